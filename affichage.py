@@ -0,0 +1,69 @@
+import heapq
+import sys
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, Tuple
+
+
+# ===============================================================
+# AFFICHAGE DES LISTES (pages, tri, écriture groupée)
+# ---------------------------------------------------------------
+# Rôle : Afficher de longues listes sans un print() par ligne.
+# - Les filtres sont appliqués par l'appelant sur les entités (souvent
+#   via l'index), avant toute mise en forme : seule la page demandée est
+#   convertie en texte.
+# - Sans tri, la page est lue au fil de l'itérateur (on s'arrête après
+#   la page) ; avec tri, seules les `debut + par_page` premières entités
+#   sont gardées (tas), sans trier toute la liste.
+# - Le texte est écrit par blocs de plusieurs centaines de lignes.
+# ===============================================================
+PAR_PAGE = 20
+TAILLE_BLOC = 500
+
+
+def extraire_page(elements: Iterable, page: int = 1, par_page: Optional[int] = PAR_PAGE,
+                  cle: Optional[Callable] = None, decroissant: bool = False) -> Tuple[List, bool]:
+    """(entités de la page, True s'il reste des entités après). par_page=None : tout."""
+    if page < 1:
+        raise ValueError("Les pages commencent à 1.")
+    if par_page is None:
+        if cle is not None:
+            return sorted(elements, key=cle, reverse=decroissant), False
+        return list(elements), False
+    debut = (page - 1) * par_page
+    # une entité de plus que la page : savoir s'il existe une suite sans tout compter
+    fin = debut + par_page + 1
+    if cle is None:
+        selection = list(islice(elements, debut, fin))
+    else:
+        selection = (heapq.nlargest if decroissant else heapq.nsmallest)(fin, elements, key=cle)[debut:]
+    return selection[:par_page], len(selection) > par_page
+
+
+def ecrire_lignes(lignes: Iterable[str], sortie=None):
+    """Écrit les lignes par blocs (un seul write par bloc)."""
+    sortie = sortie or sys.stdout
+    lignes = iter(lignes)
+    while True:
+        bloc = list(islice(lignes, TAILLE_BLOC))
+        if not bloc:
+            break
+        sortie.write("\n".join(bloc) + "\n")
+
+
+def afficher_page(titre: str, elements: Iterable, formater: Callable[[int, object], str], page: int = 1,
+                  par_page: Optional[int] = PAR_PAGE, cle: Optional[Callable] = None, decroissant: bool = False,
+                  total: Optional[int] = None, sortie=None) -> bool:
+    """Affiche une page ; formater(numero, entite) -> texte. Renvoie True s'il y a une page suivante."""
+    selection, suite = extraire_page(elements, page, par_page, cle, decroissant)
+    premier = (page - 1) * par_page if par_page else 0
+    lignes = [f"\n===== {titre} ====="]
+    lignes.extend(formater(premier + i + 1, e) for i, e in enumerate(selection))
+    if not selection:
+        lignes.append("Aucun résultat.")
+    if par_page is not None:
+        sur = f" / {-(-total // par_page)}" if total is not None else ""
+        lignes.append(f"--- page {page}{sur} : {premier + 1 if selection else 0}-{premier + len(selection)}"
+                      + (f" sur {total}" if total is not None else "") + (" (suite disponible)" if suite else "") + " ---")
+    lignes.append("=" * (len(titre) + 12) + "\n")
+    ecrire_lignes(lignes, sortie)
+    return suite
@@ -0,0 +1,210 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from calendrier import lire_date, periode
+from classes import ContratLocation
+from instrumentation import compter, mesurer
+
+TYPES = ('Voiture', 'Moto')
+
+
+class DemandeLocation:
+    """Une ligne de commande : `nombre` véhicules d'un type, pour une période, avec contraintes.
+
+    nombre_portes (voitures) : valeur exacte ; cylindree_min (motos) : minimum ;
+    prix_max : budget par jour et par véhicule, tarif réel (réduction ou surtaxe comprise).
+    """
+    __slots__ = ('type_vehicule', 'nombre', 'nb_jours', 'date_debut', 'nombre_portes', 'cylindree_min', 'prix_max')
+
+    def __init__(self, type_vehicule: str, nombre: int, nb_jours: int, date_debut: Optional[date] = None,
+                 nombre_portes: Optional[int] = None, cylindree_min: Optional[int] = None,
+                 prix_max: Optional[float] = None):
+        type_vehicule = str(type_vehicule).strip().capitalize()
+        if type_vehicule not in TYPES:
+            raise ValueError(f"Type de véhicule inconnu : {type_vehicule!r} (Voiture ou Moto)")
+        if nombre < 1 or nb_jours < 1:
+            raise ValueError("Le nombre de véhicules et la durée doivent être d'au moins 1.")
+        self.type_vehicule = type_vehicule
+        self.nombre = nombre
+        self.nb_jours = nb_jours
+        self.date_debut = date_debut
+        self.nombre_portes = nombre_portes
+        self.cylindree_min = cylindree_min
+        self.prix_max = prix_max
+
+    def __str__(self):
+        texte = f"{self.nombre} {self.type_vehicule}(s)"
+        if self.nombre_portes is not None:
+            texte += f" {self.nombre_portes} portes"
+        if self.cylindree_min is not None:
+            texte += f" {self.cylindree_min}cc et plus"
+        debut, fin = self.periode()
+        texte += f", {self.nb_jours} jours du {debut} au {fin}"
+        if self.prix_max is not None:
+            texte += f", {self.prix_max:g} fcfa/jour maximum"
+        return texte
+
+    def periode(self) -> Tuple[date, date]:
+        return periode(self.date_debut, self.nb_jours)
+
+    def accepte(self, type_vehicule: str, specifique: int) -> bool:
+        """Un seau (type, portes ou cylindrée) convient-il ?"""
+        if type_vehicule != self.type_vehicule:
+            return False
+        if type_vehicule == 'Voiture':
+            return self.nombre_portes is None or specifique == self.nombre_portes
+        return self.cylindree_min is None or specifique >= self.cylindree_min
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'type': self.type_vehicule, 'nombre': self.nombre, 'nb_jours': self.nb_jours,
+                'date_debut': self.date_debut.isoformat() if self.date_debut else None,
+                'nombre_portes': self.nombre_portes, 'cylindree_min': self.cylindree_min, 'prix_max': self.prix_max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        def entier(cle):
+            return int(data[cle]) if data.get(cle) is not None else None
+        return cls(data.get('type', ''), int(data.get('nombre', 1)), int(data.get('nb_jours', 1)),
+                   lire_date(data.get('date_debut')), entier('nombre_portes'), entier('cylindree_min'),
+                   float(data['prix_max']) if data.get('prix_max') is not None else None)
+
+    @classmethod
+    def depuis_texte(cls, ligne: str):
+        """« voiture 40 10 [AAAA-MM-JJ] [portes=5] [cc=600] [max=25000] » (saisie du menu)."""
+        morceaux = ligne.split()
+        if len(morceaux) < 3:
+            raise ValueError("Format : type nombre jours [AAAA-MM-JJ] [portes=N] [cc=N] [max=PRIX]")
+        data = {'type': morceaux[0], 'nombre': morceaux[1], 'nb_jours': morceaux[2]}
+        noms = {'portes': 'nombre_portes', 'cc': 'cylindree_min', 'max': 'prix_max'}
+        for morceau in morceaux[3:]:
+            cle, _, valeur = morceau.partition("=")
+            if not valeur:
+                data['date_debut'] = cle
+            elif cle in noms:
+                data[noms[cle]] = valeur
+            else:
+                raise ValueError(f"Option inconnue : {cle} (portes, cc ou max)")
+        return cls.from_dict(data)
+
+
+class Affectation:
+    """Résultat d'une demande : contrats créés (dans l'ordre des prix) et véhicules manquants."""
+    __slots__ = ('demande', 'contrats')
+
+    def __init__(self, demande: DemandeLocation):
+        self.demande = demande
+        self.contrats: List[ContratLocation] = []
+
+    def manquants(self) -> int:
+        return self.demande.nombre - len(self.contrats)
+
+    def est_complete(self) -> bool:
+        return self.manquants() == 0
+
+
+# ===============================================================
+# ALLOCATION EN LOT (commandes d'un client entreprise)
+# ---------------------------------------------------------------
+# Rôle : Répartir d'un coup de nombreuses demandes (« 40 voitures 5
+#        portes pour 10 jours, 25 000 fcfa/jour maximum ») sur la flotte,
+#        au lieu d'une location à la fois par le menu.
+# - La flotte est d'abord rangée en seaux (type, nombre de portes ou
+#   cylindrée), chacun trié par prix journalier : une demande ne
+#   parcourt que les seaux qui lui conviennent et prend, à chaque pas,
+#   la tête de seau au tarif réel le plus bas. Les colonnes d'un store
+#   compact sont lues sans créer de vues.
+# - Glouton : les demandes au budget le plus serré passent en premier et
+#   prennent les véhicules les moins chers ; les budgets plus larges se
+#   servent ensuite. Dans un seau, le tarif suit le prix (même règle de
+#   réduction ou de surtaxe) : au premier véhicule hors budget, le reste
+#   du seau l'est aussi.
+# - Un curseur par (seau, période) saute les véhicules déjà pris ou
+#   occupés sur cette période : pour des demandes de même période, chaque
+#   véhicule n'est examiné qu'une fois.
+# - Réservations atomiques, comme louer() ; avec tout_ou_rien, une
+#   demande incomplète annule toutes les réservations du lot.
+# - Les seaux sont faits à la création : un allocateur par lot.
+# ===============================================================
+class AllocateurFlotte:
+    def __init__(self, vehicules):
+        self.__vehicules = vehicules
+        # (type, portes ou cylindrée) -> [(prix, position dans vehicules)], trié
+        self.__seaux: Dict[Tuple[str, int], List[Tuple[float, int]]] = {}
+        with mesurer("allocation.seaux"):
+            if hasattr(vehicules, 'colonnes_tarif'):
+                prix, types, specifiques = vehicules.colonnes_tarif()
+                for i, (p, t, s) in enumerate(zip(prix, types, specifiques)):
+                    self.__seaux.setdefault((TYPES[t], s), []).append((p, i))
+            else:
+                for i, v in enumerate(vehicules):
+                    type_v = v.get_type()
+                    specifique = v.get_nombre_portes() if type_v == 'Voiture' else v.get_cylindree()
+                    self.__seaux.setdefault((type_v, specifique), []).append((v.get_prix_journalier() or 0.0, i))
+            for seau in self.__seaux.values():
+                seau.sort()
+
+    def seaux(self) -> Dict[Tuple[str, int], int]:
+        """Nombre de véhicules par seau (type, portes ou cylindrée)."""
+        return {cle: len(seau) for cle, seau in self.__seaux.items()}
+
+    def allouer(self, client, demandes: List[DemandeLocation], tout_ou_rien: bool = False) -> List[Affectation]:
+        """Une affectation par demande (même ordre) ; les contrats ne sont ni intégrés ni sauvegardés."""
+        affectations = [Affectation(d) for d in demandes]
+        # budgets serrés d'abord, puis demandes avec le moins de seaux possibles
+        ordre = sorted(affectations, key=lambda a: (a.demande.prix_max is None, a.demande.prix_max or 0,
+                                                    sum(1 for cle in self.__seaux if a.demande.accepte(*cle))))
+        curseurs: Dict[Tuple[Tuple[str, int], date, date], int] = {}
+        with mesurer("allocation.lot"):
+            try:
+                for affectation in ordre:
+                    self.__servir(client, affectation, curseurs)
+                    if tout_ou_rien and not affectation.est_complete():
+                        break
+            except BaseException:
+                self.__annuler(affectations)
+                raise
+            if tout_ou_rien and not all(a.est_complete() for a in affectations):
+                self.__annuler(affectations)
+        compter("allocation.contrats", sum(len(a.contrats) for a in affectations))
+        return affectations
+
+    def __servir(self, client, affectation: Affectation, curseurs):
+        demande = affectation.demande
+        debut, fin = demande.periode()
+        budget = demande.prix_max * demande.nb_jours if demande.prix_max is not None else None
+        seaux = [cle for cle in self.__seaux if demande.accepte(*cle)]
+        # tête de chaque seau : (position, véhicule, tarif réel) ; la surtaxe des grosses
+        # cylindrées fait que le prix journalier seul ne suffit pas à comparer deux seaux
+        tetes: Dict[Tuple[str, int], Tuple[int, Any, float]] = {}
+        while seaux and not affectation.est_complete():
+            meilleur = None
+            for cle in list(seaux):
+                i = curseurs.get((cle, debut, fin), 0)
+                if i >= len(self.__seaux[cle]):
+                    seaux.remove(cle)  # seau épuisé pour cette période
+                    continue
+                if cle not in tetes or tetes[cle][0] != i:
+                    vehicule = self.__vehicules[self.__seaux[cle][i][1]]
+                    tetes[cle] = (i, vehicule, vehicule.calculer_tarif_location(demande.nb_jours))
+                if meilleur is None or tetes[cle][2] < tetes[meilleur][2]:
+                    meilleur = cle
+            if meilleur is None:
+                break
+            i, vehicule, tarif = tetes[meilleur]
+            if budget is not None and tarif > budget:
+                seaux.remove(meilleur)  # la suite du seau est plus chère
+                continue
+            curseurs[(meilleur, debut, fin)] = i + 1
+            if not vehicule.est_libre(debut, fin):
+                continue
+            try:
+                affectation.contrats.append(ContratLocation(client, vehicule, demande.nb_jours, debut))
+            except ValueError:
+                continue  # réservé entre-temps par un autre thread
+
+    @staticmethod
+    def __annuler(affectations: List[Affectation]):
+        for affectation in affectations:
+            for contrat in affectation.contrats:
+                contrat.get_vehicule().liberer(contrat.get_date_debut(), contrat.get_date_fin())
+            affectation.contrats = []
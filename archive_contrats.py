@@ -0,0 +1,260 @@
+import gzip
+import json
+import os
+import threading
+import zlib
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from calendrier import jours_par_mois, lire_date, periode
+from instrumentation import compter, compter_octets, est_actif, mesurer
+
+
+# ===============================================================
+# ARCHIVE DES CONTRATS CLOS (stockage « froid »)
+# ---------------------------------------------------------------
+# Rôle : Sortir l'historique de l'état chargé au démarrage. Les
+#        contrats clos (véhicule rendu) quittent la liste des contrats
+#        actifs et le snapshot ; ils sont ajoutés ici.
+# - Fichier JSON Lines compressé (gzip), en ajout seul : chaque ajout
+#   écrit un membre gzip complet à la fin du fichier (un lot de
+#   contrats clos = un membre) ; rien n'est jamais réécrit.
+# - Lecture à la demande, au fil de l'eau : rechercher() par client,
+#   véhicule ou période de retour, sans charger toute l'archive.
+# - Un arrêt brutal pendant un ajout laisse au plus un membre tronqué
+#   à la fin : il est ignoré à la lecture (avec un avertissement).
+# - compacter() regroupe les petits membres en un seul (meilleure
+#   compression) ; fichier temporaire puis renommage.
+# - cumuls() : montants et jours des contrats archivés pour les
+#   rapports, sans relire tout l'historique. Ils sont enregistrés à
+#   côté (archive.cumuls.json) avec la taille d'archive qu'ils couvrent ;
+#   seuls les membres ajoutés depuis sont relus, puis le fichier est mis
+#   à jour.
+# - Un contrat archivé puis rétabli (état actif non enregistré) est
+#   archivé de nouveau à son vrai retour : lectures et cumuls ne gardent
+#   que le dernier enregistrement d'une même clé (client, véhicule,
+#   début). Les clés sans date (ancien format) ne sont pas regroupées.
+# ===============================================================
+Mois = Optional[Tuple[int, int]]
+
+
+def _cle(enregistrement: Dict[str, Any]) -> Tuple[Any, Any, Optional[str]]:
+    # même clé que ContratLocation.cle_dict (classes.py importe ce module)
+    return enregistrement.get('client_id'), enregistrement.get('vehicule_id'), enregistrement.get('date_debut')
+
+
+class CumulsArchive:
+    """Cumuls [nb, montant, jours] des contrats archivés, par identifiants.
+
+    Par véhicule et mois de début, par client, et jours loués par véhicule
+    et mois : les rapports les regroupent ensuite par type, marque...
+    avec les véhicules et clients actuels.
+    """
+    __slots__ = ('taille', 'par_vehicule_mois', 'par_client', 'jours_loues')
+
+    def __init__(self):
+        self.taille = 0  # octets de l'archive déjà cumulés
+        self.par_vehicule_mois: Dict[Tuple[int, Mois], List[float]] = {}
+        self.par_client: Dict[int, List[float]] = {}
+        self.jours_loues: Dict[Tuple[int, Tuple[int, int]], int] = {}
+
+    def ajouter(self, enregistrement: Dict[str, Any]):
+        montant = enregistrement.get('montant_total') or 0.0
+        jours = enregistrement.get('nb_jours', 1)
+        debut = lire_date(enregistrement.get('date_debut'))
+        vehicule_id = enregistrement.get('vehicule_id')
+        for cumuls, cle in ((self.par_vehicule_mois, (vehicule_id, (debut.year, debut.month) if debut else None)),
+                            (self.par_client, enregistrement.get('client_id'))):
+            cumul = cumuls.setdefault(cle, [0, 0.0, 0])
+            cumul[0] += 1
+            cumul[1] += montant
+            cumul[2] += jours
+        if debut is not None:
+            for mois, n in jours_par_mois(*periode(debut, jours)):
+                self.jours_loues[(vehicule_id, mois)] = self.jours_loues.get((vehicule_id, mois), 0) + n
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'taille': self.taille,
+                'vehicules': [[v, *(m or (None, None)), *c] for (v, m), c in self.par_vehicule_mois.items()],
+                'clients': [[cl, *c] for cl, c in self.par_client.items()],
+                'jours_loues': [[v, *m, n] for (v, m), n in self.jours_loues.items()]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CumulsArchive':
+        cumuls = cls()
+        cumuls.taille = data['taille']
+        for v, annee, mois, *c in data['vehicules']:
+            cumuls.par_vehicule_mois[(v, (annee, mois) if annee is not None else None)] = c
+        for cl, *c in data['clients']:
+            cumuls.par_client[cl] = c
+        for v, annee, mois, n in data['jours_loues']:
+            cumuls.jours_loues[(v, (annee, mois))] = n
+        return cumuls
+
+
+class ArchiveContrats:
+    def __init__(self, chemin: str):
+        self.__chemin = chemin
+        base = chemin[:-len(".jsonl.gz")] if chemin.endswith(".jsonl.gz") else chemin
+        self.__chemin_cumuls = base + ".cumuls.json"
+        self.__verrou = threading.Lock()
+
+    def get_chemin(self):
+        return self.__chemin
+
+    def taille(self) -> int:
+        """Taille compressée sur disque (octets)."""
+        try:
+            return os.path.getsize(self.__chemin)
+        except FileNotFoundError:
+            return 0
+
+    # --- Écriture ---
+    def ajouter(self, enregistrements: Iterable[Dict[str, Any]]) -> int:
+        """Ajoute des contrats clos (dicts) en un membre gzip ; renvoie le nombre ajouté."""
+        lignes = [json.dumps(e, ensure_ascii=False) + "\n" for e in enregistrements]
+        if not lignes:
+            return 0
+        membre = gzip.compress("".join(lignes).encode('utf-8'))
+        with mesurer("archive.ajout"), self.__verrou, open(self.__chemin, "ab") as f:
+            f.write(membre)
+            f.flush()
+            os.fsync(f.fileno())
+        compter("contrats_archives", len(lignes))
+        if est_actif():
+            compter_octets("ecrits", "archive", len(membre))
+        return len(lignes)
+
+    def compacter(self):
+        """Réécrit l'archive en un seul membre gzip (même contenu)."""
+        with mesurer("archive.compaction"), self.__verrou:
+            temporaire = self.__chemin + ".tmp"
+            with gzip.open(temporaire, "wt", encoding='utf-8') as f:
+                for e in self.parcourir():  # enregistrements remplacés abandonnés
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            os.replace(temporaire, self.__chemin)
+            # positions en octets changées : les cumuls seront refaits au prochain besoin
+            try:
+                os.remove(self.__chemin_cumuls)
+            except FileNotFoundError:
+                pass
+
+    def cumuls(self, ignorer: Optional[Callable[[Dict[str, Any]], bool]] = None,
+               provisoire: Optional[Callable[[Dict[str, Any]], bool]] = None) -> CumulsArchive:
+        """Cumuls de tous les contrats archivés ; seuls les membres ajoutés depuis le dernier appel sont lus.
+
+        ignorer(enregistrement) : contrat lu mais non cumulé (par exemple encore actif
+        après un arrêt entre l'archivage et l'écriture de l'état actif).
+        provisoire(enregistrement) : contrat cumulé dont la clôture n'est pas encore
+        enregistrée ; les cumuls ne sont alors pas enregistrés et la suite sera relue.
+        """
+        with mesurer("archive.cumuls"), self.__verrou:
+            cumuls = CumulsArchive()
+            taille = self.taille()
+            try:
+                with open(self.__chemin_cumuls, encoding='utf-8') as f:
+                    enregistres = CumulsArchive.from_dict(json.load(f))
+                if enregistres.taille <= taille:
+                    cumuls = enregistres  # sinon archive remplacée : tout est relu
+            except (FileNotFoundError, ValueError, KeyError, TypeError):
+                pass
+            if cumuls.taille == taille:
+                return cumuls
+            nb = 0
+            enregistrer = True
+            try:
+                for enregistrement in self.__sans_doublons(lambda avertir: self.__lire_depuis(cumuls.taille)):
+                    if ignorer is None or not ignorer(enregistrement):
+                        cumuls.ajouter(enregistrement)
+                        nb += 1
+                        if provisoire is not None and provisoire(enregistrement):
+                            enregistrer = False
+            except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError):
+                # fin tronquée (ajout interrompu) : cumuls non enregistrés, la suite sera relue
+                print(f"⚠️ Fin de l'archive {self.__chemin} illisible (ajout interrompu) : ignorée")
+                return cumuls
+            compter("archive.contrats_cumules", nb)
+            if est_actif():
+                compter_octets("lus", "archive", taille - cumuls.taille)
+            if not enregistrer:
+                return cumuls
+            cumuls.taille = taille
+            temporaire = self.__chemin_cumuls + ".tmp"
+            with open(temporaire, "w", encoding='utf-8') as f:
+                json.dump(cumuls.to_dict(), f)
+            os.replace(temporaire, self.__chemin_cumuls)
+            return cumuls
+
+    # --- Lecture à la demande ---
+    def __lire_depuis(self, position: int) -> Iterator[Dict[str, Any]]:
+        # lève EOFError, zlib.error... sur une fin tronquée
+        try:
+            brut = open(self.__chemin, "rb")
+        except FileNotFoundError:
+            return
+        with brut:
+            brut.seek(position)
+            with gzip.GzipFile(fileobj=brut) as f:
+                for ligne in f:
+                    yield json.loads(ligne)
+
+    def __lire(self, avertir: bool = True) -> Iterator[Dict[str, Any]]:
+        try:
+            yield from self.__lire_depuis(0)
+        except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError):
+            # ajout interrompu par un arrêt brutal : la fin du fichier est ignorée
+            if avertir:
+                print(f"⚠️ Fin de l'archive {self.__chemin} illisible (ajout interrompu) : ignorée")
+        if est_actif():
+            compter_octets("lus", "archive", self.taille())
+
+    @staticmethod
+    def __sans_doublons(lire: Callable[[bool], Iterator[Dict[str, Any]]],
+                        garder: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Iterator[Dict[str, Any]]:
+        """Enregistrements retenus par garder, sauf ceux qu'un enregistrement suivant de même clé remplace.
+
+        Deux lectures : la première compte les clés, la seconde ne rend que la dernière de chacune.
+        """
+        restants: Dict[Tuple[Any, Any, Optional[str]], int] = {}
+        for e in lire(False):
+            cle = _cle(e)
+            if cle[2] is not None and (garder is None or garder(e)):
+                restants[cle] = restants.get(cle, 0) + 1
+        for e in lire(True):
+            if garder is not None and not garder(e):
+                continue
+            cle = _cle(e)
+            if cle[2] is not None:
+                restants[cle] = restants.get(cle, 0) - 1
+                if restants[cle] > 0:
+                    continue  # remplacé plus loin
+            yield e
+
+    def parcourir(self) -> Iterator[Dict[str, Any]]:
+        """Tous les contrats archivés, dans l'ordre de clôture."""
+        return self.__sans_doublons(self.__lire)
+
+    def rechercher(self, client_id: Optional[int] = None, vehicule_id: Optional[int] = None,
+                   retour_du: Optional[date] = None, retour_au: Optional[date] = None,
+                   filtre: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                   limite: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Contrats archivés d'un client et/ou d'un véhicule, rendus entre deux dates (incluses)."""
+        du = retour_du.isoformat() if retour_du else None
+        au = retour_au.isoformat() if retour_au else None
+        resultats = []
+        def garder(e):
+            # sur la clé seulement : le retour et le filtre portent sur le dernier enregistrement
+            return (client_id is None or e.get('client_id') == client_id) \
+                and (vehicule_id is None or e.get('vehicule_id') == vehicule_id)
+        with mesurer("archive.recherche"):
+            for e in self.__sans_doublons(self.__lire, garder):
+                # dates ISO : l'ordre du texte est celui des dates
+                retour = e.get('date_retour') or ''
+                if (du is not None and retour < du) or (au is not None and retour > au):
+                    continue
+                if filtre is not None and not filtre(e):
+                    continue
+                resultats.append(e)
+                if limite is not None and len(resultats) >= limite:
+                    break
+        return resultats
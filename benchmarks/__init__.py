@@ -0,0 +1,9 @@
+# ===============================================================
+# BENCHMARKS DU SYSTÈME DE LOCATION
+# ---------------------------------------------------------------
+# - generateur.py : jeux de données synthétiques reproductibles (graine).
+# - suite.py : suite complète avec résultats JSON comparables entre
+#   commits (python -m benchmarks.suite ou python -m benchmarks).
+# - Scripts ciblés : bench_memoire.py, bench_demarrage.py,
+#   bench_reservations.py, charge_service.py.
+# ===============================================================
@@ -0,0 +1,88 @@
+# ===============================================================
+# BENCHMARK DÉMARRAGE : snapshot JSON vs snapshot binaire
+# ---------------------------------------------------------------
+# Génère N véhicules, N clients et leurs contrats, les sauvegarde dans les
+# deux formats, puis mesure pour chaque mode de chargement :
+# - le temps de GestionnaireDonnees.charger() ;
+# - le temps jusqu'au système prêt (SystemeLocation, index construit) ;
+# - le temps du premier accès aux contrats (différés selon le mode).
+# Usage : python benchmarks/bench_demarrage.py [-n 100000] [--json]
+# ===============================================================
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.generateur import generer  # noqa: E402
+from classes import GestionnaireDonnees  # noqa: E402
+from main import SystemeLocation  # noqa: E402
+
+MODES = (
+    ("json", dict(format_="json")),
+    ("json paresseux", dict(format_="json", paresseux=True)),
+    ("json compact", dict(format_="json", paresseux=True, compact=True)),
+    ("binaire", dict(format_="binaire")),
+    ("binaire compact", dict(format_="binaire", compact=True)),
+)
+
+
+def mesurer(chemin, options):
+    gc.collect()
+    debut = time.perf_counter()
+    gestionnaire = GestionnaireDonnees(chemin, **options)
+    data = gestionnaire.charger()
+    charge = time.perf_counter() - debut
+    # SystemeLocation recharge lui-même : on mesure le démarrage complet à part
+    del data
+    gc.collect()
+    debut = time.perf_counter()
+    systeme = SystemeLocation(GestionnaireDonnees(chemin, **options))
+    pret = time.perf_counter() - debut
+    debut = time.perf_counter()
+    nb_contrats = len(systeme.get_contrat())
+    contrats = time.perf_counter() - debut
+    return {"charger_s": round(charge, 3), "pret_s": round(pret, 3),
+            "premier_acces_contrats_s": round(contrats, 3), "contrats": nb_contrats}
+
+
+def main(argv=None):
+    parseur = argparse.ArgumentParser(description="Temps de démarrage selon le format du snapshot")
+    parseur.add_argument("-n", type=int, default=100000, help="nombre de véhicules (et de clients)")
+    parseur.add_argument("--json", action="store_true", help="résultat au format JSON uniquement")
+    args = parseur.parse_args(argv)
+
+    dossier = tempfile.mkdtemp(prefix="bench_demarrage_")
+    chemins = {"json": os.path.join(dossier, "donnees.json"), "binaire": os.path.join(dossier, "donnees.bin")}
+    vehicules, clients, contrats = generer(args.n)
+    nb_contrats = len(contrats)
+    tailles = {}
+    for format_, chemin in chemins.items():
+        GestionnaireDonnees(chemin, format_=format_).sauvegarder(vehicules, clients, contrats)
+        tailles[format_] = os.path.getsize(chemin)
+    del vehicules, clients, contrats
+
+    # les messages de chargement sont masqués pendant les mesures
+    sortie, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        resultats = {nom: mesurer(chemins[options["format_"]], options) for nom, options in MODES}
+    finally:
+        sys.stdout.close()
+        sys.stdout = sortie
+    resultat = {"n": args.n, "contrats": nb_contrats, "taille_octets": tailles, "modes": resultats}
+    if args.json:
+        print(json.dumps(resultat))
+        return
+    print(f"N = {args.n} véhicules / clients, {nb_contrats} contrats")
+    print(f"taille : JSON {tailles['json'] / 1e6:.1f} Mo, binaire {tailles['binaire'] / 1e6:.1f} Mo")
+    print(f"{'mode':<18} {'charger':>9} {'prêt':>9} {'contrats':>10}")
+    for nom, r in resultats.items():
+        print(f"{nom:<18} {r['charger_s']:>8.3f}s {r['pret_s']:>8.3f}s {r['premier_acces_contrats_s']:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# ===============================================================
+# BENCHMARK MÉMOIRE : représentation des véhicules et clients
+# ---------------------------------------------------------------
+# Compare, pour N entités décodées depuis du JSON (comme au chargement) :
+# - les classes historiques (attributs dans un __dict__ par instance) ;
+# - les classes avec __slots__, sans puis avec internement des chaînes ;
+# - les stores en colonnes (VehiculeStore / ClientStore).
+# Usage : python benchmarks/bench_memoire.py [-n 100000] [--json]
+# ===============================================================
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from classes import Vehicule, Voiture, Moto, Client  # noqa: E402
+from stockage_compact import VehiculeStore, ClientStore  # noqa: E402
+from benchmarks.generateur import generer_json  # noqa: E402
+
+
+class _VehiculeHistorique:
+    """Réplique de la disposition mémoire d'avant __slots__ (même attributs, __dict__ par instance)."""
+    def __init__(self, d):
+        self.__identifiant = d['id']
+        self.__marque = d['marque']
+        self.__modele = d['modele']
+        self.__annee = d['annee']
+        self.__prix_journalier = d['prix_journalier']
+        self.__disponible = d['disponible']
+        self.__immatriculation = d['immatriculation']
+        self.__observateur = None
+        self.__specifique = d.get('nombre_portes', d.get('cylindree'))
+
+
+class _ClientHistorique:
+    def __init__(self, d):
+        self.__identifiant = d['id']
+        self.__nom = d['nom']
+        self.__prenom = d['prenom']
+        self.__telephone = d['telephone']
+        self.__observateur = None
+
+
+def mesurer(construire, texte_json):
+    gc.collect()
+    tracemalloc.start()
+    avant = tracemalloc.get_traced_memory()[0]
+    donnees = json.loads(texte_json)
+    resultat = construire(donnees)
+    del donnees  # seules restent comptées les chaînes encore référencées par les objets
+    gc.collect()
+    apres = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del resultat
+    return apres - avant
+
+
+def _vehicule_slots_sans_internement(d):
+    cls = Moto if d['type'] == 'Moto' else Voiture
+    specifique = d.get('cylindree', d.get('nombre_portes'))
+    v = cls(d['marque'], d['modele'], d['annee'], d['prix_journalier'], specifique,
+            immatriculation=d['immatriculation'], identifiant=d['id'])
+    v.set_disponibilite(d['disponible'])
+    return v
+
+
+def _remplir(store, donnees):
+    for d in donnees:
+        store.ajouter_dict(d)
+    return store
+
+
+SCENARIOS = {
+    'vehicules': [
+        ('historique (__dict__)', lambda ds: [_VehiculeHistorique(d) for d in ds]),
+        ('__slots__', lambda ds: [_vehicule_slots_sans_internement(d) for d in ds]),
+        ('__slots__ + internement', lambda ds: [Vehicule.from_dict(d) for d in ds]),
+        ('VehiculeStore (colonnes)', lambda ds: _remplir(VehiculeStore(), ds)),
+    ],
+    'clients': [
+        ('historique (__dict__)', lambda ds: [_ClientHistorique(d) for d in ds]),
+        ('__slots__', lambda ds: [Client(d['nom'], d['prenom'], d['telephone'], identifiant=d['id']) for d in ds]),
+        ('__slots__ + internement', lambda ds: [Client.from_dict(d) for d in ds]),
+        ('ClientStore (colonnes)', lambda ds: _remplir(ClientStore(), ds)),
+    ],
+}
+
+
+def main(argv=None):
+    parseur = argparse.ArgumentParser(description=__doc__)
+    parseur.add_argument("-n", type=int, default=100_000, help="nombre de véhicules et de clients")
+    parseur.add_argument("--json", action="store_true", help="résultats au format JSON")
+    args = parseur.parse_args(argv)
+
+    textes = dict(zip(('vehicules', 'clients'), generer_json(args.n)))
+    resultats = {}
+    for collection, scenarios in SCENARIOS.items():
+        resultats[collection] = {nom: mesurer(construire, textes[collection]) for nom, construire in scenarios}
+
+    if args.json:
+        print(json.dumps({'n': args.n, 'octets': resultats}, indent=2, ensure_ascii=False))
+        return
+    for collection, mesures in resultats.items():
+        reference = next(iter(mesures.values()))
+        print(f"\n{collection} (n = {args.n})")
+        for nom, octets in mesures.items():
+            print(f"  {nom:<28} {octets / 1e6:8.1f} Mo  {octets / args.n:7.0f} o/entité  "
+                  f"{100 * octets / reference:5.0f} %")
+
+
+if __name__ == "__main__":
+    main()
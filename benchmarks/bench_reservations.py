@@ -0,0 +1,98 @@
+# ===============================================================
+# BENCHMARK RÉSERVATIONS CONCURRENTES
+# ---------------------------------------------------------------
+# N threads tentent de louer au hasard les véhicules d'une même flotte
+# (plus de tentatives que de véhicules). Vérifie qu'aucun véhicule n'a
+# plus d'un contrat, puis mesure le débit selon le nombre de threads.
+# Usage : python benchmarks/bench_reservations.py [-n 20000] [--threads 1 2 4 8] [--json]
+# ===============================================================
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.generateur import generer  # noqa: E402
+from classes import GestionnaireDonnees  # noqa: E402
+from main import SystemeLocation  # noqa: E402
+
+
+def preparer(nb_vehicules, dossier):
+    chemin = os.path.join(dossier, f"reservations_{nb_vehicules}.json")
+    vehicules, clients, _ = generer(nb_vehicules, part_louee=0)
+    GestionnaireDonnees(chemin).sauvegarder(vehicules, clients[:100], [])
+    return chemin
+
+
+def executer(chemin, nb_threads, tentatives_par_thread):
+    # journal sans fsync : on mesure la réservation et l'indexation, pas le disque
+    if os.path.exists(chemin + ".journal"):
+        os.remove(chemin + ".journal")
+    systeme = SystemeLocation(GestionnaireDonnees(chemin, journalise=True, seuil_compaction=10 ** 9))
+    vehicules = list(systeme.get_vehicule())
+    clients = list(systeme.get_client())
+    reussites, echecs = Counter(), Counter()
+    depart = threading.Barrier(nb_threads + 1)
+
+    def travailleur(graine):
+        rnd = random.Random(graine)
+        depart.wait()
+        for _ in range(tentatives_par_thread):
+            try:
+                systeme.louer(rnd.choice(clients), rnd.choice(vehicules), rnd.randint(1, 14))
+                reussites[graine] += 1
+            except ValueError:
+                echecs[graine] += 1
+
+    threads = [threading.Thread(target=travailleur, args=(i,)) for i in range(nb_threads)]
+    for t in threads:
+        t.start()
+    depart.wait()
+    debut = time.perf_counter()
+    for t in threads:
+        t.join()
+    ecoule = time.perf_counter() - debut
+
+    par_vehicule = Counter(c.get_vehicule().get_identifiant() for c in systeme.get_contrat())
+    doubles = sum(1 for n in par_vehicule.values() if n > 1)
+    return {
+        "threads": nb_threads,
+        "tentatives": nb_threads * tentatives_par_thread,
+        "contrats": len(systeme.get_contrat()),
+        "refus": sum(echecs.values()),
+        "doubles_reservations": doubles,
+        "coherent": doubles == 0 and len(systeme.get_contrat()) == sum(reussites.values()),
+        "tentatives_par_s": round(nb_threads * tentatives_par_thread / ecoule),
+    }
+
+
+def main(argv=None):
+    parseur = argparse.ArgumentParser(description="Réservations concurrentes sur une même flotte")
+    parseur.add_argument("-n", type=int, default=20000, help="nombre de véhicules")
+    parseur.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parseur.add_argument("--json", action="store_true", help="résultat au format JSON uniquement")
+    args = parseur.parse_args(argv)
+
+    dossier = tempfile.mkdtemp(prefix="bench_reservations_")
+    chemin = preparer(args.n, dossier)
+    resultats = []
+    for nb in args.threads:
+        # deux fois plus de tentatives que de véhicules, réparties entre les threads
+        resultats.append(executer(chemin, nb, 2 * args.n // nb))
+    if args.json:
+        print(json.dumps(resultats))
+        return
+    print(f"{'threads':>8} {'contrats':>9} {'refus':>8} {'doubles':>8} {'tent./s':>10}")
+    for r in resultats:
+        print(f"{r['threads']:>8} {r['contrats']:>9} {r['refus']:>8} {r['doubles_reservations']:>8} "
+              f"{r['tentatives_par_s']:>10}{'' if r['coherent'] else '   ⚠️ incohérent'}")
+
+
+if __name__ == "__main__":
+    main()
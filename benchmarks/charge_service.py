@@ -0,0 +1,150 @@
+# ===============================================================
+# TEST DE CHARGE DU SERVICE HTTP (service.py)
+# ---------------------------------------------------------------
+# Ouvre plusieurs connexions persistantes et envoie en boucle un mélange
+# de requêtes (liste des disponibles, recherche véhicule / client, création
+# de contrat). Mesure le débit (requêtes/s) et les latences p50 / p99.
+#
+# Contre une instance déjà lancée :
+#   python benchmarks/charge_service.py --port 8080 --connexions 64 --duree 10
+# En démarrant une instance locale sur un jeu de données généré :
+#   python benchmarks/charge_service.py --demarrer 10000
+# ===============================================================
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RACINE)
+
+
+async def requete(lecteur, ecrivain, methode, chemin, corps=None):
+    donnees = json.dumps(corps).encode("utf-8") if corps is not None else b""
+    ecrivain.write(f"{methode} {chemin} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(donnees)}\r\n\r\n"
+                   .encode("latin-1") + donnees)
+    await ecrivain.drain()
+    statut = int((await lecteur.readline()).split(b" ", 2)[1])
+    taille = 0
+    while True:
+        ligne = await lecteur.readline()
+        if ligne in (b"\r\n", b""):
+            break
+        if ligne.lower().startswith(b"content-length:"):
+            taille = int(ligne.split(b":", 1)[1])
+    return statut, json.loads(await lecteur.readexactly(taille)) if taille else None
+
+
+async def preparer(hote, port, nb_clients):
+    lecteur, ecrivain = await asyncio.open_connection(hote, port)
+    _, vehicules = await requete(lecteur, ecrivain, "GET", "/vehicules/disponibles?limite=5000")
+    telephones = []
+    for i in range(nb_clients):
+        tel = f"+225-bench-{os.getpid()}-{i}"
+        statut, _ = await requete(lecteur, ecrivain, "POST", "/clients", {"nom": "Charge", "prenom": str(i), "telephone": tel})
+        if statut in (201, 409):
+            telephones.append(tel)
+    ecrivain.close()
+    return [v["immatriculation"] for v in vehicules if v.get("immatriculation")], telephones
+
+
+async def travailleur(hote, port, fin, immatriculations, telephones, part_reservations, latences, statuts, graine):
+    rnd = random.Random(graine)
+    lecteur, ecrivain = await asyncio.open_connection(hote, port)
+    while time.perf_counter() < fin:
+        tirage = rnd.random()
+        if tirage < part_reservations and immatriculations:
+            args = ("POST", "/contrats", {"telephone": rnd.choice(telephones),
+                                          "immatriculation": rnd.choice(immatriculations), "nb_jours": rnd.randint(1, 14)})
+        elif tirage < 0.4:
+            args = ("GET", "/vehicules/disponibles?limite=20" + rnd.choice(["", "&type=Voiture", "&type=Moto"]))
+        elif tirage < 0.7 and immatriculations:
+            args = ("GET", "/vehicules/" + quote(rnd.choice(immatriculations)))
+        else:
+            args = ("GET", "/clients/" + quote(rnd.choice(telephones)))
+        debut = time.perf_counter()
+        statut, _ = await requete(lecteur, ecrivain, *args)
+        latences.append(time.perf_counter() - debut)
+        statuts[statut] = statuts.get(statut, 0) + 1
+    ecrivain.close()
+
+
+async def charger(hote, port, connexions, duree, part_reservations, nb_clients):
+    immatriculations, telephones = await preparer(hote, port, nb_clients)
+    latences, statuts = [], {}
+    debut = time.perf_counter()
+    fin = debut + duree
+    await asyncio.gather(*(travailleur(hote, port, fin, immatriculations, telephones, part_reservations,
+                                       latences, statuts, i) for i in range(connexions)))
+    ecoule = time.perf_counter() - debut
+    latences.sort()
+
+    def centile(p):
+        return latences[min(len(latences) - 1, int(p / 100 * len(latences)))] * 1000 if latences else 0.0
+    return {
+        "connexions": connexions, "duree_s": round(ecoule, 2), "requetes": len(latences),
+        "requetes_par_s": round(len(latences) / ecoule, 1),
+        "latence_p50_ms": round(centile(50), 2), "latence_p99_ms": round(centile(99), 2),
+        "statuts": {str(k): v for k, v in sorted(statuts.items())},
+    }
+
+
+def demarrer_instance(nb_vehicules, port):
+    """Génère un jeu de données temporaire et lance service.py dessus."""
+    sys.path.insert(0, RACINE)
+    from benchmarks.generateur import ecrire_jeu
+    dossier = tempfile.mkdtemp(prefix="charge_location_")
+    chemin = os.path.join(dossier, "donnees.json")
+    ecrire_jeu(chemin, nb_vehicules)
+    processus = subprocess.Popen([sys.executable, os.path.join(RACINE, "service.py"), "--fichier", chemin,
+                                  "--journal", "--port", str(port)], stdout=subprocess.DEVNULL)
+    limite = time.time() + 60
+    while time.time() < limite:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return processus
+        except OSError:
+            time.sleep(0.1)
+    processus.terminate()
+    raise RuntimeError("le service n'a pas démarré")
+
+
+def main(argv=None):
+    parseur = argparse.ArgumentParser(description="Test de charge du service de location")
+    parseur.add_argument("--hote", default="127.0.0.1")
+    parseur.add_argument("--port", type=int, default=8080)
+    parseur.add_argument("--connexions", type=int, default=64)
+    parseur.add_argument("--duree", type=float, default=10.0, help="secondes")
+    parseur.add_argument("--reservations", type=float, default=0.05, help="part des requêtes qui créent un contrat")
+    parseur.add_argument("--clients", type=int, default=50, help="clients créés avant la mesure")
+    parseur.add_argument("--demarrer", type=int, metavar="N",
+                         help="lancer une instance locale avec N véhicules générés")
+    parseur.add_argument("--json", action="store_true", help="résultat au format JSON uniquement")
+    args = parseur.parse_args(argv)
+
+    processus = demarrer_instance(args.demarrer, args.port) if args.demarrer else None
+    try:
+        resultat = asyncio.run(charger(args.hote, args.port, args.connexions, args.duree,
+                                       args.reservations, args.clients))
+    finally:
+        if processus is not None:
+            processus.terminate()
+            processus.wait()
+    if args.json:
+        print(json.dumps(resultat))
+    else:
+        print(f"{resultat['requetes']} requêtes en {resultat['duree_s']} s avec {resultat['connexions']} connexions")
+        print(f"  débit : {resultat['requetes_par_s']} req/s")
+        print(f"  latence p50 : {resultat['latence_p50_ms']} ms   p99 : {resultat['latence_p99_ms']} ms")
+        print(f"  statuts HTTP : {resultat['statuts']}")
+
+
+if __name__ == "__main__":
+    main()
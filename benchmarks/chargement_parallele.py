@@ -0,0 +1,89 @@
+# ===============================================================
+# CHARGEMENT PARALLÈLE : ACCÉLÉRATION SELON LE NOMBRE DE PROCESSUS
+# ---------------------------------------------------------------
+# Génère (ou réutilise) un gros donnees.json, le charge en séquentiel
+# puis avec 2, 4, ... processus (jusqu'au nombre de cœurs), en mode
+# objets et en mode compact, et affiche le temps médian et le gain.
+#
+#   python benchmarks/chargement_parallele.py --echelle 1m
+#   python benchmarks/chargement_parallele.py --fichier gros.json --processus 1 2 4 8 --sortie par.json
+# Le jeu généré contient n véhicules, n clients et environ 0,9 n contrats.
+# ===============================================================
+import argparse
+import contextlib
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RACINE)
+
+from benchmarks.generateur import ecrire_jeu, lire_echelle  # noqa: E402
+from classes import GestionnaireDonnees  # noqa: E402
+
+
+def nombres_de_processus():
+    coeurs = os.cpu_count() or 1
+    nombres, n = [1], 2
+    while n <= coeurs:
+        nombres.append(n)
+        n *= 2
+    if nombres[-1] != coeurs:
+        nombres.append(coeurs)
+    return nombres
+
+
+def mesurer_chargement(chemin, processus, compact, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        gc.collect()
+        with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+            debut = time.perf_counter()
+            data = GestionnaireDonnees(chemin, compact=compact, processus=processus).charger()
+            durees.append(time.perf_counter() - debut)
+        nb = sum(len(data[k]) for k in ("vehicules", "clients", "contrats"))
+        del data
+    return statistics.median(durees), nb
+
+
+def main(argv=None):
+    parseur = argparse.ArgumentParser(description="Gain du chargement parallèle selon le nombre de processus")
+    parseur.add_argument("--echelle", default="1m", help="nombre de véhicules et de clients générés (1m, 500k...)")
+    parseur.add_argument("--fichier", help="fichier existant à charger (sinon généré dans un dossier temporaire)")
+    parseur.add_argument("--processus", type=int, nargs="+", help="nombres de processus (défaut : 1, 2, 4... cœurs)")
+    parseur.add_argument("--modes", nargs="+", choices=("objets", "compact"), default=["objets", "compact"])
+    parseur.add_argument("--repetitions", type=int, default=3)
+    parseur.add_argument("--graine", type=int, default=42)
+    parseur.add_argument("--sortie", help="écrire les résultats en JSON")
+    args = parseur.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench-parallele-") as dossier:
+        chemin = args.fichier
+        if chemin is None:
+            chemin = os.path.join(dossier, "donnees.json")
+            debut = time.perf_counter()
+            with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+                compteurs = ecrire_jeu(chemin, lire_echelle(args.echelle), args.graine)
+            print(f"Jeu généré en {time.perf_counter() - debut:.1f} s : {compteurs}")
+        print(f"{chemin} : {os.path.getsize(chemin) / 1e6:.0f} Mo, {os.cpu_count()} cœur(s)")
+        resultats = []
+        for mode in args.modes:
+            reference = None
+            for processus in args.processus or nombres_de_processus():
+                duree, nb = mesurer_chargement(chemin, processus, mode == "compact", args.repetitions)
+                reference = reference or duree
+                resultats.append({"mode": mode, "processus": processus, "mediane_s": round(duree, 3),
+                                  "enregistrements": nb, "gain": round(reference / duree, 2)})
+                print(f"  {mode:<8} {processus:>3} processus  {duree:8.2f} s  "
+                      f"{nb / duree:>12,.0f} enreg./s  x{reference / duree:.2f}")
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump({"coeurs": os.cpu_count(), "resultats": resultats}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
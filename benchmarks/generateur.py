@@ -0,0 +1,97 @@
+# ===============================================================
+# GÉNÉRATEUR DE JEUX DE DONNÉES SYNTHÉTIQUES (reproductible)
+# ---------------------------------------------------------------
+# Même graine -> mêmes véhicules, clients et contrats (à date de
+# référence égale : les périodes des contrats en dépendent).
+# - Véhicules : 70 % de voitures, 30 % de motos, marques et modèles
+#   réalistes, quelques véhicules hors service.
+# - Immatriculations et téléphones uniques (jusqu'à plusieurs millions).
+# - Contrats : une partie de la flotte a 1 à 3 réservations entre
+#   30 jours avant et 90 jours après la date de référence.
+# Échelles usuelles : 1k, 100k, 1m (voir lire_echelle).
+# ===============================================================
+import json
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from classes import Vehicule, Client, ContratLocation, ModePaiement, GestionnaireDonnees
+
+MARQUES = {'Voiture': [('Toyota', 'Corolla'), ('Peugeot', '208'), ('Renault', 'Clio'), ('Hyundai', 'Tucson'),
+                       ('Kia', 'Rio'), ('Suzuki', 'Swift')],
+           'Moto': [('Yamaha', 'MT-07'), ('Honda', 'CB500'), ('Suzuki', 'GSX-R'), ('KTM', 'Duke 390')]}
+NOMS = ['Diallo', 'Traoré', 'Koné', 'Ouattara', 'Nguessan', 'Kouassi', 'Bamba', 'Coulibaly', 'Yao', 'Touré']
+PRENOMS = ['Awa', 'Moussa', 'Fatou', 'Yao', 'Aya', 'Ibrahim', 'Mariam', 'Koffi', 'Eric', 'Adjoua']
+
+
+def lire_echelle(texte: str) -> int:
+    """'1k' -> 1000, '100k' -> 100000, '1m' -> 1000000, '2500' -> 2500."""
+    texte = texte.strip().lower()
+    multiplicateur = {'k': 1000, 'm': 1000000}.get(texte[-1:], 1)
+    return int(float(texte[:-1] if multiplicateur > 1 else texte) * multiplicateur)
+
+
+def _immatriculation(i: int, rnd: random.Random) -> str:
+    # unique pour i < 9000 * 26 * 26 (numéro, deux lettres), département aléatoire
+    return f"{i % 9000 + 1000} {chr(65 + i // 9000 % 26)}{chr(65 + i // 234000 % 26)} {rnd.randint(1, 99):02d}"
+
+
+def _telephone(i: int) -> str:
+    # 7919 est premier avec 10**8 : numéros distincts et dispersés
+    return f"+225 07{(i * 7919 + 12345) % 10 ** 8:08d}"
+
+
+def generer_dicts(n: int, graine: int = 42) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """n véhicules et n clients au format de donnees.json."""
+    rnd = random.Random(graine)
+    vehicules, clients = [], []
+    for i in range(n):
+        typ = 'Moto' if rnd.random() < 0.3 else 'Voiture'
+        marque, modele = rnd.choice(MARQUES[typ])
+        d = {'id': i + 1, 'type': typ, 'marque': marque, 'modele': modele, 'annee': str(rnd.randint(2005, 2024)),
+             'prix_journalier': float(rnd.randint(10, 100) * 1000), 'disponible': rnd.random() < 0.95,
+             'immatriculation': _immatriculation(i, rnd)}
+        if typ == 'Voiture':
+            d['nombre_portes'] = rnd.choice([3, 5])
+        else:
+            d['cylindree'] = rnd.choice([125, 500, 650, 900])
+        vehicules.append(d)
+        clients.append({'id': i + 1, 'nom': rnd.choice(NOMS), 'prenom': rnd.choice(PRENOMS), 'telephone': _telephone(i)})
+    return vehicules, clients
+
+
+def generer_json(n: int, graine: int = 42) -> Tuple[str, str]:
+    """Textes JSON des véhicules et des clients (décodés à nouveau comme au chargement réel)."""
+    vehicules, clients = generer_dicts(n, graine)
+    return json.dumps(vehicules), json.dumps(clients)
+
+
+def generer(n: int, graine: int = 42, reference: Optional[date] = None, part_louee: float = 0.5):
+    """(véhicules, clients, contrats) : objets prêts à sauvegarder ou à intégrer."""
+    rnd = random.Random(graine + 1)
+    reference = reference or date.today()
+    d_vehicules, d_clients = generer_dicts(n, graine)
+    vehicules = [Vehicule.from_dict(d) for d in d_vehicules]
+    clients = [Client.from_dict(d) for d in d_clients]
+    del d_vehicules, d_clients
+    contrats = []
+    for v in rnd.sample(vehicules, int(n * part_louee)):
+        if not v.est_en_service():
+            continue
+        for _ in range(rnd.randint(1, 3)):
+            debut = reference + timedelta(days=rnd.randint(-30, 90))
+            try:
+                contrat = ContratLocation(rnd.choice(clients), v, rnd.randint(1, 14), debut)
+            except ValueError:
+                continue  # période déjà prise sur ce véhicule
+            if rnd.random() < 0.5:
+                contrat.set_mode_paiement(ModePaiement('carte', {'numero': f"**** {rnd.randint(0, 9999):04d}"}))
+            contrats.append(contrat)
+    return vehicules, clients, contrats
+
+
+def ecrire_jeu(chemin: str, n: int, graine: int = 42, format_: str = "json", reference: Optional[date] = None):
+    """Génère un jeu et l'écrit comme un snapshot de GestionnaireDonnees ; renvoie les compteurs."""
+    vehicules, clients, contrats = generer(n, graine, reference)
+    GestionnaireDonnees(chemin, format_=format_).sauvegarder(vehicules, clients, contrats)
+    return {"vehicules": len(vehicules), "clients": len(clients), "contrats": len(contrats)}
@@ -0,0 +1,153 @@
+# ===============================================================
+# RÉPLICATION ENTRE AGENCES : PLUSIEURS PROCESSUS SUR UNE MACHINE
+# ---------------------------------------------------------------
+# Lance N processus « agence », chacun avec son propre stockage et un
+# dossier de flux partagé. La première agence crée la flotte et les
+# clients ; toutes louent ensuite au hasard dans la même flotte (des
+# conflits sont donc attendus) en se synchronisant en cours de route.
+# À la fin, chaque agence est rechargée depuis son stockage et l'on
+# vérifie que toutes ont les mêmes contrats, sans chevauchement.
+#
+#   python benchmarks/replication_agences.py --agences 3 --locations 300
+#   python benchmarks/replication_agences.py --agences 4 --vehicules 50 --stockages json sqlite fragments
+# ===============================================================
+import argparse
+import contextlib
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RACINE)
+
+from classes import Client, GestionnaireDonnees, Moto, Voiture  # noqa: E402
+from main import SystemeLocation  # noqa: E402
+from replication import ReplicationAgences  # noqa: E402
+from stockage_fragmente import StockageFragmente  # noqa: E402
+from stockage_sqlite import StockageSQLite  # noqa: E402
+
+
+def creer_stockage(dossier, agence, stockage):
+    if stockage == "sqlite":
+        return StockageSQLite(os.path.join(dossier, f"{agence}.db"))
+    if stockage == "fragments":
+        return StockageFragmente(os.path.join(dossier, agence), 100)
+    return GestionnaireDonnees(os.path.join(dossier, f"{agence}.json"), journalise=True)
+
+
+def ouvrir(dossier, agence, stockage):
+    systeme = SystemeLocation(creer_stockage(dossier, agence, stockage))
+    systeme.set_replication(ReplicationAgences(systeme, os.path.join(dossier, "flux"), agence))
+    return systeme
+
+
+def agence(numero, args, dossier, stockage, barriere, resultats):
+    nom = f"agence{numero}"
+    rnd = random.Random(args.graine + numero)
+    with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+        systeme = ouvrir(dossier, nom, stockage)
+        if numero == 0:
+            vehicules = [(Voiture if i % 3 else Moto)("Marque", f"M{i}", 2020, 10000 + 500 * (i % 40),
+                                                      5 if i % 3 else 650, immatriculation=f"AG-{i:05d}")
+                         for i in range(args.vehicules)]
+            clients = [Client(f"Nom{i}", "Prenom", f"07{i:08d}") for i in range(args.clients)]
+            vehicules = [systeme.integrer_vehicule(v) for v in vehicules]
+            clients = [systeme.integrer_client(c) for c in clients]
+            systeme.enregistrer_mutations([('ajout_vehicule', v.to_dict()) for v in vehicules]
+                                          + [('ajout_client', c.to_dict()) for c in clients])
+        barriere.wait()
+        while len(systeme.get_vehicule()) < args.vehicules or len(systeme.get_client()) < args.clients:
+            systeme.synchroniser_agences()
+        refus = 0
+        debut = time.perf_counter()
+        for i in range(args.locations):
+            client = rnd.choice(systeme.get_client())
+            vehicule = rnd.choice(systeme.get_vehicule())
+            try:
+                contrat = systeme.louer(client, vehicule, rnd.randint(1, 7),
+                                        date.today() + timedelta(days=rnd.randint(0, args.jours)))
+                systeme.enregistrer_mutation('creation_contrat', contrat.to_dict())
+            except ValueError:
+                refus += 1  # déjà réservé dans cette agence
+            if i % args.synchro == 0:
+                systeme.synchroniser_agences()
+            if rnd.random() < 0.1 and systeme.get_contrat():
+                contrat = rnd.choice(systeme.get_contrat())
+                systeme.retourner(contrat)
+                systeme.enregistrer_cloture(contrat)
+        duree = time.perf_counter() - debut
+        # toutes les agences ont fini d'écrire : deux tours de synchronisation suffisent
+        barriere.wait()
+        recus = systeme.synchroniser_agences()
+        barriere.wait()
+        recus += systeme.synchroniser_agences()
+        conflits = len(systeme.get_replication().get_conflits())
+        systeme.fermer()
+    resultats.put((nom, duree, refus, conflits, recus))
+
+
+def contrats_par_agence(dossier, nombre, stockage):
+    etats = {}
+    with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+        for numero in range(nombre):
+            systeme = SystemeLocation(creer_stockage(dossier, f"agence{numero}", stockage))
+            etats[f"agence{numero}"] = sorted((c.get_client().get_telephone(), c.get_vehicule().get_immatriculation(),
+                                               c.get_date_debut(), c.get_date_fin()) for c in systeme.get_contrat())
+            systeme.fermer()
+    return etats
+
+
+def chevauchements(contrats):
+    par_vehicule = {}
+    for _, immatriculation, debut, fin in contrats:
+        par_vehicule.setdefault(immatriculation, []).append((debut, fin))
+    return sum(1 for periodes in par_vehicule.values()
+               for (d1, f1), (d2, f2) in zip(sorted(periodes), sorted(periodes)[1:]) if d2 < f1)
+
+
+def main(argv=None):
+    parseur = argparse.ArgumentParser(description="Réplication entre plusieurs processus agence")
+    parseur.add_argument("--agences", type=int, default=3)
+    parseur.add_argument("--vehicules", type=int, default=100)
+    parseur.add_argument("--clients", type=int, default=50)
+    parseur.add_argument("--locations", type=int, default=300, help="tentatives de location par agence")
+    parseur.add_argument("--jours", type=int, default=60, help="dates de début dans les N prochains jours")
+    parseur.add_argument("--synchro", type=int, default=10, help="synchronisation toutes les N locations")
+    parseur.add_argument("--stockages", nargs="+", choices=("json", "sqlite", "fragments"), default=["json"])
+    parseur.add_argument("--graine", type=int, default=42)
+    args = parseur.parse_args(argv)
+
+    ok = True
+    for stockage in args.stockages:
+        with tempfile.TemporaryDirectory(prefix="bench-agences-") as dossier:
+            barriere = multiprocessing.Barrier(args.agences)
+            resultats = multiprocessing.Queue()
+            processus = [multiprocessing.Process(target=agence, args=(n, args, dossier, stockage, barriere, resultats))
+                         for n in range(args.agences)]
+            for p in processus:
+                p.start()
+            lignes = sorted(resultats.get() for _ in processus)
+            for p in processus:
+                p.join()
+            print(f"== {args.agences} agences, stockage {stockage}")
+            for nom, duree, refus, conflits, recus in lignes:
+                print(f"  {nom:<10} {args.locations / duree:>9,.0f} locations/s  {refus:>4} refus  "
+                      f"{conflits:>4} conflits  {recus:>5} reçues à la fin")
+            etats = contrats_par_agence(dossier, args.agences, stockage)
+            reference = etats["agence0"]
+            identiques = all(e == reference for e in etats.values())
+            doublons = chevauchements(reference)
+            print(f"  {len(reference)} contrats actifs ; agences identiques : {'oui' if identiques else 'NON'} ; "
+                  f"chevauchements : {doublons}")
+            ok = ok and identiques and doublons == 0
+    if not ok:
+        raise SystemExit("⚠️ Agences divergentes")
+    print("✅ Toutes les agences convergent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# ===============================================================
+# SUITE DE BENCHMARKS (chargement, sauvegarde, location, listes, rapports)
+# ---------------------------------------------------------------
+# Pour chaque échelle, un jeu synthétique reproductible (generateur.py)
+# est créé, puis chaque benchmark est répété ; on garde la médiane et le
+# minimum. Les résultats JSON portent le commit, la version de Python et
+# la graine, pour comparer deux exécutions :
+#   python -m benchmarks.suite --echelles 1k 100k --sortie avant.json
+#   python -m benchmarks.suite --echelles 1k 100k --sortie apres.json --comparer avant.json
+# Benchmarks disponibles : voir BENCHMARKS (option --seulement).
+# ===============================================================
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RACINE)
+
+from allocation import DemandeLocation  # noqa: E402
+from benchmarks.generateur import generer, lire_echelle  # noqa: E402
+from classes import Client, GestionnaireDonnees  # noqa: E402
+from main import SystemeLocation  # noqa: E402
+from rapports import RapportsLocation  # noqa: E402
+from stockage_fragmente import StockageFragmente  # noqa: E402
+from tarification import MoteurTarification  # noqa: E402
+
+DUREES = (1, 7, 14)
+
+
+class Contexte:
+    """Jeu de données d'une échelle : objets générés, fichiers écrits et système chargé."""
+
+    def __init__(self, n, graine, dossier):
+        self.n = n
+        self.graine = graine
+        self.dossier = dossier
+        self.reference = date.today()
+        self.vehicules, self.clients, self.contrats = generer(n, graine, self.reference)
+        self.chemins = {}
+        for format_, nom in (("json", "donnees.json"), ("binaire", "donnees.bin")):
+            self.chemins[format_] = os.path.join(dossier, nom)
+            GestionnaireDonnees(self.chemins[format_], format_=format_).sauvegarder(
+                self.vehicules, self.clients, self.contrats)
+        self.systeme = SystemeLocation(GestionnaireDonnees(self.chemins["binaire"], format_="binaire"))
+
+    def fichier_temporaire(self, nom):
+        chemin = os.path.join(self.dossier, nom)
+        if os.path.exists(chemin):
+            os.remove(chemin)
+        return chemin
+
+
+# ---------------------------------------------------------------
+# Benchmarks : préparation (non mesurée) puis fonction mesurée
+# Chaque fonction renvoie (préparer, mesurer, nb_operations).
+# ---------------------------------------------------------------
+def _sauvegarde(format_):
+    def bench(ctx):
+        nom = "sauvegarde.bin" if format_ == "binaire" else "sauvegarde.json"
+        etat = {}
+
+        def preparer():
+            etat["gestionnaire"] = GestionnaireDonnees(ctx.fichier_temporaire(nom), format_=format_)
+
+        def mesurer():
+            etat["gestionnaire"].sauvegarder(ctx.vehicules, ctx.clients, ctx.contrats)
+        return preparer, mesurer, ctx.n
+    return bench
+
+
+def _chargement(format_, **options):
+    def bench(ctx):
+        def mesurer():
+            data = GestionnaireDonnees(ctx.chemins[format_], format_=format_, **options).charger()
+            len(data["contrats"])  # les contrats différés comptent aussi
+        return None, mesurer, ctx.n
+    return bench
+
+
+def _location(ctx):
+    etat = {}
+    nb = max(1, ctx.n // 2)
+
+    def preparer():
+        etat["systeme"] = SystemeLocation(GestionnaireDonnees(ctx.chemins["binaire"], format_="binaire"))
+        rnd = random.Random(ctx.graine)
+        vehicules, clients = etat["systeme"].get_vehicule(), etat["systeme"].get_client()
+        etat["demandes"] = [(rnd.choice(clients), rnd.choice(vehicules), rnd.randint(1, 14),
+                             ctx.reference + timedelta(days=rnd.randint(0, 90))) for _ in range(nb)]
+
+    def mesurer():
+        louer = etat["systeme"].louer
+        for client, vehicule, nb_jours, debut in etat["demandes"]:
+            try:
+                louer(client, vehicule, nb_jours, debut)
+            except ValueError:
+                pass  # période déjà réservée : refus compté comme une opération
+    return preparer, mesurer, nb
+
+
+def _allocation_lot(ctx):
+    # commande d'un client entreprise : 50 demandes couvrant la moitié de la flotte
+    etat = {}
+    nb_demandes = 50
+    par_demande = max(1, ctx.n // (2 * nb_demandes))
+
+    def preparer():
+        etat["systeme"] = SystemeLocation(GestionnaireDonnees(ctx.chemins["binaire"], format_="binaire"))
+        rnd = random.Random(ctx.graine)
+        etat["client"] = rnd.choice(etat["systeme"].get_client())
+        demandes = []
+        for _ in range(nb_demandes):
+            debut = ctx.reference + timedelta(days=rnd.choice((0, 7, 14)))
+            prix_max = rnd.choice((None, 40000, 70000))
+            if rnd.random() < 0.5:
+                demandes.append(DemandeLocation("Voiture", par_demande, rnd.randint(1, 14), debut,
+                                                nombre_portes=rnd.choice((None, 3, 5)), prix_max=prix_max))
+            else:
+                demandes.append(DemandeLocation("Moto", par_demande, rnd.randint(1, 14), debut,
+                                                cylindree_min=rnd.choice((None, 500, 900)), prix_max=prix_max))
+        etat["demandes"] = demandes
+
+    def mesurer():
+        etat["systeme"].louer_en_lot(etat["client"], etat["demandes"])
+    return preparer, mesurer, nb_demandes * par_demande
+
+
+def _tarif_objets(ctx):
+    def mesurer():
+        for v in ctx.vehicules:
+            for d in DUREES:
+                v.calculer_tarif_location(d)
+    return None, mesurer, ctx.n * len(DUREES)
+
+
+def _tarif_lots(ctx):
+    def mesurer():
+        MoteurTarification(ctx.vehicules).calculer(DUREES)
+    return None, mesurer, ctx.n * len(DUREES)
+
+
+def _liste(methode, nb, **options):
+    # par_page=None : liste complète (écriture groupée) ; sinon une seule page
+    def bench(ctx):
+        def mesurer():
+            with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+                getattr(ctx.systeme, methode)(**options)
+        return None, mesurer, nb(ctx)
+    return bench
+
+
+def _recherche_libres(ctx):
+    debut = ctx.reference + timedelta(days=30)
+
+    def mesurer():
+        ctx.systeme.vehicules_libres(debut, debut + timedelta(days=7))
+    return None, mesurer, ctx.n
+
+
+def _ajout_client(stockage):
+    # une mutation persistée : réécriture du snapshot JSON ou d'un seul fragment
+    def bench(ctx):
+        etat = {}
+
+        def preparer():
+            if stockage == "fragments":
+                dossier = os.path.join(ctx.dossier, "fragments")
+                if not os.path.exists(dossier):
+                    StockageFragmente(dossier).sauvegarder(ctx.vehicules, ctx.clients, ctx.contrats)
+                gestionnaire = StockageFragmente(dossier)
+            else:
+                chemin = ctx.fichier_temporaire("ajout.json")
+                shutil.copyfile(ctx.chemins["json"], chemin)
+                gestionnaire = GestionnaireDonnees(chemin)
+            etat["systeme"] = SystemeLocation(gestionnaire)
+
+        def mesurer():
+            systeme = etat["systeme"]
+            client = systeme.integrer_client(Client("Bench", "Ajout", "0000"))
+            systeme.enregistrer_mutation("ajout_client", client.to_dict())
+        return preparer, mesurer, 1
+    return bench
+
+
+def _rapport(ctx):
+    # cumuls déjà construits (premier rapport) : coût d'un affichage de tableau de bord
+    def preparer():
+        ctx.systeme.get_rapports().total()
+
+    def mesurer():
+        with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+            ctx.systeme.afficher_rapports()
+    return preparer, mesurer, 1
+
+
+def _rapport_reconstruction(ctx):
+    def mesurer():
+        rapports = RapportsLocation()
+        rapports.reconstruire(ctx.contrats)
+        rapports.total()
+    return None, mesurer, len(ctx.contrats)
+
+
+BENCHMARKS = {
+    "sauvegarde_json": _sauvegarde("json"),
+    "sauvegarde_binaire": _sauvegarde("binaire"),
+    "chargement_json": _chargement("json"),
+    "chargement_json_paresseux": _chargement("json", paresseux=True),
+    "chargement_binaire": _chargement("binaire"),
+    "location": _location,
+    "allocation_lot": _allocation_lot,
+    "tarif_objets": _tarif_objets,
+    "tarif_lots": _tarif_lots,
+    "liste_vehicules": _liste("afficher_vehicules", lambda ctx: ctx.n, par_page=None),
+    "liste_clients": _liste("afficher_clients", lambda ctx: ctx.n, par_page=None),
+    "liste_contrats": _liste("afficher_contrats", lambda ctx: len(ctx.contrats), par_page=None),
+    "page_vehicules_filtree": _liste("afficher_vehicules", lambda ctx: 20, page=5, type_vehicule="Moto",
+                                     disponible=True),
+    "page_vehicules_triee": _liste("afficher_vehicules", lambda ctx: 20, page=5, tri="-prix"),
+    "recherche_libres": _recherche_libres,
+    "ajout_client_json": _ajout_client("json"),
+    "ajout_client_fragments": _ajout_client("fragments"),
+    "rapport": _rapport,
+    "rapport_reconstruction": _rapport_reconstruction,
+}
+
+
+def executer(nom, ctx, repetitions):
+    preparer, mesurer, nb_operations = BENCHMARKS[nom](ctx)
+    durees = []
+    with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+        for _ in range(repetitions):
+            if preparer is not None:
+                preparer()
+            gc.collect()
+            debut = time.perf_counter()
+            mesurer()
+            durees.append(time.perf_counter() - debut)
+    mediane = statistics.median(durees)
+    return {
+        "benchmark": nom, "echelle": ctx.n, "repetitions": repetitions,
+        "mediane_s": round(mediane, 6), "min_s": round(min(durees), 6),
+        "operations": nb_operations, "operations_par_s": round(nb_operations / mediane) if mediane else None,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RACINE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparer(reference, actuels):
+    """Lignes « benchmark échelle avant après ratio » pour les mesures communes."""
+    avant = {(r["benchmark"], r["echelle"]): r["mediane_s"] for r in reference["resultats"]}
+    lignes = []
+    for r in actuels["resultats"]:
+        ancien = avant.get((r["benchmark"], r["echelle"]))
+        if ancien:
+            lignes.append((r["benchmark"], r["echelle"], ancien, r["mediane_s"], r["mediane_s"] / ancien))
+    return lignes
+
+
+def main(argv=None):
+    parseur = argparse.ArgumentParser(description="Suite de benchmarks du système de location")
+    parseur.add_argument("--echelles", nargs="+", default=["1k", "100k"], help="ex. 1k 100k 1m")
+    parseur.add_argument("--seulement", nargs="+", choices=sorted(BENCHMARKS), metavar="BENCH",
+                         help="limiter à certains benchmarks")
+    parseur.add_argument("--repetitions", type=int, help="par défaut 5 (1k), 3 (100k), 1 (1m et plus)")
+    parseur.add_argument("--graine", type=int, default=42)
+    parseur.add_argument("--sortie", help="fichier JSON des résultats")
+    parseur.add_argument("--comparer", metavar="REFERENCE", help="résultats JSON d'une exécution précédente")
+    args = parseur.parse_args(argv)
+
+    noms = args.seulement or list(BENCHMARKS)
+    resultats = {
+        "meta": {"commit": _commit(), "python": platform.python_version(), "plateforme": platform.platform(),
+                 "date": datetime.now().isoformat(timespec="seconds"), "graine": args.graine},
+        "resultats": [],
+    }
+    for texte in args.echelles:
+        n = lire_echelle(texte)
+        repetitions = args.repetitions or (5 if n <= 10000 else 3 if n < 1000000 else 1)
+        dossier = tempfile.mkdtemp(prefix=f"bench_suite_{n}_")
+        try:
+            debut = time.perf_counter()
+            with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+                ctx = Contexte(n, args.graine, dossier)
+            print(f"== échelle {n} : {len(ctx.contrats)} contrats, jeu prêt en {time.perf_counter() - debut:.1f} s")
+            for nom in noms:
+                r = executer(nom, ctx, repetitions)
+                resultats["resultats"].append(r)
+                print(f"  {nom:<28} {r['mediane_s']:>10.4f} s  {r['operations_par_s'] or 0:>12,} op/s")
+            del ctx
+            gc.collect()
+        finally:
+            shutil.rmtree(dossier, ignore_errors=True)
+
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+        print(f"✅ Résultats écrits dans {args.sortie}")
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            reference = json.load(f)
+        print(f"\nComparaison avec {args.comparer} (commit {reference['meta'].get('commit')}) :")
+        for nom, n, avant, apres, ratio in comparer(reference, resultats):
+            signe = "⚠️" if ratio > 1.10 else "  "
+            print(f"{signe} {nom:<28} {n:>9}  {avant:>9.4f} s -> {apres:>9.4f} s  x{ratio:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+from array import array
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+
+def aujourdhui() -> date:
+    return date.today()
+
+
+def periode(date_debut: Optional[date], nb_jours: int) -> Tuple[date, date]:
+    """(début, fin) d'une location ; la fin est exclue (jour de retour, de nouveau libre)."""
+    debut = date_debut or aujourdhui()
+    return debut, debut + timedelta(days=nb_jours)
+
+
+def lire_date(valeur) -> Optional[date]:
+    """Date au format AAAA-MM-JJ (ou déjà une date) ; None si vide."""
+    if valeur is None or valeur == '':
+        return None
+    if isinstance(valeur, date):
+        return valeur
+    try:
+        return date.fromisoformat(str(valeur).strip())
+    except ValueError:
+        raise ValueError(f"Date invalide (AAAA-MM-JJ attendu) : {valeur!r}")
+
+
+def jours_par_mois(debut: date, fin: date) -> Iterator[Tuple[Tuple[int, int], int]]:
+    """((année, mois), jours) de la période [debut, fin) ; au plus quelques mois par location."""
+    while debut < fin:
+        annee, mois = debut.year, debut.month
+        suivant = date(annee + mois // 12, mois % 12 + 1, 1)
+        yield (annee, mois), (min(fin, suivant) - debut).days
+        debut = suivant
+
+
+# ===============================================================
+# CALENDRIER DE RÉSERVATIONS D'UN VÉHICULE
+# ---------------------------------------------------------------
+# Rôle : Conserver les périodes réservées [début, fin) d'un véhicule.
+# - Les périodes ne se chevauchent jamais (refusées à l'ajout) : triées par
+#   date de début, une recherche dichotomique suffit pour savoir si une
+#   période est libre (O(log k) pour k réservations).
+# - Dates stockées en numéros de jour (date.toordinal) dans des tableaux
+#   compacts.
+# ===============================================================
+class CalendrierReservations:
+    __slots__ = ('__debuts', '__fins')
+
+    def __init__(self):
+        self.__debuts = array('l')
+        self.__fins = array('l')
+
+    def __len__(self):
+        return len(self.__debuts)
+
+    def __iter__(self) -> Iterator[Tuple[date, date]]:
+        for d, f in zip(self.__debuts, self.__fins):
+            yield date.fromordinal(d), date.fromordinal(f)
+
+    def __position(self, debut: int, fin: int) -> Optional[int]:
+        # indice d'insertion si [debut, fin) est libre, sinon None
+        i = bisect_right(self.__debuts, debut)
+        if i > 0 and self.__fins[i - 1] > debut:
+            return None  # la période précédente n'est pas terminée
+        if i < len(self.__debuts) and self.__debuts[i] < fin:
+            return None  # la période suivante commence avant la fin
+        return i
+
+    def est_libre(self, debut: date, fin: date) -> bool:
+        return self.__position(debut.toordinal(), fin.toordinal()) is not None
+
+    def conflit(self, debut: date, fin: date) -> Optional[Tuple[date, date]]:
+        """Première période réservée qui chevauche [debut, fin), ou None."""
+        d, f = debut.toordinal(), fin.toordinal()
+        i = bisect_right(self.__debuts, d)
+        if i > 0 and self.__fins[i - 1] > d:
+            i -= 1
+        if i < len(self.__debuts) and self.__debuts[i] < f:
+            return date.fromordinal(self.__debuts[i]), date.fromordinal(self.__fins[i])
+        return None
+
+    def ajouter(self, debut: date, fin: date) -> bool:
+        """Réserve [debut, fin) ; False (sans rien modifier) si la période chevauche une réservation."""
+        if fin <= debut:
+            raise ValueError("La fin d'une réservation doit suivre son début.")
+        d, f = debut.toordinal(), fin.toordinal()
+        i = self.__position(d, f)
+        if i is None:
+            return False
+        self.__debuts.insert(i, d)
+        self.__fins.insert(i, f)
+        return True
+
+    def retirer(self, debut: date, fin: date) -> bool:
+        d = debut.toordinal()
+        i = bisect_right(self.__debuts, d) - 1
+        if i >= 0 and self.__debuts[i] == d and self.__fins[i] == fin.toordinal():
+            del self.__debuts[i]
+            del self.__fins[i]
+            return True
+        return False
+
+    def ordinaux(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.__debuts, self.__fins)
+
+    def to_list(self) -> List[List[str]]:
+        return [[d.isoformat(), f.isoformat()] for d, f in self]
+
+    @classmethod
+    def from_list(cls, periodes) -> 'CalendrierReservations':
+        calendrier = cls()
+        for debut, fin in periodes:
+            if not calendrier.ajouter(lire_date(debut), lire_date(fin)):
+                print(f"⚠️ Réservation en conflit ignorée : {debut} -> {fin}")
+        return calendrier
+
+    @classmethod
+    def depuis_ordinaux(cls, paires) -> 'CalendrierReservations':
+        """Périodes déjà triées et sans chevauchement (relues d'un calendrier valide)."""
+        calendrier = cls()
+        for d, f in paires:
+            calendrier.__debuts.append(d)
+            calendrier.__fins.append(f)
+        return calendrier
@@ -0,0 +1,243 @@
+import json
+import math
+import mmap
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from calendrier import CalendrierReservations
+from classes import Voiture, Moto, Vehicule, Client, ContratLocation, ModePaiement
+from instrumentation import compter, mesurer
+from lecture_progressive import LecteurJSONProgressif
+
+SECTIONS = ("vehicules", "clients", "contrats")
+TAILLE_MIN = 8 << 20  # en dessous, le démarrage des processus coûte plus qu'il ne rapporte
+BLOCS_PAR_PROCESSUS = 4
+
+# mise en page de GestionnaireDonnees.ecrire_flux (et de json.dump(..., indent=4)) :
+# éléments des tableaux à 8 espaces, fin de section à 4 ; un saut de ligne n'apparaît
+# jamais dans une chaîne JSON, ces marqueurs ne peuvent donc pas être dans une valeur
+FIN_ELEMENT = b"\n        },\n        {"
+FIN_SECTION = b"\n    ]"
+
+
+class FormatNonPris(Exception):
+    """Fichier que le chargement parallèle ne sait pas découper : lecture séquentielle."""
+
+
+# ===============================================================
+# CHARGEMENT PARALLÈLE DE donnees.json (pool de processus)
+# ---------------------------------------------------------------
+# Rôle : Répartir le décodage d'un gros snapshot JSON sur plusieurs
+#        cœurs (GestionnaireDonnees(..., processus=N)).
+# - Le processus principal projette le fichier en mémoire (mmap) et
+#   repère les limites des éléments de chaque section, sans décoder :
+#   blocs de taille voisine, BLOCS_PAR_PROCESSUS par processus.
+# - Chaque processus relit son bloc (positions en octets), le décode
+#   et le valide, puis renvoie des colonnes (listes de valeurs, chaînes
+#   répétées remplacées par un code) : peu de données à transférer.
+# - Les blocs sont fusionnés dans l'ordre du fichier (executor.map) :
+#   résultat identique au chargement séquentiel.
+# - En mode compact, les colonnes sont ajoutées telles quelles aux
+#   stores ; sinon les objets sont construits dans le processus
+#   principal (les objets Python ne peuvent pas être partagés entre
+#   processus), seul le décodage est alors parallèle.
+# - Fichier trop petit, mise en page inconnue ou ancien format des
+#   contrats : FormatNonPris, l'appelant lit le fichier normalement.
+# ===============================================================
+def decouper(chemin: str, nb_blocs: int) -> Tuple[Dict[str, Any], List[Tuple[str, str, int, int]]]:
+    """(métadonnées, tâches) ; une tâche = (chemin, section, début, fin) en octets."""
+    with LecteurJSONProgressif(chemin) as lecteur:
+        meta = dict(lecteur.parcourir(differer=SECTIONS))
+    taches = []
+    with open(chemin, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as carte:
+        position = 0
+        for section in SECTIONS:
+            entete = carte.find(b'\n    "' + section.encode() + b'": [', position)
+            if entete < 0:
+                raise FormatNonPris(f"section {section} introuvable ou mise en page inconnue")
+            debut = carte.find(b"[", entete) + 1
+            if carte[debut:debut + 1] == b"]":
+                position = debut  # section vide
+                continue
+            fin = carte.find(FIN_SECTION, debut)
+            if fin < 0:
+                raise FormatNonPris(f"fin de la section {section} introuvable")
+            position = fin
+            taille_bloc = max(1 << 16, math.ceil((fin - debut) / nb_blocs))
+            while debut < fin:
+                coupure = carte.find(FIN_ELEMENT, min(debut + taille_bloc, fin), fin)
+                if coupure < 0:
+                    taches.append((chemin, section, debut, fin))
+                    break
+                coupure += len(FIN_ELEMENT) - len(",\n        {")  # juste après l'accolade fermante
+                taches.append((chemin, section, debut, coupure))
+                debut = coupure + 1  # après la virgule
+    return meta, taches
+
+
+# ---------------------------------------------------------------
+# Processus de décodage : un bloc -> colonnes
+# ---------------------------------------------------------------
+class _Codes:
+    """Chaînes répétées d'un bloc -> codes (table locale, recodée à la fusion)."""
+
+    def __init__(self):
+        self.valeurs: List[Any] = []
+        self.__codes: Dict[Any, int] = {}
+
+    def code(self, valeur) -> int:
+        c = self.__codes.get(valeur)
+        if c is None:
+            c = self.__codes[valeur] = len(self.valeurs)
+            self.valeurs.append(valeur)
+        return c
+
+
+def _identifiant(d, lieu, i):
+    identifiant = d.get('id')
+    if type(identifiant) is not int:
+        # sans identifiant, il serait attribué dans l'ordre de lecture : lecture séquentielle
+        raise FormatNonPris(f"{lieu}, élément {i} : identifiant absent")
+    return identifiant
+
+
+def _nombre(valeur, nom, lieu, i, entier=False):
+    if type(valeur) is bool or not isinstance(valeur, int if entier else (int, float)):
+        raise ValueError(f"{lieu}, élément {i} : {nom} invalide ({valeur!r})")
+    return valeur
+
+
+def decoder_bloc(tache: Tuple[str, str, int, int]) -> Dict[str, Any]:
+    chemin, section, debut, fin = tache
+    with open(chemin, "rb") as f:
+        f.seek(debut)
+        elements = json.loads(b"[" + f.read(fin - debut) + b"]")
+    lieu = f"{section} (bloc à l'octet {debut})"
+    codes = _Codes()
+    if section == "vehicules":
+        colonnes = {'ids': [], 'motos': bytearray(), 'marques': [], 'modeles': [], 'annees': [], 'prix': [],
+                    'disponibles': bytearray(), 'immatriculations': [], 'specifiques': [], 'reservations': {}}
+        for i, d in enumerate(elements):
+            moto = d.get('type') == 'Moto'
+            colonnes['ids'].append(_identifiant(d, lieu, i))
+            colonnes['motos'].append(moto)
+            colonnes['marques'].append(codes.code(d.get('marque')))
+            colonnes['modeles'].append(codes.code(d.get('modele')))
+            colonnes['annees'].append(codes.code(d.get('annee')))
+            prix = d.get('prix_journalier')
+            colonnes['prix'].append(prix if prix is None else _nombre(prix, 'prix_journalier', lieu, i))
+            colonnes['disponibles'].append(bool(d.get('disponible', True)))
+            colonnes['immatriculations'].append(d.get('immatriculation'))
+            specifique = d.get('cylindree', 500) if moto else d.get('nombre_portes', 4)
+            colonnes['specifiques'].append(_nombre(specifique, 'cylindree / nombre_portes', lieu, i, entier=True))
+            if d.get('reservations'):
+                # validées ici (tri, chevauchements) ; transmises en numéros de jour
+                calendrier = CalendrierReservations.from_list(d['reservations'])
+                colonnes['reservations'][i] = [(a.toordinal(), b.toordinal()) for a, b in calendrier]
+    elif section == "clients":
+        colonnes = {'ids': [], 'noms': [], 'prenoms': [], 'telephones': []}
+        for i, d in enumerate(elements):
+            colonnes['ids'].append(_identifiant(d, lieu, i))
+            colonnes['noms'].append(codes.code(d.get('nom', '')))
+            colonnes['prenoms'].append(codes.code(d.get('prenom', '')))
+            colonnes['telephones'].append(d.get('telephone', ''))
+    else:
+        colonnes = {'clients': [], 'vehicules': [], 'nb_jours': [], 'montants': [], 'debuts': [], 'modes': {}}
+        for i, d in enumerate(elements):
+            if 'client_id' not in d:
+                raise FormatNonPris("contrats à l'ancien format (conversion séquentielle)")
+            colonnes['clients'].append(_nombre(d['client_id'], 'client_id', lieu, i, entier=True))
+            colonnes['vehicules'].append(_nombre(d['vehicule_id'], 'vehicule_id', lieu, i, entier=True))
+            nb_jours = _nombre(d.get('nb_jours', 1), 'nb_jours', lieu, i, entier=True)
+            if nb_jours < 1:
+                raise ValueError(f"{lieu}, élément {i} : nb_jours invalide ({nb_jours!r})")
+            colonnes['nb_jours'].append(nb_jours)
+            montant = d.get('montant_total')
+            colonnes['montants'].append(montant if montant is None else _nombre(montant, 'montant_total', lieu, i))
+            debut = d.get('date_debut')
+            colonnes['debuts'].append(date.fromisoformat(debut).toordinal() if debut else 0)
+            if d.get('mode_paiement'):
+                colonnes['modes'][i] = d['mode_paiement']
+    colonnes['valeurs'] = codes.valeurs
+    colonnes['section'] = section
+    return colonnes
+
+
+# ---------------------------------------------------------------
+# Fusion dans le processus principal
+# ---------------------------------------------------------------
+def _valeurs_internees(colonnes):
+    return [sys.intern(v) if isinstance(v, str) else v for v in colonnes['valeurs']]
+
+
+def _fusionner_vehicules(vehicules, colonnes):
+    if hasattr(vehicules, 'ajouter_colonnes'):
+        vehicules.ajouter_colonnes(colonnes)
+        return
+    valeurs = _valeurs_internees(colonnes)
+    reservations = colonnes['reservations']
+    for i, (identifiant, moto, marque, modele, annee, prix, disponible, immatriculation, specifique) in enumerate(zip(
+            colonnes['ids'], colonnes['motos'], colonnes['marques'], colonnes['modeles'], colonnes['annees'],
+            colonnes['prix'], colonnes['disponibles'], colonnes['immatriculations'], colonnes['specifiques'])):
+        v = (Moto if moto else Voiture)(valeurs[marque], valeurs[modele], valeurs[annee], prix, specifique,
+                                        immatriculation=immatriculation, identifiant=identifiant)
+        if not disponible:
+            v.set_disponibilite(False)
+        if i in reservations:
+            v.set_calendrier(CalendrierReservations.depuis_ordinaux(reservations[i]))
+        vehicules.append(v)
+
+
+def _fusionner_clients(clients, colonnes):
+    if hasattr(clients, 'ajouter_colonnes'):
+        clients.ajouter_colonnes(colonnes)
+        return
+    valeurs = _valeurs_internees(colonnes)
+    for identifiant, nom, prenom, telephone in zip(colonnes['ids'], colonnes['noms'], colonnes['prenoms'],
+                                                   colonnes['telephones']):
+        clients.append(Client(valeurs[nom], valeurs[prenom], telephone, identifiant))
+
+
+def _fusionner_contrats(contrats, colonnes, vehicules_par_id, clients_par_id):
+    modes = colonnes['modes']
+    for i, (client_id, vehicule_id, nb_jours, montant, debut) in enumerate(zip(
+            colonnes['clients'], colonnes['vehicules'], colonnes['nb_jours'], colonnes['montants'],
+            colonnes['debuts'])):
+        vehicule = vehicules_par_id[vehicule_id]
+        if montant is None:
+            montant = vehicule.calculer_tarif_location(nb_jours)
+        mode = ModePaiement.from_dict(modes[i]) if i in modes else None
+        contrats.append(ContratLocation.restaurer(clients_par_id[client_id], vehicule, nb_jours, montant, mode,
+                                                  date.fromordinal(debut) if debut else None))
+
+
+def charger_parallele(chemin: str, processus: int, vehicules, clients, par_identifiant):
+    """Remplit vehicules et clients (listes ou stores) ; renvoie (métadonnées, contrats).
+
+    par_identifiant(collection) -> accès identifiant -> entité (celui de GestionnaireDonnees).
+    """
+    if os.path.getsize(chemin) < TAILLE_MIN:
+        raise FormatNonPris("fichier trop petit pour un chargement parallèle")
+    with mesurer("charger.parallele"):
+        meta, taches = decouper(chemin, processus * BLOCS_PAR_PROCESSUS)
+        contrats: List[ContratLocation] = []
+        liens: Optional[Tuple[Any, Any]] = None
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            # blocs rendus dans l'ordre des tâches, fusionnés pendant que les suivants se décodent
+            for colonnes in pool.map(decoder_bloc, taches):
+                section = colonnes['section']
+                if section == "vehicules":
+                    _fusionner_vehicules(vehicules, colonnes)
+                elif section == "clients":
+                    _fusionner_clients(clients, colonnes)
+                else:
+                    if liens is None:
+                        liens = par_identifiant(vehicules), par_identifiant(clients)
+                    _fusionner_contrats(contrats, colonnes, *liens)
+    compter("vehicules_reconstruits", len(vehicules))
+    compter("clients_reconstruits", len(clients))
+    compter("contrats_reconstruits", len(contrats))
+    return meta, contrats
@@ -1,24 +1,85 @@
 
 from abc import ABC, abstractmethod  # Pour gérer les classes abstraites en Python
 import json
-from typing import List, Dict, Any, Optional
+import os
+import sys
+import threading
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+
+from archive_contrats import ArchiveContrats
+from calendrier import CalendrierReservations, aujourdhui, lire_date, periode
+from instrumentation import compter, compter_octets, est_actif, mesurer
+from journal import Journal
+from lecture_progressive import LecteurJSONProgressif, ListeDifferee, lire_tableau
+from verrous import ConflitEcriture, VerrousRayes, verrou_fichier
+
+
+# Règles tarifaires (partagées avec la tarification par lots, tarification.py)
+SEUIL_LONGUE_DUREE = 7            # jours
+REDUCTION_LONGUE_DUREE = 0.9      # Voiture : -10 % au-delà du seuil
+SEUIL_CYLINDREE = 600             # cc
+SURTAXE_GROSSE_CYLINDREE = 1.15   # Moto : +15 % au-delà du seuil
+
+
+# Un verrou par véhicule (rayé par identifiant) pour les réservations concurrentes
+_VERROUS_VEHICULES = VerrousRayes()
+
+
+def _interner(valeur):
+    # les chaînes répétées (marque, modèle, nom...) partagent une seule instance en mémoire
+    return sys.intern(valeur) if isinstance(valeur, str) else valeur
 
 
 # ===============================================================
 # 1. CLASSE ABSTRAITE VEHICULE
 # ---------------------------------------------------------------
 # Rôle : Classe de base représentant tout véhicule louable.
-# - Attributs communs : marque, modèle, année, prix journalier, disponibilité.
-# - Méthodes abstraites : calculer_tarif_location() et afficher_details()
+# - Attributs communs : identifiant, marque, modèle, année, prix journalier, disponibilité.
+# - L'identifiant est stable (sauvegardé) et sert de référence dans les contrats.
+# - Disponibilité : le véhicule est « en service » (set_disponibilite) et son
+#   calendrier de réservations dit s'il est libre sur une période donnée ;
+#   est_disponible() signifie « libre aujourd'hui ».
+# - Méthodes abstraites : calculer_tarif_location() et details() (afficher_details() l'affiche)
+# - __slots__ : pas de __dict__ par instance (grandes flottes).
 # ===============================================================
 class Vehicule(ABC):
-    def __init__(self, marque, modele, annee, prix_journalier, immatriculation: Optional[str] = None):
+    __slots__ = ('__identifiant', '__marque', '__modele', '__annee', '__prix_journalier',
+                 '__disponible', '__immatriculation', '__observateur', '__calendrier')
+    _prochain_id = 1  # compteur partagé par Voiture et Moto
+
+    def __init__(self, marque, modele, annee, prix_journalier, immatriculation: Optional[str] = None,
+                 identifiant: Optional[int] = None):
+        self.__identifiant = Vehicule._attribuer_id(identifiant)
         self.__marque = marque
         self.__modele = modele
         self.__annee = annee
         self.__prix_journalier = prix_journalier
         self.__disponible = True  # Par défaut, un véhicule est disponible
         self.__immatriculation = immatriculation
+        self.__observateur = None  # index à prévenir des changements (voir IndexLocation)
+        self.__calendrier = None  # créé à la première réservation
+
+    @staticmethod
+    def _attribuer_id(identifiant: Optional[int] = None) -> int:
+        # un identifiant relu depuis le fichier fait avancer le compteur
+        if identifiant is None:
+            identifiant = Vehicule._prochain_id
+        Vehicule._prochain_id = max(Vehicule._prochain_id, identifiant + 1)
+        return identifiant
+
+    def get_identifiant(self):
+        return self.__identifiant
+
+    def get_type(self):
+        # 'Voiture' ou 'Moto' ; aussi fourni par les vues du stockage compact
+        return self.__class__.__name__
+
+    def set_observateur(self, observateur):
+        self.__observateur = observateur
+
+    def get_observateur(self):
+        return self.__observateur
 
     # --- Getters et Setters (Encapsulation) ---
     def get_marque(self):
@@ -26,12 +87,16 @@ class Vehicule(ABC):
 
     def set_marque(self, marque):
         self.__marque = marque
+        if self.__observateur is not None:
+            self.__observateur.vehicule_renomme(self)
 
     def get_modele(self):
         return self.__modele
 
     def set_modele(self, modele):
         self.__modele = modele
+        if self.__observateur is not None:
+            self.__observateur.vehicule_renomme(self)
 
     def get_annee(self):
         return self.__annee
@@ -45,12 +110,65 @@ class Vehicule(ABC):
     def set_prix_journalier(self, prix):
         self.__prix_journalier = prix
 
-    def est_disponible(self):
+    def est_en_service(self):
         return self.__disponible
 
+    def get_calendrier(self, creer: bool = False) -> Optional[CalendrierReservations]:
+        if self.__calendrier is None and creer:
+            self.__calendrier = CalendrierReservations()
+        return self.__calendrier
+
+    def set_calendrier(self, calendrier: Optional[CalendrierReservations]):
+        self.__calendrier = calendrier
+
+    def est_libre(self, debut: date, fin: date) -> bool:
+        """En service et sans réservation sur [debut, fin)."""
+        if not self.est_en_service():
+            return False
+        calendrier = self.get_calendrier()
+        return calendrier is None or calendrier.est_libre(debut, fin)
+
+    def est_disponible(self):
+        # libre aujourd'hui
+        jour = aujourdhui()
+        return self.est_libre(jour, jour + timedelta(days=1))
+
+    def reserver(self, debut: Optional[date] = None, fin: Optional[date] = None) -> bool:
+        """Réserve atomiquement [debut, fin) (par défaut : aujourd'hui) ; False si la période est prise.
+
+        Sûr entre threads : deux réservations simultanées qui se chevauchent
+        ne peuvent pas réussir toutes les deux.
+        """
+        if debut is None:
+            debut, fin = periode(None, 1)
+        with _VERROUS_VEHICULES.pour(self.get_identifiant()):
+            if not self.est_en_service() or not self.get_calendrier(creer=True).ajouter(debut, fin):
+                return False
+        observateur = self.get_observateur()
+        if observateur is not None and debut <= aujourdhui() < fin:
+            observateur.disponibilite_modifiee(self)
+        return True
+
+    def liberer(self, debut: date, fin: date) -> bool:
+        """Retire la réservation [debut, fin) (retour du véhicule) ; False si elle n'existe pas."""
+        with _VERROUS_VEHICULES.pour(self.get_identifiant()):
+            calendrier = self.get_calendrier()
+            if calendrier is None or not calendrier.retirer(debut, fin):
+                return False
+            if not calendrier:
+                self.set_calendrier(None)
+        observateur = self.get_observateur()
+        if observateur is not None and debut <= aujourdhui() < fin:
+            observateur.disponibilite_modifiee(self)
+        return True
+
+    # En service ou non (hors service : aucune location possible)
     def set_disponibilite(self, etat):
         if etat in [True, False]:
+            ancien = self.__disponible
             self.__disponible = etat
+            if self.__observateur is not None and ancien != etat:
+                self.__observateur.disponibilite_modifiee(self)
         else:
             raise ValueError("La disponibilité doit être True ou False.")
     
@@ -58,7 +176,10 @@ class Vehicule(ABC):
         return self.__immatriculation
 
     def set_immatriculation(self, immat: str):
+        ancienne = self.__immatriculation
         self.__immatriculation = immat
+        if self.__observateur is not None and ancienne != immat:
+            self.__observateur.immatriculation_modifiee(self, ancienne)
         
 
     # --- Méthodes abstraites à implémenter dans les sous-classes ---
@@ -66,14 +187,19 @@ class Vehicule(ABC):
     def calculer_tarif_location(self, nb_jours):
         pass
 
+    # Description d'une ligne (construite sans affichage, pour les listes)
     @abstractmethod
-    def afficher_details(self):
+    def details(self) -> str:
         pass
 
+    def afficher_details(self):
+        print(self.details())
+
     # Sérialisation de base pour tous les véhicules
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            'type': self.__class__.__name__,
+        base = {
+            'id': self.__identifiant,
+            'type': self.get_type(),
             'marque': self.__marque,
             'modele': self.__modele,
             'annee': self.__annee,
@@ -81,6 +207,9 @@ class Vehicule(ABC):
             'disponible': self.__disponible,
             'immatriculation': self.__immatriculation,
         }
+        if self.__calendrier:
+            base['reservations'] = self.__calendrier.to_list()
+        return base
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
@@ -90,7 +219,9 @@ class Vehicule(ABC):
         if typ == 'Moto':
             return Moto.from_dict(data)
         # fallback to a generic Vehicule (not instantiable as abstract) -> create a simple Voiture
-        return Voiture(data.get('marque'), data.get('modele'), data.get('annee'), data.get('prix_journalier'), nombre_portes=4)
+        return Voiture(_interner(data.get('marque')), _interner(data.get('modele')), _interner(data.get('annee')),
+                       data.get('prix_journalier'), nombre_portes=4,
+                       immatriculation=data.get('immatriculation'), identifiant=data.get('id'))
 
 
     # ===============================================================
@@ -101,8 +232,11 @@ class Vehicule(ABC):
 # - Redéfinit les méthodes abstraites de Vehicule.
 # ===============================================================
 class Voiture(Vehicule):
-    def __init__(self, marque, modele, annee, prix_journalier, nombre_portes):
-        super().__init__(marque, modele, annee, prix_journalier)
+    __slots__ = ('__nombre_portes',)
+
+    def __init__(self, marque, modele, annee, prix_journalier, nombre_portes, immatriculation: Optional[str] = None,
+                 identifiant: Optional[int] = None):
+        super().__init__(marque, modele, annee, prix_journalier, immatriculation, identifiant)
         self.__nombre_portes = nombre_portes
 
     def get_nombre_portes(self):
@@ -115,14 +249,14 @@ class Voiture(Vehicule):
     def calculer_tarif_location(self, nb_jours):
         total = self.get_prix_journalier() * nb_jours
         # Réduction de 10 % si la location dépasse 7 jours
-        if nb_jours > 7:
-            total *= 0.9
+        if nb_jours > SEUIL_LONGUE_DUREE:
+            total *= REDUCTION_LONGUE_DUREE
         return total
 
     # Redéfinition de l’affichage des détails
-    def afficher_details(self):
-        print(f"Voiture : {self.get_marque()} {self.get_modele()} ({self.get_annee()}) - "
-              f"{self.get_nombre_portes()} portes - {self.get_prix_journalier()}fcfa/jour")
+    def details(self) -> str:
+        return (f"Voiture : {self.get_marque()} {self.get_modele()} ({self.get_annee()}) - "
+                f"{self.get_nombre_portes()} portes - {self.get_prix_journalier()}fcfa/jour")
 
     def to_dict(self) -> Dict[str, Any]:
         base = super().to_dict()
@@ -131,9 +265,12 @@ class Voiture(Vehicule):
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        v = cls(data.get('marque'), data.get('modele'), data.get('annee'), data.get('prix_journalier'), data.get('nombre_portes', 4))
+        v = cls(_interner(data.get('marque')), _interner(data.get('modele')), _interner(data.get('annee')),
+                data.get('prix_journalier'), data.get('nombre_portes', 4),
+                immatriculation=data.get('immatriculation'), identifiant=data.get('id'))
         v.set_disponibilite(data.get('disponible', True))
-        v.set_immatriculation(data.get('immatriculation'))
+        if data.get('reservations'):
+            v.set_calendrier(CalendrierReservations.from_list(data['reservations']))
         return v
 
 
@@ -145,8 +282,11 @@ class Voiture(Vehicule):
 # - Redéfinit les méthodes abstraites.
 # ===============================================================
 class Moto(Vehicule):
-    def __init__(self, marque, modele, annee, prix_journalier, cylindree: int = 500):
-        super().__init__(marque, modele, annee, prix_journalier)
+    __slots__ = ('__cylindree',)
+
+    def __init__(self, marque, modele, annee, prix_journalier, cylindree: int = 500, immatriculation: Optional[str] = None,
+                 identifiant: Optional[int] = None):
+        super().__init__(marque, modele, annee, prix_journalier, immatriculation, identifiant)
         self.__cylindree = cylindree
 
 
@@ -159,13 +299,13 @@ class Moto(Vehicule):
     def calculer_tarif_location(self, nb_jours):
         total = self.get_prix_journalier() * nb_jours
         # Surtaxe de 15 % pour les grosses cylindrées
-        if self.__cylindree > 600:
-            total *= 1.15
+        if self.get_cylindree() > SEUIL_CYLINDREE:
+            total *= SURTAXE_GROSSE_CYLINDREE
         return total
 
-    def afficher_details(self):
-        print(f"Moto : {self.get_marque()} {self.get_modele()} ({self.get_annee()}) - "
-              f"{self.get_cylindree()}cc - {self.get_prix_journalier()}fcfa/jour")
+    def details(self) -> str:
+        return (f"Moto : {self.get_marque()} {self.get_modele()} ({self.get_annee()}) - "
+                f"{self.get_cylindree()}cc - {self.get_prix_journalier()}fcfa/jour")
 
     def to_dict(self) -> Dict[str, Any]:
         base = super().to_dict()
@@ -174,9 +314,12 @@ class Moto(Vehicule):
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        m = cls(data.get('marque'), data.get('modele'), data.get('annee'), data.get('prix_journalier'), data.get('cylindree', 500))
+        m = cls(_interner(data.get('marque')), _interner(data.get('modele')), _interner(data.get('annee')),
+                data.get('prix_journalier'), data.get('cylindree', 500),
+                immatriculation=data.get('immatriculation'), identifiant=data.get('id'))
         m.set_disponibilite(data.get('disponible', True))
-        m.set_immatriculation(data.get('immatriculation'))
+        if data.get('reservations'):
+            m.set_calendrier(CalendrierReservations.from_list(data['reservations']))
         return m
 
 
@@ -185,37 +328,63 @@ class Moto(Vehicule):
 # ---------------------------------------------------------------
 # Rôle : Représente un client de l’entreprise.
 # - Un client peut avoir plusieurs contrats de location.
-# - Stocke les informations personnelles.
+# - Stocke les informations personnelles et un identifiant stable.
 # ===============================================================
 class Client:
-    def __init__(self, nom, prenom, telephone):
+    __slots__ = ('__identifiant', '__nom', '__prenom', '__telephone', '__observateur')
+    _prochain_id = 1
+
+    def __init__(self, nom, prenom, telephone, identifiant: Optional[int] = None):
+        self.__identifiant = Client._attribuer_id(identifiant)
         self.__nom = nom
         self.__prenom = prenom
         self.__telephone = telephone
+        self.__observateur = None
+
+    @staticmethod
+    def _attribuer_id(identifiant: Optional[int] = None) -> int:
+        if identifiant is None:
+            identifiant = Client._prochain_id
+        Client._prochain_id = max(Client._prochain_id, identifiant + 1)
+        return identifiant
+
+    def get_identifiant(self):
+        return self.__identifiant
+
+    def set_observateur(self, observateur):
+        self.__observateur = observateur
 
     def get_nom(self):
         return self.__nom
 
     def set_nom(self, nom):
         self.__nom = nom
+        if self.__observateur is not None:
+            self.__observateur.client_renomme(self)
 
     def get_prenom(self):
         return self.__prenom
 
     def set_prenom(self, prenom):
         self.__prenom = prenom
+        if self.__observateur is not None:
+            self.__observateur.client_renomme(self)
 
     def get_telephone(self):
         return self.__telephone
 
     def set_telephone(self, telephone):
+        ancien = self.__telephone
         self.__telephone = telephone
+        if self.__observateur is not None and ancien != telephone:
+            self.__observateur.telephone_modifie(self, ancien)
 
     def afficher_details(self):
         return (f"{self.__prenom} {self.__nom} - Tél: {self.__telephone}")
 
     def to_dict(self) -> Dict[str, Any]:
         return {
+            'id': self.__identifiant,
             'nom': self.__nom,
             'prenom': self.__prenom,
             'telephone': self.__telephone
@@ -223,24 +392,45 @@ class Client:
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        return cls(data.get('nom', ''), data.get('prenom', ''), data.get('telephone', ''))
+        return cls(_interner(data.get('nom', '')), _interner(data.get('prenom', '')), data.get('telephone', ''),
+                   identifiant=data.get('id'))
 
 
 # ===============================================================
 # 5. CLASSE CONTRATLOCATION
 # ---------------------------------------------------------------
-# Rôle : Associe un client à un véhicule pour une durée donnée.
+# Rôle : Associe un client à un véhicule pour une période donnée.
 # - Calcule le montant total de la location.
-# - Rend le véhicule indisponible pendant la période.
+# - Période [date_debut, date_fin) : date_debut vaut aujourd'hui par défaut
+#   et peut être future ; date_fin = date_debut + nb_jours (jour de retour).
+# - Réserve la période dans le calendrier du véhicule ; la réservation est
+#   atomique et échoue (ValueError) si elle chevauche une autre location.
+# - Les contrats de l'ancien format n'ont pas de dates (None).
+# - cloturer() enregistre le retour effectif du véhicule et libère sa
+#   réservation : un contrat clos quitte la liste des contrats actifs
+#   pour l'archive (voir archive_contrats.py).
+# - Sauvegardé avec les identifiants du client et du véhicule (références),
+#   pas avec des copies.
 # ===============================================================
 class ContratLocation:
-    def __init__(self, client, vehicule, nb_jours):
+    __slots__ = ('__client', '__vehicule', '__nb_jours', '__montant_total', '__mode_paiement',
+                 '__date_debut', '__date_fin', '__date_retour')
+
+    def __init__(self, client, vehicule, nb_jours, date_debut: Optional[date] = None):
+        if nb_jours < 1:
+            raise ValueError("La durée doit être d'au moins un jour.")
+        debut, fin = periode(date_debut, nb_jours)
+        # Le véhicule est réservé sur la période (vérification et réservation en une étape)
+        if not vehicule.reserver(debut, fin):
+            raise ValueError(f"Véhicule indisponible du {debut} au {fin}.")
         self.__client = client
         self.__vehicule = vehicule
         self.__nb_jours = nb_jours
+        self.__date_debut = debut
+        self.__date_fin = fin
         self.__montant_total = vehicule.calculer_tarif_location(nb_jours)
-        vehicule.set_disponibilite(False)  # Le véhicule n’est plus disponible
         self.__mode_paiement = None  # Optionnel: mode de paiement utilisé
+        self.__date_retour = None  # retour effectif (contrat clos)
 
     def get_client(self):
         return self.__client
@@ -254,15 +444,71 @@ class ContratLocation:
     def get_montant_total(self):
         return self.__montant_total
 
+    def get_date_debut(self) -> Optional[date]:
+        return self.__date_debut
+
+    def get_date_fin(self) -> Optional[date]:
+        return self.__date_fin
+
+    def get_date_retour(self) -> Optional[date]:
+        return self.__date_retour
+
+    def est_clos(self) -> bool:
+        return self.__date_retour is not None
+
+    def cle(self) -> Tuple[int, int, Optional[str]]:
+        """(client, véhicule, début) : un véhicule n'a qu'une location par date de début."""
+        return (self.__client.get_identifiant(), self.__vehicule.get_identifiant(),
+                self.__date_debut.isoformat() if self.__date_debut else None)
+
+    @staticmethod
+    def cle_dict(data: Dict[str, Any]) -> Tuple[int, int, Optional[str]]:
+        return data.get('client_id'), data.get('vehicule_id'), data.get('date_debut')
+
+    def cloturer(self, date_retour: Optional[date] = None):
+        """Retour du véhicule (aujourd'hui par défaut) : le contrat est clos et la réservation libérée.
+
+        Un retour anticipé rend le véhicule louable aussitôt ; un retour avant
+        le début vaut annulation. Le montant du contrat n'est pas modifié.
+        """
+        if self.__date_retour is not None:
+            raise ValueError(f"Contrat déjà clos (retour le {self.__date_retour}).")
+        date_retour = date_retour or aujourdhui()
+        if self.__date_debut is None:
+            # ancien format : sans calendrier, le véhicule redevient disponible
+            self.__vehicule.set_disponibilite(True)
+        elif not self.__vehicule.liberer(self.__date_debut, self.__date_fin):
+            print(f"⚠️ Réservation introuvable : {self.__date_debut} -> {self.__date_fin}")
+        self.__date_retour = date_retour
+
+    def rouvrir(self):
+        """Annule cloturer() (retour qui n'a pas pu être enregistré) : la période est de nouveau réservée."""
+        if self.__date_retour is None:
+            return
+        if self.__date_debut is None:
+            self.__vehicule.set_disponibilite(False)
+        elif not self.__vehicule.reserver(self.__date_debut, self.__date_fin):
+            raise ValueError(f"Véhicule de nouveau loué du {self.__date_debut} au {self.__date_fin}.")
+        self.__date_retour = None
+
     def afficher_details(self):
-        print("===== Contrat de location =====")
-        self.__client.afficher_details()
-        self.__vehicule.afficher_details()
-        print(f"Durée : {self.__nb_jours} jours")
-        print(f"Montant total : {self.__montant_total} fcfa")
+        print(self.details())
+
+    # Bloc de texte complet (construit en une fois, affiché en une fois)
+    def details(self) -> str:
+        lignes = ["===== Contrat de location =====",
+                  f"Client : {self.__client.afficher_details()}",
+                  self.__vehicule.details(),
+                  f"Durée : {self.__nb_jours} jours"]
+        if self.__date_debut is not None:
+            lignes.append(f"Période : du {self.__date_debut} au {self.__date_fin}")
+        if self.__date_retour is not None:
+            lignes.append(f"Retour effectif : {self.__date_retour} (contrat clos)")
+        lignes.append(f"Montant total : {self.__montant_total} fcfa")
         if self.__mode_paiement:
-            print(f"Mode de paiement : {self.__mode_paiement}")
-        print("===============================")
+            lignes.append(f"Mode de paiement : {self.__mode_paiement}")
+        lignes.append("===============================")
+        return "\n".join(lignes)
 
     def set_mode_paiement(self, mode):
         self.__mode_paiement = mode
@@ -271,27 +517,60 @@ class ContratLocation:
         return self.__mode_paiement
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            'client': self.__client.to_dict(),
-            'vehicule': self.__vehicule.to_dict(),
+        d = {
+            'client_id': self.__client.get_identifiant(),
+            'vehicule_id': self.__vehicule.get_identifiant(),
             'nb_jours': self.__nb_jours,
             'montant_total': self.__montant_total,
-            'mode_paiement': self.__mode_paiement.to_dict() if self.__mode_paiement else None
+            'mode_paiement': self.__mode_paiement.to_dict() if self.__mode_paiement else None,
+            'date_debut': self.__date_debut.isoformat() if self.__date_debut else None,
+            'date_fin': self.__date_fin.isoformat() if self.__date_fin else None,
         }
+        if self.__date_retour is not None:
+            # contrats clos seulement (archive) : les contrats actifs gardent le format d'origine
+            d['date_retour'] = self.__date_retour.isoformat()
+        return d
 
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]):
-        client = Client.from_dict(data.get('client', {}))
-        vehicule = Vehicule.from_dict(data.get('vehicule', {}))
+    def restaurer(cls, client, vehicule, nb_jours, montant_total, mode_paiement=None,
+                  date_debut: Optional[date] = None, date_retour: Optional[date] = None):
+        """Reconstruit un contrat sauvegardé sans effet de bord.
+
+        Contrairement au constructeur, le tarif n'est pas recalculé et le
+        calendrier du véhicule (déjà sauvegardé avec lui) n'est pas modifié.
+        """
+        contrat = cls.__new__(cls)
+        contrat.__client = client
+        contrat.__vehicule = vehicule
+        contrat.__nb_jours = nb_jours
+        contrat.__montant_total = montant_total
+        contrat.__mode_paiement = mode_paiement
+        contrat.__date_debut = date_debut
+        contrat.__date_fin = periode(date_debut, nb_jours)[1] if date_debut else None
+        contrat.__date_retour = date_retour
+        return contrat
+
+    def appliquer_reservation(self):
+        """Reporte sur le véhicule un contrat relu (rejeu du journal, autre stockage)."""
+        if self.__date_debut is None:
+            # ancien format : le véhicule reste indisponible
+            self.__vehicule.set_disponibilite(False)
+        elif not self.__vehicule.get_calendrier(creer=True).ajouter(self.__date_debut, self.__date_fin):
+            print(f"⚠️ Réservation en conflit ignorée : {self.__date_debut} -> {self.__date_fin}")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], clients_par_id: Dict[int, 'Client'],
+                  vehicules_par_id: Dict[int, 'Vehicule']):
+        client = clients_par_id[data['client_id']]
+        vehicule = vehicules_par_id[data['vehicule_id']]
         nb_jours = data.get('nb_jours', 1)
-        contrat = cls(client, vehicule, nb_jours)
-        # montant_total recalculé dans __init__ ; si présent on peut l'assigner
-        contrat.__montant_total = data.get('montant_total', contrat.get_montant_total())
+        montant = data.get('montant_total')
+        if montant is None:
+            montant = vehicule.calculer_tarif_location(nb_jours)
         # mode de paiement
         mp = data.get('mode_paiement')
-        if mp:
-            contrat.set_mode_paiement(ModePaiement.from_dict(mp))
-        return contrat
+        return cls.restaurer(client, vehicule, nb_jours, montant, ModePaiement.from_dict(mp) if mp else None,
+                             lire_date(data.get('date_debut')), lire_date(data.get('date_retour')))
 
 
 
@@ -301,32 +580,429 @@ class ContratLocation:
 # ==============================
 # Gestion des données
 # ==============================
+# Deux modes de persistance :
+# - simple : chaque mutation réécrit tout donnees.json (comportement historique) ;
+# - journalisé : chaque mutation ajoute une ligne à un journal, et le fichier
+#   donnees.json (snapshot) n'est réécrit qu'à la compaction, lorsque le journal
+#   atteint `seuil_compaction` enregistrements.
+# Option `paresseux` : le fichier est lu par blocs et les contrats ne sont
+# décodés qu'au premier accès à la liste (ex. affichage des contrats).
+# Option `compact` : véhicules et clients sont chargés dans des stores en
+# colonnes (voir stockage_compact.py) au lieu d'un objet par entité.
+# Option `format_` : 'json' (donnees.json lisible) ou 'binaire' (snapshot
+# projeté en mémoire, rechargement rapide ; voir snapshot_binaire.py).
+# Écritures concurrentes : un verrou (threads) et un fichier .lock
+# (processus) sérialisent les écritures ; le snapshot porte une version,
+# et si le fichier a changé depuis notre lecture, ConflitEcriture est levée
+# au lieu d'écraser les modifications d'un autre processus.
+# Contrats clos : retirés du snapshot, ils sont dans l'archive compressée
+# donnees.archive.jsonl.gz (get_archive, voir archive_contrats.py).
 class GestionnaireDonnees:
-    @staticmethod
-    def sauvegarder(vehicules, clients, contrats):
-        data = {
-            "vehicules": [v.to_dict() for v in vehicules],
-            "clients": [c.to_dict() for c in clients],
-            "contrats": [c.to_dict() for c in contrats]
-        }
-        with open("donnees.json", "w", encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        print("✅ Données sauvegardées dans donnees.json")
+    def __init__(self, chemin: str = "donnees.json", journalise: bool = False,
+                 seuil_compaction: int = 1000, chemin_journal: Optional[str] = None,
+                 paresseux: bool = False, compact: bool = False, format_: str = "json", processus: int = 1):
+        if format_ not in ("json", "binaire"):
+            raise ValueError(f"Format de snapshot inconnu : {format_}")
+        self.__chemin = chemin
+        self.__format = format_
+        self.__seuil_compaction = seuil_compaction
+        self.__paresseux = paresseux
+        self.__compact = compact
+        self.__processus = processus  # > 1 : décodage du JSON réparti sur un pool de processus
+        self.__version = 0  # version du snapshot lu ou écrit en dernier
+        self.__verrou = threading.RLock()
+        self.__chemin_verrou = chemin + ".lock"
+        self.__journal = None
+        if journalise:
+            self.__journal = Journal(chemin_journal or os.path.splitext(chemin)[0] + ".journal")
+        self.__archive = None
+
+    def get_chemin(self):
+        return self.__chemin
+
+    def get_archive(self):
+        if self.__archive is None:
+            self.__archive = ArchiveContrats(os.path.splitext(self.__chemin)[0] + ".archive.jsonl.gz")
+        return self.__archive
+
+    def get_format(self):
+        return self.__format
+
+    def est_journalise(self):
+        return self.__journal is not None
+
+    def get_version(self):
+        return self.__version
+
+    def sauvegarder(self, vehicules, clients, contrats):
+        with mesurer("sauvegarder"), self.__verrou, verrou_fichier(self.__chemin_verrou):
+            self.__sauvegarder_verrouille(vehicules, clients, contrats)
+
+    def __lire_version_disque(self) -> int:
+        # la version est en tête du fichier : lecture des seules métadonnées
+        if self.__format == "binaire":
+            from snapshot_binaire import SnapshotBinaire
+            try:
+                with SnapshotBinaire(self.__chemin) as snapshot:
+                    return snapshot.get_meta().get('version', 0)
+            except FileNotFoundError:
+                return 0
+        try:
+            with LecteurJSONProgressif(self.__chemin) as lecteur:
+                for cle, valeur in lecteur.parcourir(differer=('vehicules', 'clients', 'contrats')):
+                    if cle == 'version':
+                        return valeur
+        except FileNotFoundError:
+            pass
+        return 0
+
+    def __sauvegarder_verrouille(self, vehicules, clients, contrats):
+        if self.__lire_version_disque() != self.__version:
+            raise ConflitEcriture(f"{self.__chemin} a été modifié par un autre processus depuis le chargement")
+        meta = {"version": self.__version + 1}
+        # métadonnées en tête : la lecture progressive s'arrête avant les contrats
+        if self.__journal is not None:
+            meta["journal_seq"] = self.__journal.get_dernier_seq()
+        sections = (("vehicules", vehicules), ("clients", clients), ("contrats", contrats))
+        # écriture dans un fichier temporaire puis renommage : le snapshot
+        # n'est jamais à moitié écrit, même en cas d'arrêt brutal
+        temporaire = self.__chemin + ".tmp"
+        with mesurer("snapshot.ecriture"):
+            if self.__format == "binaire":
+                from snapshot_binaire import ecrire_snapshot
+                with open(temporaire, "wb") as f:
+                    ecrire_snapshot(f, meta, vehicules, clients, contrats)
+            else:
+                with open(temporaire, "w", encoding='utf-8') as f:
+                    self.ecrire_flux(f, meta, sections)
+            os.replace(temporaire, self.__chemin)
+        if est_actif():
+            compter_octets("ecrits", "snapshot", os.path.getsize(self.__chemin))
+        self.__version += 1
+        if self.__journal is not None:
+            self.__journal.vider()
+        print(f"✅ Données sauvegardées dans {self.__chemin}")
 
     @staticmethod
-    def charger():
+    def ecrire_flux(f, meta: Dict[str, Any], sections):
+        """Écrit le même JSON que json.dump(..., indent=4), entité par entité.
+
+        L'arbre complet des dicts n'est jamais construit : seule l'entité en
+        cours d'écriture est convertie par to_dict().
+        """
+        premier = True
+        f.write("{")
+        for cle, valeur in meta.items():
+            f.write(("\n" if premier else ",\n") + "    " + json.dumps(cle) + ": "
+                    + json.dumps(valeur, ensure_ascii=False))
+            premier = False
+        for cle, entites in sections:
+            f.write(("\n" if premier else ",\n") + "    " + json.dumps(cle) + ": [")
+            premier = False
+            vide = True
+            for e in entites:
+                texte = json.dumps(e.to_dict(), indent=4, ensure_ascii=False)
+                f.write(("\n" if vide else ",\n") + "        " + texte.replace("\n", "\n        "))
+                vide = False
+            f.write("]" if vide else "\n    ]")
+        f.write("}" if premier else "\n}")
+
+    def enregistrer(self, operation: str, donnees: Dict[str, Any], vehicules, clients, contrats):
+        """Persiste une mutation unique.
+
+        En mode simple, tout est réécrit ; en mode journalisé, seule la mutation
+        est ajoutée au journal, avec compaction au-delà du seuil.
+        """
+        self.enregistrer_lot([(operation, donnees)], vehicules, clients, contrats)
+
+    def enregistrer_lot(self, operations, vehicules, clients, contrats):
+        """Persiste plusieurs mutations en une écriture : un snapshot, ou un seul ajout au journal."""
+        with mesurer("enregistrer"), self.__verrou, verrou_fichier(self.__chemin_verrou):
+            if self.__journal is None:
+                self.__sauvegarder_verrouille(vehicules, clients, contrats)
+                return
+            self.__journal.ajouter_lot(operations)
+            if len(self.__journal) >= self.__seuil_compaction:
+                self.__sauvegarder_verrouille(vehicules, clients, contrats)
+
+    def charger(self):
+        with mesurer("charger"):
+            return self.__charger()
+
+    def __charger(self):
+        if self.__format == "binaire":
+            return self.__charger_binaire()
+        if self.__paresseux:
+            resultat = self.__charger_progressif()
+            if resultat is not None:
+                return resultat
+        elif self.__processus > 1:
+            resultat = self.__charger_parallele()
+            if resultat is not None:
+                return resultat
         try:
-            with open("donnees.json", "r", encoding='utf-8') as f:
+            with mesurer("charger.analyse_json"), open(self.__chemin, "r", encoding='utf-8') as f:
                 data = json.load(f)
                 print("✅ Données chargées avec succès")
-                # reconstruire objets
-                vehs = [Vehicule.from_dict(v) for v in data.get('vehicules', [])]
-                clts = [Client.from_dict(c) for c in data.get('clients', [])]
-                contrats = [ContratLocation.from_dict(c) for c in data.get('contrats', [])]
-                return {"vehicules": vehs, "clients": clts, "contrats": contrats}
+            if est_actif():
+                compter_octets("lus", "snapshot", os.path.getsize(self.__chemin))
+        except FileNotFoundError:
+            if self.__journal is None:
+                print("⚠️ Aucune donnée trouvée. Nouveau départ.")
+                vehs, clts = self.__collections()
+                return {"vehicules": vehs, "clients": clts, "contrats": []}
+            data = {}
+        # reconstruire objets : une seule instance par entité, puis liaison des contrats
+        vehs, clts = self.__collections()
+        with mesurer("charger.reconstruction"):
+            for v in data.get('vehicules', []):
+                self.__ajouter_dict(vehs, v, Vehicule.from_dict)
+            for c in data.get('clients', []):
+                self.__ajouter_dict(clts, c, Client.from_dict)
+        compter("vehicules_reconstruits", len(vehs))
+        compter("clients_reconstruits", len(clts))
+        vehicules_par_id = self.__par_identifiant(vehs)
+        clients_par_id = self.__par_identifiant(clts)
+        contrats = self.__lier_contrats(data.get('contrats', []), vehs, clts, vehicules_par_id, clients_par_id)
+        self.__version = data.get('version', 0)
+        self.__rejouer_journal(data.get('journal_seq', 0), vehs, clts, contrats, vehicules_par_id, clients_par_id)
+        return {"vehicules": vehs, "clients": clts, "contrats": contrats}
+
+    def __charger_progressif(self):
+        """Lecture par blocs ; None si une lecture complète est nécessaire."""
+        try:
+            lecteur = LecteurJSONProgressif(self.__chemin)
+        except FileNotFoundError:
+            return None
+        vehs, clts = self.__collections()
+        meta = {}
+        with lecteur:
+            for cle, valeur in lecteur.parcourir(differer=('contrats',)):
+                if cle == 'vehicules':
+                    self.__ajouter_dict(vehs, valeur, Vehicule.from_dict)
+                elif cle == 'clients':
+                    self.__ajouter_dict(clts, valeur, Client.from_dict)
+                else:
+                    meta[cle] = valeur
+            position = lecteur.get_position_differee('contrats')
+        compter("vehicules_reconstruits", len(vehs))
+        compter("clients_reconstruits", len(clts))
+        if est_actif():
+            compter_octets("lus", "snapshot", position if position is not None else os.path.getsize(self.__chemin))
+        if self.__journal is not None and 'journal_seq' not in meta:
+            # ancien snapshot où la séquence suit les contrats
+            return None
+        if position is not None:
+            with LecteurJSONProgressif(self.__chemin, position) as suite:
+                premier = next(suite.elements(), None)
+            if premier is not None and 'client_id' not in premier:
+                # ancien format : la migration peut ajouter clients et véhicules, qui
+                # doivent exister avant la construction des index
+                return None
+        vehicules_par_id = self.__par_identifiant(vehs)
+        clients_par_id = self.__par_identifiant(clts)
+        contrats = []
+        if position is not None:
+            chemin = self.__chemin
+            contrats = ListeDifferee(lambda: self.__lier_contrats(
+                lire_tableau(chemin, position), vehs, clts, vehicules_par_id, clients_par_id))
+        print("✅ Données chargées avec succès (contrats chargés à la demande)")
+        self.__version = meta.get('version', 0)
+        self.__rejouer_journal(meta.get('journal_seq', 0), vehs, clts, contrats, vehicules_par_id, clients_par_id)
+        return {"vehicules": vehs, "clients": clts, "contrats": contrats}
+
+    def __charger_parallele(self):
+        """Décodage sur plusieurs processus ; None si une lecture normale est nécessaire."""
+        from chargement_parallele import FormatNonPris, charger_parallele
+        vehs, clts = self.__collections()
+        try:
+            meta, contrats = charger_parallele(self.__chemin, self.__processus, vehs, clts, self.__par_identifiant)
+        except (FileNotFoundError, FormatNonPris):
+            return None
+        if self.__journal is not None and 'journal_seq' not in meta:
+            return None  # ancien snapshot où la séquence suit les contrats
+        if est_actif():
+            compter_octets("lus", "snapshot", os.path.getsize(self.__chemin))
+        print(f"✅ Données chargées avec succès ({self.__processus} processus)")
+        self.__version = meta.get('version', 0)
+        self.__rejouer_journal(meta.get('journal_seq', 0), vehs, clts, contrats,
+                               self.__par_identifiant(vehs), self.__par_identifiant(clts))
+        return {"vehicules": vehs, "clients": clts, "contrats": contrats}
+
+    def __charger_binaire(self):
+        """Snapshot projeté en mémoire ; les contrats sont décodés au premier accès."""
+        from snapshot_binaire import SnapshotBinaire
+        vehs, clts = self.__collections()
+        try:
+            snapshot = SnapshotBinaire(self.__chemin)
         except FileNotFoundError:
             print("⚠️ Aucune donnée trouvée. Nouveau départ.")
-            return {"vehicules": [], "clients": [], "contrats": []}
+            self.__version = 0
+            contrats = []
+            self.__rejouer_journal(0, vehs, clts, contrats, {}, {})
+            return {"vehicules": vehs, "clients": clts, "contrats": contrats}
+        meta = snapshot.get_meta()
+        with mesurer("charger.reconstruction"):
+            snapshot.charger_vehicules(vehs)
+            snapshot.charger_clients(clts)
+        compter("vehicules_reconstruits", len(vehs))
+        compter("clients_reconstruits", len(clts))
+        if est_actif():
+            compter_octets("lus", "snapshot", os.path.getsize(self.__chemin))
+        vehicules_par_id = self.__par_identifiant(vehs)
+        clients_par_id = self.__par_identifiant(clts)
+
+        def lire_contrats():
+            with snapshot, mesurer("charger.contrats"):
+                contrats = snapshot.contrats(clients_par_id, vehicules_par_id)
+            compter("contrats_reconstruits", len(contrats))
+            return contrats
+        if snapshot.nb_contrats():
+            contrats = ListeDifferee(lire_contrats)
+        else:
+            snapshot.fermer()
+            contrats = []
+        print("✅ Données chargées avec succès (snapshot binaire)")
+        self.__version = meta.get('version', 0)
+        self.__rejouer_journal(meta.get('journal_seq', 0), vehs, clts, contrats, vehicules_par_id, clients_par_id)
+        return {"vehicules": vehs, "clients": clts, "contrats": contrats}
+
+    def __collections(self):
+        if self.__compact:
+            from stockage_compact import VehiculeStore, ClientStore
+            return VehiculeStore(), ClientStore()
+        return [], []
+
+    @staticmethod
+    def __ajouter_dict(collection, data, fabrique):
+        if isinstance(collection, list):
+            collection.append(fabrique(data))
+        else:
+            collection.ajouter_dict(data)
+
+    @staticmethod
+    def __par_identifiant(collection):
+        if isinstance(collection, list):
+            return {e.get_identifiant(): e for e in collection}
+        return collection.par_identifiant()
+
+    @staticmethod
+    def __lier_contrats(enregistrements, vehs, clts, vehicules_par_id, clients_par_id):
+        with mesurer("charger.contrats"):
+            contrats = GestionnaireDonnees.__lier(enregistrements, vehs, clts, vehicules_par_id, clients_par_id)
+        compter("contrats_reconstruits", len(contrats))
+        return contrats
+
+    @staticmethod
+    def __lier(enregistrements, vehs, clts, vehicules_par_id, clients_par_id):
+        contrats = []
+        migration = None
+        for c in enregistrements:
+            if 'client_id' in c:
+                contrats.append(ContratLocation.from_dict(c, clients_par_id, vehicules_par_id))
+            else:
+                # ancien format : client et véhicule copiés dans chaque contrat
+                if migration is None:
+                    migration = _MigrationContrats(vehs, clts, vehicules_par_id, clients_par_id)
+                contrats.append(migration.convertir(c))
+        if migration is not None:
+            print(f"⚠️ {migration.get_nb_convertis()} contrat(s) converti(s) vers le format par référence")
+        return contrats
+
+    def __rejouer_journal(self, seq_snapshot, vehs, clts, contrats, vehicules_par_id, clients_par_id):
+        if self.__journal is None:
+            return
+        self.__journal.set_dernier_seq(seq_snapshot)
+        with mesurer("journal.rejeu"):
+            for enreg in self.__journal.relire(seq_snapshot):
+                self.__rejouer(enreg, vehs, clts, contrats, vehicules_par_id, clients_par_id)
+
+    @staticmethod
+    def __rejouer(enreg: Dict[str, Any], vehicules, clients, contrats, vehicules_par_id, clients_par_id):
+        op = enreg.get('op')
+        donnees = enreg.get('donnees', {})
+        # après append, [-1] est l'objet lui-même ou sa vue dans un store compact
+        if op == 'ajout_vehicule':
+            vehicules.append(Vehicule.from_dict(donnees))
+            v = vehicules[-1]
+            vehicules_par_id[v.get_identifiant()] = v
+        elif op == 'ajout_client':
+            clients.append(Client.from_dict(donnees))
+            c = clients[-1]
+            clients_par_id[c.get_identifiant()] = c
+        elif op == 'creation_contrat':
+            contrat = ContratLocation.from_dict(donnees, clients_par_id, vehicules_par_id)
+            # la réservation a été faite après le dernier snapshot
+            contrat.appliquer_reservation()
+            contrats.append(contrat)
+        elif op == 'cloture_contrat':
+            # le contrat est déjà dans l'archive : il quitte seulement les contrats actifs
+            cle = ContratLocation.cle_dict(donnees)
+            for i in range(len(contrats) - 1, -1, -1):
+                if contrats[i].cle() == cle:
+                    contrats[i].cloturer(lire_date(donnees.get('date_retour')))
+                    del contrats[i]
+                    break
+            else:
+                print(f"⚠️ Contrat à clore introuvable (ignoré) : {cle}")
+        else:
+            raise ValueError(f"Opération de journal inconnue : {op}")
+
+
+class _MigrationContrats:
+    """Convertit les contrats de l'ancien format (copies intégrées).
+
+    Le client et le véhicule copiés sont rapprochés des entités déjà chargées
+    (immatriculation ou caractéristiques pour un véhicule, nom/prénom/téléphone
+    pour un client) ; sans correspondance, l'entité est ajoutée une seule fois.
+    """
+    def __init__(self, vehicules, clients, vehicules_par_id, clients_par_id):
+        self.__vehicules = vehicules
+        self.__clients = clients
+        self.__vehicules_par_id = vehicules_par_id
+        self.__clients_par_id = clients_par_id
+        self.__vehicules_par_cle = {self.__cle_vehicule(v.to_dict()): v for v in vehicules}
+        self.__clients_par_cle = {self.__cle_client(c.to_dict()): c for c in clients}
+        self.__nb_convertis = 0
+
+    def get_nb_convertis(self):
+        return self.__nb_convertis
+
+    @staticmethod
+    def __cle_vehicule(d: Dict[str, Any]):
+        if d.get('immatriculation'):
+            return ('immatriculation', d['immatriculation'])
+        return (d.get('type'), d.get('marque'), d.get('modele'), d.get('annee'), d.get('prix_journalier'))
+
+    @staticmethod
+    def __cle_client(d: Dict[str, Any]):
+        return (d.get('nom', ''), d.get('prenom', ''), d.get('telephone', ''))
+
+    def convertir(self, data: Dict[str, Any]) -> 'ContratLocation':
+        d_client = data.get('client', {})
+        cle = self.__cle_client(d_client)
+        client = self.__clients_par_cle.get(cle)
+        if client is None:
+            self.__clients.append(Client.from_dict(d_client))
+            client = self.__clients[-1]
+            self.__clients_par_id[client.get_identifiant()] = client
+            self.__clients_par_cle[cle] = client
+        d_vehicule = data.get('vehicule', {})
+        cle = self.__cle_vehicule(d_vehicule)
+        vehicule = self.__vehicules_par_cle.get(cle)
+        if vehicule is None:
+            self.__vehicules.append(Vehicule.from_dict(d_vehicule))
+            vehicule = self.__vehicules[-1]
+            self.__vehicules_par_id[vehicule.get_identifiant()] = vehicule
+            self.__vehicules_par_cle[cle] = vehicule
+        nb_jours = data.get('nb_jours', 1)
+        montant = data.get('montant_total')
+        if montant is None:
+            montant = vehicule.calculer_tarif_location(nb_jours)
+        mp = data.get('mode_paiement')
+        self.__nb_convertis += 1
+        return ContratLocation.restaurer(client, vehicule, nb_jours, montant,
+                                         ModePaiement.from_dict(mp) if mp else None)
 
 
 # --------------------------------------------------
@@ -337,6 +1013,8 @@ class ModePaiement:
 
     Attributs : type ('carte' ou 'virement') et details (dict avec info pertinentes).
     """
+    __slots__ = ('type_mode', 'details')
+
     def __init__(self, type_mode: str, details: Optional[Dict[str, Any]] = None):
         self.type_mode = type_mode
         self.details = details or {}
@@ -349,7 +1027,7 @@ class ModePaiement:
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        return cls(data.get('type_mode', 'unknown'), data.get('details', {}))
+        return cls(_interner(data.get('type_mode', 'unknown')), data.get('details', {}))
 
 # Alias francophone pour compatibilité si utilisé ailleurs
 ModePaiement = ModePaiement
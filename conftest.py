@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+
+from classes import Client, ModePaiement, Moto, Voiture
+from main import SystemeLocation
+
+DEBUT = date(2030, 1, 1)  # dans le futur : les disponibilités du jour ne changent pas
+
+
+@pytest.fixture(autouse=True)
+def dossier_de_travail(tmp_path, monkeypatch):
+    # SystemeLocation() sans stockage lit et écrit donnees.json dans le dossier courant
+    monkeypatch.chdir(tmp_path)
+
+
+def etat(systeme):
+    """Tout l'état persistant d'un système, comparable d'un stockage à l'autre."""
+    return {
+        'vehicules': sorted((v.to_dict() for v in systeme.get_vehicule()), key=lambda d: d['id']),
+        'clients': sorted((c.to_dict() for c in systeme.get_client()), key=lambda d: d['id']),
+        'contrats': sorted((c.to_dict() for c in systeme.get_contrat()),
+                           key=lambda d: (d['client_id'], d['vehicule_id'], d['date_debut'])),
+        'archives': sorted((c.to_dict() for c in systeme.contrats_archives()),
+                           key=lambda d: (d['client_id'], d['vehicule_id'], d['date_debut'])),
+    }
+
+
+@pytest.fixture
+def peupler():
+    """Ajoute 3 véhicules, 2 clients et 3 contrats (dont un clos), enregistrés mutation par mutation."""
+    def peupler(systeme: SystemeLocation):
+        vehicules = [systeme.integrer_vehicule(Voiture("Toyota", "Corolla", 2020, 15000, 5, immatriculation="AA-001")),
+                     systeme.integrer_vehicule(Voiture("Kia", "Rio", 2019, 12000, 3, immatriculation="AA-002")),
+                     systeme.integrer_vehicule(Moto("Yamaha", "MT", 2021, 8000, 700, immatriculation="MM-001"))]
+        clients = [systeme.integrer_client(Client("Kouassi", "Awa", "0701020304")),
+                   systeme.integrer_client(Client("Traoré", "Moussa", "0505050505"))]
+        for v in vehicules:
+            systeme.enregistrer_mutation('ajout_vehicule', v.to_dict())
+        for c in clients:
+            systeme.enregistrer_mutation('ajout_client', c.to_dict())
+        contrats = [systeme.louer(clients[0], vehicules[0], 3, DEBUT),
+                    systeme.louer(clients[1], vehicules[2], 10, DEBUT),
+                    systeme.louer(clients[1], vehicules[0], 2, date(2030, 2, 1))]
+        contrats[1].set_mode_paiement(ModePaiement("carte", {"fin": "4242"}))
+        for contrat in contrats:
+            systeme.enregistrer_mutation('creation_contrat', contrat.to_dict())
+        systeme.retourner(contrats[2], date(2030, 2, 2))
+        systeme.enregistrer_cloture(contrats[2])
+        return vehicules, clients, contrats
+    return peupler
+
+
+def verifier_aller_retour(fabrique, peupler):
+    """Peuple un système mutation par mutation, le ferme, puis vérifie qu'un rechargement retrouve tout."""
+    systeme = SystemeLocation(fabrique())
+    vehicules, clients, contrats = peupler(systeme)
+    attendu = etat(systeme)
+    assert len(attendu['contrats']) == 2 and len(attendu['archives']) == 1
+    montant = systeme.get_rapports().total().montant
+    systeme.fermer()
+
+    relu = SystemeLocation(fabrique())
+    assert etat(relu) == attendu
+    assert relu.get_rapports().verifier() == []
+    assert relu.get_rapports().total().montant == pytest.approx(montant)
+    # réservations reconstruites : le contrat clos a libéré sa période
+    corolla = relu.trouver_vehicule("AA-001")
+    assert not corolla.est_libre(DEBUT, date(2030, 1, 2))
+    assert corolla.est_libre(date(2030, 2, 1), date(2030, 2, 3))
+    moto = next(c for c in relu.get_contrat() if c.get_vehicule().get_immatriculation() == "MM-001")
+    assert moto.get_mode_paiement().to_dict() == contrats[1].get_mode_paiement().to_dict()
+    relu.fermer()
+
+
+def verifier_sauvegarde_complete(fabrique, peupler):
+    """Sauvegarde complète, rechargement, puis seconde sauvegarde complète sans effet sur l'état."""
+    systeme = SystemeLocation(fabrique())
+    peupler(systeme)
+    systeme.sauvegarder_donnees()
+    attendu = etat(systeme)
+    systeme.fermer()
+
+    for _ in range(2):
+        relu = SystemeLocation(fabrique())
+        assert etat(relu) == attendu
+        relu.sauvegarder_donnees()
+        relu.fermer()
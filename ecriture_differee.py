@@ -0,0 +1,231 @@
+import contextlib
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from classes import GestionnaireDonnees
+from instrumentation import compter, mesurer
+from verrous import ConflitEcriture
+
+
+class ErreurSauvegarde(Exception):
+    """Des modifications n'ont pas pu être écrites sur disque."""
+
+
+# ===============================================================
+# SAUVEGARDE DIFFÉRÉE (write-behind)
+# ---------------------------------------------------------------
+# Rôle : Rendre la main tout de suite après une mutation ; un thread
+#        d'arrière-plan écrit plus tard, en regroupant les rafales.
+# - S'utilise à la place du stockage (même interface charger /
+#   sauvegarder / enregistrer) et enveloppe GestionnaireDonnees ou
+#   StockageSQLite.
+# - Écriture déclenchée après `delai` secondes depuis la plus ancienne
+#   mutation en attente, ou dès `lot` mutations, ou par vider().
+# - Snapshot JSON/binaire sans journal : toutes les mutations en attente
+#   donnent une seule réécriture (fichier temporaire puis renommage, fait
+#   par GestionnaireDonnees). Journal, SQLite ou stockage fragmenté :
+#   le lot en une écriture (enregistrer_lot : un ajout au journal, une
+#   transaction, chaque fragment touché écrit une fois), dans l'ordre.
+# - enregistrer_lot() met plusieurs mutations en attente d'un coup
+#   (réservations en lot) ; elles partent dans la même écriture.
+# - Une erreur d'écriture n'est jamais ignorée : elle est affichée, les
+#   mutations restent en attente et une nouvelle tentative suit après
+#   `delai`. Un ConflitEcriture (autre processus) n'est pas retenté ; les
+#   mutations suivantes lèvent ErreurSauvegarde. vider() et fermer()
+#   lèvent ErreurSauvegarde s'il reste des modifications non écrites.
+# - Les listes sont parcourues pendant l'écriture, dans le thread
+#   d'arrière-plan : set_verrou() donne le verrou qui les protège
+#   (SystemeLocation le fait), pris autour de chaque écriture.
+# ===============================================================
+class SauvegardeDifferee:
+    def __init__(self, gestionnaire, delai: float = 1.0, lot: int = 100):
+        if delai < 0 or lot < 1:
+            raise ValueError("delai >= 0 et lot >= 1 attendus")
+        self.__gestionnaire = gestionnaire
+        self.__delai = delai
+        self.__lot = lot
+        self.__regrouper = isinstance(gestionnaire, GestionnaireDonnees) and not gestionnaire.est_journalise()
+        self.__condition = threading.Condition()
+        self.__attente: List[Tuple[str, Dict[str, Any]]] = []
+        self.__collections = None
+        self.__premiere: Optional[float] = None  # instant de la plus ancienne mutation en attente
+        self.__en_cours = False
+        self.__urgent = False
+        self.__tentatives = 0
+        self.__nb_ecritures = 0
+        self.__erreur: Optional[Exception] = None
+        self.__fermee = False
+        self.__thread: Optional[threading.Thread] = None
+        self.__verrou = contextlib.nullcontext()
+
+    def set_verrou(self, verrou):
+        self.__verrou = verrou
+
+    def get_gestionnaire(self):
+        return self.__gestionnaire
+
+    def get_archive(self):
+        # l'archive est écrite tout de suite (ajout seul), seul l'état actif est différé
+        return self.__gestionnaire.get_archive()
+
+    def get_nb_ecritures(self):
+        return self.__nb_ecritures
+
+    def get_erreur(self):
+        return self.__erreur
+
+    def nb_en_attente(self):
+        with self.__condition:
+            return len(self.__attente)
+
+    # --- Interface commune avec GestionnaireDonnees ---
+    def charger(self):
+        return self.__gestionnaire.charger()
+
+    def sauvegarder(self, vehicules, clients, contrats):
+        """Écriture complète immédiate ; elle remplace les mutations en attente."""
+        with self.__condition:
+            while self.__en_cours:
+                self.__condition.wait()
+            self.__en_cours = True
+            remplacees, self.__attente = self.__attente, []
+            self.__premiere = None
+        try:
+            with self.__verrou:
+                self.__gestionnaire.sauvegarder(vehicules, clients, contrats)
+        except Exception:
+            with self.__condition:
+                self.__attente[:0] = remplacees
+                if self.__attente:
+                    self.__premiere = time.monotonic()
+            raise
+        else:
+            with self.__condition:
+                self.__erreur = None
+        finally:
+            with self.__condition:
+                self.__en_cours = False
+                self.__condition.notify_all()
+
+    def enregistrer(self, operation: str, donnees: Dict[str, Any], vehicules, clients, contrats):
+        self.enregistrer_lot([(operation, donnees)], vehicules, clients, contrats)
+
+    def enregistrer_lot(self, operations, vehicules, clients, contrats):
+        with self.__condition:
+            if self.__fermee:
+                raise ErreurSauvegarde("Sauvegarde différée déjà fermée")
+            self.__attente.extend(operations)
+            self.__collections = (vehicules, clients, contrats)
+            if self.__premiere is None:
+                self.__premiere = time.monotonic()
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__boucle, name="sauvegarde-differee", daemon=True)
+                self.__thread.start()
+            self.__condition.notify_all()
+            if isinstance(self.__erreur, ConflitEcriture):
+                raise ErreurSauvegarde(f"{len(self.__attente)} modification(s) non enregistrée(s) : {self.__erreur}")
+
+    def vider(self):
+        """Écrit tout de suite les mutations en attente et attend la fin de l'écriture."""
+        with self.__condition:
+            if self.__thread is None:
+                return
+            tentatives = self.__tentatives
+            while (self.__attente or self.__en_cours) and self.__thread.is_alive():
+                if self.__tentatives > tentatives and not self.__en_cours and self.__erreur is not None:
+                    break  # la tentative forcée a échoué
+                self.__urgent = True
+                self.__condition.notify_all()
+                self.__condition.wait()
+            self.__urgent = False
+            if self.__attente:
+                raise ErreurSauvegarde(f"{len(self.__attente)} modification(s) non enregistrée(s) : {self.__erreur}")
+
+    def fermer(self):
+        """Vide puis arrête le thread ; ferme ensuite le stockage s'il le permet."""
+        try:
+            self.vider()
+        finally:
+            with self.__condition:
+                self.__fermee = True
+                self.__condition.notify_all()
+            if self.__thread is not None:
+                self.__thread.join()
+            fermer = getattr(self.__gestionnaire, 'fermer', None)
+            if fermer is not None:
+                fermer()
+
+    # --- Thread d'écriture ---
+    def __prochaine_ecriture(self):
+        # appelé sous la condition : attend qu'une écriture soit due
+        while True:
+            if self.__fermee:
+                return None
+            if self.__en_cours:
+                self.__condition.wait()  # sauvegarder() écrit déjà
+                continue
+            if self.__attente:
+                if self.__urgent or (len(self.__attente) >= self.__lot and self.__erreur is None):
+                    break
+                if isinstance(self.__erreur, ConflitEcriture):
+                    self.__condition.wait()
+                    continue
+                reste = self.__premiere + self.__delai - time.monotonic()
+                if reste <= 0:
+                    break
+                self.__condition.wait(reste)
+            else:
+                self.__condition.wait()
+        operations, self.__attente = self.__attente, []
+        self.__premiere = None
+        self.__urgent = False  # demande de vider() prise en compte
+        self.__en_cours = True
+        return operations, self.__collections
+
+    def __boucle(self):
+        while True:
+            with self.__condition:
+                travail = self.__prochaine_ecriture()
+            if travail is None:
+                return
+            operations, collections = travail
+            fait, erreur = self.__ecrire(operations, collections)
+            with self.__condition:
+                self.__en_cours = False
+                self.__tentatives += 1
+                if erreur is None:
+                    self.__erreur = None
+                    self.__nb_ecritures += 1
+                else:
+                    # remises en tête, dans l'ordre, pour la prochaine tentative
+                    self.__attente[:0] = operations[fait:]
+                    self.__premiere = time.monotonic()
+                    self.__erreur = erreur
+                    suite = "abandon (autre processus)" if isinstance(erreur, ConflitEcriture) \
+                        else f"nouvel essai dans {self.__delai:g} s"
+                    print(f"⚠️ Échec de la sauvegarde en arrière-plan ({len(self.__attente)} modification(s) "
+                          f"en attente) : {erreur} — {suite}", file=sys.stderr)
+                self.__condition.notify_all()
+
+    def __ecrire(self, operations, collections) -> Tuple[int, Optional[Exception]]:
+        """Nombre de mutations écrites et erreur éventuelle."""
+        compter("sauvegarde_differee.mutations", len(operations))
+        fait = 0
+        try:
+            with mesurer("sauvegarde_differee.ecriture"), self.__verrou:
+                if self.__regrouper:
+                    self.__gestionnaire.sauvegarder(*collections)
+                    return len(operations), None
+                enregistrer_lot = getattr(self.__gestionnaire, 'enregistrer_lot', None)
+                if enregistrer_lot is not None:
+                    # une écriture pour tout le lot (journal, transaction, fragments touchés)
+                    enregistrer_lot(operations, *collections)
+                    return len(operations), None
+                for operation, donnees in operations:
+                    self.__gestionnaire.enregistrer(operation, donnees, *collections)
+                    fait += 1
+                return fait, None
+        except Exception as e:
+            return fait, e
@@ -0,0 +1,321 @@
+import argparse
+import csv
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from calendrier import lire_date
+from classes import Voiture, Moto, Client, ContratLocation, ModePaiement
+
+
+# ===============================================================
+# IMPORT / EXPORT EN MASSE (CSV et JSON Lines)
+# ---------------------------------------------------------------
+# Rôle : Charger ou extraire de gros volumes sans passer par les menus.
+# - Import : lecture en flux, validation ligne par ligne, dédoublonnage
+#   sur l'immatriculation (véhicules) et le téléphone (clients), ajout
+#   par lots, puis UNE seule sauvegarde à la fin.
+# - Les contrats importés désignent client et véhicule par téléphone et
+#   immatriculation (les identifiants internes d'un autre système n'ont
+#   pas de sens ici ; les colonnes `id` éventuelles sont ignorées).
+#   `date_debut` est optionnelle (aujourd'hui par défaut) ; `date_fin` est
+#   recalculée à partir de nb_jours.
+# - Export : écriture entité par entité, sans construire toute la liste
+#   des dicts en mémoire.
+# ===============================================================
+COLLECTIONS = ('vehicules', 'clients', 'contrats')
+
+COLONNES = {
+    'vehicules': ['id', 'type', 'marque', 'modele', 'annee', 'prix_journalier', 'disponible',
+                  'immatriculation', 'nombre_portes', 'cylindree'],
+    'clients': ['id', 'nom', 'prenom', 'telephone'],
+    'contrats': ['client_id', 'vehicule_id', 'telephone', 'immatriculation', 'nb_jours',
+                 'date_debut', 'date_fin', 'montant_total', 'mode_paiement'],
+}
+
+
+class RapportImport:
+    def __init__(self, collection: str):
+        self.collection = collection
+        self.ajoutes = 0
+        self.doublons = 0
+        self.erreurs: List[Tuple[int, str]] = []  # (numéro de ligne, message)
+
+    def __str__(self):
+        texte = (f"{self.collection} : {self.ajoutes} ajouté(s), {self.doublons} doublon(s) ignoré(s), "
+                 f"{len(self.erreurs)} erreur(s)")
+        for ligne, message in self.erreurs[:20]:
+            texte += f"\n  ligne {ligne} : {message}"
+        if len(self.erreurs) > 20:
+            texte += f"\n  ... {len(self.erreurs) - 20} autre(s)"
+        return texte
+
+
+def detecter_format(chemin: str, format_: Optional[str] = None) -> str:
+    if format_:
+        return format_
+    ext = os.path.splitext(chemin)[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    raise ValueError(f"Format inconnu pour {chemin} (utiliser .csv ou .jsonl)")
+
+
+# ---------------------------------------------------------------
+# Lecture en flux
+# ---------------------------------------------------------------
+def lire_enregistrements(chemin: str, format_: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Produit (numéro de ligne, enregistrement) sans charger tout le fichier.
+
+    Une ligne JSON illisible produit une ValueError à la place de
+    l'enregistrement : elle est rapportée sans interrompre l'import.
+    """
+    format_ = detecter_format(chemin, format_)
+    with open(chemin, "r", encoding='utf-8', newline='') as f:
+        if format_ == 'csv':
+            lecteur = csv.DictReader(f)
+            for enreg in lecteur:
+                # cellules vides = valeur absente
+                yield lecteur.line_num, {k: v for k, v in enreg.items() if k and v not in (None, '')}
+        else:
+            for num, ligne in enumerate(f, start=1):
+                if ligne.strip():
+                    try:
+                        enreg = json.loads(ligne)
+                    except ValueError as e:
+                        yield num, ValueError(f"ligne JSON illisible : {e}")
+                        continue
+                    if not isinstance(enreg, dict):
+                        yield num, ValueError("ligne JSON illisible : objet attendu")
+                        continue
+                    yield num, enreg
+
+
+# ---------------------------------------------------------------
+# Validation
+# ---------------------------------------------------------------
+def _texte(enreg, cle, obligatoire=True):
+    valeur = enreg.get(cle)
+    if valeur is None or str(valeur).strip() == '':
+        if obligatoire:
+            raise ValueError(f"champ '{cle}' manquant")
+        return None
+    return str(valeur).strip()
+
+
+def _nombre(enreg, cle, conversion, defaut=None, minimum=None):
+    valeur = enreg.get(cle)
+    if valeur is None or valeur == '':
+        if defaut is None:
+            raise ValueError(f"champ '{cle}' manquant")
+        return defaut
+    try:
+        nombre = conversion(valeur)
+    except (TypeError, ValueError):
+        raise ValueError(f"champ '{cle}' invalide : {valeur!r}")
+    if minimum is not None and nombre < minimum:
+        raise ValueError(f"champ '{cle}' doit être >= {minimum} : {valeur!r}")
+    return nombre
+
+
+def _booleen(valeur, defaut=True):
+    if valeur is None or valeur == '':
+        return defaut
+    if isinstance(valeur, bool):
+        return valeur
+    texte = str(valeur).strip().lower()
+    if texte in ('1', 'true', 'vrai', 'oui', 'yes'):
+        return True
+    if texte in ('0', 'false', 'faux', 'non', 'no'):
+        return False
+    raise ValueError(f"champ 'disponible' invalide : {valeur!r}")
+
+
+def construire_vehicule(enreg: Dict[str, Any]):
+    typ = _texte(enreg, 'type').lower()
+    marque = _texte(enreg, 'marque')
+    modele = _texte(enreg, 'modele')
+    annee = _texte(enreg, 'annee', obligatoire=False)
+    prix = _nombre(enreg, 'prix_journalier', float, minimum=0)
+    immatriculation = _texte(enreg, 'immatriculation')
+    if typ == 'voiture':
+        v = Voiture(marque, modele, annee, prix, _nombre(enreg, 'nombre_portes', int, defaut=4, minimum=1),
+                    immatriculation=immatriculation)
+    elif typ == 'moto':
+        v = Moto(marque, modele, annee, prix, _nombre(enreg, 'cylindree', int, defaut=500, minimum=1),
+                 immatriculation=immatriculation)
+    else:
+        raise ValueError(f"type de véhicule invalide : {enreg.get('type')!r}")
+    v.set_disponibilite(_booleen(enreg.get('disponible')))
+    return v
+
+
+def _mode_paiement(enreg):
+    # objet JSON (texte en CSV) {"type_mode": ..., "details": {...}}
+    valeur = enreg.get('mode_paiement')
+    if valeur is None or valeur == '':
+        return None
+    if isinstance(valeur, str):
+        try:
+            valeur = json.loads(valeur)
+        except ValueError:
+            raise ValueError(f"champ 'mode_paiement' invalide : {enreg['mode_paiement']!r}")
+    if not isinstance(valeur, dict) or not isinstance(valeur.get('details', {}), dict):
+        raise ValueError(f"champ 'mode_paiement' invalide : {enreg['mode_paiement']!r}")
+    return ModePaiement.from_dict(valeur)
+
+
+def construire_client(enreg: Dict[str, Any]):
+    return Client(_texte(enreg, 'nom'), _texte(enreg, 'prenom', obligatoire=False) or '', _texte(enreg, 'telephone'))
+
+
+# ---------------------------------------------------------------
+# Import
+# ---------------------------------------------------------------
+class ImportateurMasse:
+    """Importe des fichiers dans un SystemeLocation, avec une seule sauvegarde finale."""
+
+    def __init__(self, systeme, taille_lot: int = 1000):
+        self.__systeme = systeme
+        self.__taille_lot = taille_lot
+        self.__modifie = False
+
+    def importer(self, collection: str, chemin: str, format_: Optional[str] = None) -> RapportImport:
+        if collection not in COLLECTIONS:
+            raise ValueError(f"Collection inconnue : {collection}")
+        rapport = RapportImport(collection)
+        lot = []
+        cles_du_lot = set()  # doublons internes au lot pas encore indexé
+        for num, enreg in lire_enregistrements(chemin, format_):
+            if isinstance(enreg, ValueError):
+                rapport.erreurs.append((num, str(enreg)))
+                continue
+            try:
+                if collection == 'vehicules':
+                    cle = _texte(enreg, 'immatriculation')
+                    if cle in cles_du_lot or self.__systeme.trouver_vehicule(cle) is not None:
+                        rapport.doublons += 1
+                        continue
+                    lot.append(construire_vehicule(enreg))
+                elif collection == 'clients':
+                    cle = _texte(enreg, 'telephone')
+                    if cle in cles_du_lot or self.__systeme.trouver_client(cle) is not None:
+                        rapport.doublons += 1
+                        continue
+                    lot.append(construire_client(enreg))
+                else:
+                    # un contrat change la disponibilité : il est intégré tout de suite
+                    self.__importer_contrat(enreg)
+                    rapport.ajoutes += 1
+                    self.__modifie = True
+                    continue
+            except ValueError as e:
+                rapport.erreurs.append((num, str(e)))
+                continue
+            cles_du_lot.add(cle)
+            if len(lot) >= self.__taille_lot:
+                self.__integrer(collection, lot, rapport)
+                cles_du_lot.clear()
+        self.__integrer(collection, lot, rapport)
+        return rapport
+
+    def __integrer(self, collection, lot, rapport):
+        integrer = self.__systeme.integrer_vehicule if collection == 'vehicules' else self.__systeme.integrer_client
+        for entite in lot:
+            integrer(entite)
+        rapport.ajoutes += len(lot)
+        self.__modifie = self.__modifie or bool(lot)
+        lot.clear()
+
+    def __importer_contrat(self, enreg):
+        telephone = _texte(enreg, 'telephone')
+        immatriculation = _texte(enreg, 'immatriculation')
+        client = self.__systeme.trouver_client(telephone)
+        if client is None:
+            raise ValueError(f"client inconnu (téléphone {telephone})")
+        vehicule = self.__systeme.trouver_vehicule(immatriculation)
+        if vehicule is None:
+            raise ValueError(f"véhicule inconnu (immatriculation {immatriculation})")
+        nb_jours = _nombre(enreg, 'nb_jours', int, minimum=1)
+        mode_paiement = _mode_paiement(enreg)
+        # tout est validé avant la réservation : une ligne refusée ne laisse pas le véhicule réservé
+        # ValueError si la période chevauche une location existante
+        contrat = ContratLocation(client, vehicule, nb_jours, lire_date(enreg.get('date_debut')))
+        if mode_paiement is not None:
+            contrat.set_mode_paiement(mode_paiement)
+        self.__systeme.integrer_contrat(contrat)
+
+    def terminer(self):
+        """Sauvegarde unique de tout ce qui a été importé."""
+        if self.__modifie:
+            self.__systeme.sauvegarder_donnees()
+            self.__modifie = False
+
+
+# ---------------------------------------------------------------
+# Export en flux
+# ---------------------------------------------------------------
+def _enregistrement_export(collection: str, entite) -> Dict[str, Any]:
+    d = entite.to_dict()
+    if collection == 'contrats':
+        # clés naturelles en plus des identifiants, pour un réimport ailleurs
+        d['telephone'] = entite.get_client().get_telephone()
+        d['immatriculation'] = entite.get_vehicule().get_immatriculation()
+    return d
+
+
+def exporter(collection: str, entites: Iterable[Any], chemin: str, format_: Optional[str] = None) -> int:
+    """Écrit les entités une par une ; renvoie le nombre de lignes écrites."""
+    format_ = detecter_format(chemin, format_)
+    n = 0
+    with open(chemin, "w", encoding='utf-8', newline='') as f:
+        if format_ == 'csv':
+            ecrivain = csv.DictWriter(f, fieldnames=COLONNES[collection], extrasaction='ignore')
+            ecrivain.writeheader()
+            for e in entites:
+                d = _enregistrement_export(collection, e)
+                if d.get('mode_paiement') is not None:
+                    d['mode_paiement'] = json.dumps(d['mode_paiement'], ensure_ascii=False)
+                ecrivain.writerow(d)
+                n += 1
+        else:
+            for e in entites:
+                f.write(json.dumps(_enregistrement_export(collection, e), ensure_ascii=False) + "\n")
+                n += 1
+    return n
+
+
+def main(argv=None):
+    # import ici : main.py importe déjà les modules de stockage
+    from main import SystemeLocation, creer_gestionnaire, creer_parseur
+
+    # mêmes options de stockage que main.py (--journal, --sqlite, --fragments...) ;
+    # --format y désigne le format du snapshot, d'où --format-fichier ici
+    parseur = creer_parseur()
+    parseur.description = "Import / export en masse (CSV, JSON Lines)"
+    parseur.add_argument("action", choices=("importer", "exporter"))
+    parseur.add_argument("collection", choices=COLLECTIONS)
+    parseur.add_argument("chemin", help="fichier .csv ou .jsonl")
+    parseur.add_argument("--format-fichier", choices=("csv", "jsonl"),
+                         help="format du fichier importé ou exporté (par défaut : d'après l'extension)")
+    parseur.add_argument("--taille-lot", type=int, default=1000)
+    args = parseur.parse_args(argv)
+
+    systeme = SystemeLocation(creer_gestionnaire(args))
+    try:
+        if args.action == "importer":
+            importateur = ImportateurMasse(systeme, args.taille_lot)
+            print(importateur.importer(args.collection, args.chemin, args.format_fichier))
+            importateur.terminer()
+        else:
+            entites = {'vehicules': systeme.get_vehicule, 'clients': systeme.get_client,
+                       'contrats': systeme.get_contrat}[args.collection]()
+            n = exporter(args.collection, entites, args.chemin, args.format_fichier)
+            print(f"{n} ligne(s) écrite(s) dans {args.chemin}")
+    finally:
+        systeme.fermer()
+
+
+if __name__ == "__main__":
+    main()
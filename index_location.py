@@ -0,0 +1,218 @@
+from datetime import date
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional
+
+from calendrier import aujourdhui
+from classes import Vehicule, Client, ContratLocation
+from instrumentation import mesurer
+from recherche import IndexRecherche
+
+
+# ===============================================================
+# INDEX EN MÉMOIRE DU SYSTÈME DE LOCATION
+# ---------------------------------------------------------------
+# Rôle : Éviter les parcours complets des listes de SystemeLocation.
+# - immatriculation -> véhicule, téléphone -> client,
+#   identifiant client -> contrats.
+# - Ensemble « vivant » des véhicules disponibles aujourd'hui, par type,
+#   recalculé au changement de jour (des réservations commencent ou
+#   se terminent).
+# - Véhicules libres sur une période : chaque véhicule du type demandé
+#   est testé dans son calendrier (O(log k) par véhicule).
+# - Recherche par début de mot (nom, prénom, téléphone ; marque, modèle,
+#   immatriculation) : IndexRecherche, construit à la première recherche
+#   puis tenu à jour.
+# - Les véhicules et clients indexés préviennent l'index (observateur)
+#   quand leur disponibilité, immatriculation, téléphone, nom ou marque
+#   change.
+# ===============================================================
+class IndexLocation:
+    def __init__(self):
+        self.__par_immatriculation: Dict[str, Vehicule] = {}
+        self.__par_telephone: Dict[str, Client] = {}
+        # construit au premier besoin : la liste des contrats peut être différée
+        self.__contrats: List[ContratLocation] = []
+        self.__contrats_par_client: Optional[Dict[int, List[ContratLocation]]] = None
+        self.__clients_par_id: Optional[Dict[int, Client]] = None  # au premier besoin (réplication)
+        # type -> {identifiant: véhicule} ; un dict garde un ordre d'affichage stable
+        self.__par_type: Dict[str, Dict[int, Vehicule]] = {}
+        self.__disponibles: Dict[str, Dict[int, Vehicule]] = {}
+        self.__jour = aujourdhui()  # jour pour lequel __disponibles est à jour
+        # recherche textuelle : construite à la première recherche (démarrage inchangé)
+        self.__clients = []
+        self.__recherche_clients: Optional[IndexRecherche] = None
+        self.__recherche_vehicules: Optional[IndexRecherche] = None
+
+    def reconstruire(self, vehicules, clients, contrats):
+        self.__init__()
+        for v in vehicules:
+            self.ajouter_vehicule(v)
+        for c in clients:
+            self.ajouter_client(c)
+        self.__clients = clients
+        self.__contrats = contrats
+
+    # --- Ajouts ---
+    def ajouter_vehicule(self, vehicule: Vehicule):
+        vehicule.set_observateur(self)
+        if vehicule.get_immatriculation():
+            self.__par_immatriculation[vehicule.get_immatriculation()] = vehicule
+        self.__par_type.setdefault(vehicule.get_type(), {})[vehicule.get_identifiant()] = vehicule
+        if vehicule.est_disponible():
+            self.__disponibles.setdefault(vehicule.get_type(), {})[vehicule.get_identifiant()] = vehicule
+        if self.__recherche_vehicules is not None:
+            self.__recherche_vehicules.ajouter(vehicule)
+
+    def ajouter_client(self, client: Client):
+        client.set_observateur(self)
+        if client.get_telephone():
+            self.__par_telephone[client.get_telephone()] = client
+        if self.__clients_par_id is not None:
+            self.__clients_par_id[client.get_identifiant()] = client
+        if self.__recherche_clients is not None:
+            self.__recherche_clients.ajouter(client)
+
+    def retirer_client(self, client: Client):
+        # ajout annulé, encore dans la liste source ; == : une vue compacte égale n'est pas forcément le même objet
+        if self.__par_telephone.get(client.get_telephone()) == client:
+            del self.__par_telephone[client.get_telephone()]
+        if self.__clients_par_id is not None:
+            self.__clients_par_id.pop(client.get_identifiant(), None)
+        if self.__recherche_clients is not None:
+            self.__recherche_clients.retirer(client)
+
+    def ajouter_contrat(self, contrat: ContratLocation):
+        # le contrat est déjà dans la liste source ; il suffit de l'indexer si l'index existe
+        if self.__contrats_par_client is not None:
+            self.__contrats_par_client.setdefault(contrat.get_client().get_identifiant(), []).append(contrat)
+
+    def retirer_contrat(self, contrat: ContratLocation):
+        # contrat clos, déjà retiré de la liste source
+        if self.__contrats_par_client is not None:
+            contrats = self.__contrats_par_client.get(contrat.get_client().get_identifiant(), [])
+            if contrat in contrats:
+                contrats.remove(contrat)
+
+    # --- Notifications des entités ---
+    def disponibilite_modifiee(self, vehicule: Vehicule):
+        du_type = self.__disponibles.setdefault(vehicule.get_type(), {})
+        if vehicule.est_disponible():
+            du_type[vehicule.get_identifiant()] = vehicule
+        else:
+            du_type.pop(vehicule.get_identifiant(), None)
+
+    def immatriculation_modifiee(self, vehicule: Vehicule, ancienne: Optional[str]):
+        if ancienne and self.__par_immatriculation.get(ancienne) is vehicule:
+            del self.__par_immatriculation[ancienne]
+        if vehicule.get_immatriculation():
+            self.__par_immatriculation[vehicule.get_immatriculation()] = vehicule
+        self.vehicule_renomme(vehicule)
+
+    def vehicule_renomme(self, vehicule: Vehicule):
+        if self.__recherche_vehicules is not None:
+            self.__recherche_vehicules.mettre_a_jour(vehicule)
+
+    def client_renomme(self, client: Client):
+        if self.__recherche_clients is not None:
+            self.__recherche_clients.mettre_a_jour(client)
+
+    def telephone_modifie(self, client: Client, ancien: Optional[str]):
+        if ancien and self.__par_telephone.get(ancien) is client:
+            del self.__par_telephone[ancien]
+        if client.get_telephone():
+            self.__par_telephone[client.get_telephone()] = client
+        self.client_renomme(client)
+
+    # --- Recherches en temps constant ---
+    def trouver_vehicule(self, immatriculation: str) -> Optional[Vehicule]:
+        return self.__par_immatriculation.get(immatriculation)
+
+    def trouver_client(self, telephone: str) -> Optional[Client]:
+        return self.__par_telephone.get(telephone)
+
+    def vehicule_par_identifiant(self, identifiant: int) -> Optional[Vehicule]:
+        for vehicules in self.__par_type.values():
+            if identifiant in vehicules:
+                return vehicules[identifiant]
+        return None
+
+    def client_par_identifiant(self, identifiant: int) -> Optional[Client]:
+        if self.__clients_par_id is None:
+            self.__clients_par_id = {c.get_identifiant(): c for c in self.__clients}
+        return self.__clients_par_id.get(identifiant)
+
+    # --- Recherche textuelle (saisie partielle, fautes de frappe) ---
+    def rechercher_clients(self, requete: str, limite: Optional[int] = 20) -> List[Client]:
+        if self.__recherche_clients is None:
+            with mesurer("recherche.construction"):
+                self.__recherche_clients = IndexRecherche(
+                    lambda c: (c.get_nom(), c.get_prenom(), c.get_telephone()))
+                self.__recherche_clients.construire(self.__clients)
+        with mesurer("recherche.clients"):
+            return self.__recherche_clients.rechercher(requete, limite)
+
+    def rechercher_vehicules(self, requete: str, limite: Optional[int] = 20,
+                             filtre: Optional[Callable[[Vehicule], bool]] = None) -> List[Vehicule]:
+        """filtre : condition supplémentaire (ex. libre sur une période), vérifiée avant la limite."""
+        if self.__recherche_vehicules is None:
+            with mesurer("recherche.construction"):
+                self.__recherche_vehicules = IndexRecherche(
+                    lambda v: (v.get_marque(), v.get_modele(), v.get_immatriculation(), v.get_type()))
+                self.__recherche_vehicules.construire(v for d in self.__par_type.values() for v in d.values())
+        with mesurer("recherche.vehicules"):
+            return self.__recherche_vehicules.rechercher(requete, limite, filtre)
+
+    def contrats_du_client(self, client: Client) -> List[ContratLocation]:
+        if self.__contrats_par_client is None:
+            self.__contrats_par_client = {}
+            for c in self.__contrats:
+                self.__contrats_par_client.setdefault(c.get_client().get_identifiant(), []).append(c)
+        return self.__contrats_par_client.get(client.get_identifiant(), [])
+
+    def __actualiser_jour(self):
+        jour = aujourdhui()
+        if jour != self.__jour:
+            self.__jour = jour
+            self.__disponibles = {t: {i: v for i, v in vehicules.items() if v.est_disponible()}
+                                  for t, vehicules in self.__par_type.items()}
+
+    def nb_disponibles(self, type_vehicule: Optional[str] = None) -> int:
+        self.__actualiser_jour()
+        if type_vehicule is not None:
+            return len(self.__disponibles.get(type_vehicule, {}))
+        return sum(len(d) for d in self.__disponibles.values())
+
+    def nb_vehicules_par_type(self) -> Dict[str, int]:
+        return {type_v: len(vehicules) for type_v, vehicules in self.__par_type.items()}
+
+    def vehicules_disponibles(self, type_vehicule: Optional[str] = None, limite: Optional[int] = None) -> List[Vehicule]:
+        """Liste des véhicules disponibles (coût proportionnel au résultat, pas à la flotte)."""
+        with mesurer("index.vehicules_disponibles"):
+            self.__actualiser_jour()
+            if type_vehicule is not None:
+                vehicules = self.__disponibles.get(type_vehicule, {}).values()
+            else:
+                vehicules = (v for d in self.__disponibles.values() for v in d.values())
+            return list(islice(vehicules, limite))
+
+    def iter_vehicules(self, type_vehicule: Optional[str] = None,
+                       disponibles: Optional[bool] = None) -> Iterator[Vehicule]:
+        """Parcours filtré par type et disponibilité du jour (None : tous), sans copie."""
+        self.__actualiser_jour()
+        source = self.__disponibles if disponibles else self.__par_type
+        groupes = [source.get(type_vehicule, {})] if type_vehicule is not None else list(source.values())
+        for groupe in groupes:
+            for v in groupe.values():
+                if disponibles is False and v.est_disponible():
+                    continue
+                yield v
+
+    def vehicules_libres(self, debut: date, fin: date, type_vehicule: Optional[str] = None,
+                         limite: Optional[int] = None) -> List[Vehicule]:
+        """Véhicules libres sur toute la période [debut, fin)."""
+        with mesurer("index.vehicules_libres"):
+            if type_vehicule is not None:
+                vehicules = self.__par_type.get(type_vehicule, {}).values()
+            else:
+                vehicules = (v for d in self.__par_type.values() for v in d.values())
+            return list(islice((v for v in vehicules if v.est_libre(debut, fin)), limite))
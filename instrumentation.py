@@ -0,0 +1,242 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+
+# ===============================================================
+# HISTOGRAMME DE DURÉES
+# ---------------------------------------------------------------
+# Rôle : Répartir des durées dans des classes fixes (1-2-5 de 1 µs à
+#        10 s) : mémoire constante, centiles estimés à la borne près.
+# ===============================================================
+BORNES = [m * 10.0 ** e for e in range(-6, 1) for m in (1, 2, 5)] + [10.0]
+
+
+class Histogramme:
+    __slots__ = ('__classes', '__nombre', '__total', '__min', '__max')
+
+    def __init__(self):
+        self.__classes = [0] * (len(BORNES) + 1)  # dernière classe : au-delà de 10 s
+        self.__nombre = 0
+        self.__total = 0.0
+        self.__min = None
+        self.__max = 0.0
+
+    def observer(self, duree: float):
+        self.__classes[bisect_left(BORNES, duree)] += 1
+        self.__nombre += 1
+        self.__total += duree
+        if self.__min is None or duree < self.__min:
+            self.__min = duree
+        if duree > self.__max:
+            self.__max = duree
+
+    def get_nombre(self):
+        return self.__nombre
+
+    def get_total(self):
+        return self.__total
+
+    def centile(self, q: float) -> float:
+        """Borne supérieure de la classe contenant le centile q (0-100)."""
+        if not self.__nombre:
+            return 0.0
+        rang = q / 100 * self.__nombre
+        cumul = 0
+        for i, n in enumerate(self.__classes):
+            cumul += n
+            if cumul >= rang and n:
+                return min(BORNES[i], self.__max) if i < len(BORNES) else self.__max
+        return self.__max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "nombre": self.__nombre, "total_s": self.__total,
+            "moyenne_s": self.__total / self.__nombre if self.__nombre else 0.0,
+            "min_s": self.__min or 0.0, "max_s": self.__max,
+            "p50_s": self.centile(50), "p90_s": self.centile(90), "p99_s": self.centile(99),
+            "classes": {("<=" + format(b, 'g')) if i < len(BORNES) else ">10": n
+                        for i, (b, n) in enumerate(zip(BORNES + [None], self.__classes)) if n},
+        }
+
+
+# ===============================================================
+# MÉTRIQUES DES CHEMINS CRITIQUES
+# ---------------------------------------------------------------
+# Rôle : Compteurs, histogrammes de latence et octets lus / écrits
+#        sur la persistance (charger, sauvegarder, journal), la
+#        reconstruction des objets et les recherches de l'index.
+# - Désactivées par défaut : mesurer() renvoie alors un contexte vide
+#   partagé et compter() / compter_octets() sortent immédiatement ; les
+#   appels ne sont placés que sur des opérations entières (jamais par
+#   entité), le surcoût reste négligeable.
+# - Un seul objet par processus (METRIQUES), utilisé via les fonctions
+#   du module. Mises à jour et lectures sous un verrou : le service
+#   mesure aussi depuis son thread de persistance.
+# ===============================================================
+class _MesureNulle:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NUL = _MesureNulle()
+
+
+class _Mesure:
+    __slots__ = ('__metriques', '__nom', '__debut')
+
+    def __init__(self, metriques: 'Metriques', nom: str):
+        self.__metriques = metriques
+        self.__nom = nom
+
+    def __enter__(self):
+        self.__debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.__metriques.observer(self.__nom, time.perf_counter() - self.__debut)
+        return False
+
+
+class Metriques:
+    def __init__(self):
+        self.actif = False
+        self.__debut = time.time()
+        self.__compteurs: Dict[str, int] = {}
+        self.__latences: Dict[str, Histogramme] = {}
+        self.__octets = {"lus": {}, "ecrits": {}}
+        self.__verrou = threading.Lock()
+
+    def reinitialiser(self):
+        with self.__verrou:
+            self.__debut = time.time()
+            self.__compteurs.clear()
+            self.__latences.clear()
+            self.__octets = {"lus": {}, "ecrits": {}}
+
+    def mesurer(self, nom: str):
+        return _Mesure(self, nom) if self.actif else _NUL
+
+    def observer(self, nom: str, duree: float):
+        with self.__verrou:
+            histogramme = self.__latences.get(nom)
+            if histogramme is None:
+                histogramme = self.__latences[nom] = Histogramme()
+            histogramme.observer(duree)
+
+    def compter(self, nom: str, n: int = 1):
+        if self.actif:
+            with self.__verrou:
+                self.__compteurs[nom] = self.__compteurs.get(nom, 0) + n
+
+    def compter_octets(self, sens: str, source: str, n: int):
+        # sens : "lus" ou "ecrits" ; source : fichier logique (snapshot, journal...)
+        if self.actif:
+            with self.__verrou:
+                par_source = self.__octets[sens]
+                par_source[source] = par_source.get(source, 0) + n
+
+    def instantane(self) -> Dict[str, Any]:
+        """Copie sérialisable en JSON de toutes les mesures."""
+        with self.__verrou:
+            return {
+                "actif": self.actif,
+                "depuis": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.__debut)),
+                "duree_s": round(time.time() - self.__debut, 3),
+                "compteurs": dict(sorted(self.__compteurs.items())),
+                "latences": {nom: h.to_dict() for nom, h in sorted(self.__latences.items())},
+                "octets": {sens: dict(sorted(s.items())) for sens, s in self.__octets.items()},
+            }
+
+    def ecrire(self, chemin: str):
+        with open(chemin, "w", encoding='utf-8') as f:
+            json.dump(self.instantane(), f, indent=4, ensure_ascii=False)
+
+    def lignes(self) -> List[str]:
+        """Résumé lisible pour le menu."""
+        if not self.actif:
+            return ["⚠️ Instrumentation désactivée (relancer avec --instrumenter ou --metriques FICHIER)."]
+        mesures = self.instantane()
+        lignes = [f"{'opération':<32} {'nb':>7} {'total':>9} {'moy.':>9} {'p50':>9} {'p99':>9} {'max':>9}"]
+        for nom, d in mesures["latences"].items():
+            lignes.append(f"{nom:<32} {d['nombre']:>7} {d['total_s']:>8.3f}s "
+                          + " ".join(f"{_ms(d[c]):>9}" for c in ("moyenne_s", "p50_s", "p99_s", "max_s")))
+        if mesures["compteurs"]:
+            lignes.append("")
+            lignes.extend(f"{nom:<32} {n:>12,}" for nom, n in mesures["compteurs"].items())
+        for sens, libelle in (("lus", "octets lus"), ("ecrits", "octets écrits")):
+            for source, n in mesures["octets"][sens].items():
+                lignes.append(f"{libelle + ' (' + source + ')':<32} {n:>12,}")
+        return lignes
+
+
+def _ms(secondes: float) -> str:
+    return f"{secondes * 1000:.2f}ms" if secondes < 1 else f"{secondes:.2f}s"
+
+
+METRIQUES = Metriques()
+
+
+def activer():
+    METRIQUES.actif = True
+
+
+def desactiver():
+    METRIQUES.actif = False
+
+
+def est_actif() -> bool:
+    return METRIQUES.actif
+
+
+def mesurer(nom: str):
+    """with mesurer("charger"): ... -> durée ajoutée à l'histogramme du nom."""
+    return _Mesure(METRIQUES, nom) if METRIQUES.actif else _NUL
+
+
+def compter(nom: str, n: int = 1):
+    METRIQUES.compter(nom, n)
+
+
+def compter_octets(sens: str, source: str, n: int):
+    METRIQUES.compter_octets(sens, source, n)
+
+
+# ===============================================================
+# PROFIL D'UNE SESSION (cProfile, sur demande)
+# ---------------------------------------------------------------
+# Rôle : Profiler toute une session du menu ; à la fin, les
+#        statistiques brutes sont écrites (lisibles par pstats ou
+#        snakeviz) et les fonctions les plus coûteuses affichées.
+# ===============================================================
+class ProfilSession:
+    def __init__(self, chemin: str, nb_lignes: int = 20):
+        self.__chemin = chemin
+        self.__nb_lignes = nb_lignes
+        self.__profil = cProfile.Profile()
+
+    def __enter__(self):
+        self.__profil.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.__profil.disable()
+        self.__profil.dump_stats(self.__chemin)
+        print(f"✅ Profil écrit dans {self.__chemin} (python -m pstats {self.__chemin})")
+        print(self.resume())
+        return False
+
+    def resume(self, tri: Optional[str] = "cumulative") -> str:
+        flux = io.StringIO()
+        pstats.Stats(self.__profil, stream=flux).sort_stats(tri).print_stats(self.__nb_lignes)
+        return flux.getvalue()
@@ -0,0 +1,110 @@
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from instrumentation import compter_octets, mesurer
+from verrous import ConflitEcriture, taille_fichier
+
+
+# ===============================================================
+# JOURNAL D'AJOUT (append-only)
+# ---------------------------------------------------------------
+# Rôle : Conserver chaque mutation (ajout client, véhicule, contrat)
+#        sous forme d'une petite ligne JSON ajoutée en fin de fichier.
+# - Chaque enregistrement porte un numéro de séquence croissant.
+# - Une dernière ligne tronquée (arrêt brutal) est ignorée puis coupée.
+# - Le journal ne connaît pas les classes métier : le rejeu est fait
+#   par GestionnaireDonnees.
+# - Avant chaque ajout, la taille du fichier doit être celle attendue :
+#   sinon un autre processus a écrit entre-temps (ConflitEcriture).
+#   Les verrous sont pris par GestionnaireDonnees.
+# ===============================================================
+class Journal:
+    def __init__(self, chemin: str, fsync: bool = True):
+        self.__chemin = chemin
+        self.__fsync = fsync
+        self.__dernier_seq = 0
+        self.__nb_enregistrements = 0
+        self.__taille_attendue = 0
+
+    def get_chemin(self):
+        return self.__chemin
+
+    def get_dernier_seq(self):
+        return self.__dernier_seq
+
+    def set_dernier_seq(self, seq: int):
+        # utilisé après chargement du snapshot pour reprendre la numérotation
+        self.__dernier_seq = max(self.__dernier_seq, seq)
+
+    def __len__(self):
+        return self.__nb_enregistrements
+
+    def ajouter(self, operation: str, donnees: Dict[str, Any]) -> int:
+        return self.ajouter_lot([(operation, donnees)])
+
+    def ajouter_lot(self, operations: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """Plusieurs enregistrements en une écriture (un seul fsync) ; renvoie la dernière séquence."""
+        if taille_fichier(self.__chemin) != self.__taille_attendue:
+            raise ConflitEcriture(f"{self.__chemin} a été modifié par un autre processus")
+        seq = self.__dernier_seq
+        lignes = []
+        for operation, donnees in operations:
+            seq += 1
+            lignes.append(json.dumps({'seq': seq, 'op': operation, 'donnees': donnees}, ensure_ascii=False) + "\n")
+        contenu = "".join(lignes).encode('utf-8')
+        with mesurer("journal.ajout"), open(self.__chemin, "ab") as f:
+            f.write(contenu)
+            f.flush()
+            if self.__fsync:
+                os.fsync(f.fileno())
+        compter_octets("ecrits", "journal", len(contenu))
+        self.__taille_attendue += len(contenu)
+        self.__dernier_seq = seq
+        self.__nb_enregistrements += len(lignes)
+        return seq
+
+    def relire(self, depuis_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        """Renvoie les enregistrements dont la séquence est > depuis_seq.
+
+        Une dernière ligne incomplète est ignorée et retirée du fichier pour
+        que le prochain ajout ne soit pas collé à un fragment corrompu.
+        """
+        self.__nb_enregistrements = 0
+        self.__taille_attendue = 0
+        try:
+            f = open(self.__chemin, "rb")
+        except FileNotFoundError:
+            return
+        position_valide = 0
+        troncature: Optional[int] = None
+        with f:
+            for brut in f:
+                try:
+                    if not brut.endswith(b"\n"):
+                        raise ValueError("ligne incomplète")
+                    enreg = json.loads(brut.decode('utf-8'))
+                except ValueError:
+                    # seule la toute dernière ligne peut être tronquée
+                    if f.read(1):
+                        raise ValueError(f"Journal corrompu à l'octet {position_valide} : {self.__chemin}")
+                    troncature = position_valide
+                    break
+                position_valide += len(brut)
+                self.__nb_enregistrements += 1
+                self.__dernier_seq = max(self.__dernier_seq, enreg.get('seq', 0))
+                if enreg.get('seq', 0) > depuis_seq:
+                    yield enreg
+        if troncature is not None:
+            with open(self.__chemin, "r+b") as f:
+                f.truncate(troncature)
+            print("⚠️ Dernier enregistrement du journal incomplet : ignoré")
+        self.__taille_attendue = position_valide
+        compter_octets("lus", "journal", position_valide)
+
+    def vider(self):
+        # la séquence continue : elle est mémorisée dans le snapshot
+        with open(self.__chemin, "w", encoding='utf-8'):
+            pass
+        self.__nb_enregistrements = 0
+        self.__taille_attendue = 0
@@ -0,0 +1,179 @@
+import codecs
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# ===============================================================
+# LECTURE PROGRESSIVE DE donnees.json
+# ---------------------------------------------------------------
+# Rôle : Lire le fichier par blocs au lieu d'un json.load complet.
+# - Les éléments des tableaux (véhicules, clients) sont décodés un par un.
+# - Une section peut être « différée » : on note sa position en octets
+#   et on arrête la lecture ; elle sera relue plus tard si nécessaire.
+# ===============================================================
+class LecteurJSONProgressif:
+    def __init__(self, chemin: str, position: int = 0, taille_bloc: int = 1 << 16):
+        self.__fichier = open(chemin, "rb")
+        self.__fichier.seek(position)
+        self.__taille_bloc = taille_bloc
+        self.__decodeur_utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.__decodeur_json = json.JSONDecoder()
+        self.__tampon = ""
+        self.__pos = 0                  # position dans le tampon (caractères)
+        self.__octets_debut = position  # position en octets du début du tampon
+        self.__fin = False
+        self.__positions_differees: Dict[str, int] = {}
+
+    def fermer(self):
+        self.__fichier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def get_position_differee(self, cle: str) -> Optional[int]:
+        return self.__positions_differees.get(cle)
+
+    # --- Gestion du tampon ---
+    def __remplir(self) -> bool:
+        if self.__fin:
+            return False
+        bloc = self.__fichier.read(self.__taille_bloc)
+        texte = self.__decodeur_utf8.decode(bloc, final=not bloc)
+        if not bloc:
+            self.__fin = True
+        # on oublie la partie déjà consommée en comptant ses octets
+        consomme = self.__tampon[:self.__pos]
+        self.__octets_debut += len(consomme.encode('utf-8'))
+        self.__tampon = self.__tampon[self.__pos:] + texte
+        self.__pos = 0
+        return bool(bloc)
+
+    def __position_octets(self) -> int:
+        return self.__octets_debut + len(self.__tampon[:self.__pos].encode('utf-8'))
+
+    def __caractere(self) -> str:
+        """Prochain caractère significatif (sans le consommer), '' en fin de fichier."""
+        while True:
+            while self.__pos < len(self.__tampon) and self.__tampon[self.__pos] in " \t\r\n":
+                self.__pos += 1
+            if self.__pos < len(self.__tampon):
+                return self.__tampon[self.__pos]
+            if not self.__remplir() and self.__pos >= len(self.__tampon):
+                return ""
+
+    def __attendre(self, attendu: str):
+        c = self.__caractere()
+        if c != attendu:
+            raise ValueError(f"JSON invalide : '{attendu}' attendu, '{c}' trouvé (octet {self.__position_octets()})")
+        self.__pos += 1
+
+    def __valeur(self) -> Any:
+        self.__caractere()
+        while True:
+            try:
+                valeur, fin = self.__decodeur_json.raw_decode(self.__tampon, self.__pos)
+                # un nombre en fin de tampon peut continuer dans le bloc suivant
+                if fin < len(self.__tampon) or self.__fin:
+                    self.__pos = fin
+                    return valeur
+            except ValueError:
+                if self.__fin:
+                    raise
+            self.__remplir()
+
+    # --- Parcours ---
+    def parcourir(self, differer: Iterable[str] = ()) -> Iterator[Tuple[str, Any]]:
+        """Parcourt l'objet racine.
+
+        Produit (clé, élément) pour chaque élément d'un tableau et (clé, valeur)
+        pour les autres valeurs. À la première clé de `differer`, sa position est
+        mémorisée et le parcours s'arrête.
+        """
+        differer = set(differer)
+        self.__attendre('{')
+        if self.__caractere() == '}':
+            return
+        while True:
+            cle = self.__valeur()
+            self.__attendre(':')
+            if cle in differer and self.__caractere() == '[':
+                self.__positions_differees[cle] = self.__position_octets()
+                return
+            if self.__caractere() == '[':
+                yield from ((cle, element) for element in self.elements())
+            else:
+                yield cle, self.__valeur()
+            c = self.__caractere()
+            self.__pos += 1
+            if c == '}':
+                return
+            if c != ',':
+                raise ValueError(f"JSON invalide : ',' ou '}}' attendu, '{c}' trouvé")
+
+    def elements(self) -> Iterator[Any]:
+        """Décode un à un les éléments du tableau situé à la position courante."""
+        self.__attendre('[')
+        if self.__caractere() == ']':
+            self.__pos += 1
+            return
+        while True:
+            yield self.__valeur()
+            c = self.__caractere()
+            self.__pos += 1
+            if c == ']':
+                return
+            if c != ',':
+                raise ValueError(f"JSON invalide : ',' ou ']' attendu, '{c}' trouvé")
+
+
+def lire_tableau(chemin: str, position: int) -> List[Any]:
+    """Relit le tableau commençant à `position` (octets), par exemple une section différée.
+
+    Le tableau est décodé d'un seul appel (plus rapide qu'élément par élément),
+    la suite du fichier étant ignorée.
+    """
+    with open(chemin, "rb") as f:
+        f.seek(position)
+        texte = f.read().decode('utf-8')
+    tableau, _ = json.JSONDecoder().raw_decode(texte)
+    return tableau
+
+
+# ===============================================================
+# LISTE DIFFÉRÉE
+# ---------------------------------------------------------------
+# Une liste dont le contenu initial n'est construit qu'au premier accès.
+# Les ajouts en fin (append / extend) ne déclenchent pas le chargement :
+# les éléments chargés sont insérés devant eux le moment venu.
+# ===============================================================
+class ListeDifferee(list):
+    def __init__(self, chargeur: Callable[[], Iterable[Any]]):
+        super().__init__()
+        self.__chargeur: Optional[Callable[[], Iterable[Any]]] = chargeur
+
+    def est_materialisee(self):
+        return self.__chargeur is None
+
+    def materialiser(self):
+        if self.__chargeur is not None:
+            chargeur, self.__chargeur = self.__chargeur, None
+            list.__setitem__(self, slice(0, 0), list(chargeur()))
+
+
+def _materialisant(nom: str):
+    methode = getattr(list, nom)
+
+    def enveloppe(self, *args, **kwargs):
+        self.materialiser()
+        return methode(self, *args, **kwargs)
+    enveloppe.__name__ = nom
+    return enveloppe
+
+
+for _nom in ('__iter__', '__len__', '__getitem__', '__setitem__', '__delitem__', '__contains__',
+             '__reversed__', '__repr__', '__eq__', '__ne__', '__add__', '__mul__', 'insert', 'pop',
+             'remove', 'index', 'count', 'sort', 'reverse', 'clear', 'copy'):
+    setattr(ListeDifferee, _nom, _materialisant(_nom))
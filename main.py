@@ -15,20 +15,66 @@
 # ---------------------------------------------------------------
 
 
+import argparse
+import contextlib
+import threading
+from datetime import date
+
 from classes import *
+from affichage import PAR_PAGE, afficher_page
+from allocation import AllocateurFlotte, DemandeLocation
+from calendrier import lire_date, periode
+from ecriture_differee import SauvegardeDifferee
+from stockage_fragmente import StockageFragmente
+from stockage_sqlite import StockageSQLite
+from index_location import IndexLocation
+from instrumentation import METRIQUES, ProfilSession, activer, mesurer
+from rapports import RapportsLocation
+from replication import ReplicationAgences
+from tarification import MoteurTarification
+
+
+
 
 
+# ----------------------------------------------------------
+# Mise en forme et tris des listes
+# ----------------------------------------------------------
+def ligne_vehicule(numero, v):
+    dispo = "Disponible" if v.est_disponible() else "Indisponible"
+    return (f"- {v.get_marque()} {v.get_modele()} ({v.get_annee()}) immatriculation : {v.get_immatriculation()} | "
+            f"{v.get_prix_journalier()}fcfa/jour | {dispo}")
 
 
+TRIS_CLIENTS = {"nom": lambda c: (c.get_nom(), c.get_prenom())}
+TRIS_VEHICULES = {"marque": lambda v: (v.get_marque(), v.get_modele()), "prix": lambda v: v.get_prix_journalier(),
+                  "annee": lambda v: str(v.get_annee())}
+TRIS_CONTRATS = {"montant": lambda c: c.get_montant_total(),
+                 "date": lambda c: c.get_date_debut() or date.min}
+
 
 # ==========================================================
 # CLASSE SYSTÈME DE LOCATION
 # ==========================================================
 class SystemeLocation:
-    def __init__(self):
+    # gestionnaire : GestionnaireDonnees (JSON) ou tout stockage offrant
+    # charger / sauvegarder / enregistrer, comme StockageSQLite
+    def __init__(self, gestionnaire: Optional[GestionnaireDonnees] = None):
         self.__vehicules = []
         self.__clients = []
         self.__contrats = []
+        self.__gestionnaire = gestionnaire or GestionnaireDonnees()
+        self.__index = IndexLocation()  # recherches et disponibilités sans parcours des listes
+        self.__rapports = RapportsLocation()  # cumuls (chiffre d'affaires, utilisation) tenus à jour
+        self.__verrou = threading.Lock()  # listes et index partagés entre threads
+        # les stockages parcourent les listes en écrivant : verrou pris autour de chaque écriture,
+        # sauf stockage différé (set_verrou), qui le prend lui-même depuis son thread d'écriture
+        set_verrou = getattr(self.__gestionnaire, 'set_verrou', None)
+        if set_verrou is not None:
+            set_verrou(self.__verrou)
+        self.__verrou_ecriture = contextlib.nullcontext() if set_verrou is not None else self.__verrou
+        self.__replication = None  # flux de modifications entre agences (set_replication)
+        self.__clotures_en_cours = set()  # clés archivées dont l'état actif n'est pas encore enregistré
         # Charger automatiquement les données si elles existent
         try:
             self.charger_donnees()
@@ -46,30 +92,187 @@ class SystemeLocation:
     def get_contrat(self):
         return self.__contrats
 
+    # --- Intégration d'une entité (indexation, sans sauvegarde) ---
+    # Utilisé par les ajouts du menu et par l'import en masse, qui ne
+    # sauvegarde qu'une fois à la fin. Renvoie l'entité telle que stockée
+    # (l'objet lui-même, ou sa vue en mode compact).
+    def integrer_client(self, client):
+        with self.__verrou:
+            self.__clients.append(client)
+            client = self.__clients[-1]
+            self.__index.ajouter_client(client)
+        return client
+
+    # Annule integrer_client quand l'ajout n'a pas pu être enregistré (client sans contrat)
+    def retirer_client(self, client):
+        with self.__verrou:
+            self.__index.retirer_client(client)  # avant la liste : une vue compacte retirée n'est plus lisible
+            self.__clients.remove(client)
+        return client
+
+    def integrer_vehicule(self, vehicule):
+        with self.__verrou:
+            self.__vehicules.append(vehicule)
+            vehicule = self.__vehicules[-1]
+            self.__index.ajouter_vehicule(vehicule)
+        return vehicule
+
+    def integrer_contrat(self, contrat):
+        with self.__verrou:
+            self.__contrats.append(contrat)
+            self.__index.ajouter_contrat(contrat)
+            self.__rapports.ajouter_contrat(contrat)
+        return contrat
+
+    # --- Location sans saisie (menu, service HTTP, import) ---
+    # Crée et indexe le contrat ; la persistance reste à la charge de l'appelant.
+    # La réservation du véhicule est atomique (ContratLocation lève ValueError
+    # si la période chevauche une autre location, même créée par un autre thread).
+    def louer(self, client, vehicule, nb_jours, date_debut=None):
+        return self.integrer_contrat(ContratLocation(client, vehicule, nb_jours, date_debut))
+
+    # --- Réservations en lot (client entreprise) ---
+    # Toutes les demandes sont réparties d'un coup (AllocateurFlotte) ; les contrats
+    # créés sont indexés, la persistance reste à la charge de l'appelant
+    # (enregistrer_mutations : une seule écriture pour le lot).
+    def louer_en_lot(self, client, demandes, tout_ou_rien=False):
+        affectations = AllocateurFlotte(self.__vehicules).allouer(client, demandes, tout_ou_rien)
+        for affectation in affectations:
+            for contrat in affectation.contrats:
+                self.integrer_contrat(contrat)
+        return affectations
+
+    # --- Retour d'un véhicule (sans saisie) ---
+    # Le contrat est clos (réservation libérée) et quitte les contrats actifs ;
+    # la persistance reste à la charge de l'appelant (enregistrer_cloture).
+    # Les rapports ne changent pas : le contrat reste compté.
+    def retourner(self, contrat, date_retour=None):
+        with self.__verrou:
+            contrat.cloturer(date_retour)  # ValueError si déjà clos
+            self.__contrats.remove(contrat)
+            self.__index.retirer_contrat(contrat)
+        return contrat
+
+    # Annule retourner() quand la clôture n'a pas pu être enregistrée :
+    # le contrat redevient actif et sa période de nouveau réservée.
+    def retablir(self, contrat):
+        try:
+            with self.__verrou:
+                contrat.rouvrir()  # ValueError si la période a été relouée entre-temps
+                self.__contrats.append(contrat)
+                self.__index.ajouter_contrat(contrat)
+        finally:
+            self.__clotures_en_cours.discard(contrat.cle())
+        return contrat
+
+    def enregistrer_cloture(self, contrat, publier=True):
+        # archive (ajout seul) d'abord, puis état actif : après un arrêt entre les deux,
+        # le contrat est encore actif au redémarrage et contrats_archives() l'ignore ;
+        # son vrai retour l'archive de nouveau et ce dernier enregistrement remplace l'autre
+        donnees = contrat.to_dict()
+        cle = contrat.cle()
+        self.__clotures_en_cours.add(cle)  # en cas d'échec : jusqu'à retablir()
+        self.archiver([donnees])
+        self.enregistrer_mutation('cloture_contrat', donnees, publier)
+        self.__clotures_en_cours.discard(cle)
+
+    def archiver(self, enregistrements):
+        self.__gestionnaire.get_archive().ajouter(enregistrements)
+
+    # --- Annulation (conflit entre agences) ---
+    # Le contrat n'a jamais eu lieu : réservation libérée, retiré des contrats
+    # actifs et des rapports, pas archivé. Persistance : 'cloture_contrat'.
+    def annuler(self, contrat):
+        with self.__verrou:
+            if contrat.get_date_debut() is None:
+                contrat.get_vehicule().set_disponibilite(True)
+            else:
+                contrat.get_vehicule().liberer(contrat.get_date_debut(), contrat.get_date_fin())
+            self.__contrats.remove(contrat)
+            self.__index.retirer_contrat(contrat)
+            self.__rapports.retirer_contrat(contrat)
+        return contrat
+
+    # Contrats clos relus de l'archive à la demande (ordre de clôture), tous ou ceux d'un client
+    def contrats_archives(self, client=None):
+        archive = self.__gestionnaire.get_archive()
+        if client is not None:
+            actifs = self.__index.contrats_du_client(client)
+            enregistrements = archive.rechercher(client_id=client.get_identifiant())
+            clients_par_id = {client.get_identifiant(): client}
+        else:
+            actifs = self.__contrats
+            enregistrements = archive.parcourir()
+            clients_par_id = {c.get_identifiant(): c for c in self.__clients}
+        cles_actives = {c.cle() for c in actifs}
+        for d in enregistrements:
+            if ContratLocation.cle_dict(d) in cles_actives:
+                continue
+            vehicule = self.__index.vehicule_par_identifiant(d['vehicule_id'])
+            yield ContratLocation.from_dict(d, clients_par_id, {d['vehicule_id']: vehicule})
+
+    # Cumuls des contrats clos pour les rapports, sans relire toute l'archive ; comme dans
+    # contrats_archives(), un contrat archivé mais encore actif n'est pas compté. Une clôture
+    # en cours d'enregistrement est comptée sans être retenue dans les cumuls enregistrés.
+    def cumuls_archives(self):
+        cles_actives = {c.cle() for c in self.__contrats}
+        en_cours = set(self.__clotures_en_cours)
+        return self.__gestionnaire.get_archive().cumuls(lambda d: ContratLocation.cle_dict(d) in cles_actives,
+                                                        lambda d: ContratLocation.cle_dict(d) in en_cours)
+
+    # --- Recherches indexées ---
+    def trouver_vehicule(self, immatriculation):
+        return self.__index.trouver_vehicule(immatriculation)
+
+    def trouver_client(self, telephone):
+        return self.__index.trouver_client(telephone)
+
+    def contrats_du_client(self, client):
+        return self.__index.contrats_du_client(client)
+
+    def vehicules_disponibles(self, type_vehicule=None, limite=None):
+        return self.__index.vehicules_disponibles(type_vehicule, limite)
+
+    # Véhicules libres sur toute la période [debut, fin) (fin = jour de retour)
+    def vehicules_libres(self, debut, fin, type_vehicule=None, limite=None):
+        return self.__index.vehicules_libres(debut, fin, type_vehicule, limite)
+
+    # Recherche par début de mot ou approchée (« kou », « 0701 », « toy cor »)
+    def rechercher_clients(self, requete, limite=20):
+        return self.__index.rechercher_clients(requete, limite)
+
+    def rechercher_vehicules(self, requete, limite=20, filtre=None):
+        return self.__index.rechercher_vehicules(requete, limite, filtre)
+
+    # --- Grille de devis : tous les véhicules disponibles x plusieurs durées ---
+    def grille_tarifaire(self, durees, type_vehicule=None):
+        vehicules = self.__index.vehicules_disponibles(type_vehicule)
+        return vehicules, MoteurTarification(vehicules).calculer(durees)
+
     # --- Ajout de client ---
     def ajouter_client(self):
         nom = input("Nom du client : ")
         prenom = input("Prénom du client : ")
         telephone = input("Téléphone : ")
-        client = Client(nom, prenom, telephone)
-        self.__clients.append(client)
+        client = self.integrer_client(Client(nom, prenom, telephone))
         print("✅ Client ajouté avec succès.\n")
         # sauvegarde immédiate
         try:
-            self.sauvegarder_donnees()
-        except Exception:
-            pass
+            self.enregistrer_mutation('ajout_client', client.to_dict())
+        except Exception as e:
+            print(f"⚠️ Sauvegarde impossible : {e}")
 
     # --- Affichage des clients ---
-    def afficher_clients(self):
+    # Les listes sont affichées par pages ; les filtres sont appliqués sur les
+    # entités (via l'index quand c'est possible) avant toute mise en forme.
+    def afficher_clients(self, page=1, par_page=PAR_PAGE, tri=None):
         if not self.__clients:
             print("Aucun client enregistré.")
-        else:
-            print("===== LISTE DES CLIENTS =====\n")
-            for i, c in enumerate(self.__clients):
-                print(f"{i + 1} - {c.afficher_details()}")
-                
-            print("=============================\n")
+            return False
+        cle, decroissant = self.__cle_tri(tri, TRIS_CLIENTS)
+        with mesurer("affichage.clients"):
+            return afficher_page("LISTE DES CLIENTS", self.__clients, lambda n, c: f"{n} - {c.afficher_details()}",
+                                 page, par_page, cle, decroissant, total=len(self.__clients))
 
     # --- Ajout de véhicule ---
     def ajouter_vehicule(self):
@@ -91,88 +294,413 @@ class SystemeLocation:
         
         
 
-        self.__vehicules.append(v)
+        v = self.integrer_vehicule(v)
         print("✅ Véhicule ajouté avec succès.\n")
         try:
-            self.sauvegarder_donnees()
-        except Exception:
-            pass
+            self.enregistrer_mutation('ajout_vehicule', v.to_dict())
+        except Exception as e:
+            print(f"⚠️ Sauvegarde impossible : {e}")
 
     # --- Affichage des véhicules ---
-    def afficher_vehicules(self):   
+    # disponible : True (libres aujourd'hui), False (indisponibles) ou None (tous)
+    def afficher_vehicules(self, page=1, par_page=PAR_PAGE, type_vehicule=None, disponible=None, tri=None):
         if not self.__vehicules:
-            return ("Aucun véhicule enregistré.")
-        
-        print("\n===== LISTE DES VÉHICULES =====")
-        for v in self.__vehicules:
-            dispo = "Disponible" if v.est_disponible() else "Indisponible"
-            print(f"- {v.get_marque()} {v.get_modele()} ({v.get_annee()}) immatriculation : {v.get_immatriculation()} | {dispo}")
-        print("===============================\n")
+            print("Aucun véhicule enregistré.")
+            return False
+        cle, decroissant = self.__cle_tri(tri, TRIS_VEHICULES)
+        if type_vehicule is None and disponible is None:
+            vehicules, total = self.__vehicules, len(self.__vehicules)
+        else:
+            vehicules = self.__index.iter_vehicules(type_vehicule, disponible)
+            total = self.__index.nb_disponibles(type_vehicule) if disponible else None
+        with mesurer("affichage.vehicules"):
+            return afficher_page("LISTE DES VÉHICULES", vehicules, ligne_vehicule,
+                                 page, par_page, cle, decroissant, total=total)
 
     # --- Créer un contrat ---
     def creer_contrat(self):
         if not self.__clients or not self.__vehicules:
             print("⚠️ Vous devez d'abord ajouter des clients et des véhicules.")
-            
-
-        # Sélection du client
-        print("\nListe des clients :")
-        for i, c in enumerate(self.__clients):
-            print(f"{i + 1}. {c.get_nom()}")
-        choix_client = int(input("Choisissez un client : ")) - 1
-        client = self.__clients[choix_client]
-
-        # Sélection du véhicule disponible
-        print("\nVéhicules disponibles :")
-        disponibles = [v for v in self.__vehicules if v.est_disponible()]
-        if not disponibles:
-            print("Aucun véhicule disponible.")
-            
-
-        for i, v in enumerate(disponibles):
-            print(f"{i + 1}. {v.get_marque()} {v.get_modele()}")
-        choix_vehicule = int(input("Choisissez un véhicule : ")) - 1
-        vehicule = disponibles[choix_vehicule]
-
-        # Durée de location
-        nb_jours = int(input("Nombre de jours de location : "))
-
-        # Création du contrat
-        contrat = ContratLocation(client, vehicule, nb_jours)
-        self.__contrats.append(contrat)
+            return
+
+        # Sélection du client par recherche (nom, prénom ou téléphone)
+        client = self.__choisir("client", lambda requete: self.rechercher_clients(requete, self.NB_PROPOSITIONS)
+                                if requete.strip() else self.__clients[:self.NB_PROPOSITIONS],
+                                lambda c: f"{c.get_nom()} {c.get_prenom()} ({c.get_telephone()})")
+        if client is None:
+            print("Création du contrat annulée.")
+            return
+
+        # Période de location (début aujourd'hui ou plus tard)
+        try:
+            date_debut = lire_date(input("Date de début (AAAA-MM-JJ, Entrée = aujourd'hui) : "))
+            nb_jours = int(input("Nombre de jours de location : "))
+            if nb_jours < 1:
+                raise ValueError("au moins un jour de location")
+            debut, fin = periode(date_debut, nb_jours)
+        except ValueError as e:
+            print(f"⚠️ Saisie invalide : {e}")
+            return
+        if not self.vehicules_libres(debut, fin, limite=1):
+            print(f"Aucun véhicule disponible du {debut} au {fin}.")
+            return
+
+        # Sélection d'un véhicule libre sur la période (Entrée = premiers véhicules libres)
+        def vehicules_libres(requete):
+            if not requete.strip():
+                return self.vehicules_libres(debut, fin, limite=self.NB_PROPOSITIONS)
+            return self.rechercher_vehicules(requete, self.NB_PROPOSITIONS, lambda v: v.est_libre(debut, fin))
+
+        print(f"\nVéhicules disponibles du {debut} au {fin}")
+        vehicule = self.__choisir("véhicule", vehicules_libres,
+                                  lambda v: f"{v.get_marque()} {v.get_modele()} ({v.get_immatriculation()}) "
+                                            f"{v.get_prix_journalier()}fcfa/jour")
+        if vehicule is None:
+            print("Création du contrat annulée.")
+            return
+
+        # Création du contrat (ValueError : véhicule loué entre-temps)
+        try:
+            contrat = self.louer(client, vehicule, nb_jours, debut)
+        except ValueError as e:
+            print(f"⚠️ {e}")
+            return
         print("\n✅ Contrat créé avec succès !\n")
         contrat.afficher_details()
         try:
-            self.sauvegarder_donnees()
-        except Exception:
-            pass
-
-    # --- Afficher tous les contrats actifs ---
-    def afficher_contrats(self):
+            self.enregistrer_mutation('creation_contrat', contrat.to_dict())
+        except Exception as e:
+            print(f"⚠️ Sauvegarde impossible : {e}")
+
+    # Recherche puis choix dans une courte liste numérotée ; recommence tant que rien n'est choisi.
+    # Renvoie None si l'utilisateur annule (0) ou si une recherche vide ne trouve rien.
+    NB_PROPOSITIONS = 10
+
+    @staticmethod
+    def __choisir(nom, rechercher, formater):
+        while True:
+            requete = input(f"Rechercher un {nom} (Entrée = premiers résultats, 0 = annuler) : ")
+            if requete.strip() == "0":
+                return None
+            resultats = rechercher(requete)
+            if not resultats:
+                if not requete.strip():
+                    print(f"Aucun {nom} à proposer.")
+                    return None
+                print("Aucun résultat, essayez d'autres lettres.")
+                continue
+            print("\n".join(f"{i + 1}. {formater(e)}" for i, e in enumerate(resultats)))
+            choix = input(f"Choisissez un {nom} (Entrée = nouvelle recherche, 0 = annuler) : ").strip()
+            if choix == "0":
+                return None
+            if choix.isdigit() and 1 <= int(choix) <= len(resultats):
+                return resultats[int(choix) - 1]
+
+    # --- Afficher les contrats actifs (tous, ou ceux d'un client) ---
+    def afficher_contrats(self, page=1, par_page=PAR_PAGE, client=None, tri=None):
         if not self.__contrats:
             print("Aucun contrat enregistré.")
+            return False
+        cle, decroissant = self.__cle_tri(tri, TRIS_CONTRATS)
+        contrats = self.__index.contrats_du_client(client) if client is not None else self.__contrats
+        with mesurer("affichage.contrats"):
+            return afficher_page("LISTE DES CONTRATS ACTIFS", contrats, lambda n, c: c.details(),
+                                 page, par_page, cle, decroissant, total=len(contrats))
+
+    # --- Contrats archivés : lus au fil de l'archive, page par page ---
+    def afficher_archives(self, page=1, par_page=PAR_PAGE, client=None):
+        with mesurer("affichage.archives"):
+            return afficher_page("CONTRATS CLOS (ARCHIVE)", self.contrats_archives(client),
+                                 lambda n, c: c.details(), page, par_page)
+
+    # --- Réservations en lot (menu) ---
+    def reserver_en_lot(self):
+        client = self.trouver_client(input("Téléphone du client : ").strip())
+        if client is None:
+            print("⚠️ Aucun client avec ce téléphone.")
+            return
+        print("Une demande par ligne : type nombre jours [AAAA-MM-JJ] [portes=N] [cc=N] [max=PRIX]")
+        print("(ex. « voiture 40 10 portes=5 max=25000 »), Entrée = fin de la saisie")
+        demandes = []
+        while True:
+            ligne = input(f"Demande {len(demandes) + 1} : ").strip()
+            if not ligne:
+                break
+            try:
+                demandes.append(DemandeLocation.depuis_texte(ligne))
+            except ValueError as e:
+                print(f"⚠️ {e}")
+        if not demandes:
+            return
+        tout_ou_rien = input("Tout ou rien (annuler si une demande est incomplète) ? (o/n) : ").strip().lower() == "o"
+        affectations = self.louer_en_lot(client, demandes, tout_ou_rien)
+        contrats = [c for a in affectations for c in a.contrats]
+        print()
+        for affectation in affectations:
+            montant = sum(c.get_montant_total() for c in affectation.contrats)
+            etat = "✅" if affectation.est_complete() else f"⚠️ {affectation.manquants()} manquant(s),"
+            print(f"{etat} {affectation.demande} : {len(affectation.contrats)} véhicule(s), {montant:.0f} fcfa")
+        if not contrats:
+            print("Aucun contrat créé.")
+            return
+        print(f"\n✅ {len(contrats)} contrat(s) créé(s), "
+              f"{sum(c.get_montant_total() for c in contrats):.0f} fcfa au total.")
+        try:
+            self.enregistrer_mutations([('creation_contrat', c.to_dict()) for c in contrats])
+        except Exception as e:
+            print(f"⚠️ Sauvegarde impossible : {e}")
+
+    # --- Retour d'un véhicule (menu) ---
+    def retour_vehicule(self):
+        client = self.trouver_client(input("Téléphone du client : ").strip())
+        if client is None:
+            print("⚠️ Aucun client avec ce téléphone.")
+            return
+        contrats = self.contrats_du_client(client)
+        if not contrats:
+            print("Aucun contrat actif pour ce client.")
+            return
+        print("\n".join(f"{i + 1}. {c.get_vehicule().get_marque()} {c.get_vehicule().get_modele()} "
+                        f"({c.get_vehicule().get_immatriculation()}) "
+                        + (f"du {c.get_date_debut()} au {c.get_date_fin()}" if c.get_date_debut() else "sans date")
+                        for i, c in enumerate(contrats)))
+        choix = input("Contrat à clore (numéro, Entrée = annuler) : ").strip()
+        if not (choix.isdigit() and 1 <= int(choix) <= len(contrats)):
+            return
+        contrat = contrats[int(choix) - 1]
+        try:
+            date_retour = lire_date(input("Date de retour (AAAA-MM-JJ, Entrée = aujourd'hui) : "))
+            self.retourner(contrat, date_retour)
+        except ValueError as e:
+            print(f"⚠️ {e}")
             return
-        print("\n===== LISTE DES CONTRATS ACTIFS =====")
-        for c in self.__contrats:
-            c.afficher_details()
+        try:
+            self.enregistrer_cloture(contrat)
+        except Exception as e:
+            print(f"⚠️ Sauvegarde impossible : {e}")
+            self.retablir(contrat)  # le contrat reste actif, comme sur disque
+            print("Le contrat reste actif : refaites le retour plus tard.")
+            return
+        print("\n✅ Véhicule rendu : contrat clos et archivé.\n")
+        contrat.afficher_details()
 
     # --- Test polymorphisme ---
-    def tester_polymorphisme(self):
-        print("\n=== TEST DU POLYMORPHISME ===")
-        for v in self.__vehicules:
-            v.afficher_details()
+    def tester_polymorphisme(self, page=1, par_page=PAR_PAGE):
+        # details() est redéfinie par Voiture et Moto
+        return afficher_page("TEST DU POLYMORPHISME", self.__vehicules, lambda n, v: v.details(),
+                             page, par_page, total=len(self.__vehicules))
+
+    # --- Parcours interactif des listes (menu) ---
+    def parcourir_clients(self):
+        self.parcourir(self.afficher_clients, tri=self.__demander_tri(TRIS_CLIENTS))
+
+    def parcourir_vehicules(self):
+        type_v = input("Type (voiture/moto, Entrée = tous) : ").strip().capitalize() or None
+        dispo = input("Disponibles aujourd'hui ? (o/n, Entrée = tous) : ").strip().lower()
+        disponible = {"o": True, "n": False}.get(dispo)
+        self.parcourir(self.afficher_vehicules, type_vehicule=type_v, disponible=disponible,
+                         tri=self.__demander_tri(TRIS_VEHICULES))
+
+    def parcourir_contrats(self):
+        client = None
+        telephone = input("Téléphone du client (Entrée = tous les contrats) : ").strip()
+        if telephone:
+            client = self.trouver_client(telephone)
+            if client is None:
+                print("⚠️ Aucun client avec ce téléphone.")
+                return
+        self.parcourir(self.afficher_contrats, client=client, tri=self.__demander_tri(TRIS_CONTRATS))
+
+    def parcourir_archives(self):
+        client = None
+        telephone = input("Téléphone du client (Entrée = tous les contrats clos) : ").strip()
+        if telephone:
+            client = self.trouver_client(telephone)
+            if client is None:
+                print("⚠️ Aucun client avec ce téléphone.")
+                return
+        self.parcourir(self.afficher_archives, client=client)
+
+    @staticmethod
+    def __demander_tri(tris):
+        noms = "/".join(tris)
+        tri = input(f"Trier par ({noms}, préfixe - pour décroissant, Entrée = aucun) : ").strip().lower()
+        if tri and tri.lstrip("-") not in tris:
+            print("⚠️ Tri inconnu : ordre d'enregistrement conservé.")
+            return None
+        return tri or None
+
+    @staticmethod
+    def __cle_tri(tri, tris):
+        if not tri:
+            return None, False
+        return tris[tri.lstrip("-")], tri.startswith("-")
+
+    @staticmethod
+    def parcourir(afficher, **options):
+        """Affiche une page après l'autre ; afficher(page=..., **options) renvoie True s'il y a une suite."""
+        page = 1
+        while True:
+            suite = afficher(page=page, **options)
+            if page == 1 and not suite:
+                return
+            choix = input("Entrée = page suivante, p = précédente, q = retour : ").strip().lower()
+            if choix == "p" and page > 1:
+                page -= 1
+            elif choix == "" and suite:
+                page += 1
+            elif choix == "q" or not suite:
+                return
+
+    # --- Rapports : cumuls déjà calculés, affichage instantané ---
+    def get_rapports(self):
+        return self.__rapports
+
+    def utilisation_flotte(self, mois):
+        return self.__rapports.utilisation(mois, self.__index.nb_vehicules_par_type())
+
+    def afficher_rapports(self, mois=None, nombre=5):
+        jour = date.today()
+        mois = mois or (jour.year, jour.month)
+        rapports = self.__rapports
+        total = rapports.total()
+        lignes = ["\n===== RAPPORTS =====",
+                  f"Contrats : {total.nb} | Chiffre d'affaires : {total.montant:.0f} fcfa | "
+                  f"Durée moyenne : {total.duree_moyenne():.1f} jours",
+                  "\nPar type de véhicule :"]
+        for type_v, cumul in sorted(rapports.par_type().items()):
+            lignes.append(f"- {type_v} : {cumul.montant:.0f} fcfa ({cumul.nb} contrats, "
+                          f"{cumul.duree_moyenne():.1f} jours en moyenne)")
+        lignes.append(f"\nMois {mois[0]}-{mois[1]:02d} :")
+        for type_v, cumul in sorted(rapports.par_type(mois).items()):
+            lignes.append(f"- {type_v} : {cumul.montant:.0f} fcfa ({cumul.nb} contrats)")
+        taux = self.utilisation_flotte(mois)
+        lignes.append("Utilisation : " + ", ".join(f"{t} {v:.1%}" for t, v in taux.items()))
+        lignes.append(f"\nMarques (top {nombre}) :")
+        for marque, cumul in rapports.meilleures_marques(nombre):
+            lignes.append(f"- {marque} : {cumul.montant:.0f} fcfa ({cumul.nb} contrats)")
+        lignes.append(f"\nMeilleurs clients (top {nombre}) :")
+        for client, cumul in rapports.meilleurs_clients(nombre):
+            lignes.append(f"- {client.get_nom()} {client.get_prenom()} ({client.get_telephone()}) : "
+                          f"{cumul.montant:.0f} fcfa, {cumul.nb} contrats")
+        lignes.append("====================\n")
+        print("\n".join(lignes))
+
+    def consulter_rapports(self):
+        saisie = input("Mois (AAAA-MM, Entrée = mois en cours) : ").strip()
+        try:
+            mois = tuple(int(x) for x in saisie.split("-")) if saisie else None
+            if mois is not None and (len(mois) != 2 or not 1 <= mois[1] <= 12):
+                raise ValueError
+        except ValueError:
+            print("⚠️ Mois invalide (AAAA-MM attendu).")
+            return
+        self.afficher_rapports(mois)
+        if input("Vérifier les cumuls par un recalcul complet ? (o/n) : ").strip().lower() == "o":
+            ecarts = self.__rapports.verifier()
+            if ecarts:
+                print(f"⚠️ {len(ecarts)} écart(s) :")
+                print("\n".join(ecarts[:20]))
+            else:
+                print("✅ Cumuls cohérents avec les contrats.")
+
+    # --- Statistiques de l'instrumentation (--instrumenter) ---
+    def afficher_statistiques(self):
+        print("\n===== STATISTIQUES =====")
+        for ligne in METRIQUES.lignes():
+            print(ligne)
+        print("========================\n")
+        if METRIQUES.actif:
+            chemin = input("Exporter en JSON (nom de fichier, Entrée = non) : ").strip()
+            if chemin:
+                METRIQUES.ecrire(chemin)
+                print(f"✅ Statistiques écrites dans {chemin}")
 
     # --- Persistence (sauvegarde / chargement) ---
     def sauvegarder_donnees(self):
         # utilise GestionnaireDonnees défini dans classes.py
-        GestionnaireDonnees.sauvegarder(self.__vehicules, self.__clients, self.__contrats)
+        with self.__verrou_ecriture:
+            self.__gestionnaire.sauvegarder(self.__vehicules, self.__clients, self.__contrats)
+
+    def enregistrer_mutation(self, operation, donnees, publier=True):
+        # réécriture complète ou simple ajout au journal selon le mode du gestionnaire
+        # (avec SauvegardeDifferee : mise en attente, écrite plus tard en arrière-plan)
+        # Appelé aussi hors de la boucle du service (thread de persistance) : les listes
+        # ne bougent pas pendant que le stockage les parcourt.
+        with self.__verrou_ecriture:
+            self.__gestionnaire.enregistrer(operation, donnees, self.__vehicules, self.__clients, self.__contrats)
+        # puis diffusée aux autres agences (publier=False : mutation reçue d'une autre agence)
+        if publier and self.__replication is not None:
+            self.__replication.publier([(operation, donnees)])
+
+    def enregistrer_mutations(self, operations, publier=True):
+        # plusieurs mutations en une écriture (un ajout au journal, une transaction...)
+        enregistrer_lot = getattr(self.__gestionnaire, 'enregistrer_lot', None)
+        with self.__verrou_ecriture:
+            if enregistrer_lot is None:
+                for operation, donnees in operations:
+                    self.__gestionnaire.enregistrer(operation, donnees, self.__vehicules, self.__clients,
+                                                    self.__contrats)
+            else:
+                enregistrer_lot(operations, self.__vehicules, self.__clients, self.__contrats)
+        if publier and self.__replication is not None:
+            self.__replication.publier(operations)
+
+    # --- Réplication entre agences (replication.py) ---
+    def set_replication(self, replication):
+        self.__replication = replication
+
+    def get_replication(self):
+        return self.__replication
+
+    def client_par_identifiant(self, identifiant):
+        return self.__index.client_par_identifiant(identifiant)
+
+    def vehicule_par_identifiant(self, identifiant):
+        return self.__index.vehicule_par_identifiant(identifiant)
+
+    def synchroniser_agences(self):
+        # modifications des autres agences appliquées et sauvegardées ; 0 sans réplication
+        if self.__replication is None:
+            return 0
+        return self.__replication.synchroniser()
+
+    def afficher_agences(self):
+        replication = self.__replication
+        if replication is None:
+            print("Réplication désactivée (options --flux et --agence).")
+            return
+        try:
+            nb = self.synchroniser_agences()
+        except Exception as e:
+            print(f"⚠️ Synchronisation impossible : {e}")
+            nb = 0
+        print(f"\n===== AGENCE {replication.get_agence()} ({replication.get_dossier()}) =====")
+        print(f"{nb} modification(s) reçue(s)")
+        for agence, etat in replication.etat().items():
+            print(f"- {agence} : séquence {etat['seq']}"
+                  + (f", {etat['en_attente']} en attente" if etat['en_attente'] else ""))
+        conflits = replication.get_conflits()
+        if conflits:
+            print(f"\n⚠️ {len(conflits)} conflit(s) :")
+            print("\n".join(conflits[-20:]))
+        print("====================\n")
+
+    def fermer(self):
+        # écrit ce qui reste en attente (sauvegarde différée) et libère le stockage
+        fermer = getattr(self.__gestionnaire, 'fermer', None)
+        if fermer is not None:
+            fermer()
 
     def charger_donnees(self):
-        data = GestionnaireDonnees.charger()
+        data = self.__gestionnaire.charger()
         # data contient des objets reconstruits
         self.__vehicules = data.get('vehicules', [])
         self.__clients = data.get('clients', [])
         self.__contrats = data.get('contrats', [])
+        self.__index.reconstruire(self.__vehicules, self.__clients, self.__contrats)
+        # contrats clos : leurs cumuls, enregistrés avec l'archive, sont lus au premier rapport
+        self.__rapports.reconstruire(self.__contrats, self.contrats_archives, self.cumuls_archives, self.__index)
     
     
 
@@ -182,10 +710,114 @@ class SystemeLocation:
 # ==========================================================
 # PROGRAMME PRINCIPAL
 # ==========================================================
-def main():
-    systeme = SystemeLocation()
-    
+def creer_parseur():
+    parseur = argparse.ArgumentParser(description="Système de gestion de location de véhicules")
+    parseur.add_argument("--fichier", default="donnees.json", help="fichier de données (snapshot JSON)")
+    parseur.add_argument("--journal", action="store_true",
+                         help="mode journalisé : chaque mutation est ajoutée à un journal au lieu de tout réécrire")
+    parseur.add_argument("--seuil-compaction", type=int, default=1000,
+                         help="nombre d'enregistrements du journal avant réécriture du snapshot")
+    parseur.add_argument("--paresseux", action="store_true",
+                         help="lecture progressive : les contrats ne sont décodés qu'au premier affichage")
+    parseur.add_argument("--compact", action="store_true",
+                         help="stocker véhicules et clients en colonnes (faible mémoire pour de grands volumes)")
+    parseur.add_argument("--processus", type=int, default=1,
+                         help="décoder un gros fichier JSON sur N processus (chargement parallèle)")
+    parseur.add_argument("--format", choices=("json", "binaire"), default="json",
+                         help="format du snapshot : JSON lisible ou binaire (rechargement rapide)")
+    parseur.add_argument("--sqlite", metavar="BASE",
+                         help="utiliser une base SQLite au lieu du fichier JSON")
+    parseur.add_argument("--importer-json", action="store_true",
+                         help="avec --sqlite ou --fragments : importer d'abord le fichier JSON")
+    parseur.add_argument("--fragments", metavar="DOSSIER",
+                         help="un fichier JSON Lines par tranche d'entités : seuls les fichiers modifiés sont réécrits")
+    parseur.add_argument("--taille-fragment", type=int, default=1000,
+                         help="avec --fragments : nombre d'entités par fichier")
+    parseur.add_argument("--ecriture-differee", action="store_true",
+                         help="écrire en arrière-plan en regroupant les modifications (vidé en quittant)")
+    parseur.add_argument("--delai-ecriture", type=float, default=1.0,
+                         help="secondes d'attente avant l'écriture différée")
+    parseur.add_argument("--lot-ecriture", type=int, default=100,
+                         help="nombre de modifications qui déclenche l'écriture différée sans attendre")
+    parseur.add_argument("--flux", metavar="DOSSIER",
+                         help="dossier partagé entre agences : modifications publiées et reçues (avec --agence)")
+    parseur.add_argument("--agence", help="nom de cette agence dans le dossier --flux")
+    parseur.add_argument("--instrumenter", action="store_true",
+                         help="mesurer durées, compteurs et octets lus/écrits (menu Statistiques)")
+    parseur.add_argument("--metriques", metavar="FICHIER",
+                         help="écrire les statistiques en JSON à la fin (active l'instrumentation)")
+    parseur.add_argument("--profil", metavar="FICHIER",
+                         help="profiler la session avec cProfile et écrire les statistiques brutes")
+    return parseur
+
+
+def creer_gestionnaire(args):
+    # options de stockage communes au menu et au service HTTP
+    if args.sqlite:
+        gestionnaire = StockageSQLite(args.sqlite)
+        if args.importer_json:
+            gestionnaire.importer_json(args.fichier)
+    elif args.fragments:
+        gestionnaire = StockageFragmente(args.fragments, args.taille_fragment,
+                                         paresseux=args.paresseux, compact=args.compact)
+        if args.importer_json:
+            gestionnaire.importer_json(args.fichier)
+    else:
+        gestionnaire = GestionnaireDonnees(args.fichier, journalise=args.journal,
+                                           seuil_compaction=args.seuil_compaction,
+                                           paresseux=args.paresseux, compact=args.compact, format_=args.format,
+                                           processus=args.processus)
+    if args.ecriture_differee:
+        gestionnaire = SauvegardeDifferee(gestionnaire, args.delai_ecriture, args.lot_ecriture)
+    return gestionnaire
+
+
+def main(argv=None):
+    args = creer_parseur().parse_args(argv)
+    if args.instrumenter or args.metriques:
+        activer()
+    try:
+        if args.profil:
+            with ProfilSession(args.profil):
+                return session(args)
+        return session(args)
+    finally:
+        if args.metriques:
+            METRIQUES.ecrire(args.metriques)
+            print(f"✅ Statistiques écrites dans {args.metriques}")
+
+
+def creer_systeme(args):
+    systeme = SystemeLocation(creer_gestionnaire(args))
+    if args.flux:
+        if not args.agence:
+            raise SystemExit("⚠️ --flux demande un nom d'agence (--agence)")
+        systeme.set_replication(ReplicationAgences(systeme, args.flux, args.agence))
+    return systeme
+
+
+def session(args):
+    systeme = creer_systeme(args)
+    try:
+        return menu(systeme)
+    finally:
+        # écriture différée : ce qui est encore en attente est écrit avant de quitter
+        try:
+            systeme.fermer()
+        except Exception as e:
+            print(f"⚠️ Modifications non sauvegardées : {e}")
+            raise SystemExit(1)
+
+
+def menu(systeme):
     while True:
+        # modifications des autres agences reçues avant chaque affichage du menu
+        try:
+            nb = systeme.synchroniser_agences()
+            if nb:
+                print(f"🔄 {nb} modification(s) reçue(s) des autres agences")
+        except Exception as e:
+            print(f"⚠️ Synchronisation impossible : {e}")
         print("\n=== MENU PRINCIPAL ===")
         print("1. Ajouter un client")
         print("2. Afficher la liste des clients")
@@ -194,6 +826,12 @@ def main():
         print("5. Créer un contrat de location")
         print("6. Afficher la liste des contrats actifs")
         print("7. Tester le polymorphisme (Voiture/Moto)")
+        print("8. Statistiques")
+        print("9. Rapports (chiffre d'affaires, clients, utilisation)")
+        print("10. Retour d'un véhicule (clôture du contrat)")
+        print("11. Contrats clos (archive)")
+        print("12. Réservations en lot (client entreprise)")
+        print("13. Agences (réplication)")
         print("0. Quitter")
 
         choix = input("Votre choix : ")
@@ -201,17 +839,29 @@ def main():
         if choix == "1":
             systeme.ajouter_client()
         elif choix == "2":
-            systeme.afficher_clients()
+            systeme.parcourir_clients()
         elif choix == "3":
             systeme.ajouter_vehicule()
         elif choix == "4":
-            systeme.afficher_vehicules()
+            systeme.parcourir_vehicules()
         elif choix == "5":
             systeme.creer_contrat()
         elif choix == "6":
-            systeme.afficher_contrats()
+            systeme.parcourir_contrats()
         elif choix == "7":
-            systeme.tester_polymorphisme()
+            systeme.parcourir(systeme.tester_polymorphisme)
+        elif choix == "8":
+            systeme.afficher_statistiques()
+        elif choix == "9":
+            systeme.consulter_rapports()
+        elif choix == "10":
+            systeme.retour_vehicule()
+        elif choix == "11":
+            systeme.parcourir_archives()
+        elif choix == "12":
+            systeme.reserver_en_lot()
+        elif choix == "13":
+            systeme.afficher_agences()
         elif choix == "0":
             print("👋 Au revoir !")
             break
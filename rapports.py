@@ -0,0 +1,228 @@
+import calendar
+import heapq
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from archive_contrats import CumulsArchive
+from calendrier import jours_par_mois
+from classes import ContratLocation
+from instrumentation import mesurer
+
+
+class Cumul:
+    """Nombre de contrats, montant total et jours loués."""
+    __slots__ = ('nb', 'montant', 'jours')
+
+    def __init__(self):
+        self.nb = 0
+        self.montant = 0.0
+        self.jours = 0
+
+    def ajouter(self, montant: float, jours: int, nb: int = 1):
+        self.nb += nb
+        self.montant += nb * montant
+        self.jours += nb * jours
+
+    def ajouter_totaux(self, nb: int, montant: float, jours: int):
+        """Ajoute des totaux déjà cumulés (nb contrats, leur montant et leurs jours)."""
+        self.nb += nb
+        self.montant += montant
+        self.jours += jours
+
+    def duree_moyenne(self) -> float:
+        return self.jours / self.nb if self.nb else 0.0
+
+    def to_dict(self):
+        return {'nb': self.nb, 'montant': self.montant, 'jours': self.jours}
+
+
+# ===============================================================
+# RAPPORTS (chiffre d'affaires, clients, utilisation de la flotte)
+# ---------------------------------------------------------------
+# Rôle : Répondre tout de suite à « chiffre d'affaires par type ce
+#        mois-ci », « meilleurs clients » ou « taux d'utilisation »,
+#        sans parcourir l'historique des contrats.
+# - Cumuls tenus à jour à chaque contrat (O(1)) : total, par type
+#   (Voiture/Moto), par marque, par client, par mois et par type et
+#   mois ; jours loués par type et par mois (une location à cheval
+#   sur deux mois compte dans chacun).
+# - Comme l'index des contrats par client, les cumuls sont calculés en
+#   une passe au premier rapport : le chargement paresseux reste
+#   paresseux. Ensuite seuls les nouveaux contrats sont ajoutés.
+# - Les contrats clos restent comptés : à la construction, les cumuls
+#   de l'archive (enregistrés avec elle, voir archive_contrats.py) sont
+#   ajoutés à ceux des contrats actifs, sans relire l'historique ; une
+#   clôture ne change pas les cumuls. Seul un contrat annulé (conflit
+#   entre agences) est retiré des cumuls.
+# - verifier() recalcule tout depuis les contrats et liste les écarts.
+# ===============================================================
+class RapportsLocation:
+    def __init__(self):
+        self.__contrats: Iterable[ContratLocation] = []
+        self.__archives: Optional[Callable[[], Iterable[ContratLocation]]] = None
+        self.__cumuls_archives: Optional[Callable[[], CumulsArchive]] = None
+        self.__index = None
+        self.__prets = False
+        self.__total = Cumul()
+        self.__par_type: Dict[str, Cumul] = {}
+        self.__par_marque: Dict[str, Cumul] = {}
+        self.__par_client: Dict[int, Cumul] = {}
+        self.__clients: Dict[int, object] = {}
+        self.__par_mois: Dict[Optional[Tuple[int, int]], Cumul] = {}  # mois du début (None : sans date)
+        self.__par_type_mois: Dict[Tuple[str, Optional[Tuple[int, int]]], Cumul] = {}
+        self.__jours_loues: Dict[Tuple[str, Tuple[int, int]], int] = {}  # (type, mois) -> jours occupés
+
+    def reconstruire(self, contrats: Iterable[ContratLocation],
+                     archives: Optional[Callable[[], Iterable[ContratLocation]]] = None,
+                     cumuls_archives: Optional[Callable[[], CumulsArchive]] = None, index=None):
+        """archives() : contrats clos, relus en entier par verifier().
+
+        cumuls_archives() : leurs cumuls par identifiants, utilisés au premier
+        rapport s'ils sont fournis ; index résout les identifiants
+        (vehicule_par_identifiant, client_par_identifiant).
+        """
+        self.__init__()
+        self.__contrats = contrats
+        self.__archives = archives
+        self.__cumuls_archives = cumuls_archives
+        self.__index = index
+
+    # --- Mise à jour incrémentale ---
+    def ajouter_contrat(self, contrat: ContratLocation):
+        # le contrat est déjà dans la liste source ; il suffit de le cumuler si les cumuls existent
+        if self.__prets:
+            self.__cumuler(contrat)
+
+    def retirer_contrat(self, contrat: ContratLocation):
+        # contrat annulé (jamais exécuté), déjà retiré de la liste source
+        if self.__prets:
+            self.__cumuler(contrat, -1)
+
+    def __cumuler(self, contrat: ContratLocation, nb: int = 1):
+        vehicule, client = contrat.get_vehicule(), contrat.get_client()
+        montant, jours = contrat.get_montant_total(), contrat.get_nb_jours()
+        type_v = vehicule.get_type()
+        debut = contrat.get_date_debut()
+        mois = (debut.year, debut.month) if debut is not None else None
+        self.__total.ajouter(montant, jours, nb)
+        self.__cumul(self.__par_type, type_v).ajouter(montant, jours, nb)
+        self.__cumul(self.__par_marque, vehicule.get_marque()).ajouter(montant, jours, nb)
+        self.__cumul(self.__par_client, client.get_identifiant()).ajouter(montant, jours, nb)
+        self.__clients[client.get_identifiant()] = client
+        self.__cumul(self.__par_mois, mois).ajouter(montant, jours, nb)
+        self.__cumul(self.__par_type_mois, (type_v, mois)).ajouter(montant, jours, nb)
+        if debut is not None:
+            for m, n in jours_par_mois(debut, contrat.get_date_fin()):
+                self.__jours_loues[(type_v, m)] = self.__jours_loues.get((type_v, m), 0) + nb * n
+
+    @staticmethod
+    def __cumul(cumuls, cle) -> Cumul:
+        cumul = cumuls.get(cle)
+        if cumul is None:
+            cumul = cumuls[cle] = Cumul()
+        return cumul
+
+    def __cumuler_archives(self, cumuls: CumulsArchive):
+        # identifiants -> véhicules et clients actuels (type et marque du moment, comme pour les actifs)
+        for (vehicule_id, mois), (nb, montant, jours) in cumuls.par_vehicule_mois.items():
+            vehicule = self.__index.vehicule_par_identifiant(vehicule_id)
+            if vehicule is None:
+                continue
+            type_v = vehicule.get_type()
+            self.__total.ajouter_totaux(nb, montant, jours)
+            self.__cumul(self.__par_type, type_v).ajouter_totaux(nb, montant, jours)
+            self.__cumul(self.__par_marque, vehicule.get_marque()).ajouter_totaux(nb, montant, jours)
+            self.__cumul(self.__par_mois, mois).ajouter_totaux(nb, montant, jours)
+            self.__cumul(self.__par_type_mois, (type_v, mois)).ajouter_totaux(nb, montant, jours)
+        for client_id, (nb, montant, jours) in cumuls.par_client.items():
+            client = self.__index.client_par_identifiant(client_id)
+            if client is None:
+                continue
+            self.__cumul(self.__par_client, client_id).ajouter_totaux(nb, montant, jours)
+            self.__clients[client_id] = client
+        for (vehicule_id, mois), n in cumuls.jours_loues.items():
+            vehicule = self.__index.vehicule_par_identifiant(vehicule_id)
+            if vehicule is not None:
+                cle = (vehicule.get_type(), mois)
+                self.__jours_loues[cle] = self.__jours_loues.get(cle, 0) + n
+
+    def __preparer(self):
+        if not self.__prets:
+            with mesurer("rapports.construction"):
+                for contrat in self.__contrats:
+                    self.__cumuler(contrat)
+                if self.__cumuls_archives is not None:
+                    self.__cumuler_archives(self.__cumuls_archives())
+                else:
+                    for contrat in self.__archives() if self.__archives is not None else ():
+                        self.__cumuler(contrat)
+            self.__prets = True
+
+    # --- Consultation ---
+    def total(self) -> Cumul:
+        self.__preparer()
+        return self.__total
+
+    def par_type(self, mois: Optional[Tuple[int, int]] = None) -> Dict[str, Cumul]:
+        """Cumuls par type de véhicule, sur tout l'historique ou pour un mois (année, mois) de début."""
+        self.__preparer()
+        if mois is None:
+            return dict(self.__par_type)
+        return {t: c for (t, m), c in self.__par_type_mois.items() if m == mois}
+
+    def par_mois(self) -> Dict[Optional[Tuple[int, int]], Cumul]:
+        self.__preparer()
+        return dict(self.__par_mois)
+
+    def meilleures_marques(self, nombre: int = 10) -> List[Tuple[str, Cumul]]:
+        self.__preparer()
+        return heapq.nlargest(nombre, self.__par_marque.items(), key=lambda e: e[1].montant)
+
+    def meilleurs_clients(self, nombre: int = 10) -> List[Tuple[object, Cumul]]:
+        self.__preparer()
+        meilleurs = heapq.nlargest(nombre, self.__par_client.items(), key=lambda e: e[1].montant)
+        return [(self.__clients[identifiant], cumul) for identifiant, cumul in meilleurs]
+
+    def utilisation(self, mois: Tuple[int, int], flotte: Dict[str, int]) -> Dict[str, float]:
+        """Taux d'occupation par type sur un mois : jours loués / (véhicules x jours du mois).
+
+        flotte : nombre de véhicules par type (IndexLocation.nb_vehicules_par_type).
+        """
+        self.__preparer()
+        jours_du_mois = calendar.monthrange(*mois)[1]
+        taux = {}
+        for type_v, nb in flotte.items():
+            if nb:
+                taux[type_v] = self.__jours_loues.get((type_v, mois), 0) / (nb * jours_du_mois)
+        loues = sum(self.__jours_loues.get((t, mois), 0) for t in flotte)
+        nb_total = sum(flotte.values())
+        taux['Flotte'] = loues / (nb_total * jours_du_mois) if nb_total else 0.0
+        return taux
+
+    # --- Vérification ---
+    def instantane(self) -> Dict[str, Dict[str, dict]]:
+        self.__preparer()
+        return {
+            'total': {'': self.__total.to_dict()},
+            'par_type': {str(k): c.to_dict() for k, c in self.__par_type.items()},
+            'par_marque': {str(k): c.to_dict() for k, c in self.__par_marque.items()},
+            'par_client': {str(k): c.to_dict() for k, c in self.__par_client.items()},
+            'par_mois': {str(k): c.to_dict() for k, c in self.__par_mois.items()},
+            'par_type_mois': {str(k): c.to_dict() for k, c in self.__par_type_mois.items()},
+            'jours_loues': {str(k): {'jours': n} for k, n in self.__jours_loues.items()},
+        }
+
+    def verifier(self) -> List[str]:
+        """Recalcule les cumuls depuis les contrats (archive relue en entier) ; renvoie les écarts."""
+        with mesurer("rapports.verification"):
+            reference = RapportsLocation()
+            reference.reconstruire(self.__contrats, self.__archives)
+            attendu, actuel = reference.instantane(), self.instantane()
+        ecarts = []
+        for groupe, cumuls in attendu.items():
+            for cle in cumuls.keys() | actuel[groupe].keys():
+                a, b = cumuls.get(cle, {}), actuel[groupe].get(cle, {})
+                for champ in a.keys() | b.keys():
+                    if not math.isclose(a.get(champ, 0), b.get(champ, 0), rel_tol=1e-9, abs_tol=1e-6):
+                        ecarts.append(f"{groupe}[{cle}].{champ} : {b.get(champ, 0)} au lieu de {a.get(champ, 0)}")
+        return ecarts
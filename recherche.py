@@ -0,0 +1,167 @@
+import unicodedata
+from bisect import bisect_left, insort
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+
+def normaliser(texte) -> str:
+    """Minuscules sans accents ; tout ce qui n'est ni lettre ni chiffre devient un espace."""
+    texte = unicodedata.normalize('NFKD', str(texte or '')).lower()
+    return ''.join(c if c.isalnum() else ' ' for c in texte if not unicodedata.combining(c))
+
+
+def trigrammes(mot: str) -> Set[str]:
+    mot = f" {mot} "  # bords marqués : le début et la fin du mot comptent aussi
+    return {mot[i:i + 3] for i in range(len(mot) - 2)}
+
+
+# ===============================================================
+# INDEX DE RECHERCHE PAR PRÉFIXE (ET APPROCHÉE)
+# ---------------------------------------------------------------
+# Rôle : Retrouver des clients ou des véhicules à partir de quelques
+#        lettres ou chiffres tapés (« kou aw », « 0701 », « toy cor »).
+# - Chaque entité est découpée en mots normalisés (voir normaliser) ;
+#   un champ de plusieurs mots qui contient des chiffres (téléphone,
+#   immatriculation) donne aussi sa forme collée (« 1234 AB 01 » ->
+#   « 1234ab01 », « AB 456 CI » -> « ab456ci »).
+# - Vocabulaire trié : les mots qui commencent par un préfixe sont une
+#   tranche obtenue par dichotomie. Chaque terme de la requête doit être
+#   le préfixe d'un mot de l'entité.
+# - Les résultats sont produits au fil de l'eau et la recherche s'arrête
+#   à `limite` : le temps dépend du nombre de résultats demandés, pas
+#   de la taille de la flotte ou du fichier clients.
+# - Recherche approchée (faute de frappe) si aucun mot ne commence par
+#   le terme : mots alphabétiques partageant assez de trigrammes.
+#   Les mots avec chiffres (téléphones, immatriculations) sont uniques
+#   et nombreux : ils ne sont pas dans l'index de trigrammes.
+# - Mise à jour incrémentale : ajouter / mettre_a_jour / retirer.
+# ===============================================================
+class IndexRecherche:
+    SIMILARITE_MIN = 0.4
+
+    def __init__(self, textes: Callable[[object], Iterable[str]]):
+        # textes(entite) -> champs à indexer
+        self.__textes = textes
+        self.__vocabulaire: List[str] = []                # mots distincts, triés
+        # identifiant seul (mot propre à une entité : téléphone...) ou dict utilisé comme ensemble ordonné
+        self.__entites_par_mot: Dict[str, Union[int, Dict[int, None]]] = {}
+        self.__mots_par_entite: Dict[int, Tuple[str, ...]] = {}
+        self.__entites: Dict[int, object] = {}
+        self.__trigrammes: Dict[str, Set[str]] = {}
+
+    def __len__(self):
+        return len(self.__entites)
+
+    def __mots(self, entite) -> Tuple[str, ...]:
+        mots = []
+        for texte in self.__textes(entite):
+            decoupe = normaliser(texte).split()
+            mots.extend(decoupe)
+            if len(decoupe) > 1 and any(c.isdigit() for mot in decoupe for c in mot):
+                mots.append(''.join(decoupe))  # « 07 01 02 » ou « AB 456 CI » se cherchent aussi collés
+        return tuple(dict.fromkeys(mots))
+
+    # --- Construction et mises à jour ---
+    def construire(self, entites: Iterable):
+        """Construction complète (un seul tri du vocabulaire)."""
+        self.__init__(self.__textes)
+        for e in entites:
+            self.__indexer(e, trier=False)
+        self.__vocabulaire = sorted(self.__entites_par_mot)
+
+    def ajouter(self, entite):
+        self.__indexer(entite, trier=True)
+
+    def retirer(self, entite):
+        identifiant = entite.get_identifiant()
+        self.__entites.pop(identifiant, None)
+        for mot in self.__mots_par_entite.pop(identifiant, ()):
+            entites = self.__entites_par_mot[mot]
+            if isinstance(entites, dict):
+                entites.pop(identifiant, None)
+            if not isinstance(entites, dict) or not entites:
+                del self.__entites_par_mot[mot]
+                del self.__vocabulaire[bisect_left(self.__vocabulaire, mot)]
+                for t in trigrammes(mot) if mot.isalpha() else ():
+                    self.__trigrammes[t].discard(mot)
+
+    def mettre_a_jour(self, entite):
+        # nom, téléphone, marque... modifiés : les anciens mots sont retirés
+        self.retirer(entite)
+        self.ajouter(entite)
+
+    def __indexer(self, entite, trier: bool):
+        identifiant = entite.get_identifiant()
+        mots = self.__mots(entite)
+        self.__entites[identifiant] = entite
+        self.__mots_par_entite[identifiant] = mots
+        for mot in mots:
+            entites = self.__entites_par_mot.get(mot)
+            if entites is None:
+                self.__entites_par_mot[mot] = identifiant
+                if trier:
+                    insort(self.__vocabulaire, mot)
+                if mot.isalpha():
+                    for t in trigrammes(mot):
+                        self.__trigrammes.setdefault(t, set()).add(mot)
+            elif isinstance(entites, dict):
+                entites[identifiant] = None
+            elif entites != identifiant:
+                self.__entites_par_mot[mot] = {entites: None, identifiant: None}
+
+    # --- Recherche ---
+    def __identifiants(self, mot: str) -> Iterable[int]:
+        entites = self.__entites_par_mot[mot]
+        return entites if isinstance(entites, dict) else (entites,)
+
+    def __mots_prefixes(self, prefixe: str) -> Iterator[str]:
+        i = bisect_left(self.__vocabulaire, prefixe)
+        while i < len(self.__vocabulaire) and self.__vocabulaire[i].startswith(prefixe):
+            yield self.__vocabulaire[i]
+            i += 1
+
+    def mots_proches(self, terme: str, nombre: int = 5) -> List[str]:
+        """Mots alphabétiques les plus proches d'un terme mal orthographié."""
+        cibles = trigrammes(terme)
+        communs: Dict[str, int] = {}
+        for t in cibles:
+            for mot in self.__trigrammes.get(t, ()):
+                communs[mot] = communs.get(mot, 0) + 1
+        scores = []
+        for mot, n in communs.items():
+            similarite = n / (len(cibles) + len(trigrammes(mot)) - n)
+            if similarite >= self.SIMILARITE_MIN:
+                scores.append((-similarite, mot))
+        return [mot for _, mot in sorted(scores)[:nombre]]
+
+    def rechercher(self, requete: str, limite: Optional[int] = 20, filtre: Optional[Callable] = None) -> List:
+        """Entités dont chaque terme de la requête commence un de leurs mots (et acceptées par filtre)."""
+        termes = sorted(set(normaliser(requete).split()), key=len, reverse=True)
+        if not termes:
+            return []
+        # candidats : mots du terme le plus long (souvent le plus sélectif), parcourus au fil de l'eau
+        mots_premier = self.__mots_prefixes(termes[0])
+        mot = next(mots_premier, None)
+        premier = chain((mot,), mots_premier) if mot is not None else self.mots_proches(termes[0])
+        autres = []
+        for terme in termes[1:]:
+            if next(self.__mots_prefixes(terme), None) is not None:
+                autres.append((terme,))
+            else:
+                proches = tuple(self.mots_proches(terme))
+                if not proches:
+                    return []
+                autres.append(proches)
+        resultats, vus = [], set()
+        for mot in premier:
+            for identifiant in self.__identifiants(mot):
+                if identifiant in vus:
+                    continue
+                vus.add(identifiant)
+                mots = self.__mots_par_entite[identifiant]
+                if all(any(m.startswith(p) for p in possibles for m in mots) for possibles in autres) \
+                        and (filtre is None or filtre(self.__entites[identifiant])):
+                    resultats.append(self.__entites[identifiant])
+                    if limite is not None and len(resultats) >= limite:
+                        return resultats
+        return resultats
@@ -0,0 +1,414 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from calendrier import lire_date, periode
+from classes import Client, ContratLocation, Vehicule
+from instrumentation import compter, compter_octets, mesurer
+from verrous import ConflitEcriture, taille_fichier
+
+NOM_AGENCE = re.compile(r"^[\w-]+$")
+EXTENSION_FLUX = ".jsonl"
+OPERATIONS = ('ajout_vehicule', 'ajout_client', 'creation_contrat', 'cloture_contrat')
+
+# (téléphone, immatriculation, début) : un contrat désigné de la même façon dans toutes les agences
+CleContrat = Tuple[str, str, Optional[str]]
+# (horodatage, agence, séquence) : ordre total des réservations, identique partout
+Marque = Tuple[float, str, int]
+INCONNUE: Marque = (0.0, "", 0)
+
+
+# ===============================================================
+# RÉPLICATION ENTRE AGENCES (flux de modifications)
+# ---------------------------------------------------------------
+# Rôle : Garder la même flotte, les mêmes clients et les mêmes
+#        réservations dans plusieurs agences, chacune avec son propre
+#        processus SystemeLocation et son propre stockage.
+# - Dossier partagé : chaque agence ajoute ses mutations à SON flux
+#   (<agence>.jsonl, ajout seul, un seul écrivain) ; un événement =
+#   numéro de séquence, agence, horodatage, séquences déjà appliquées
+#   des autres agences (vu), opération, données.
+# - Les identifiants sont propres à chaque agence : les événements
+#   désignent clients et véhicules par téléphone et immatriculation.
+# - Abonnement par sondage du dossier : lire() reprend chaque flux des
+#   autres agences à la position déjà lue (seules les nouvelles lignes
+#   sont décodées), appliquer() intègre les événements au système,
+#   enregistrer() les persiste dans le stockage local, sans les publier
+#   à nouveau, puis note les positions (<agence>.curseurs.json).
+# - Ordre causal : un événement attend que ce que son agence avait vu
+#   soit appliqué ici (une clôture après la création du contrat, une
+#   location après la clôture qui a libéré le véhicule...), ainsi qu'un
+#   client ou un véhicule encore inconnu.
+# - Rejeu sans effet : un client, un véhicule ou un contrat déjà présent
+#   est ignoré ; un arrêt avant la sauvegarde des positions est sans
+#   conséquence.
+# - Conflit (même véhicule réservé sur des périodes qui se chevauchent
+#   dans deux agences) : toutes les réservations ouvertes du véhicule
+#   sont reprises de la plus ancienne (horodatage, agence, séquence) à
+#   la plus récente ; chacune est retenue si elle ne chevauche aucune
+#   réservation déjà retenue. Le résultat ne dépend que des événements
+#   reçus, pas de leur ordre d'arrivée : toutes les agences aboutissent
+#   aux mêmes contrats. Un contrat écarté est annulé (retiré des contrats
+#   actifs et des rapports, pas archivé) et le conflit est signalé ; il
+#   est rétabli si la réservation qui l'emportait est close.
+# - Les réservations ouvertes (retenues ou écartées) sont gardées en
+#   mémoire ; après un redémarrage elles sont relues dans les flux au
+#   premier contrat reçu ou clos.
+# - Les changements de disponibilité d'un véhicule sont ceux de ses
+#   réservations : création et clôture des contrats.
+# ===============================================================
+class ReplicationAgences:
+    def __init__(self, systeme, dossier: str, agence: str):
+        if not NOM_AGENCE.match(agence or ""):
+            raise ValueError(f"Nom d'agence invalide : {agence!r} (lettres, chiffres, - et _)")
+        os.makedirs(dossier, exist_ok=True)
+        self.__systeme = systeme
+        self.__dossier = dossier
+        self.__agence = agence
+        self.__chemin = os.path.join(dossier, agence + EXTENSION_FLUX)
+        self.__chemin_curseurs = os.path.join(dossier, agence + ".curseurs.json")
+        self.__verrou = threading.Lock()  # publication (thread d'écriture) et réservations ouvertes
+        self.__seq, self.__taille_attendue = self.__reprendre()
+        # agence -> [position, séquence] du dernier événement appliqué
+        self.__curseurs: Dict[str, List[int]] = {}
+        if os.path.exists(self.__chemin_curseurs):
+            with open(self.__chemin_curseurs, encoding='utf-8') as f:
+                self.__curseurs = {a: list(c) for a, c in json.load(f).items()}
+        # lu mais pas encore appliqué : agence -> [(événement, position de fin)]
+        self.__lus: Dict[str, int] = {a: c[0] for a, c in self.__curseurs.items()}
+        self.__seq_lues: Dict[str, int] = {a: c[1] for a, c in self.__curseurs.items()}
+        self.__en_attente: Dict[str, List[Tuple[Dict[str, Any], int]]] = {}
+        # réservations ouvertes : clé -> (marque, données de l'événement), par véhicule, et celles écartées
+        self.__candidats: Dict[CleContrat, Tuple[Marque, Dict[str, Any]]] = {}
+        self.__par_vehicule: Dict[str, Set[CleContrat]] = {}
+        self.__ecartes: Set[CleContrat] = set()
+        self.__candidats_complets = False
+        self.__a_reevaluer: Set[str] = set()  # véhicules libérés par une clôture
+        self.__conflits: List[str] = []
+
+    def get_agence(self):
+        return self.__agence
+
+    def get_dossier(self):
+        return self.__dossier
+
+    def get_conflits(self) -> List[str]:
+        return list(self.__conflits)
+
+    def agences(self) -> List[str]:
+        """Autres agences présentes dans le dossier partagé."""
+        return sorted(nom[:-len(EXTENSION_FLUX)] for nom in os.listdir(self.__dossier)
+                      if nom.endswith(EXTENSION_FLUX) and nom != self.__agence + EXTENSION_FLUX)
+
+    def etat(self) -> Dict[str, Dict[str, int]]:
+        """Par agence : dernière séquence appliquée et événements lus en attente."""
+        return {a: {'seq': self.__curseurs.get(a, [0, 0])[1], 'en_attente': len(self.__en_attente.get(a, []))}
+                for a in self.agences()}
+
+    def __reprendre(self) -> Tuple[int, int]:
+        # dernière séquence de notre flux et taille attendue ; une dernière ligne
+        # incomplète (arrêt brutal) est coupée, comme dans le journal
+        taille = taille_fichier(self.__chemin)
+        if taille == 0:
+            return 0, 0
+        with open(self.__chemin, "rb") as f:
+            f.seek(max(0, taille - 65536))
+            lignes = f.read().split(b"\n")
+        if lignes[-1]:
+            print(f"⚠️ Fin du flux {self.__chemin} incomplète (écriture interrompue) : coupée")
+            taille -= len(lignes[-1])
+            os.truncate(self.__chemin, taille)
+        lignes = [l for l in lignes[:-1] if l]
+        return (json.loads(lignes[-1])['seq'] if lignes else 0), taille
+
+    # ---------------------------------------------------------------
+    # Publication (mutations locales)
+    # ---------------------------------------------------------------
+    def publier(self, operations):
+        """Ajoute les mutations locales à notre flux, en une écriture."""
+        with self.__verrou:
+            horodatage = time.time()
+            vu = {a: c[1] for a, c in list(self.__curseurs.items())}
+            seq = self.__seq
+            lignes = []
+            for operation, donnees in operations:
+                donnees = self.__exporter(operation, donnees)
+                if donnees is None:
+                    continue
+                seq += 1
+                lignes.append(json.dumps({'seq': seq, 'agence': self.__agence, 'horodatage': horodatage, 'vu': vu,
+                                          'op': operation, 'donnees': donnees}, ensure_ascii=False) + "\n")
+                self.__noter(operation, donnees, (horodatage, self.__agence, seq))
+            if not lignes:
+                return
+            if taille_fichier(self.__chemin) != self.__taille_attendue:
+                raise ConflitEcriture(f"{self.__chemin} modifié par un autre processus (même nom d'agence ?)")
+            contenu = "".join(lignes).encode('utf-8')
+            with mesurer("replication.publication"), open(self.__chemin, "ab") as f:
+                f.write(contenu)
+                f.flush()
+                os.fsync(f.fileno())
+            self.__taille_attendue += len(contenu)
+            self.__seq = seq
+        compter("replication.publies", len(lignes))
+        compter_octets("ecrits", "replication", len(contenu))
+
+    def __exporter(self, operation: str, donnees: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # identifiants locaux -> téléphone et immatriculation
+        if operation not in OPERATIONS:
+            return None
+        d = {k: v for k, v in donnees.items() if k not in ('id', 'reservations')}
+        if operation in ('creation_contrat', 'cloture_contrat'):
+            client = self.__systeme.client_par_identifiant(d.pop('client_id'))
+            vehicule = self.__systeme.vehicule_par_identifiant(d.pop('vehicule_id'))
+            if client is None or vehicule is None:
+                return None
+            d['telephone'], d['immatriculation'] = client.get_telephone(), vehicule.get_immatriculation()
+        if operation in ('ajout_client', 'creation_contrat', 'cloture_contrat') and not d.get('telephone'):
+            print(f"⚠️ Non répliqué (client sans téléphone) : {operation}")
+            return None
+        if operation in ('ajout_vehicule', 'creation_contrat', 'cloture_contrat') and not d.get('immatriculation'):
+            print(f"⚠️ Non répliqué (véhicule sans immatriculation) : {operation}")
+            return None
+        return d
+
+    # ---------------------------------------------------------------
+    # Réservations ouvertes (verrou pris)
+    # ---------------------------------------------------------------
+    @staticmethod
+    def __cle_dict(donnees: Dict[str, Any]) -> CleContrat:
+        return donnees.get('telephone'), donnees.get('immatriculation'), donnees.get('date_debut')
+
+    def __noter(self, operation: str, donnees: Dict[str, Any], marque: Marque):
+        if operation not in ('creation_contrat', 'cloture_contrat'):
+            return
+        self.__completer()
+        cle = self.__cle_dict(donnees)
+        if operation == 'creation_contrat':
+            self.__candidats[cle] = (marque, donnees)
+            self.__par_vehicule.setdefault(cle[1], set()).add(cle)
+            return
+        self.__candidats.pop(cle, None)
+        self.__par_vehicule.get(cle[1], set()).discard(cle)
+        self.__ecartes.discard(cle)
+        if any(c[1] == cle[1] for c in self.__ecartes):
+            self.__a_reevaluer.add(cle[1])  # une réservation écartée peut être rétablie
+
+    def __completer(self):
+        # après un redémarrage : réservations ouvertes relues dans notre flux et dans
+        # ceux des autres agences jusqu'à la position appliquée
+        if self.__candidats_complets:
+            return
+        self.__candidats_complets = True
+        with mesurer("replication.candidats"):
+            for nom in os.listdir(self.__dossier):
+                if not nom.endswith(EXTENSION_FLUX):
+                    continue
+                agence = nom[:-len(EXTENSION_FLUX)]
+                limite = self.__taille_attendue if agence == self.__agence else self.__curseurs.get(agence, [0])[0]
+                with open(os.path.join(self.__dossier, nom), "rb") as f:
+                    contenu = f.read(limite)
+                for ligne in contenu.split(b"\n")[:-1]:
+                    e = json.loads(ligne)
+                    self.__noter(e['op'], e['donnees'], (e['horodatage'], e['agence'], e['seq']))
+            self.__ecartes = {cle for cle in self.__candidats if self.__actif(cle) is None}
+
+    # ---------------------------------------------------------------
+    # Abonnement (mutations des autres agences)
+    # ---------------------------------------------------------------
+    def lire(self) -> int:
+        """Lit les nouveaux événements des autres agences ; renvoie leur nombre."""
+        nouveaux = 0
+        with mesurer("replication.lecture"):
+            for agence in self.agences():
+                chemin = os.path.join(self.__dossier, agence + EXTENSION_FLUX)
+                position = self.__lus.get(agence, 0)
+                if taille_fichier(chemin) <= position:
+                    continue
+                with open(chemin, "rb") as f:
+                    f.seek(position)
+                    contenu = f.read()
+                compter_octets("lus", "replication", len(contenu))
+                attente = self.__en_attente.setdefault(agence, [])
+                # une dernière ligne sans fin est en cours d'écriture : relue au prochain passage
+                for ligne in contenu.split(b"\n")[:-1]:
+                    position += len(ligne) + 1
+                    evenement = json.loads(ligne)
+                    attendue = self.__seq_lues.get(agence, 0) + 1
+                    if evenement['seq'] != attendue:
+                        print(f"⚠️ Flux {agence} : séquence {evenement['seq']} au lieu de {attendue}")
+                    self.__seq_lues[agence] = evenement['seq']
+                    attente.append((evenement, position))
+                    nouveaux += 1
+                self.__lus[agence] = position
+        compter("replication.lus", nouveaux)
+        return nouveaux
+
+    def appliquer(self) -> List[Tuple[str, Dict[str, Any], bool]]:
+        """Intègre les événements lus ; renvoie les mutations locales à persister (op, données, archiver).
+
+        Les agences sont parcourues tant que l'une d'elles progresse : un
+        événement qui attend celui d'une autre agence passe dès que
+        celui-ci est appliqué.
+        """
+        operations: List[Tuple[str, Dict[str, Any], bool]] = []
+        with mesurer("replication.application"):
+            progres = True
+            while progres:
+                progres = False
+                for agence, attente in self.__en_attente.items():
+                    fait = 0
+                    for evenement, position in attente:
+                        if not self.__appliquer(evenement, operations):
+                            break
+                        self.__curseurs[agence] = [position, evenement['seq']]
+                        fait += 1
+                    if fait:
+                        del attente[:fait]
+                        progres = True
+            with self.__verrou:
+                liberes, self.__a_reevaluer = self.__a_reevaluer, set()
+            for immatriculation in sorted(liberes):
+                self.__reevaluer(immatriculation, operations)
+        compter("replication.appliques", len(operations))
+        return operations
+
+    def enregistrer(self, operations: List[Tuple[str, Dict[str, Any], bool]]):
+        """Persiste localement (sans republier) puis note les positions appliquées."""
+        archives = [d for _, d, archiver in operations if archiver]
+        if archives:
+            self.__systeme.archiver(archives)
+        if operations:
+            self.__systeme.enregistrer_mutations([(op, d) for op, d, _ in operations], publier=False)
+        temporaire = self.__chemin_curseurs + ".tmp"
+        with open(temporaire, "w", encoding='utf-8') as f:
+            json.dump(self.__curseurs, f)
+        os.replace(temporaire, self.__chemin_curseurs)
+
+    def synchroniser(self) -> int:
+        """lire(), appliquer() et enregistrer() ; renvoie le nombre de mutations locales."""
+        self.lire()
+        operations = self.appliquer()
+        self.enregistrer(operations)
+        return len(operations)
+
+    # --- Application d'un événement ---
+    def __appliquer(self, evenement: Dict[str, Any], operations) -> bool:
+        """False si l'événement doit attendre (ordre causal, client ou véhicule encore inconnu)."""
+        for agence, seq in evenement.get('vu', {}).items():
+            if agence != self.__agence and self.__curseurs.get(agence, [0, 0])[1] < seq:
+                return False
+        systeme = self.__systeme
+        operation, d = evenement['op'], evenement['donnees']
+        try:
+            if operation == 'ajout_client':
+                if systeme.trouver_client(d['telephone']) is None:
+                    client = systeme.integrer_client(Client.from_dict(d))
+                    operations.append(('ajout_client', client.to_dict(), False))
+                return True
+            if operation == 'ajout_vehicule':
+                if systeme.trouver_vehicule(d['immatriculation']) is None:
+                    vehicule = systeme.integrer_vehicule(Vehicule.from_dict(d))
+                    operations.append(('ajout_vehicule', vehicule.to_dict(), False))
+                return True
+            if operation not in ('creation_contrat', 'cloture_contrat'):
+                print(f"⚠️ Opération inconnue dans le flux {evenement['agence']} : {operation}")
+                return True
+            if systeme.trouver_client(d['telephone']) is None or systeme.trouver_vehicule(d['immatriculation']) is None:
+                return False
+            cle = self.__cle_dict(d)
+            existant = self.__actif(cle)
+            with self.__verrou:
+                self.__noter(operation, d, (evenement['horodatage'], evenement['agence'], evenement['seq']))
+            if operation == 'cloture_contrat':
+                if existant is not None:
+                    systeme.retourner(existant, lire_date(d.get('date_retour')))
+                    operations.append(('cloture_contrat', existant.to_dict(), True))
+                return True
+            if existant is None:
+                contrat = self.__contrat(d)
+                debut, fin = contrat.get_date_debut(), contrat.get_date_fin()
+                if debut is None or contrat.get_vehicule().reserver(debut, fin):
+                    if debut is None:
+                        contrat.appliquer_reservation()  # ancien format : pas de période à comparer
+                    systeme.integrer_contrat(contrat)
+                    operations.append(('creation_contrat', contrat.to_dict(), False))
+                else:
+                    self.__reevaluer(d['immatriculation'], operations)
+            return True
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"⚠️ Événement {evenement.get('agence')}#{evenement.get('seq')} ignoré : {e}", file=sys.stderr)
+            return True
+
+    def __actif(self, cle: CleContrat) -> Optional[ContratLocation]:
+        client, vehicule = self.__systeme.trouver_client(cle[0]), self.__systeme.trouver_vehicule(cle[1])
+        if client is None or vehicule is None:
+            return None
+        cle_locale = (client.get_identifiant(), vehicule.get_identifiant(), cle[2])
+        return next((c for c in self.__systeme.contrats_du_client(client) if c.cle() == cle_locale), None)
+
+    def __contrat(self, d: Dict[str, Any]) -> ContratLocation:
+        # contrat (non réservé) à partir des données d'un événement
+        client, vehicule = self.__systeme.trouver_client(d['telephone']), self.__systeme.trouver_vehicule(d['immatriculation'])
+        local = {k: v for k, v in d.items() if k not in ('telephone', 'immatriculation')}
+        local['client_id'], local['vehicule_id'] = client.get_identifiant(), vehicule.get_identifiant()
+        return ContratLocation.from_dict(local, {client.get_identifiant(): client},
+                                         {vehicule.get_identifiant(): vehicule})
+
+    # --- Conflits : réservations ouvertes d'un véhicule reprises dans l'ordre des marques ---
+    def __reevaluer(self, immatriculation: str, operations):
+        systeme = self.__systeme
+        vehicule = systeme.trouver_vehicule(immatriculation)
+        with self.__verrou:
+            self.__completer()
+            candidats = sorted((self.__candidats[cle] + (cle,) for cle in self.__par_vehicule.get(immatriculation, ())),
+                               key=lambda c: (c[0], c[2]))
+        retenus: List[Tuple[Any, Any, str]] = []  # (début, fin, agence) des réservations retenues
+        gagnants: Dict[CleContrat, str] = {}  # clé écartée -> agence de la réservation qui l'emporte
+        for marque, d, cle in candidats:
+            debut = lire_date(d.get('date_debut'))
+            if debut is None:
+                continue
+            fin = periode(debut, d['nb_jours'])[1]
+            gagnant = next((a for r_debut, r_fin, a in retenus if debut < r_fin and r_debut < fin), None)
+            if gagnant is None:
+                retenus.append((debut, fin, marque[1]))
+            else:
+                gagnants[cle] = gagnant
+        actifs = {cle: self.__actif(cle) for _, _, cle in candidats}
+        # annulations d'abord : elles libèrent le calendrier
+        for _, d, cle in candidats:
+            if cle in gagnants and actifs[cle] is not None:
+                systeme.annuler(actifs[cle])
+                operations.append(('cloture_contrat', actifs[cle].to_dict(), False))
+                self.__signaler(d, f"annulé au profit de la réservation antérieure de {gagnants[cle]}")
+        for _, d, cle in candidats:
+            if cle in gagnants:
+                if actifs[cle] is None and cle not in self.__ecartes:
+                    self.__signaler(d, f"ignoré, réservation antérieure de {gagnants[cle]}")
+                self.__ecartes.add(cle)
+            elif actifs[cle] is None:
+                contrat = self.__contrat(d)
+                if contrat.get_date_debut() is not None and \
+                        not vehicule.reserver(contrat.get_date_debut(), contrat.get_date_fin()):
+                    # période occupée par un contrat antérieur à la réplication
+                    if cle not in self.__ecartes:
+                        self.__signaler(d, "ignoré, période déjà occupée")
+                    self.__ecartes.add(cle)
+                    continue
+                systeme.integrer_contrat(contrat)
+                operations.append(('creation_contrat', contrat.to_dict(), False))
+                if cle in self.__ecartes:
+                    self.__signaler(d, "rétabli (la réservation qui l'emportait est close)")
+                    self.__ecartes.discard(cle)
+
+    def __signaler(self, d: Dict[str, Any], raison: str):
+        message = (f"Conflit sur {d.get('immatriculation')} à partir du {d.get('date_debut')} "
+                   f"({d.get('nb_jours')} jours, client {d.get('telephone')}) : {raison}")
+        self.__conflits.append(message)
+        compter("replication.conflits")
+        print(f"⚠️ {message}")
@@ -0,0 +1,433 @@
+import asyncio
+import contextlib
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from itertools import islice
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from allocation import DemandeLocation
+from calendrier import lire_date
+from classes import Client
+from instrumentation import METRIQUES, ProfilSession, activer, mesurer
+from main import SystemeLocation, creer_parseur, creer_systeme
+
+
+# ===============================================================
+# SERVICE HTTP/JSON (asyncio, bibliothèque standard uniquement)
+# ---------------------------------------------------------------
+# Rôle : Donner accès au SystemeLocation à plusieurs agents en même temps.
+# - Une seule boucle asyncio modifie le système : pas d'accès concurrent
+#   aux listes et index.
+# - La persistance s'exécute dans un thread dédié (ordre des écritures
+#   conservé) : la boucle continue à servir pendant l'écriture disque.
+# - Une création, un lot ou un retour qui n'a pas pu être enregistré est
+#   défait en mémoire (contrat annulé, retour rétabli) avant la réponse
+#   500. Ces écritures de contrats passent une à une (verrou asyncio) : rien
+#   ne peut reprendre entre-temps la période libérée par un retour.
+# - HTTP/1.1 minimal avec connexions persistantes (keep-alive). Un
+#   Content-Length illisible (400) ou trop grand (413, TAILLE_CORPS_MAX)
+#   reçoit une réponse d'erreur, puis la connexion est fermée.
+# - Avec --flux/--agence, les modifications des autres agences sont lues
+#   toutes les --intervalle-flux secondes (thread de persistance) et
+#   appliquées par la boucle, comme une requête.
+#
+# Points d'accès :
+#   GET  /vehicules/disponibles?type=Voiture&limite=100
+#   GET  /vehicules/disponibles?debut=2025-07-01&fin=2025-07-08   (fin exclue)
+#   GET  /vehicules/<immatriculation>
+#   GET  /clients/<telephone>
+#   GET  /clients/<telephone>/contrats   (contrats actifs)
+#   GET  /clients/<telephone>/archives?limite=100   (contrats clos, lus dans l'archive)
+#   GET  /recherche/clients?q=kou&limite=20
+#   GET  /recherche/vehicules?q=toy&debut=2025-07-01&fin=2025-07-08   (période optionnelle)
+#   GET  /rapports?mois=2025-07   (cumuls : chiffre d'affaires, clients, utilisation)
+#   GET  /metriques   (statistiques JSON, avec --instrumenter)
+#   POST /clients    {"nom", "prenom", "telephone"}
+#   POST /contrats   {"telephone", "immatriculation", "nb_jours", "date_debut" (optionnel)}
+#   POST /contrats/lot   {"telephone", "demandes": [{"type", "nombre", "nb_jours", "date_debut",
+#                         "nombre_portes", "cylindree_min", "prix_max"}], "tout_ou_rien": false}
+#        (réservations en lot ; 409 si aucun véhicule n'a pu être réservé)
+#   POST /contrats/retour   {"telephone", "immatriculation", "date_debut" (optionnel), "date_retour" (optionnel)}
+# ===============================================================
+class ErreurHTTP(Exception):
+    def __init__(self, statut: int, message: str):
+        super().__init__(message)
+        self.statut = statut
+        self.message = message
+
+
+RAISONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+LIMITE_PAR_DEFAUT = 100
+TAILLE_CORPS_MAX = 1 << 20  # octets ; un lot de réservations tient largement dans 1 Mio
+
+
+class ServiceLocation:
+    def __init__(self, systeme: SystemeLocation, intervalle_flux: float = 1.0):
+        self.__systeme = systeme
+        self.__intervalle_flux = intervalle_flux
+        self.__persistance = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persistance")
+        self.__contrats_verrou: Optional[asyncio.Lock] = None  # créé dans la boucle (Python 3.7+)
+
+    # --- Persistance non bloquante ---
+    async def __persister(self, operation: str, donnees: Dict[str, Any]):
+        boucle = asyncio.get_running_loop()
+        await boucle.run_in_executor(self.__persistance, self.__systeme.enregistrer_mutation, operation, donnees)
+
+    def __verrou_contrats(self) -> asyncio.Lock:
+        if self.__contrats_verrou is None:
+            self.__contrats_verrou = asyncio.Lock()
+        return self.__contrats_verrou
+
+    async def __suivre_agences(self):
+        replication = self.__systeme.get_replication()
+        boucle = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.__intervalle_flux)
+            try:
+                await boucle.run_in_executor(self.__persistance, replication.lire)
+                async with self.__verrou_contrats():
+                    operations = replication.appliquer()  # la boucle reste seule à modifier le système
+                    await boucle.run_in_executor(self.__persistance, replication.enregistrer, operations)
+            except Exception as e:
+                print(f"⚠️ Réplication : {e}", file=sys.stderr)
+
+    def fermer(self):
+        self.__persistance.shutdown(wait=True)
+        self.__systeme.fermer()
+
+    # --- Routage ---
+    async def traiter_requete(self, methode: str, cible: str, corps: bytes) -> Tuple[int, Any]:
+        with mesurer(f"http.{methode}"):
+            return await self.__router(methode, cible, corps)
+
+    async def __router(self, methode: str, cible: str, corps: bytes) -> Tuple[int, Any]:
+        url = urlsplit(cible)
+        morceaux = [unquote(m) for m in url.path.strip("/").split("/") if m]
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if morceaux[:2] == ["vehicules", "disponibles"] and len(morceaux) == 2:
+            self.__verifier_methode(methode, "GET")
+            limite = self.__entier(params.get("limite", LIMITE_PAR_DEFAUT), "limite")
+            if "debut" in params or "fin" in params:
+                debut, fin = self.__date(params.get("debut")), self.__date(params.get("fin"))
+                if debut is None or fin is None or fin <= debut:
+                    raise ErreurHTTP(400, "'debut' et 'fin' obligatoires, avec fin > debut")
+                vehicules = self.__systeme.vehicules_libres(debut, fin, params.get("type"), limite)
+            else:
+                vehicules = self.__systeme.vehicules_disponibles(params.get("type"), limite)
+            return 200, [v.to_dict() for v in vehicules]
+        if morceaux[:1] == ["vehicules"] and len(morceaux) == 2:
+            self.__verifier_methode(methode, "GET")
+            return 200, self.__vehicule(morceaux[1]).to_dict()
+        if morceaux == ["clients"]:
+            self.__verifier_methode(methode, "POST")
+            return await self.__creer_client(self.__json(corps))
+        if morceaux[:1] == ["clients"] and len(morceaux) == 2:
+            self.__verifier_methode(methode, "GET")
+            return 200, self.__client(morceaux[1]).to_dict()
+        if morceaux[:1] == ["clients"] and len(morceaux) == 3 and morceaux[2] == "contrats":
+            self.__verifier_methode(methode, "GET")
+            client = self.__client(morceaux[1])
+            return 200, [self.__contrat_json(c) for c in self.__systeme.contrats_du_client(client)]
+        if morceaux[:1] == ["clients"] and len(morceaux) == 3 and morceaux[2] == "archives":
+            self.__verifier_methode(methode, "GET")
+            client = self.__client(morceaux[1])
+            limite = self.__entier(params.get("limite", LIMITE_PAR_DEFAUT), "limite")
+            # lecture de l'archive (disque) dans le thread de persistance : après les clôtures en cours
+            boucle = asyncio.get_running_loop()
+            contrats = await boucle.run_in_executor(
+                self.__persistance, lambda: list(islice(self.__systeme.contrats_archives(client), limite)))
+            return 200, [self.__contrat_json(c) for c in contrats]
+        if morceaux == ["contrats"]:
+            self.__verifier_methode(methode, "POST")
+            return await self.__creer_contrat(self.__json(corps))
+        if morceaux == ["contrats", "lot"]:
+            self.__verifier_methode(methode, "POST")
+            return await self.__louer_en_lot(self.__json(corps))
+        if morceaux == ["contrats", "retour"]:
+            self.__verifier_methode(methode, "POST")
+            return await self.__retourner(self.__json(corps))
+        if morceaux == ["recherche", "clients"]:
+            self.__verifier_methode(methode, "GET")
+            limite = self.__entier(params.get("limite", 20), "limite")
+            return 200, [c.to_dict() for c in self.__systeme.rechercher_clients(params.get("q", ""), limite)]
+        if morceaux == ["recherche", "vehicules"]:
+            self.__verifier_methode(methode, "GET")
+            limite = self.__entier(params.get("limite", 20), "limite")
+            filtre = None
+            if "debut" in params or "fin" in params:
+                debut, fin = self.__date(params.get("debut")), self.__date(params.get("fin"))
+                if debut is None or fin is None or fin <= debut:
+                    raise ErreurHTTP(400, "'debut' et 'fin' obligatoires, avec fin > debut")
+                filtre = lambda v: v.est_libre(debut, fin)
+            vehicules = self.__systeme.rechercher_vehicules(params.get("q", ""), limite, filtre)
+            return 200, [v.to_dict() for v in vehicules]
+        if morceaux == ["rapports"]:
+            self.__verifier_methode(methode, "GET")
+            return 200, self.__rapports(params.get("mois"))
+        if morceaux == ["metriques"]:
+            self.__verifier_methode(methode, "GET")
+            return 200, METRIQUES.instantane()
+        raise ErreurHTTP(404, f"Ressource inconnue : {url.path}")
+
+    async def __creer_client(self, donnees):
+        telephone = str(donnees.get("telephone") or "").strip()
+        if not telephone or not donnees.get("nom"):
+            raise ErreurHTTP(400, "Champs 'nom' et 'telephone' obligatoires")
+        # même verrou que les contrats : aucun autre ajout tant que ce client peut être retiré
+        async with self.__verrou_contrats():
+            if self.__systeme.trouver_client(telephone) is not None:
+                raise ErreurHTTP(409, f"Client déjà enregistré : {telephone}")
+            client = self.__systeme.integrer_client(Client(donnees["nom"], donnees.get("prenom", ""), telephone))
+            try:
+                await self.__persister('ajout_client', client.to_dict())
+            except Exception:
+                self.__systeme.retirer_client(client)  # rien d'enregistré : un nouvel essai doit réussir
+                raise
+        return 201, client.to_dict()
+
+    async def __creer_contrat(self, donnees):
+        client = self.__client(str(donnees.get("telephone", "")))
+        vehicule = self.__vehicule(str(donnees.get("immatriculation", "")))
+        nb_jours = self.__entier(donnees.get("nb_jours"), "nb_jours")
+        date_debut = self.__date(donnees.get("date_debut"))
+        async with self.__verrou_contrats():
+            try:
+                contrat = self.__systeme.louer(client, vehicule, nb_jours, date_debut)
+            except ValueError as e:
+                raise ErreurHTTP(409, str(e))
+            try:
+                await self.__persister('creation_contrat', contrat.to_dict())
+            except Exception:
+                self.__systeme.annuler(contrat)  # rien d'enregistré : la location n'a pas eu lieu
+                raise
+        return 201, self.__contrat_json(contrat)
+
+    async def __louer_en_lot(self, donnees):
+        client = self.__client(str(donnees.get("telephone", "")))
+        if not isinstance(donnees.get("demandes"), list) or not donnees["demandes"]:
+            raise ErreurHTTP(400, "Champ 'demandes' obligatoire (liste non vide)")
+        try:
+            demandes = [DemandeLocation.from_dict(d) for d in donnees["demandes"]]
+        except (TypeError, ValueError, AttributeError) as e:
+            raise ErreurHTTP(400, f"Demande invalide : {e}")
+        async with self.__verrou_contrats():
+            affectations = self.__systeme.louer_en_lot(client, demandes, bool(donnees.get("tout_ou_rien")))
+            contrats = [c for a in affectations for c in a.contrats]
+            if contrats:
+                # une seule écriture pour tout le lot
+                boucle = asyncio.get_running_loop()
+                try:
+                    await boucle.run_in_executor(self.__persistance, self.__systeme.enregistrer_mutations,
+                                                 [('creation_contrat', c.to_dict()) for c in contrats])
+                except Exception:
+                    for contrat in contrats:
+                        self.__systeme.annuler(contrat)
+                    raise
+        reponse = [{'demande': a.demande.to_dict(), 'manquants': a.manquants(),
+                    'contrats': [self.__contrat_json(c) for c in a.contrats]} for a in affectations]
+        return (201 if contrats else 409), reponse
+
+    async def __retourner(self, donnees):
+        client = self.__client(str(donnees.get("telephone", "")))
+        vehicule = self.__vehicule(str(donnees.get("immatriculation", "")))
+        date_debut = self.__date(donnees.get("date_debut"))
+        date_retour = self.__date(donnees.get("date_retour"))
+        # sans date de début : le plus ancien contrat actif du client pour ce véhicule
+        contrat = next((c for c in self.__systeme.contrats_du_client(client) if c.get_vehicule() == vehicule
+                        and (date_debut is None or c.get_date_debut() == date_debut)), None)
+        if contrat is None:
+            raise ErreurHTTP(404, f"Aucun contrat actif de {client.get_telephone()} pour {vehicule.get_immatriculation()}")
+        async with self.__verrou_contrats():
+            try:
+                self.__systeme.retourner(contrat, date_retour)
+            except ValueError as e:
+                raise ErreurHTTP(409, str(e))
+            boucle = asyncio.get_running_loop()
+            try:
+                await boucle.run_in_executor(self.__persistance, self.__systeme.enregistrer_cloture, contrat)
+            except Exception:
+                self.__systeme.retablir(contrat)  # le contrat reste actif, comme sur disque
+                raise
+        return 200, self.__contrat_json(contrat)
+
+    # --- Aides ---
+    @staticmethod
+    def __verifier_methode(methode, attendue):
+        if methode != attendue:
+            raise ErreurHTTP(405, f"Méthode {methode} non autorisée")
+
+    @staticmethod
+    def __json(corps: bytes):
+        try:
+            donnees = json.loads(corps or b"{}")
+        except ValueError:
+            raise ErreurHTTP(400, "Corps JSON invalide")
+        if not isinstance(donnees, dict):
+            raise ErreurHTTP(400, "Un objet JSON est attendu")
+        return donnees
+
+    @staticmethod
+    def __entier(valeur, nom) -> int:
+        try:
+            n = int(valeur)
+        except (TypeError, ValueError):
+            raise ErreurHTTP(400, f"'{nom}' doit être un entier")
+        if n < 1:
+            raise ErreurHTTP(400, f"'{nom}' doit être positif")
+        return n
+
+    @staticmethod
+    def __date(valeur):
+        try:
+            return lire_date(valeur)
+        except ValueError as e:
+            raise ErreurHTTP(400, str(e))
+
+    def __vehicule(self, immatriculation):
+        vehicule = self.__systeme.trouver_vehicule(immatriculation)
+        if vehicule is None:
+            raise ErreurHTTP(404, f"Véhicule inconnu : {immatriculation}")
+        return vehicule
+
+    def __client(self, telephone):
+        client = self.__systeme.trouver_client(telephone)
+        if client is None:
+            raise ErreurHTTP(404, f"Client inconnu : {telephone}")
+        return client
+
+    def __rapports(self, mois):
+        if mois:
+            try:
+                annee, numero = (int(x) for x in mois.split("-"))
+            except ValueError:
+                raise ErreurHTTP(400, f"Mois invalide (AAAA-MM attendu) : {mois!r}")
+            if not 1 <= numero <= 12:
+                raise ErreurHTTP(400, f"Mois invalide (AAAA-MM attendu) : {mois!r}")
+        else:
+            jour = date.today()
+            annee, numero = jour.year, jour.month
+        rapports = self.__systeme.get_rapports()
+        return {
+            'total': rapports.total().to_dict(),
+            'duree_moyenne': rapports.total().duree_moyenne(),
+            'par_type': {t: c.to_dict() for t, c in rapports.par_type().items()},
+            'mois': f"{annee}-{numero:02d}",
+            'par_type_mois': {t: c.to_dict() for t, c in rapports.par_type((annee, numero)).items()},
+            'utilisation': self.__systeme.utilisation_flotte((annee, numero)),
+            'marques': [{'marque': m, **c.to_dict()} for m, c in rapports.meilleures_marques()],
+            'clients': [{'telephone': cl.get_telephone(), 'nom': cl.get_nom(), 'prenom': cl.get_prenom(),
+                         **c.to_dict()} for cl, c in rapports.meilleurs_clients()],
+        }
+
+    @staticmethod
+    def __contrat_json(contrat):
+        d = contrat.to_dict()
+        d["immatriculation"] = contrat.get_vehicule().get_immatriculation()
+        d["telephone"] = contrat.get_client().get_telephone()
+        return d
+
+    # --- Protocole HTTP ---
+    async def traiter_connexion(self, lecteur: asyncio.StreamReader, ecrivain: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    requete = await self.__lire_requete(lecteur)
+                except ErreurHTTP as e:
+                    # corps non lu : la suite du flux n'est plus une requête
+                    self.__ecrire_reponse(ecrivain, e.statut, {"erreur": e.message}, False)
+                    await ecrivain.drain()
+                    break
+                if requete is None:
+                    break
+                methode, cible, entetes, corps = requete
+                try:
+                    statut, reponse = await self.traiter_requete(methode, cible, corps)
+                except ErreurHTTP as e:
+                    statut, reponse = e.statut, {"erreur": e.message}
+                except Exception as e:  # erreur interne : on répond quand même
+                    statut, reponse = 500, {"erreur": str(e)}
+                garder = entetes.get("connection", "").lower() != "close"
+                self.__ecrire_reponse(ecrivain, statut, reponse, garder)
+                await ecrivain.drain()
+                if not garder:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            ecrivain.close()
+
+    @staticmethod
+    async def __lire_requete(lecteur) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        ligne = await lecteur.readline()
+        if not ligne:
+            return None
+        try:
+            methode, cible, _ = ligne.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+        entetes = {}
+        while True:
+            ligne = await lecteur.readline()
+            if ligne in (b"\r\n", b"\n", b""):
+                break
+            nom, _, valeur = ligne.decode("latin-1").partition(":")
+            entetes[nom.strip().lower()] = valeur.strip()
+        try:
+            taille = int(entetes.get("content-length", 0) or 0)
+        except ValueError:
+            taille = -1
+        if taille < 0:
+            raise ErreurHTTP(400, f"Content-Length invalide : {entetes['content-length']!r}")
+        if taille > TAILLE_CORPS_MAX:
+            raise ErreurHTTP(413, f"Corps trop volumineux : {taille} octets (au plus {TAILLE_CORPS_MAX})")
+        corps = await lecteur.readexactly(taille) if taille else b""
+        return methode.upper(), cible, entetes, corps
+
+    @staticmethod
+    def __ecrire_reponse(ecrivain, statut, reponse, garder):
+        corps = json.dumps(reponse, ensure_ascii=False).encode("utf-8")
+        entete = (f"HTTP/1.1 {statut} {RAISONS.get(statut, '')}\r\n"
+                  f"Content-Type: application/json; charset=utf-8\r\n"
+                  f"Content-Length: {len(corps)}\r\n"
+                  f"Connection: {'keep-alive' if garder else 'close'}\r\n\r\n")
+        ecrivain.write(entete.encode("latin-1") + corps)
+
+    async def servir(self, hote: str = "127.0.0.1", port: int = 8080):
+        serveur = await asyncio.start_server(self.traiter_connexion, hote, port, backlog=1024)
+        print(f"🌐 Service de location à l'écoute sur http://{hote}:{port}")
+        if self.__systeme.get_replication() is not None:
+            self.__suivi = asyncio.create_task(self.__suivre_agences())  # référence gardée pendant le service
+        async with serveur:
+            await serveur.serve_forever()
+
+
+def main(argv=None):
+    parseur = creer_parseur()
+    parseur.description = "Service HTTP/JSON du système de location"
+    parseur.add_argument("--hote", default="127.0.0.1")
+    parseur.add_argument("--port", type=int, default=8080)
+    parseur.add_argument("--intervalle-flux", type=float, default=1.0,
+                         help="avec --flux : secondes entre deux lectures des autres agences")
+    args = parseur.parse_args(argv)
+    if args.instrumenter or args.metriques:
+        activer()
+    with ProfilSession(args.profil) if args.profil else contextlib.nullcontext():
+        service = ServiceLocation(creer_systeme(args), args.intervalle_flux)
+        try:
+            asyncio.run(service.servir(args.hote, args.port))
+        except KeyboardInterrupt:
+            print("👋 Arrêt du service")
+        finally:
+            service.fermer()
+            if args.metriques:
+                METRIQUES.ecrire(args.metriques)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from calendrier import CalendrierReservations
+from classes import Voiture, Moto, Client, ContratLocation, ModePaiement, GestionnaireDonnees
+
+
+# ===============================================================
+# SNAPSHOT BINAIRE (alternative à donnees.json)
+# ---------------------------------------------------------------
+# Rôle : Recharger rapidement de gros volumes (pas d'analyse JSON ni de
+#        dict intermédiaire par entité).
+# - En-tête versionné, puis les métadonnées (petit JSON), une table de
+#   valeurs, et des enregistrements de taille fixe (struct) pour les
+#   véhicules, leurs périodes réservées, les clients et les contrats.
+# - Chaque valeur distincte (marque, modèle, nom, téléphone...) n'est
+#   écrite qu'une fois dans la table ; les enregistrements y renvoient
+#   par un indice. Le type JSON d'origine est conservé (conversion sans
+#   perte dans les deux sens).
+# - Le fichier est projeté en mémoire (mmap) : chaque valeur de la table
+#   est décodée une seule fois, au premier besoin (toutes d'un bloc quand
+#   les véhicules et clients sont construits), et les contrats ne sont
+#   décodés que lorsqu'on les lit. Une valeur répétée donne un seul objet
+#   partagé (comme l'internement des chaînes).
+# - Véhicules et clients sont construits en entier au chargement (l'index
+#   les parcourt aussitôt) : pas de vues sur le fichier projeté pour eux.
+#
+# Disposition (petit-boutiste) :
+#   ENTETE | méta | décalages de la table (nb_valeurs + 1 x u32) | octets
+#   de la table | VEHICULES | PERIODES | CLIENTS | CONTRATS
+# ===============================================================
+MAGIQUE = b"LOCB"  # suivi de VERSION_FORMAT (u16) dans l'entête
+VERSION_FORMAT = 1
+
+ENTETE = struct.Struct('<4sHHIIIIIII')
+# magique, version, réservé, nb_vehicules, nb_clients, nb_contrats, nb_periodes,
+# nb_valeurs, taille de la table, taille des méta
+
+VEHICULE = struct.Struct('<qBBIIIIIdII')
+# id, type (0 Voiture, 1 Moto), drapeaux, marque, modele, annee, immatriculation,
+# nombre_portes / cylindree, prix_journalier, 1re période, nb de périodes
+PERIODE = struct.Struct('<ii')          # début, fin (numéros de jour)
+CLIENT = struct.Struct('<qIII')         # id, nom, prenom, telephone
+CONTRAT = struct.Struct('<qqiBIdi')
+# client_id, vehicule_id, nb_jours, drapeaux, mode_paiement, montant_total, date_debut (0 = aucune)
+
+_TYPES = ('Voiture', 'Moto')
+
+# drapeaux véhicule
+DISPONIBLE = 1
+# drapeaux des nombres flottants (prix, montant) : entier JSON ou null
+NOMBRE_ENTIER = 2
+NOMBRE_ABSENT = 4
+
+
+def est_snapshot_binaire(chemin: str) -> bool:
+    try:
+        with open(chemin, "rb") as f:
+            return f.read(len(MAGIQUE)) == MAGIQUE
+    except FileNotFoundError:
+        return False
+
+
+def _coder_nombre(valeur) -> Tuple[float, int]:
+    if valeur is None:
+        return 0.0, NOMBRE_ABSENT
+    if isinstance(valeur, int) and not isinstance(valeur, bool):
+        return float(valeur), NOMBRE_ENTIER
+    return float(valeur), 0
+
+
+def _decoder_nombre(valeur: float, drapeaux: int):
+    if drapeaux & NOMBRE_ABSENT:
+        return None
+    if drapeaux & NOMBRE_ENTIER:
+        return int(valeur)
+    return valeur
+
+
+# ---------------------------------------------------------------
+# Écriture
+# ---------------------------------------------------------------
+class _TableEcriture:
+    """Valeurs distinctes -> indice ; 's' + UTF-8 pour un texte, 'j' + JSON sinon."""
+
+    def __init__(self):
+        self.__indices: Dict[Any, int] = {}
+        self.__octets = bytearray()
+        self.__decalages = array('I', [0])
+
+    def indice(self, valeur) -> int:
+        if isinstance(valeur, str):
+            cle = valeur
+        else:
+            # 1, 1.0 et True sont égaux pour un dict : on distingue par le texte JSON
+            cle = (json.dumps(valeur, ensure_ascii=False, sort_keys=True),)
+        i = self.__indices.get(cle)
+        if i is None:
+            i = len(self.__decalages) - 1
+            if isinstance(valeur, str):
+                self.__octets += b's' + valeur.encode('utf-8')
+            else:
+                self.__octets += b'j' + json.dumps(valeur, ensure_ascii=False).encode('utf-8')
+            self.__decalages.append(len(self.__octets))
+            self.__indices[cle] = i
+        return i
+
+    def __len__(self):
+        return len(self.__decalages) - 1
+
+    def decalages(self) -> bytes:
+        return self.__decalages.tobytes() if sys.byteorder == 'little' else self.__decalages_petit_boutiste()
+
+    def __decalages_petit_boutiste(self) -> bytes:
+        copie = array('I', self.__decalages)
+        copie.byteswap()
+        return copie.tobytes()
+
+    def octets(self) -> bytes:
+        return bytes(self.__octets)
+
+
+def ecrire_snapshot(f, meta: Dict[str, Any], vehicules: Iterable[Any], clients: Iterable[Any],
+                    contrats: Iterable[Any]):
+    """Écrit le snapshot binaire dans le fichier binaire ouvert `f`."""
+    table = _TableEcriture()
+    indice = table.indice
+    enr_vehicules = bytearray()
+    enr_periodes = bytearray()
+    nb_vehicules = nb_periodes = 0
+    for v in vehicules:
+        d = v.to_dict()
+        typ = 1 if d.get('type') == 'Moto' else 0
+        specifique = d.get('cylindree', 500) if typ else d.get('nombre_portes', 4)
+        prix, drapeaux = _coder_nombre(d.get('prix_journalier'))
+        if d.get('disponible', True):
+            drapeaux |= DISPONIBLE
+        calendrier = v.get_calendrier()
+        premiere = nb_periodes
+        if calendrier:
+            for debut, fin in calendrier.ordinaux():
+                enr_periodes += PERIODE.pack(debut, fin)
+                nb_periodes += 1
+        enr_vehicules += VEHICULE.pack(d['id'], typ, drapeaux, indice(d.get('marque')), indice(d.get('modele')),
+                                       indice(d.get('annee')), indice(d.get('immatriculation')), indice(specifique),
+                                       prix, premiere, nb_periodes - premiere)
+        nb_vehicules += 1
+
+    enr_clients = bytearray()
+    nb_clients = 0
+    for c in clients:
+        d = c.to_dict()
+        enr_clients += CLIENT.pack(d['id'], indice(d.get('nom', '')), indice(d.get('prenom', '')),
+                                   indice(d.get('telephone', '')))
+        nb_clients += 1
+
+    enr_contrats = bytearray()
+    nb_contrats = 0
+    for k in contrats:
+        montant, drapeaux = _coder_nombre(k.get_montant_total())
+        debut = k.get_date_debut()
+        mp = k.get_mode_paiement()
+        enr_contrats += CONTRAT.pack(k.get_client().get_identifiant(), k.get_vehicule().get_identifiant(),
+                                     k.get_nb_jours(), drapeaux, indice(mp.to_dict() if mp else None), montant,
+                                     debut.toordinal() if debut else 0)
+        nb_contrats += 1
+
+    texte_meta = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+    octets_table = table.octets()
+    f.write(ENTETE.pack(MAGIQUE, VERSION_FORMAT, 0, nb_vehicules, nb_clients, nb_contrats, nb_periodes,
+                        len(table), len(octets_table), len(texte_meta)))
+    f.write(texte_meta)
+    f.write(table.decalages())
+    f.write(octets_table)
+    f.write(enr_vehicules)
+    f.write(enr_periodes)
+    f.write(enr_clients)
+    f.write(enr_contrats)
+
+
+# ---------------------------------------------------------------
+# Lecture
+# ---------------------------------------------------------------
+class SnapshotBinaire:
+    """Lecture d'un snapshot binaire projeté en mémoire (mmap)."""
+
+    def __init__(self, chemin: str):
+        with open(chemin, "rb") as f:
+            self.__mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magique, version, _, self.__nb_vehicules, self.__nb_clients, self.__nb_contrats, nb_periodes,
+         nb_valeurs, taille_table, taille_meta) = ENTETE.unpack_from(self.__mm, 0)
+        if magique != MAGIQUE:
+            self.fermer()
+            raise ValueError(f"{chemin} n'est pas un snapshot binaire")
+        if version > VERSION_FORMAT:
+            self.fermer()
+            raise ValueError(f"Version de snapshot non prise en charge : {version}")
+        position = ENTETE.size
+        self.__meta = json.loads(self.__mm[position:position + taille_meta].decode('utf-8'))
+        position += taille_meta
+        self.__decalages = array('I')
+        self.__decalages.frombytes(self.__mm[position:position + 4 * (nb_valeurs + 1)])
+        if sys.byteorder != 'little':
+            self.__decalages.byteswap()
+        position += 4 * (nb_valeurs + 1)
+        self.__debut_table = position
+        position += taille_table
+        self.__debut_vehicules = position
+        position += VEHICULE.size * self.__nb_vehicules
+        self.__debut_periodes = position
+        position += PERIODE.size * nb_periodes
+        self.__debut_clients = position
+        position += CLIENT.size * self.__nb_clients
+        self.__debut_contrats = position
+        self.__valeurs: List[Any] = [_NON_DECODEE] * nb_valeurs
+
+    def fermer(self):
+        self.__mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def get_meta(self) -> Dict[str, Any]:
+        return self.__meta
+
+    def nb_vehicules(self):
+        return self.__nb_vehicules
+
+    def nb_clients(self):
+        return self.__nb_clients
+
+    def nb_contrats(self):
+        return self.__nb_contrats
+
+    @staticmethod
+    def __decoder(brut: bytes):
+        if brut[:1] == b's':
+            return brut[1:].decode('utf-8')
+        return json.loads(brut[1:].decode('utf-8'))
+
+    def valeur(self, i: int):
+        """Valeur n° i de la table, décodée une seule fois."""
+        v = self.__valeurs[i]
+        if v is _NON_DECODEE:
+            debut = self.__debut_table
+            v = self.__valeurs[i] = self.__decoder(
+                self.__mm[debut + self.__decalages[i]:debut + self.__decalages[i + 1]])
+        return v
+
+    def __decoder_table(self) -> List[Any]:
+        # toutes les entités vont être construites : décodage de la table d'un seul passage
+        valeurs = self.__valeurs
+        if _NON_DECODEE in valeurs:
+            octets = self.__mm[self.__debut_table:self.__debut_table + self.__decalages[-1]]
+            decalages = self.__decalages
+            decoder = self.__decoder
+            for i, v in enumerate(valeurs):
+                if v is _NON_DECODEE:
+                    valeurs[i] = decoder(octets[decalages[i]:decalages[i + 1]])
+        return valeurs
+
+    def __periodes(self, premiere, nombre) -> Optional[CalendrierReservations]:
+        if not nombre:
+            return None
+        debut = self.__debut_periodes + PERIODE.size * premiere
+        return CalendrierReservations.depuis_ordinaux(
+            PERIODE.iter_unpack(self.__mm[debut:debut + PERIODE.size * nombre]))
+
+    def valeurs_vehicules(self) -> Iterator[Tuple]:
+        """(id, type, marque, modele, annee, prix, disponible, immatriculation, spécifique, calendrier)."""
+        t = self.__decoder_table()
+        octets = self.__mm[self.__debut_vehicules:self.__debut_vehicules + VEHICULE.size * self.__nb_vehicules]
+        for (ident, typ, drapeaux, marque, modele, annee, immat, specifique, prix,
+             premiere, nb_periodes) in VEHICULE.iter_unpack(octets):
+            yield (ident, _TYPES[typ], t[marque], t[modele], t[annee], _decoder_nombre(prix, drapeaux),
+                   bool(drapeaux & DISPONIBLE), t[immat], t[specifique],
+                   self.__periodes(premiere, nb_periodes) if nb_periodes else None)
+
+    def valeurs_clients(self) -> Iterator[Tuple]:
+        """(id, nom, prenom, telephone)."""
+        t = self.__decoder_table()
+        octets = self.__mm[self.__debut_clients:self.__debut_clients + CLIENT.size * self.__nb_clients]
+        for ident, nom, prenom, telephone in CLIENT.iter_unpack(octets):
+            yield ident, t[nom], t[prenom], t[telephone]
+
+    # --- Remplissage des collections de GestionnaireDonnees ---
+    def charger_vehicules(self, collection):
+        """Ajoute les véhicules à une liste (objets) ou à un VehiculeStore, sans dict intermédiaire."""
+        if not isinstance(collection, list):
+            for valeurs in self.valeurs_vehicules():
+                collection.ajouter_valeurs(*valeurs)
+            return
+        ajouter = collection.append
+        for ident, typ, marque, modele, annee, prix, disponible, immat, specifique, calendrier in self.valeurs_vehicules():
+            classe = Moto if typ == 'Moto' else Voiture
+            v = classe(marque, modele, annee, prix, specifique, immatriculation=immat, identifiant=ident)
+            if not disponible:
+                v.set_disponibilite(False)
+            if calendrier is not None:
+                v.set_calendrier(calendrier)
+            ajouter(v)
+
+    def charger_clients(self, collection):
+        if not isinstance(collection, list):
+            for valeurs in self.valeurs_clients():
+                collection.ajouter_valeurs(*valeurs)
+            return
+        ajouter = collection.append
+        for ident, nom, prenom, telephone in self.valeurs_clients():
+            ajouter(Client(nom, prenom, telephone, identifiant=ident))
+
+    def contrats(self, clients_par_id, vehicules_par_id) -> List[ContratLocation]:
+        valeur = self.valeur
+        octets = self.__mm[self.__debut_contrats:self.__debut_contrats + CONTRAT.size * self.__nb_contrats]
+        contrats = []
+        for client_id, vehicule_id, nb_jours, drapeaux, mp, montant, debut in CONTRAT.iter_unpack(octets):
+            d_mp = valeur(mp)
+            contrats.append(ContratLocation.restaurer(
+                clients_par_id[client_id], vehicules_par_id[vehicule_id], nb_jours,
+                _decoder_nombre(montant, drapeaux), ModePaiement.from_dict(d_mp) if d_mp else None,
+                date.fromordinal(debut) if debut else None))
+        return contrats
+
+
+class _NonDecodee:
+    __slots__ = ()
+
+
+_NON_DECODEE = _NonDecodee()
+
+
+# ---------------------------------------------------------------
+# Conversion JSON <-> binaire
+# ---------------------------------------------------------------
+def convertir(source: str, cible: str, ecraser: bool = False):
+    """Convertit un snapshot dans l'autre format (selon le format de la source)."""
+    if os.path.exists(cible):
+        if not ecraser:
+            raise FileExistsError(f"{cible} existe déjà")
+        os.remove(cible)
+    format_source = 'binaire' if est_snapshot_binaire(source) else 'json'
+    format_cible = 'json' if format_source == 'binaire' else 'binaire'
+    data = GestionnaireDonnees(source, format_=format_source).charger()
+    GestionnaireDonnees(cible, format_=format_cible).sauvegarder(data['vehicules'], data['clients'], data['contrats'])
+    return format_cible
+
+
+if __name__ == "__main__":
+    # usage : python snapshot_binaire.py SOURCE CIBLE [--ecraser]
+    #   donnees.json -> donnees.bin, ou donnees.bin -> donnees.json
+    if len(sys.argv) < 3:
+        print("usage : python snapshot_binaire.py SOURCE CIBLE [--ecraser]")
+        sys.exit(2)
+    format_cible = convertir(sys.argv[1], sys.argv[2], ecraser="--ecraser" in sys.argv[3:])
+    print(f"{sys.argv[1]} converti en {format_cible} : {sys.argv[2]}")
@@ -0,0 +1,490 @@
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+from calendrier import CalendrierReservations
+from classes import Vehicule, Voiture, Moto, Client, _interner
+
+
+# ===============================================================
+# STOCKAGE COMPACT EN COLONNES
+# ---------------------------------------------------------------
+# Rôle : Représenter une très grande flotte (ou base clients) sans un
+#        objet Python par entité.
+# - Chaque attribut est une colonne (array / bytearray / liste).
+# - Les valeurs répétées (marque, modèle, année, nom, prénom) sont stockées
+#   une seule fois dans une table de valeurs et référencées par un code.
+# - store[i] renvoie une « vue » légère qui offre les mêmes getters/setters
+#   que Voiture, Moto ou Client. Deux vues de la même ligne sont égales,
+#   mais ne sont pas forcément le même objet.
+# - Les calendriers de réservations ne sont conservés que pour les
+#   véhicules qui en ont (dict ligne -> calendrier).
+# ===============================================================
+class _TableValeurs:
+    """Table de valeurs distinctes : valeur <-> code entier."""
+    __slots__ = ('_valeurs', '_codes')
+
+    def __init__(self):
+        self._valeurs: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+
+    def code(self, valeur) -> int:
+        c = self._codes.get(valeur)
+        if c is None:
+            c = len(self._valeurs)
+            self._valeurs.append(_interner(valeur))
+            self._codes[valeur] = c
+        return c
+
+    def valeur(self, code: int):
+        return self._valeurs[code]
+
+
+class _VuesParIdentifiant:
+    """Accès identifiant -> vue, utilisé pour relier les contrats au chargement."""
+    __slots__ = ('_store',)
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, identifiant):
+        ligne = self._store._ligne_de(identifiant)
+        if ligne is None:
+            raise KeyError(identifiant)
+        return self._store[ligne]
+
+    def get(self, identifiant, defaut=None):
+        ligne = self._store._ligne_de(identifiant)
+        return defaut if ligne is None else self._store[ligne]
+
+    def __contains__(self, identifiant):
+        return self._store._ligne_de(identifiant) is not None
+
+    def __setitem__(self, identifiant, vue):
+        # l'ajout dans le store a déjà enregistré l'identifiant
+        pass
+
+
+class _StoreColonnes:
+    """Base commune : séquence de vues sur des colonnes."""
+
+    def __init__(self):
+        self._table = _TableValeurs()
+        self._ids = array('q')
+        # identifiants croissants (cas normal) : recherche dichotomique dans _ids,
+        # sinon dictionnaire construit au premier identifiant hors ordre
+        self._lignes_par_id: Optional[Dict[int, int]] = None
+        self._observateur = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._vue(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("index hors limites")
+        return self._vue(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._vue(i)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def par_identifiant(self) -> _VuesParIdentifiant:
+        return _VuesParIdentifiant(self)
+
+    def _enregistrer_id(self, identifiant: int):
+        if self._lignes_par_id is None and self._ids and identifiant <= self._ids[-1]:
+            self._lignes_par_id = {ident: ligne for ligne, ident in enumerate(self._ids)}
+        if self._lignes_par_id is not None:
+            self._lignes_par_id[identifiant] = len(self._ids)
+        self._ids.append(identifiant)
+
+    def _enregistrer_ids(self, identifiants: List[int], classe):
+        # ajout groupé (chargement parallèle) : même effet que _enregistrer_id sur chaque identifiant
+        croissants = all(a < b for a, b in zip(identifiants, identifiants[1:]))
+        if not croissants or (self._ids and identifiants and identifiants[0] <= self._ids[-1]):
+            for identifiant in identifiants:
+                self._enregistrer_id(identifiant)
+        else:
+            if self._lignes_par_id is not None:
+                self._lignes_par_id.update((ident, len(self._ids) + i) for i, ident in enumerate(identifiants))
+            self._ids.extend(identifiants)
+        if identifiants:
+            classe._attribuer_id(max(identifiants))
+
+    def _recoder(self, codes: List[int], valeurs: List[Any]):
+        """Codes d'une table locale (bloc décodé ailleurs) -> codes de la table du store."""
+        correspondance = [self._table.code(v) for v in valeurs]
+        return array('I', [correspondance[c] for c in codes])
+
+    def _ligne_de(self, identifiant) -> Optional[int]:
+        if self._lignes_par_id is not None:
+            return self._lignes_par_id.get(identifiant)
+        ligne = bisect_left(self._ids, identifiant)
+        if ligne < len(self._ids) and self._ids[ligne] == identifiant:
+            return ligne
+        return None
+
+    def _vue(self, i):
+        raise NotImplementedError
+
+    def append(self, entite):
+        """Ajoute une entité (objet ou vue) ; utiliser store[-1] pour obtenir sa vue."""
+        self.ajouter_dict(entite.to_dict())
+
+    def ajouter_dict(self, data: Dict[str, Any]):
+        raise NotImplementedError
+
+
+# ---------------------------------------------------------------
+# Véhicules
+# ---------------------------------------------------------------
+_TYPES = ('Voiture', 'Moto')
+
+# type d'origine du prix journalier (colonne _prix_types) : la colonne _prix
+# reste en flottants pour la tarification, le prix est rendu tel qu'il a été donné
+_PRIX_FLOTTANT, _PRIX_ENTIER, _PRIX_ABSENT = 0, 1, 2
+
+
+def _type_prix(prix) -> int:
+    if prix is None:
+        return _PRIX_ABSENT
+    if isinstance(prix, int) and not isinstance(prix, bool):
+        return _PRIX_ENTIER
+    return _PRIX_FLOTTANT
+
+
+class VehiculeStore(_StoreColonnes):
+    def __init__(self):
+        super().__init__()
+        self._types = bytearray()
+        self._marques = array('I')
+        self._modeles = array('I')
+        self._annees = array('I')
+        self._prix = array('d')           # prix journalier stocké en flottant (0 si absent)
+        self._prix_types = bytearray()    # _PRIX_FLOTTANT, _PRIX_ENTIER ou _PRIX_ABSENT
+        self._disponibles = bytearray()
+        self._immatriculations: List[Optional[str]] = []
+        self._specifiques = array('i')    # nombre de portes ou cylindrée selon le type
+        self._calendriers: Dict[int, CalendrierReservations] = {}
+
+    def ajouter_dict(self, data: Dict[str, Any]):
+        typ = data.get('type', 'Voiture')
+        if typ not in _TYPES:
+            typ = 'Voiture'  # même repli que Vehicule.from_dict
+        if typ == 'Moto':
+            specifique = data.get('cylindree', 500)
+        else:
+            specifique = data.get('nombre_portes', 4)
+        calendrier = CalendrierReservations.from_list(data['reservations']) if data.get('reservations') else None
+        self.ajouter_valeurs(data.get('id'), typ, data.get('marque'), data.get('modele'), data.get('annee'),
+                             data.get('prix_journalier'), data.get('disponible', True), data.get('immatriculation'),
+                             specifique, calendrier)
+
+    def ajouter_valeurs(self, identifiant, typ, marque, modele, annee, prix, disponible, immatriculation,
+                        specifique, calendrier: Optional[CalendrierReservations] = None):
+        # ajout sans dict intermédiaire (utilisé aussi par le snapshot binaire)
+        self._enregistrer_id(Vehicule._attribuer_id(identifiant))
+        self._types.append(_TYPES.index(typ))
+        self._marques.append(self._table.code(marque))
+        self._modeles.append(self._table.code(modele))
+        self._annees.append(self._table.code(annee))
+        self._prix.append(float(prix or 0))
+        self._prix_types.append(_type_prix(prix))
+        self._disponibles.append(1 if disponible else 0)
+        self._immatriculations.append(immatriculation)
+        self._specifiques.append(int(specifique))
+        if calendrier:
+            self._calendriers[len(self._specifiques) - 1] = calendrier
+
+    def ajouter_colonnes(self, colonnes: Dict[str, Any]):
+        """Bloc de véhicules décodé en colonnes (voir chargement_parallele.decoder_bloc)."""
+        premiere = len(self._ids)
+        self._enregistrer_ids(colonnes['ids'], Vehicule)
+        self._types.extend(colonnes['motos'])
+        valeurs = colonnes['valeurs']
+        self._marques.extend(self._recoder(colonnes['marques'], valeurs))
+        self._modeles.extend(self._recoder(colonnes['modeles'], valeurs))
+        self._annees.extend(self._recoder(colonnes['annees'], valeurs))
+        self._prix.extend([float(p or 0) for p in colonnes['prix']])
+        self._prix_types.extend([_type_prix(p) for p in colonnes['prix']])
+        self._disponibles.extend(colonnes['disponibles'])
+        self._immatriculations.extend(colonnes['immatriculations'])
+        self._specifiques.extend(colonnes['specifiques'])
+        for i, paires in colonnes['reservations'].items():
+            self._calendriers[premiere + i] = CalendrierReservations.depuis_ordinaux(paires)
+
+    def _vue(self, i):
+        return (VueMoto if self._types[i] else VueVoiture)(self, i)
+
+    def colonnes_tarif(self):
+        """(prix, types, spécifiques) pour la tarification par lots ; type 1 = Moto."""
+        return self._prix, self._types, self._specifiques
+
+    def set_observateur(self, observateur):
+        # un seul index observe toute la flotte
+        self._observateur = observateur
+
+
+class _VueVehicule:
+    __slots__ = ('_store', '_ligne')
+
+    def __init__(self, store: VehiculeStore, ligne: int):
+        self._store = store
+        self._ligne = ligne
+
+    def __eq__(self, autre):
+        return isinstance(autre, _VueVehicule) and autre._store is self._store and autre._ligne == self._ligne
+
+    def __hash__(self):
+        return hash((id(self._store), self._ligne))
+
+    def __repr__(self):
+        return f"<{self.get_type()} {self.get_identifiant()} (vue)>"
+
+    def get_type(self):
+        return _TYPES[self._store._types[self._ligne]]
+
+    def get_identifiant(self):
+        return self._store._ids[self._ligne]
+
+    def set_observateur(self, observateur):
+        self._store.set_observateur(observateur)
+
+    def get_observateur(self):
+        return self._store._observateur
+
+    def get_marque(self):
+        return self._store._table.valeur(self._store._marques[self._ligne])
+
+    def set_marque(self, marque):
+        self._store._marques[self._ligne] = self._store._table.code(marque)
+        if self._store._observateur is not None:
+            self._store._observateur.vehicule_renomme(self)
+
+    def get_modele(self):
+        return self._store._table.valeur(self._store._modeles[self._ligne])
+
+    def set_modele(self, modele):
+        self._store._modeles[self._ligne] = self._store._table.code(modele)
+        if self._store._observateur is not None:
+            self._store._observateur.vehicule_renomme(self)
+
+    def get_annee(self):
+        return self._store._table.valeur(self._store._annees[self._ligne])
+
+    def set_annee(self, annee):
+        self._store._annees[self._ligne] = self._store._table.code(annee)
+
+    def get_prix_journalier(self):
+        type_prix = self._store._prix_types[self._ligne]
+        if type_prix == _PRIX_ABSENT:
+            return None
+        prix = self._store._prix[self._ligne]
+        return int(prix) if type_prix == _PRIX_ENTIER else prix
+
+    def set_prix_journalier(self, prix):
+        self._store._prix[self._ligne] = float(prix or 0)
+        self._store._prix_types[self._ligne] = _type_prix(prix)
+
+    def est_en_service(self):
+        return bool(self._store._disponibles[self._ligne])
+
+    def get_calendrier(self, creer: bool = False) -> Optional[CalendrierReservations]:
+        calendrier = self._store._calendriers.get(self._ligne)
+        if calendrier is None and creer:
+            calendrier = self._store._calendriers[self._ligne] = CalendrierReservations()
+        return calendrier
+
+    def set_calendrier(self, calendrier: Optional[CalendrierReservations]):
+        if calendrier is None:
+            self._store._calendriers.pop(self._ligne, None)
+        else:
+            self._store._calendriers[self._ligne] = calendrier
+
+    # mêmes règles que Vehicule (elles n'utilisent que les méthodes ci-dessus)
+    est_libre = Vehicule.est_libre
+    est_disponible = Vehicule.est_disponible
+    reserver = Vehicule.reserver
+    liberer = Vehicule.liberer
+
+    def set_disponibilite(self, etat):
+        if etat in [True, False]:
+            ancien = self.est_en_service()
+            self._store._disponibles[self._ligne] = 1 if etat else 0
+            if self._store._observateur is not None and ancien != bool(etat):
+                self._store._observateur.disponibilite_modifiee(self)
+        else:
+            raise ValueError("La disponibilité doit être True ou False.")
+
+    def get_immatriculation(self):
+        return self._store._immatriculations[self._ligne]
+
+    def set_immatriculation(self, immat: str):
+        ancienne = self.get_immatriculation()
+        self._store._immatriculations[self._ligne] = immat
+        if self._store._observateur is not None and ancienne != immat:
+            self._store._observateur.immatriculation_modifiee(self, ancienne)
+
+    def to_dict(self) -> Dict[str, Any]:
+        base = {
+            'id': self.get_identifiant(),
+            'type': self.get_type(),
+            'marque': self.get_marque(),
+            'modele': self.get_modele(),
+            'annee': self.get_annee(),
+            'prix_journalier': self.get_prix_journalier(),
+            'disponible': self.est_en_service(),
+            'immatriculation': self.get_immatriculation(),
+        }
+        calendrier = self.get_calendrier()
+        if calendrier:
+            base['reservations'] = calendrier.to_list()
+        return base
+
+
+class VueVoiture(_VueVehicule):
+    __slots__ = ()
+
+    # même calcul et même affichage que Voiture (ils n'utilisent que les getters)
+    calculer_tarif_location = Voiture.calculer_tarif_location
+    afficher_details = Voiture.afficher_details
+    details = Voiture.details
+
+    def get_nombre_portes(self):
+        return self._store._specifiques[self._ligne]
+
+    def set_nombre_portes(self, nb):
+        self._store._specifiques[self._ligne] = int(nb)
+
+    def to_dict(self) -> Dict[str, Any]:
+        base = super().to_dict()
+        base.update({'nombre_portes': self.get_nombre_portes()})
+        return base
+
+
+class VueMoto(_VueVehicule):
+    __slots__ = ()
+
+    calculer_tarif_location = Moto.calculer_tarif_location
+    afficher_details = Moto.afficher_details
+    details = Moto.details
+
+    def get_cylindree(self):
+        return self._store._specifiques[self._ligne]
+
+    def set_cylindree(self, c):
+        self._store._specifiques[self._ligne] = int(c)
+
+    def to_dict(self) -> Dict[str, Any]:
+        base = super().to_dict()
+        base.update({'cylindree': self.get_cylindree()})
+        return base
+
+
+# ---------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------
+class ClientStore(_StoreColonnes):
+    def __init__(self):
+        super().__init__()
+        self._noms = array('I')
+        self._prenoms = array('I')
+        self._telephones: List[str] = []
+
+    def ajouter_dict(self, data: Dict[str, Any]):
+        self.ajouter_valeurs(data.get('id'), data.get('nom', ''), data.get('prenom', ''), data.get('telephone', ''))
+
+    def ajouter_valeurs(self, identifiant, nom, prenom, telephone):
+        self._enregistrer_id(Client._attribuer_id(identifiant))
+        self._noms.append(self._table.code(nom))
+        self._prenoms.append(self._table.code(prenom))
+        self._telephones.append(telephone)
+
+    def ajouter_colonnes(self, colonnes: Dict[str, Any]):
+        """Bloc de clients décodé en colonnes (voir chargement_parallele.decoder_bloc)."""
+        self._enregistrer_ids(colonnes['ids'], Client)
+        self._noms.extend(self._recoder(colonnes['noms'], colonnes['valeurs']))
+        self._prenoms.extend(self._recoder(colonnes['prenoms'], colonnes['valeurs']))
+        self._telephones.extend(colonnes['telephones'])
+
+    def remove(self, client):
+        """Retire le dernier client ajouté (ajout annulé) : les vues des autres lignes restent valides."""
+        ligne = len(self._ids) - 1
+        if ligne < 0 or self._ids[ligne] != client.get_identifiant():
+            raise ValueError("Seul le dernier client ajouté peut être retiré")
+        if self._lignes_par_id is not None:
+            del self._lignes_par_id[self._ids[ligne]]
+        for colonne in (self._ids, self._noms, self._prenoms, self._telephones):
+            colonne.pop()
+
+    def _vue(self, i):
+        return VueClient(self, i)
+
+    def set_observateur(self, observateur):
+        self._observateur = observateur
+
+
+class VueClient:
+    __slots__ = ('_store', '_ligne')
+
+    def __init__(self, store: ClientStore, ligne: int):
+        self._store = store
+        self._ligne = ligne
+
+    def __eq__(self, autre):
+        return isinstance(autre, VueClient) and autre._store is self._store and autre._ligne == self._ligne
+
+    def __hash__(self):
+        return hash((id(self._store), self._ligne))
+
+    def __repr__(self):
+        return f"<Client {self.get_identifiant()} (vue)>"
+
+    def get_identifiant(self):
+        return self._store._ids[self._ligne]
+
+    def set_observateur(self, observateur):
+        self._store.set_observateur(observateur)
+
+    def get_nom(self):
+        return self._store._table.valeur(self._store._noms[self._ligne])
+
+    def set_nom(self, nom):
+        self._store._noms[self._ligne] = self._store._table.code(nom)
+        if self._store._observateur is not None:
+            self._store._observateur.client_renomme(self)
+
+    def get_prenom(self):
+        return self._store._table.valeur(self._store._prenoms[self._ligne])
+
+    def set_prenom(self, prenom):
+        self._store._prenoms[self._ligne] = self._store._table.code(prenom)
+        if self._store._observateur is not None:
+            self._store._observateur.client_renomme(self)
+
+    def get_telephone(self):
+        return self._store._telephones[self._ligne]
+
+    def set_telephone(self, telephone):
+        ancien = self.get_telephone()
+        self._store._telephones[self._ligne] = telephone
+        if self._store._observateur is not None and ancien != telephone:
+            self._store._observateur.telephone_modifie(self, ancien)
+
+    def afficher_details(self):
+        return (f"{self.get_prenom()} {self.get_nom()} - Tél: {self.get_telephone()}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.get_identifiant(),
+            'nom': self.get_nom(),
+            'prenom': self.get_prenom(),
+            'telephone': self.get_telephone()
+        }
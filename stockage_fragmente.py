@@ -0,0 +1,422 @@
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from archive_contrats import ArchiveContrats
+from classes import Vehicule, Client, ContratLocation, GestionnaireDonnees
+from instrumentation import compter, compter_octets, est_actif, mesurer
+from lecture_progressive import ListeDifferee
+from verrous import ConflitEcriture, verrou_fichier
+
+
+# ===============================================================
+# STOCKAGE FRAGMENTÉ (un dossier de fichiers JSON Lines)
+# ---------------------------------------------------------------
+# Rôle : Alternative à donnees.json où une modification ne réécrit que
+#        les fichiers concernés (mêmes méthodes charger / sauvegarder /
+#        enregistrer que GestionnaireDonnees).
+# - Une entité par ligne ; véhicules et clients répartis en fragments
+#   par tranche d'identifiants (vehicules-00003.jsonl : identifiants
+#   3000 à 3999 avec taille_fragment=1000), contrats par ordre de
+#   création (contrats-00000.jsonl : les 1000 premiers).
+# - Fragments modifiés (« sales ») : ajout d'un client -> son fragment ;
+#   nouveau contrat -> dernier fragment de contrats et fragment du
+#   véhicule (ses réservations). Seuls ces fichiers sont réécrits.
+# - sauvegarder() (écriture complète) sérialise tout mais ne remplace
+#   que les fragments dont le contenu a changé (somme de contrôle).
+# - Un fragment modifié n'est jamais réécrit sur place : la nouvelle
+#   version est écrite sous un autre nom (vehicules-00003.000042.jsonl,
+#   42 = version de meta.json qui la désigne). meta.json est écrit en
+#   dernier (fichier temporaire puis renommage) et fait foi : version
+#   (autre processus -> ConflitEcriture, comme GestionnaireDonnees),
+#   fichier de chaque fragment et nombre de contrats. Son remplacement
+#   bascule d'un coup sur les nouveaux fichiers ; les anciens sont
+#   ensuite supprimés. Après un arrêt brutal, meta.json désigne encore
+#   des fichiers intacts ; les fichiers orphelins sont supprimés à la
+#   première écriture suivante.
+# - Lecture sélective : lire_fragment() ; avec paresseux=True, les
+#   contrats ne sont lus qu'au premier accès.
+# - Contrat clos (retiré des contrats actifs, ajouté à l'archive
+#   archive.jsonl.gz du dossier) : les fragments de contrats sont
+#   réécrits à partir de sa position, retrouvée en relisant les
+#   fragments depuis la fin. Les retours portent surtout sur des
+#   contrats récents : peu de fichiers réécrits.
+# ===============================================================
+class StockageFragmente:
+    COLLECTIONS = ("vehicules", "clients")
+    # fragments (nom-numéro[.version].jsonl) et fichiers temporaires laissés par une écriture
+    FICHIER_FRAGMENT = re.compile(r"^(vehicules|clients|contrats)-(\d{5})(?:\.(\d{6}))?\.jsonl(\.tmp)?$")
+
+    def __init__(self, dossier: str = "donnees", taille_fragment: int = 1000,
+                 paresseux: bool = False, compact: bool = False):
+        if taille_fragment < 1:
+            raise ValueError("taille_fragment >= 1 attendu")
+        os.makedirs(dossier, exist_ok=True)
+        self.__dossier = dossier
+        self.__taille = taille_fragment
+        self.__paresseux = paresseux
+        self.__compact = compact
+        self.__verrou = threading.RLock()
+        self.__chemin_verrou = os.path.join(dossier, "meta.lock")
+        self.__version = 0
+        self.__fragments: Dict[str, Set[int]] = {nom: set() for nom in self.COLLECTIONS}
+        self.__sommes: Dict[Tuple[str, int], int] = {}  # (collection, numéro) -> crc32 du fichier écrit
+        self.__sales: Set[Tuple[str, int]] = set()
+        # positions des entités de chaque fragment dans la collection en mémoire
+        self.__positions: Dict[str, Dict[int, List[int]]] = {nom: {} for nom in self.COLLECTIONS}
+        self.__nb_positions = {nom: 0 for nom in self.COLLECTIONS}
+        self.__collections_indexees: Dict[str, Any] = {}
+        self.__nb_contrats = 0  # contrats écrits sur disque
+        # liste rendue par charger() (ListeDifferee en mode paresseux) et nombre de contrats lus sur disque
+        self.__contrats_charges: Tuple[Optional[list], int] = (None, 0)
+        # collection -> {numéro: version de meta.json qui a écrit le fichier} ; absent : nom sans version
+        self.__generations: Dict[str, Dict[int, int]] = {nom: {} for nom in self.COLLECTIONS + ("contrats",)}
+        self.__nettoye = False  # fichiers orphelins (arrêt brutal) supprimés à la première écriture
+        self.__nb_fichiers_ecrits = 0
+        self.__archive = ArchiveContrats(os.path.join(dossier, "archive.jsonl.gz"))
+
+    def get_dossier(self):
+        return self.__dossier
+
+    def get_version(self):
+        return self.__version
+
+    def get_nb_fichiers_ecrits(self):
+        return self.__nb_fichiers_ecrits
+
+    def get_archive(self):
+        return self.__archive
+
+    def numero_fragment(self, identifiant: int) -> int:
+        return identifiant // self.__taille
+
+    def __chemin(self, nom: str, numero: int, generation: Optional[int] = None) -> str:
+        if generation is None:
+            generation = self.__generations[nom].get(numero, 0)
+        suffixe = f".{generation:06d}" if generation else ""
+        return os.path.join(self.__dossier, f"{nom}-{numero:05d}{suffixe}.jsonl")
+
+    @staticmethod
+    def __lire_generations(meta: Dict[str, Any]) -> Dict[str, Dict[int, int]]:
+        generations = meta.get('generations', {})
+        return {nom: {int(n): g for n, g in generations.get(nom, {}).items()}
+                for nom in StockageFragmente.COLLECTIONS + ("contrats",)}
+
+    # --- Lecture ---
+    def __lire_meta(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.__dossier, "meta.json"), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def __lire_lignes(self, nom: str, numero: int, nombre: Optional[int] = None,
+                      generation: Optional[int] = None) -> Tuple[List[bytes], int]:
+        with open(self.__chemin(nom, numero, generation), "rb") as f:
+            contenu = f.read()
+        if est_actif():
+            compter_octets("lus", "fragments", len(contenu))
+        lignes = contenu.splitlines(keepends=True)
+        if nombre is not None:
+            lignes = lignes[:nombre]
+        return lignes, zlib.crc32(contenu)
+
+    def lire_fragment(self, nom: str, numero: int) -> List[Dict[str, Any]]:
+        """Entités (dicts) d'un seul fragment, sans charger le reste."""
+        meta = self.__lire_meta()
+        nombre = None
+        if nom == "contrats":
+            nombre = max(0, min(self.__taille, meta.get('nb_contrats', 0) - numero * self.__taille))
+        generation = self.__lire_generations(meta)[nom].get(numero, 0)
+        try:
+            return [json.loads(l) for l in self.__lire_lignes(nom, numero, nombre, generation)[0]]
+        except FileNotFoundError:
+            return []
+
+    def charger(self):
+        with mesurer("charger"), self.__verrou:
+            meta = self.__lire_meta()
+            vehs, clts = self.__collections()
+            if not meta:
+                print("⚠️ Aucune donnée trouvée. Nouveau départ.")
+            self.__init__(self.__dossier, meta.get('taille_fragment', self.__taille), self.__paresseux, self.__compact)
+            self.__version = meta.get('version', 0)
+            self.__generations = self.__lire_generations(meta)
+            with mesurer("charger.reconstruction"):
+                for nom, collection, fabrique in (("vehicules", vehs, Vehicule.from_dict),
+                                                  ("clients", clts, Client.from_dict)):
+                    for numero in sorted(meta.get('fragments', {}).get(nom, ())):
+                        lignes, somme = self.__lire_lignes(nom, numero)
+                        self.__fragments[nom].add(numero)
+                        self.__sommes[(nom, numero)] = somme
+                        for ligne in lignes:
+                            self.__ajouter_dict(collection, json.loads(ligne), fabrique)
+            compter("vehicules_reconstruits", len(vehs))
+            compter("clients_reconstruits", len(clts))
+            for nom, collection in (("vehicules", vehs), ("clients", clts)):
+                self.__indexer(nom, collection, nouvelles=False)
+            self.__nb_contrats = nb_disque = meta.get('nb_contrats', 0)
+            vehicules_par_id = self.__par_identifiant(vehs)
+            clients_par_id = self.__par_identifiant(clts)
+
+            def lire_contrats():
+                with mesurer("charger.contrats"):
+                    contrats = []
+                    for numero in range(-(-nb_disque // self.__taille)):
+                        nombre = min(self.__taille, nb_disque - numero * self.__taille)
+                        for ligne in self.__lire_lignes("contrats", numero, nombre)[0]:
+                            contrats.append(ContratLocation.from_dict(json.loads(ligne), clients_par_id,
+                                                                      vehicules_par_id))
+                compter("contrats_reconstruits", len(contrats))
+                return contrats
+            contrats = ListeDifferee(lire_contrats) if self.__paresseux and nb_disque else lire_contrats()
+            self.__contrats_charges = (contrats, nb_disque)
+            if meta:
+                print(f"✅ Données chargées depuis {self.__dossier}")
+            return {"vehicules": vehs, "clients": clts, "contrats": contrats}
+
+    def __collections(self):
+        if self.__compact:
+            from stockage_compact import VehiculeStore, ClientStore
+            return VehiculeStore(), ClientStore()
+        return [], []
+
+    @staticmethod
+    def __ajouter_dict(collection, data, fabrique):
+        if isinstance(collection, list):
+            collection.append(fabrique(data))
+        else:
+            collection.ajouter_dict(data)
+
+    @staticmethod
+    def __par_identifiant(collection):
+        if isinstance(collection, list):
+            return {e.get_identifiant(): e for e in collection}
+        return collection.par_identifiant()
+
+    # --- Suivi des fragments modifiés ---
+    def __indexer(self, nom: str, collection, nouvelles: bool = True):
+        """Positions par fragment des entités ajoutées depuis le dernier appel (collections en ajout seul).
+
+        nouvelles : fragments des entités ajoutées marqués à écrire (pas pour celles lues sur disque).
+        """
+        if self.__collections_indexees.get(nom) is not collection:
+            # autre collection (import, nouveau système) : index refait, tout est à écrire
+            self.__collections_indexees[nom] = collection
+            self.__positions[nom] = {}
+            self.__nb_positions[nom] = 0
+        positions = self.__positions[nom]
+        for i in range(self.__nb_positions[nom], len(collection)):
+            numero = self.numero_fragment(collection[i].get_identifiant())
+            positions.setdefault(numero, []).append(i)
+            if nouvelles:
+                self.__sales.add((nom, numero))
+        self.__nb_positions[nom] = len(collection)
+
+    def __contrats_nouveaux(self, contrats) -> List[ContratLocation]:
+        """Contrats ajoutés après le dernier écrit, sans forcer la lecture des contrats différés."""
+        charges, nb_disque = self.__contrats_charges
+        if contrats is not charges:
+            # autres contrats que ceux lus ici (import) : tous réécrits
+            self.__contrats_charges = (contrats, 0)
+            self.__nb_contrats = nb_disque = 0
+        if isinstance(contrats, ListeDifferee) and not contrats.est_materialisee():
+            # seuls les contrats ajoutés sont en mémoire, à la suite des contrats du disque
+            return list.__getitem__(contrats, slice(self.__nb_contrats - nb_disque, None))
+        return contrats[self.__nb_contrats:]
+
+    # --- Interface commune avec GestionnaireDonnees ---
+    def enregistrer(self, operation: str, donnees: Dict[str, Any], vehicules, clients, contrats):
+        self.enregistrer_lot([(operation, donnees)], vehicules, clients, contrats)
+
+    def enregistrer_lot(self, operations: Iterable[Tuple[str, Dict[str, Any]]], vehicules, clients, contrats):
+        """Persiste plusieurs mutations en une écriture : chaque fragment touché n'est écrit qu'une fois."""
+        with mesurer("enregistrer"), self.__verrou, verrou_fichier(self.__chemin_verrou):
+            clos = set()
+            for operation, donnees in operations:
+                if operation in ('creation_contrat', 'cloture_contrat'):
+                    # réservations du véhicule (dans ses données) ; le contrat est repris de la liste
+                    self.__sales.add(("vehicules", self.numero_fragment(donnees['vehicule_id'])))
+                    if operation == 'cloture_contrat':
+                        clos.add(ContratLocation.cle_dict(donnees))
+                elif operation not in ('ajout_vehicule', 'ajout_client'):
+                    raise ValueError(f"Opération inconnue : {operation}")
+            if clos:
+                self.__retirer_contrats(clos, contrats)
+            self.__ecrire(vehicules, clients, contrats)
+
+    def __retirer_contrats(self, cles, contrats):
+        """Contrats clos : les fragments seront réécrits depuis le premier d'entre eux."""
+        if contrats is not self.__contrats_charges[0]:
+            return  # autre liste : tous les contrats seront réécrits
+        position = self.__premiere_position(cles)
+        if position is None:
+            return  # clos avant d'avoir été écrits : ils ne sont déjà plus dans la liste
+        if isinstance(contrats, ListeDifferee):
+            contrats.materialiser()
+        # la liste en mémoire (sans les contrats clos) est identique au disque jusqu'à cette position
+        self.__nb_contrats = position
+
+    def __premiere_position(self, cles) -> Optional[int]:
+        """Plus petite position sur disque des contrats de ces clés, en lisant les fragments depuis la fin."""
+        restantes = set(cles)
+        # une clé sans date (ancien format) peut revenir plusieurs fois : lecture jusqu'au début
+        datees = all(debut is not None for _, _, debut in cles)
+        position = None
+        for numero in range(-(-self.__nb_contrats // self.__taille) - 1, -1, -1):
+            nombre = min(self.__taille, self.__nb_contrats - numero * self.__taille)
+            lignes = self.__lire_lignes("contrats", numero, nombre)[0]
+            for i in range(len(lignes) - 1, -1, -1):
+                cle = ContratLocation.cle_dict(json.loads(lignes[i]))
+                if cle in cles:
+                    position = numero * self.__taille + i
+                    restantes.discard(cle)
+            if datees and not restantes:
+                break
+        return position
+
+    def sauvegarder(self, vehicules, clients, contrats):
+        """Écriture complète : seuls les fragments dont le contenu a changé sont remplacés."""
+        with mesurer("sauvegarder"), self.__verrou, verrou_fichier(self.__chemin_verrou):
+            for nom, collection in (("vehicules", vehicules), ("clients", clients)):
+                self.__collections_indexees.pop(nom, None)
+                self.__indexer(nom, collection)
+                # fragments devenus vides : réécrits vides
+                self.__sales.update((nom, numero) for numero in self.__fragments[nom]
+                                    if numero not in self.__positions[nom])
+            self.__ecrire(vehicules, clients, contrats)
+
+    def fermer(self):
+        pass
+
+    # --- Écriture ---
+    def __ecrire(self, vehicules, clients, contrats):
+        if self.__lire_meta().get('version', 0) != self.__version:
+            raise ConflitEcriture(f"{self.__dossier} a été modifié par un autre processus depuis le chargement")
+        version = self.__version + 1
+        # état d'avant, repris si l'écriture échoue : meta.json désigne toujours les anciens fichiers
+        generations = {nom: dict(g) for nom, g in self.__generations.items()}
+        sommes = dict(self.__sommes)
+        remplaces: List[str] = []  # fichiers qui ne seront plus désignés par meta.json
+        ecrits: Set[Tuple[str, int]] = set()  # fragments propres une fois meta.json remplacé
+        try:
+            with mesurer("fragments.ecriture"):
+                for nom, collection in (("vehicules", vehicules), ("clients", clients)):
+                    self.__indexer(nom, collection)
+                    for numero in sorted(n for c, n in self.__sales if c == nom):
+                        lignes = (self.__ligne(collection[i]) for i in self.__positions[nom].get(numero, ()))
+                        self.__remplacer(nom, numero, b"".join(lignes), version, remplaces)
+                        ecrits.add((nom, numero))
+                nb_contrats = self.__ecrire_contrats(self.__contrats_nouveaux(contrats), version, remplaces)
+                nb_fragments = -(-nb_contrats // self.__taille)
+                for numero in [n for n in self.__generations["contrats"] if n >= nb_fragments]:
+                    # fragments de contrats devenus inutiles (clôtures)
+                    remplaces.append(self.__chemin("contrats", numero))
+                    del self.__generations["contrats"][numero]
+                meta = {"version": version, "taille_fragment": self.__taille,
+                        "fragments": {nom: sorted(self.__fragments[nom] | {n for c, n in ecrits if c == nom})
+                                      for nom in self.COLLECTIONS},
+                        "generations": {nom: {str(n): g for n, g in sorted(gens.items()) if g}
+                                        for nom, gens in self.__generations.items()},
+                        "nb_contrats": nb_contrats}
+                # bascule : à partir d'ici, meta.json désigne les nouveaux fichiers
+                self.__ecrire_fichier(os.path.join(self.__dossier, "meta.json"),
+                                      json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        except BaseException:
+            self.__generations, self.__sommes = generations, sommes
+            raise
+        # marques retirées seulement maintenant : après un échec, un nouvel essai réécrit les mêmes fragments
+        for nom, numero in ecrits:
+            self.__fragments[nom].add(numero)
+            self.__sales.discard((nom, numero))
+        self.__version = version
+        self.__nb_contrats = nb_contrats
+        for chemin in remplaces:
+            self.__supprimer(chemin)
+        if not self.__nettoye:
+            self.__nettoyer()
+
+    def __nettoyer(self):
+        """Supprime les fragments que meta.json ne désigne pas (arrêt brutal avant ou après la bascule)."""
+        self.__nettoye = True
+        nb_fragments = -(-self.__nb_contrats // self.__taille)
+        for nom_fichier in os.listdir(self.__dossier):
+            trouve = self.FICHIER_FRAGMENT.match(nom_fichier)
+            if trouve is None:
+                continue
+            nom, numero, generation = trouve.group(1), int(trouve.group(2)), int(trouve.group(3) or 0)
+            designe = (numero < nb_fragments if nom == "contrats" else numero in self.__fragments[nom]) \
+                and self.__generations[nom].get(numero, 0) == generation
+            if trouve.group(4) or not designe:
+                self.__supprimer(os.path.join(self.__dossier, nom_fichier))
+
+    @staticmethod
+    def __supprimer(chemin: str):
+        try:
+            os.remove(chemin)
+        except FileNotFoundError:
+            pass
+
+    def __ecrire_contrats(self, nouveaux: List[ContratLocation], version: int, remplaces: List[str]) -> int:
+        """Écrit les contrats à partir de la position sur disque ; renvoie le nombre total de contrats."""
+        total = self.__nb_contrats
+        i = 0
+        while i < len(nouveaux):
+            numero, deja = divmod(total, self.__taille)
+            bloc = nouveaux[i:i + self.__taille - deja]
+            existant = b""
+            if deja:
+                # fragment entamé : lignes déjà écrites recopiées (lignes en trop d'un arrêt brutal ignorées)
+                existant = b"".join(self.__lire_lignes("contrats", numero, deja)[0])
+            self.__ecrire_version("contrats", numero, existant + b"".join(self.__ligne(c) for c in bloc),
+                                  version, remplaces)
+            total += len(bloc)
+            i += len(bloc)
+        return total
+
+    @staticmethod
+    def __ligne(entite) -> bytes:
+        return (json.dumps(entite.to_dict(), ensure_ascii=False) + "\n").encode('utf-8')
+
+    def __remplacer(self, nom: str, numero: int, contenu: bytes, version: int, remplaces: List[str]):
+        somme = zlib.crc32(contenu)
+        if self.__sommes.get((nom, numero)) == somme:
+            return  # contenu identique : rien à écrire
+        self.__ecrire_version(nom, numero, contenu, version, remplaces)
+        self.__sommes[(nom, numero)] = somme
+
+    def __ecrire_version(self, nom: str, numero: int, contenu: bytes, version: int, remplaces: List[str]):
+        # nouveau fichier à côté de l'ancien, qui reste désigné par meta.json jusqu'à la bascule
+        ancien = self.__chemin(nom, numero)
+        self.__ecrire_fichier(self.__chemin(nom, numero, version), contenu)
+        if self.__generations[nom].get(numero, 0) != version:
+            remplaces.append(ancien)
+        self.__generations[nom][numero] = version
+
+    def __ecrire_fichier(self, chemin: str, contenu: bytes):
+        # fichier temporaire puis renommage : jamais à moitié écrit
+        temporaire = chemin + ".tmp"
+        with open(temporaire, "wb") as f:
+            f.write(contenu)
+        os.replace(temporaire, chemin)
+        self.__nb_fichiers_ecrits += 1
+        compter("fragments_ecrits")
+        if est_actif():
+            compter_octets("ecrits", "fragments", len(contenu))
+
+    # --- Import unique depuis le fichier JSON ---
+    def importer_json(self, chemin_json: str = "donnees.json"):
+        data = GestionnaireDonnees(chemin_json).charger()
+        self.sauvegarder(data['vehicules'], data['clients'], data['contrats'])
+        return {nom: len(data[nom]) for nom in ("vehicules", "clients", "contrats")}
+
+
+if __name__ == "__main__":
+    # usage : python stockage_fragmente.py [donnees.json] [dossier]
+    source = sys.argv[1] if len(sys.argv) > 1 else "donnees.json"
+    cible = sys.argv[2] if len(sys.argv) > 2 else "donnees"
+    print(f"Import de {source} vers {cible} : {StockageFragmente(cible).importer_json(source)}")
@@ -0,0 +1,289 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from calendrier import lire_date, periode
+from archive_contrats import ArchiveContrats
+from classes import Vehicule, Client, ContratLocation, ModePaiement, GestionnaireDonnees
+from instrumentation import compter, mesurer
+from verrous import ConflitEcriture
+
+
+# ===============================================================
+# STOCKAGE SQLITE
+# ---------------------------------------------------------------
+# Rôle : Alternative à donnees.json, utilisable par SystemeLocation à la
+#        place de GestionnaireDonnees (mêmes méthodes charger / sauvegarder /
+#        enregistrer).
+# - Chaque mutation est une petite transaction (INSERT / UPDATE).
+# - Index sur immatriculation, téléphone, disponibilité et type de véhicule.
+# - Requêtes ciblées (véhicules disponibles par type, contrats d'un client)
+#   sans charger toutes les données.
+# - Les contrats portent leur période [date_debut, date_fin) ; un index
+#   (vehicule_id, date_debut) sert à la détection des chevauchements et
+#   à la recherche des véhicules libres sur une période.
+# - Utilisable depuis plusieurs threads (connexion partagée sous verrou) ;
+#   entre processus, SQLite sérialise les transactions et un contrat qui
+#   chevauche une location enregistrée ailleurs lève ConflitEcriture.
+# - La table contrats ne garde que les contrats actifs : un contrat clos
+#   est supprimé (il est dans l'archive compressée donnees.archive.jsonl.gz).
+# ===============================================================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vehicules (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    marque, modele, annee, prix_journalier,
+    disponible INTEGER NOT NULL DEFAULT 1,
+    immatriculation TEXT,
+    nombre_portes, cylindree
+);
+CREATE INDEX IF NOT EXISTS idx_vehicules_immatriculation ON vehicules(immatriculation);
+CREATE INDEX IF NOT EXISTS idx_vehicules_type ON vehicules(type);
+CREATE INDEX IF NOT EXISTS idx_vehicules_disponible_type ON vehicules(disponible, type);
+
+CREATE TABLE IF NOT EXISTS clients (
+    id INTEGER PRIMARY KEY,
+    nom, prenom,
+    telephone TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_clients_telephone ON clients(telephone);
+
+CREATE TABLE IF NOT EXISTS contrats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER NOT NULL REFERENCES clients(id),
+    vehicule_id INTEGER NOT NULL REFERENCES vehicules(id),
+    nb_jours, montant_total,
+    mode_paiement TEXT,
+    date_debut TEXT, date_fin TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_contrats_client ON contrats(client_id);
+CREATE INDEX IF NOT EXISTS idx_contrats_vehicule ON contrats(vehicule_id);
+"""
+
+# après l'ajout éventuel des colonnes de dates à une base existante
+INDEX_PERIODES = "CREATE INDEX IF NOT EXISTS idx_contrats_periode ON contrats(vehicule_id, date_debut, date_fin)"
+
+# véhicule sans contrat qui chevauche [:debut, :fin) ; les dates ISO se comparent comme du texte
+LIBRE_SUR_PERIODE = ("disponible = 1 AND NOT EXISTS (SELECT 1 FROM contrats c WHERE c.vehicule_id = vehicules.id "
+                     "AND c.date_debut < :fin AND c.date_fin > :debut)")
+
+COLONNES_VEHICULE = ('id', 'type', 'marque', 'modele', 'annee', 'prix_journalier', 'disponible',
+                     'immatriculation', 'nombre_portes', 'cylindree')
+
+
+class StockageSQLite:
+    def __init__(self, chemin: str = "donnees.db"):
+        self.__chemin = chemin
+        self.__connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self.__verrou = threading.Lock()
+        self.__connexion.row_factory = sqlite3.Row
+        self.__connexion.execute("PRAGMA journal_mode=WAL")
+        self.__connexion.execute("PRAGMA synchronous=NORMAL")
+        self.__connexion.executescript(SCHEMA)
+        self.__migrer()
+        self.__archive = ArchiveContrats(os.path.splitext(chemin)[0] + ".archive.jsonl.gz")
+
+    def __migrer(self):
+        colonnes = {l['name'] for l in self.__connexion.execute("PRAGMA table_info(contrats)")}
+        for colonne in ('date_debut', 'date_fin'):
+            if colonne not in colonnes:
+                self.__connexion.execute(f"ALTER TABLE contrats ADD COLUMN {colonne} TEXT")
+        self.__connexion.execute(INDEX_PERIODES)
+        self.__connexion.commit()
+
+    def get_chemin(self):
+        return self.__chemin
+
+    def get_archive(self):
+        return self.__archive
+
+    def fermer(self):
+        self.__connexion.close()
+
+    # --- Conversion lignes <-> objets ---
+    @staticmethod
+    def __ligne_vehicule(v: Vehicule):
+        d = v.to_dict()
+        d['disponible'] = 1 if d['disponible'] else 0
+        return tuple(d.get(col) for col in COLONNES_VEHICULE)
+
+    @staticmethod
+    def __ligne_client(c: Client):
+        d = c.to_dict()
+        return (d['id'], d['nom'], d['prenom'], d['telephone'])
+
+    @staticmethod
+    def __ligne_contrat(c: ContratLocation):
+        d = c.to_dict()
+        mp = json.dumps(d['mode_paiement'], ensure_ascii=False) if d['mode_paiement'] else None
+        return (d['client_id'], d['vehicule_id'], d['nb_jours'], d['montant_total'], mp, d['date_debut'], d['date_fin'])
+
+    @staticmethod
+    def __vers_vehicule(ligne: sqlite3.Row) -> Vehicule:
+        # les colonnes propres à l'autre type (NULL) sont retirées pour garder les valeurs par défaut
+        d = {k: ligne[k] for k in ligne.keys() if ligne[k] is not None}
+        d['disponible'] = bool(ligne['disponible'])
+        return Vehicule.from_dict(d)
+
+    @staticmethod
+    def __vers_client(ligne: sqlite3.Row) -> Client:
+        return Client.from_dict(dict(ligne))
+
+    @staticmethod
+    def __vers_contrat(ligne: sqlite3.Row, client: Client, vehicule: Vehicule) -> ContratLocation:
+        mp = ligne['mode_paiement']
+        return ContratLocation.restaurer(client, vehicule, ligne['nb_jours'], ligne['montant_total'],
+                                         ModePaiement.from_dict(json.loads(mp)) if mp else None,
+                                         lire_date(ligne['date_debut']))
+
+    # --- Interface commune avec GestionnaireDonnees ---
+    def sauvegarder(self, vehicules, clients, contrats):
+        with mesurer("sauvegarder"), self.__verrou, self.__connexion:
+            self.__connexion.execute("DELETE FROM contrats")
+            self.__connexion.execute("DELETE FROM vehicules")
+            self.__connexion.execute("DELETE FROM clients")
+            self.__inserer_vehicules(vehicules)
+            self.__inserer_clients(clients)
+            self.__inserer_contrats(contrats)
+        print(f"✅ Données sauvegardées dans {self.__chemin}")
+
+    def enregistrer(self, operation: str, donnees: Dict[str, Any], vehicules, clients, contrats):
+        """Persiste une mutation unique dans une transaction."""
+        self.enregistrer_lot([(operation, donnees)], vehicules, clients, contrats)
+
+    def enregistrer_lot(self, operations, vehicules, clients, contrats):
+        """Persiste plusieurs mutations dans une seule transaction (tout ou rien)."""
+        with mesurer("enregistrer"), self.__verrou, self.__connexion:
+            # verrou d'écriture dès le début : pas de réservation concurrente entre vérification et ajout
+            self.__connexion.execute("BEGIN IMMEDIATE")
+            for operation, donnees in operations:
+                self.__appliquer(operation, donnees)
+
+    def __appliquer(self, operation: str, donnees: Dict[str, Any]):
+        if operation == 'ajout_vehicule':
+            self.__inserer_vehicules([Vehicule.from_dict(donnees)])
+        elif operation == 'ajout_client':
+            self.__inserer_clients([Client.from_dict(donnees)])
+        elif operation == 'creation_contrat':
+            mp = json.dumps(donnees['mode_paiement'], ensure_ascii=False) if donnees.get('mode_paiement') else None
+            libre = self.__connexion.execute(
+                f"SELECT 1 FROM vehicules WHERE id = :id AND {LIBRE_SUR_PERIODE}",
+                {'id': donnees['vehicule_id'], 'debut': donnees.get('date_debut'), 'fin': donnees.get('date_fin')}).fetchone()
+            if libre is None:
+                raise ConflitEcriture(f"Véhicule {donnees['vehicule_id']} déjà loué du {donnees.get('date_debut')} "
+                                      f"au {donnees.get('date_fin')} dans {self.__chemin}")
+            self.__connexion.execute(
+                "INSERT INTO contrats (client_id, vehicule_id, nb_jours, montant_total, mode_paiement, "
+                "date_debut, date_fin) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (donnees['client_id'], donnees['vehicule_id'], donnees['nb_jours'], donnees['montant_total'], mp,
+                 donnees.get('date_debut'), donnees.get('date_fin')))
+        elif operation == 'cloture_contrat':
+            # le plus récent si un ancien contrat sans date a la même clé
+            self.__connexion.execute(
+                "DELETE FROM contrats WHERE id = (SELECT id FROM contrats WHERE client_id = ? AND vehicule_id = ? "
+                "AND date_debut IS ? ORDER BY id DESC LIMIT 1)",
+                (donnees['client_id'], donnees['vehicule_id'], donnees.get('date_debut')))
+        else:
+            raise ValueError(f"Opération inconnue : {operation}")
+
+    def charger(self):
+        with mesurer("charger"):
+            vehs = [self.__vers_vehicule(l) for l in self.__connexion.execute("SELECT * FROM vehicules ORDER BY rowid")]
+            clts = [self.__vers_client(l) for l in self.__connexion.execute("SELECT * FROM clients ORDER BY rowid")]
+            vehicules_par_id = {v.get_identifiant(): v for v in vehs}
+            clients_par_id = {c.get_identifiant(): c for c in clts}
+            contrats = [self.__vers_contrat(l, clients_par_id[l['client_id']], vehicules_par_id[l['vehicule_id']])
+                        for l in self.__connexion.execute("SELECT * FROM contrats ORDER BY id")]
+            for c in contrats:
+                # les calendriers des véhicules sont reconstruits depuis les contrats
+                c.appliquer_reservation()
+            compter("vehicules_reconstruits", len(vehs))
+            compter("clients_reconstruits", len(clts))
+            compter("contrats_reconstruits", len(contrats))
+            print(f"✅ Données chargées depuis {self.__chemin}")
+            return {"vehicules": vehs, "clients": clts, "contrats": contrats}
+
+    def __inserer_vehicules(self, vehicules):
+        marques = ", ".join("?" for _ in COLONNES_VEHICULE)
+        self.__connexion.executemany(
+            f"INSERT OR REPLACE INTO vehicules ({', '.join(COLONNES_VEHICULE)}) VALUES ({marques})",
+            (self.__ligne_vehicule(v) for v in vehicules))
+
+    def __inserer_clients(self, clients):
+        self.__connexion.executemany(
+            "INSERT OR REPLACE INTO clients (id, nom, prenom, telephone) VALUES (?, ?, ?, ?)",
+            (self.__ligne_client(c) for c in clients))
+
+    def __inserer_contrats(self, contrats):
+        self.__connexion.executemany(
+            "INSERT INTO contrats (client_id, vehicule_id, nb_jours, montant_total, mode_paiement, date_debut, date_fin) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.__ligne_contrat(c) for c in contrats))
+
+    # --- Requêtes indexées (sans chargement complet) ---
+    def vehicules_disponibles(self, type_vehicule: Optional[str] = None, debut: Optional[date] = None,
+                              fin: Optional[date] = None) -> List[Vehicule]:
+        """Véhicules libres sur [debut, fin) ; par défaut, libres aujourd'hui."""
+        if debut is None:
+            debut, fin = periode(None, 1)
+        params = {'debut': debut.isoformat(), 'fin': fin.isoformat(), 'type': type_vehicule}
+        if type_vehicule is None:
+            lignes = self.__connexion.execute(f"SELECT * FROM vehicules WHERE {LIBRE_SUR_PERIODE} ORDER BY id", params)
+        else:
+            lignes = self.__connexion.execute(
+                f"SELECT * FROM vehicules WHERE {LIBRE_SUR_PERIODE} AND type = :type ORDER BY id", params)
+        return [self.__vers_vehicule(l) for l in lignes]
+
+    def trouver_vehicule(self, immatriculation: str) -> Optional[Vehicule]:
+        ligne = self.__connexion.execute(
+            "SELECT * FROM vehicules WHERE immatriculation = ? LIMIT 1", (immatriculation,)).fetchone()
+        return self.__vers_vehicule(ligne) if ligne else None
+
+    def trouver_client(self, telephone: str) -> Optional[Client]:
+        ligne = self.__connexion.execute(
+            "SELECT * FROM clients WHERE telephone = ? LIMIT 1", (telephone,)).fetchone()
+        return self.__vers_client(ligne) if ligne else None
+
+    def contrats_par_client(self, client_id: int) -> List[ContratLocation]:
+        ligne_client = self.__connexion.execute("SELECT * FROM clients WHERE id = ?", (client_id,)).fetchone()
+        if ligne_client is None:
+            return []
+        client = self.__vers_client(ligne_client)
+        lignes = self.__connexion.execute(
+            "SELECT c.*, " + ", ".join(f"v.{col} AS v_{col}" for col in COLONNES_VEHICULE) +
+            " FROM contrats c JOIN vehicules v ON v.id = c.vehicule_id WHERE c.client_id = ? ORDER BY c.id",
+            (client_id,))
+        contrats = []
+        vehicules_par_id: Dict[int, Vehicule] = {}
+        for l in lignes:
+            vid = l['vehicule_id']
+            if vid not in vehicules_par_id:
+                d = {col: l['v_' + col] for col in COLONNES_VEHICULE if l['v_' + col] is not None}
+                d['disponible'] = bool(l['v_disponible'])
+                vehicules_par_id[vid] = Vehicule.from_dict(d)
+            contrats.append(self.__vers_contrat(l, client, vehicules_par_id[vid]))
+        return contrats
+
+    def compter(self) -> Dict[str, int]:
+        return {table: self.__connexion.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('vehicules', 'clients', 'contrats')}
+
+    # --- Import unique depuis l'ancien fichier JSON ---
+    def importer_json(self, chemin_json: str = "donnees.json"):
+        # GestionnaireDonnees gère aussi la conversion de l'ancien format des contrats
+        data = GestionnaireDonnees(chemin_json).charger()
+        self.sauvegarder(data['vehicules'], data['clients'], data['contrats'])
+        return self.compter()
+
+
+if __name__ == "__main__":
+    # usage : python stockage_sqlite.py [donnees.json] [donnees.db]
+    source = sys.argv[1] if len(sys.argv) > 1 else "donnees.json"
+    cible = sys.argv[2] if len(sys.argv) > 2 else "donnees.db"
+    stockage = StockageSQLite(cible)
+    print(f"Import de {source} vers {cible} : {stockage.importer_json(source)}")
+    stockage.fermer()
@@ -0,0 +1,90 @@
+from array import array
+from typing import List, Optional, Sequence
+
+from classes import SEUIL_LONGUE_DUREE, REDUCTION_LONGUE_DUREE, SEUIL_CYLINDREE, SURTAXE_GROSSE_CYLINDREE
+
+try:  # NumPy est optionnel : sans lui, calcul en Python pur sur des array('d')
+    import numpy as np
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    np = None
+
+
+# ===============================================================
+# TARIFICATION PAR LOTS
+# ---------------------------------------------------------------
+# Rôle : Calculer en un appel la matrice des prix (véhicules x durées)
+#        pour une grille de devis.
+# - Mêmes règles, dans le même ordre d'opérations, que
+#   Voiture.calculer_tarif_location et Moto.calculer_tarif_location :
+#     total = prix_journalier * nb_jours
+#     Voiture : total *= 0.9 si nb_jours > 7
+#     Moto    : total *= 1.15 si cylindrée > 600
+#   (multiplier par 1.0 ne change pas un flottant : les résultats sont
+#   identiques à ceux des méthodes par objet).
+# - Utilise NumPy s'il est installé, sinon des array('d').
+# ===============================================================
+class MoteurTarification:
+    """Extrait une fois les colonnes utiles de la flotte, puis calcule des grilles de prix."""
+
+    def __init__(self, vehicules, utiliser_numpy: Optional[bool] = None):
+        if utiliser_numpy is None:
+            utiliser_numpy = np is not None
+        if utiliser_numpy and np is None:
+            raise ImportError("NumPy n'est pas installé")
+        self.__numpy = utiliser_numpy
+        self.__prix = array('d')
+        self.__est_moto = bytearray()
+        self.__surtaxe = bytearray()
+        if hasattr(vehicules, 'colonnes_tarif'):
+            # VehiculeStore : lecture directe des colonnes, sans créer de vues
+            prix, types, specifiques = vehicules.colonnes_tarif()
+            self.__prix = array('d', prix)
+            self.__est_moto = bytearray(types)
+            self.__surtaxe = bytearray(1 if t and s > SEUIL_CYLINDREE else 0 for t, s in zip(types, specifiques))
+        else:
+            for v in vehicules:
+                moto = v.get_type() == 'Moto'
+                self.__prix.append(v.get_prix_journalier())
+                self.__est_moto.append(1 if moto else 0)
+                self.__surtaxe.append(1 if moto and v.get_cylindree() > SEUIL_CYLINDREE else 0)
+
+    def __len__(self):
+        return len(self.__prix)
+
+    def calculer(self, nb_jours: Sequence[int]):
+        """Matrice des prix : une ligne par véhicule, une colonne par durée.
+
+        Renvoie un numpy.ndarray (float64) avec NumPy, sinon une liste de array('d').
+        """
+        if self.__numpy:
+            return self.__calculer_numpy(nb_jours)
+        return self.__calculer_python(nb_jours)
+
+    def __calculer_numpy(self, nb_jours):
+        jours = np.asarray(nb_jours, dtype=np.float64)
+        prix = np.frombuffer(self.__prix, dtype=np.float64) if len(self.__prix) else np.zeros(0)
+        est_moto = np.frombuffer(bytes(self.__est_moto), dtype=np.uint8).astype(bool)
+        surtaxe = np.frombuffer(bytes(self.__surtaxe), dtype=np.uint8).astype(bool)
+        total = prix[:, None] * jours[None, :]
+        facteur_voiture = np.where(jours > SEUIL_LONGUE_DUREE, REDUCTION_LONGUE_DUREE, 1.0)
+        facteur = np.where(est_moto[:, None],
+                           np.where(surtaxe, SURTAXE_GROSSE_CYLINDREE, 1.0)[:, None],
+                           facteur_voiture[None, :])
+        return total * facteur
+
+    def __calculer_python(self, nb_jours) -> List[array]:
+        jours = [float(n) for n in nb_jours]
+        facteurs_voiture = [REDUCTION_LONGUE_DUREE if n > SEUIL_LONGUE_DUREE else 1.0 for n in jours]
+        lignes = []
+        for p, moto, surtaxe in zip(self.__prix, self.__est_moto, self.__surtaxe):
+            if moto:
+                f = SURTAXE_GROSSE_CYLINDREE if surtaxe else 1.0
+                lignes.append(array('d', [p * n * f for n in jours]))
+            else:
+                lignes.append(array('d', [p * n * f for n, f in zip(jours, facteurs_voiture)]))
+        return lignes
+
+
+def calculer_tarifs(vehicules, nb_jours: Sequence[int], utiliser_numpy: Optional[bool] = None):
+    """Raccourci : matrice des prix de `vehicules` pour chaque durée de `nb_jours`."""
+    return MoteurTarification(vehicules, utiliser_numpy).calculer(nb_jours)
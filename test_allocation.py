@@ -0,0 +1,96 @@
+from datetime import date
+
+import pytest
+
+from allocation import AllocateurFlotte, DemandeLocation
+from classes import Client, Moto, Voiture
+from main import SystemeLocation
+from stockage_compact import VehiculeStore
+
+DEBUT = date(2030, 1, 1)
+
+
+def flotte():
+    return ([Voiture("Kia", f"V5-{i}", 2020, 100 + 10 * i, 5, immatriculation=f"V5-{i}") for i in range(6)] +
+            [Voiture("Kia", f"V3-{i}", 2020, 50 + 10 * i, 3, immatriculation=f"V3-{i}") for i in range(3)] +
+            [Moto("Honda", f"M-{cc}", 2020, 60, cc, immatriculation=f"M-{cc}") for cc in (125, 600, 1000)])
+
+
+def immatriculations(affectation):
+    return [c.get_vehicule().get_immatriculation() for c in affectation.contrats]
+
+
+def test_demande_depuis_texte():
+    demande = DemandeLocation.depuis_texte("voiture 4 10 2030-01-01 portes=5 max=150")
+    assert (demande.type_vehicule, demande.nombre, demande.nb_jours, demande.nombre_portes, demande.prix_max) == \
+        ('Voiture', 4, 10, 5, 150.0)
+    assert demande.periode() == (DEBUT, date(2030, 1, 11))
+    assert DemandeLocation.from_dict(demande.to_dict()).to_dict() == demande.to_dict()
+    for ligne in ("camion 1 2", "voiture 0 2", "voiture 1", "voiture 1 2 couleur=rouge"):
+        with pytest.raises(ValueError):
+            DemandeLocation.depuis_texte(ligne)
+
+
+def test_moins_chers_d_abord_et_contraintes():
+    client = Client("Société", "", "0100000000")
+    [voitures5, motos] = AllocateurFlotte(flotte()).allouer(client, [
+        DemandeLocation('Voiture', 3, 2, DEBUT, nombre_portes=5),
+        DemandeLocation('Moto', 5, 2, DEBUT, cylindree_min=500),
+    ])
+    assert immatriculations(voitures5) == ["V5-0", "V5-1", "V5-2"]
+    assert sorted(immatriculations(motos)) == ["M-1000", "M-600"] and motos.manquants() == 3
+
+
+def test_budget_serre_servi_en_premier():
+    client = Client("Société", "", "0100000000")
+    large, serre = AllocateurFlotte(flotte()).allouer(client, [
+        DemandeLocation('Voiture', 2, 2, DEBUT),
+        DemandeLocation('Voiture', 2, 2, DEBUT, prix_max=60),
+    ])
+    # le budget serré prend les deux voitures à 50 et 60, le budget large les suivantes
+    assert immatriculations(serre) == ["V3-0", "V3-1"]
+    assert immatriculations(large) == ["V3-2", "V5-0"]
+
+
+def test_periodes_differentes_et_vehicules_occupes():
+    vehicules = flotte()
+    client = Client("Société", "", "0100000000")
+    vehicules[6].reserver(DEBUT, date(2030, 1, 3))  # V3-0 déjà loué
+    janvier, fevrier = AllocateurFlotte(vehicules).allouer(client, [
+        DemandeLocation('Voiture', 1, 2, DEBUT, nombre_portes=3),
+        DemandeLocation('Voiture', 1, 2, date(2030, 2, 1), nombre_portes=3),
+    ])
+    assert immatriculations(janvier) == ["V3-1"] and immatriculations(fevrier) == ["V3-0"]
+
+
+def test_tout_ou_rien_libere_les_reservations():
+    vehicules = flotte()
+    client = Client("Société", "", "0100000000")
+    affectations = AllocateurFlotte(vehicules).allouer(client, [
+        DemandeLocation('Voiture', 2, 2, DEBUT, nombre_portes=3),
+        DemandeLocation('Moto', 4, 2, DEBUT),
+    ], tout_ou_rien=True)
+    assert all(not a.contrats for a in affectations)
+    assert all(v.est_libre(DEBUT, date(2030, 1, 3)) for v in vehicules)
+
+
+def test_store_compact_meme_resultat():
+    store = VehiculeStore()
+    for v in flotte():
+        store.append(v)
+    client = Client("Société", "", "0100000000")
+    [affectation] = AllocateurFlotte(store).allouer(client, [DemandeLocation('Voiture', 2, 9, DEBUT, prix_max=95)])
+    assert immatriculations(affectation) == ["V3-0", "V3-1"]
+    assert affectation.contrats[0].get_montant_total() == pytest.approx(50 * 9 * 0.9)
+
+
+def test_louer_en_lot_integre_les_contrats():
+    systeme = SystemeLocation()
+    for v in flotte():
+        systeme.integrer_vehicule(v)
+    client = systeme.integrer_client(Client("Société", "", "0100000000"))
+    [affectation] = systeme.louer_en_lot(client, [DemandeLocation('Voiture', 4, 3, DEBUT, nombre_portes=5)])
+    assert len(systeme.get_contrat()) == 4
+    assert systeme.contrats_du_client(client) == affectation.contrats
+    assert {v.get_immatriculation() for v in systeme.vehicules_libres(DEBUT, date(2030, 1, 4), 'Voiture')} == \
+        {"V5-4", "V5-5", "V3-0", "V3-1", "V3-2"}
@@ -0,0 +1,152 @@
+import gzip
+from datetime import date
+
+import pytest
+
+from archive_contrats import ArchiveContrats
+from classes import Client, GestionnaireDonnees, Voiture
+from main import SystemeLocation
+
+DEBUT = date(2030, 1, 1)
+
+
+def contrat(client_id, vehicule_id, debut="2030-01-01", retour="2030-01-03", montant=100.0, nb_jours=2):
+    return {'client_id': client_id, 'vehicule_id': vehicule_id, 'date_debut': debut, 'date_retour': retour,
+            'nb_jours': nb_jours, 'montant_total': montant}
+
+
+def test_ajout_lecture_et_recherche(tmp_path):
+    archive = ArchiveContrats(str(tmp_path / "archive.jsonl.gz"))
+    assert list(archive.parcourir()) == [] and archive.taille() == 0
+    archive.ajouter([contrat(1, 10), contrat(2, 10, retour="2030-02-01")])
+    archive.ajouter([contrat(1, 11, retour="2030-03-01")])
+    assert len(list(archive.parcourir())) == 3
+    assert [e['vehicule_id'] for e in archive.rechercher(client_id=1)] == [10, 11]
+    assert len(archive.rechercher(vehicule_id=10, retour_du=date(2030, 1, 15))) == 1
+    assert len(archive.rechercher(retour_au=date(2030, 2, 1))) == 2
+    assert len(archive.rechercher(limite=1)) == 1
+
+
+def test_fin_tronquee_ignoree_puis_compaction(tmp_path, capsys):
+    chemin = tmp_path / "archive.jsonl.gz"
+    archive = ArchiveContrats(str(chemin))
+    for i in range(3):
+        archive.ajouter([contrat(1, i)])
+    with open(chemin, "ab") as f:
+        f.write(gzip.compress(b'{"client_id": 9}\n')[:12])  # ajout interrompu
+    assert [e['vehicule_id'] for e in archive.parcourir()] == [0, 1, 2]
+    assert "illisible" in capsys.readouterr().out
+    taille = archive.taille()
+    archive.compacter()
+    assert archive.taille() < taille
+    assert [e['vehicule_id'] for e in archive.parcourir()] == [0, 1, 2]
+
+
+def test_cumuls_incrementaux(tmp_path):
+    chemin = str(tmp_path / "archive.jsonl.gz")
+    archive = ArchiveContrats(chemin)
+    archive.ajouter([contrat(1, 10, montant=100.0), contrat(2, 10, debut="2030-01-30", montant=50.0, nb_jours=3)])
+    cumuls = archive.cumuls()
+    assert cumuls.par_client == {1: [1, 100.0, 2], 2: [1, 50.0, 3]}
+    assert cumuls.jours_loues == {(10, (2030, 1)): 4, (10, (2030, 2)): 1}
+    assert (tmp_path / "archive.cumuls.json").exists()
+
+    archive.ajouter([contrat(1, 11, montant=30.0)])
+    # nouvelle instance : cumuls enregistrés repris, seul le nouveau membre est relu
+    cumuls = ArchiveContrats(chemin).cumuls(ignorer=lambda e: e['vehicule_id'] == 99)
+    assert cumuls.par_client[1] == [2, 130.0, 4] and cumuls.taille == archive.taille()
+    archive.compacter()
+    assert not (tmp_path / "archive.cumuls.json").exists()
+    assert archive.cumuls().par_client[1] == [2, 130.0, 4]
+
+
+def test_retour_puis_archive(tmp_path):
+    chemin = str(tmp_path / "d.json")
+    systeme = SystemeLocation(GestionnaireDonnees(chemin))
+    vehicule = systeme.integrer_vehicule(Voiture("Toyota", "Corolla", 2020, 100, 5, immatriculation="AR-1"))
+    client = systeme.integrer_client(Client("Kouassi", "Awa", "0700000001"))
+    contrat_ = systeme.louer(client, vehicule, 5, DEBUT)
+    total = systeme.get_rapports().total().montant
+
+    systeme.retourner(contrat_, date(2030, 1, 3))  # retour anticipé
+    systeme.enregistrer_cloture(contrat_)
+    assert systeme.get_contrat() == [] and contrat_.est_clos()
+    assert vehicule.est_libre(date(2030, 1, 3), date(2030, 1, 6))
+    assert systeme.get_rapports().total().montant == total  # le contrat clos reste compté
+    with pytest.raises(ValueError, match="déjà clos"):
+        systeme.retourner(contrat_)
+    [archive] = systeme.contrats_archives(client)
+    assert archive.get_date_retour() == date(2030, 1, 3) and archive.get_vehicule() is vehicule
+    systeme.fermer()
+
+    relu = SystemeLocation(GestionnaireDonnees(chemin))
+    assert relu.get_contrat() == [] and len(list(relu.contrats_archives())) == 1
+    assert relu.get_rapports().total().montant == total and relu.get_rapports().verifier() == []
+    relu.fermer()
+
+
+def test_retablir_apres_echec_de_sauvegarde():
+    systeme = SystemeLocation()
+    vehicule = systeme.integrer_vehicule(Voiture("Toyota", "Corolla", 2020, 100, 5, immatriculation="AR-2"))
+    client = systeme.integrer_client(Client("Kouassi", "Awa", "0700000002"))
+    contrat_ = systeme.louer(client, vehicule, 5, DEBUT)
+    systeme.retourner(contrat_, date(2030, 1, 2))
+    systeme.retablir(contrat_)
+    assert systeme.get_contrat() == [contrat_] and not contrat_.est_clos()
+    assert not vehicule.est_libre(date(2030, 1, 4), date(2030, 1, 5))
+
+    # période relouée entre-temps : le contrat ne peut pas être rétabli
+    systeme.retourner(contrat_, date(2030, 1, 2))
+    systeme.louer(client, vehicule, 2, date(2030, 1, 3))
+    with pytest.raises(ValueError, match="de nouveau loué"):
+        systeme.retablir(contrat_)
+
+
+class ClotureInstable(GestionnaireDonnees):
+    """Échoue à l'enregistrement des `echecs` premières clôtures (l'archive est déjà écrite)."""
+    echecs = 0
+
+    def enregistrer(self, operation, *args):
+        if operation == 'cloture_contrat' and self.echecs:
+            self.echecs -= 1
+            raise OSError("disque plein")
+        super().enregistrer(operation, *args)
+
+
+def test_cloture_refaite_apres_echec(tmp_path):
+    chemin = str(tmp_path / "d.json")
+    stockage = ClotureInstable(chemin)
+    systeme = SystemeLocation(stockage)
+    vehicule = systeme.integrer_vehicule(Voiture("Toyota", "Corolla", 2020, 100, 5, immatriculation="AR-3"))
+    client = systeme.integrer_client(Client("Kouassi", "Awa", "0700000003"))
+    contrat_ = systeme.louer(client, vehicule, 5, DEBUT)
+    systeme.sauvegarder_donnees()
+
+    stockage.echecs = 1
+    systeme.retourner(contrat_, date(2030, 1, 2))
+    with pytest.raises(OSError):
+        systeme.enregistrer_cloture(contrat_)
+    # clôture en cours : cumulée, mais les cumuls ne sont pas enregistrés
+    assert systeme.cumuls_archives().par_client == {client.get_identifiant(): [1, 500.0, 5]}
+    assert not (tmp_path / "d.archive.cumuls.json").exists()
+    systeme.retablir(contrat_)
+    assert list(systeme.contrats_archives()) == []
+    assert systeme.cumuls_archives().par_client == {}  # contrat de nouveau actif
+
+    systeme.retourner(contrat_, date(2030, 1, 4))
+    systeme.enregistrer_cloture(contrat_)
+    [archive] = systeme.contrats_archives(client)
+    assert archive.get_date_retour() == date(2030, 1, 4)
+    assert [c.get_date_retour() for c in systeme.contrats_archives()] == [date(2030, 1, 4)]
+    # le premier enregistrement, remplacé, ne répond plus à une recherche sur son retour
+    assert stockage.get_archive().rechercher(retour_au=date(2030, 1, 2)) == []
+    systeme.fermer()
+
+    relu = SystemeLocation(GestionnaireDonnees(chemin))
+    assert relu.get_rapports().verifier() == []
+    assert relu.get_rapports().total().nb == 1 and relu.get_rapports().total().montant == 500.0
+    relu.fermer()
+    archive = GestionnaireDonnees(chemin).get_archive()
+    taille = archive.taille()
+    archive.compacter()
+    assert archive.taille() < taille and len(list(archive.parcourir())) == 1
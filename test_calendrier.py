@@ -0,0 +1,86 @@
+import threading
+from datetime import date
+
+import pytest
+
+from calendrier import CalendrierReservations
+from classes import Client, ContratLocation, Voiture
+from main import SystemeLocation
+
+
+def j(jour, mois=1):
+    return date(2030, mois, jour)
+
+
+def test_periodes_semi_ouvertes():
+    calendrier = CalendrierReservations()
+    assert calendrier.ajouter(j(5), j(10))
+    # fin exclue : on peut reprendre le véhicule le jour de son retour
+    assert calendrier.ajouter(j(10), j(12))
+    assert calendrier.ajouter(j(1), j(5))
+    assert list(calendrier) == [(j(1), j(5)), (j(5), j(10)), (j(10), j(12))]
+    assert not calendrier.est_libre(j(9), j(11))
+    assert calendrier.est_libre(j(12), j(20))
+
+
+@pytest.mark.parametrize("debut, fin, attendu", [
+    (j(3), j(6), (j(5), j(10))),    # déborde à gauche
+    (j(9), j(15), (j(5), j(10))),   # déborde à droite
+    (j(6), j(7), (j(5), j(10))),    # incluse
+    (j(1), j(31), (j(5), j(10))),   # englobe : premier conflit
+    (j(1), j(5), None),
+    (j(10), j(20), None),
+])
+def test_conflit(debut, fin, attendu):
+    calendrier = CalendrierReservations()
+    calendrier.ajouter(j(5), j(10))
+    calendrier.ajouter(j(20), j(25))
+    assert calendrier.conflit(debut, fin) == attendu
+    assert calendrier.ajouter(debut, fin) == (attendu is None)
+
+
+def test_retrait_et_periode_invalide():
+    calendrier = CalendrierReservations()
+    calendrier.ajouter(j(5), j(10))
+    assert not calendrier.retirer(j(5), j(9))
+    assert calendrier.retirer(j(5), j(10))
+    assert len(calendrier) == 0
+    with pytest.raises(ValueError):
+        calendrier.ajouter(j(5), j(5))
+    assert CalendrierReservations.from_list([[j(1).isoformat(), j(3).isoformat()]]).conflit(j(2), j(4)) == (j(1), j(3))
+
+
+def test_double_reservation_refusee():
+    vehicule = Voiture("Toyota", "Corolla", 2020, 100, 5, immatriculation="CAL-1")
+    client = Client("Koné", "Ali", "0100000001")
+    contrat = ContratLocation(client, vehicule, 5, j(1))
+    with pytest.raises(ValueError, match="indisponible"):
+        ContratLocation(client, vehicule, 2, j(4))
+    assert not vehicule.reserver(j(5), j(7))
+    ContratLocation(client, vehicule, 2, j(6))  # commence le jour du retour
+
+    contrat.cloturer(j(3))
+    assert vehicule.est_libre(j(3), j(6))
+
+
+def test_reservations_concurrentes_un_seul_gagnant():
+    systeme = SystemeLocation()
+    vehicule = systeme.integrer_vehicule(Voiture("Kia", "Rio", 2019, 80, 3, immatriculation="CAL-2"))
+    clients = [systeme.integrer_client(Client(f"N{i}", "P", f"01999{i:05d}")) for i in range(8)]
+    depart = threading.Barrier(len(clients))
+    reussites, refus = [], []
+
+    def louer(client):
+        depart.wait()
+        try:
+            reussites.append(systeme.louer(client, vehicule, 3, j(1, 3)))
+        except ValueError:
+            refus.append(client)
+
+    fils = [threading.Thread(target=louer, args=(c,)) for c in clients]
+    for f in fils:
+        f.start()
+    for f in fils:
+        f.join()
+    assert len(reussites) == 1 and len(refus) == len(clients) - 1
+    assert list(vehicule.get_calendrier()) == [(j(1, 3), j(4, 3))]
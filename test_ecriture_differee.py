@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from classes import Client, GestionnaireDonnees
+from conftest import etat, verifier_aller_retour, verifier_sauvegarde_complete
+from ecriture_differee import ErreurSauvegarde, SauvegardeDifferee
+from main import SystemeLocation
+from stockage_fragmente import StockageFragmente
+from verrous import ConflitEcriture
+
+STOCKAGES = {
+    'json': lambda d: GestionnaireDonnees(str(d / "d.json")),
+    'journal': lambda d: GestionnaireDonnees(str(d / "d.json"), journalise=True),
+    'fragments': lambda d: StockageFragmente(str(d / "frag"), 2),
+}
+
+
+@pytest.mark.parametrize("nom", list(STOCKAGES))
+def test_aller_retour(tmp_path, peupler, nom):
+    verifier_aller_retour(lambda: SauvegardeDifferee(STOCKAGES[nom](tmp_path), 0.01, 1000), peupler)
+
+
+def test_sauvegarde_complete(tmp_path, peupler):
+    verifier_sauvegarde_complete(lambda: SauvegardeDifferee(STOCKAGES['json'](tmp_path), 0.01, 1000), peupler)
+
+
+def test_rafale_regroupee_en_une_ecriture(tmp_path, peupler):
+    differee = SauvegardeDifferee(GestionnaireDonnees(str(tmp_path / "d.json")), delai=60, lot=1000)
+    systeme = SystemeLocation(differee)
+    peupler(systeme)
+    assert differee.get_nb_ecritures() == 0 and differee.nb_en_attente() > 0
+    differee.vider()
+    assert differee.get_nb_ecritures() == 1 and differee.nb_en_attente() == 0
+    attendu = etat(systeme)
+    systeme.fermer()
+    assert etat(SystemeLocation(GestionnaireDonnees(str(tmp_path / "d.json")))) == attendu
+
+
+class StockageInstable:
+    """Échoue aux `echecs` premières écritures, puis retient les lots reçus."""
+
+    def __init__(self, echecs, erreur=OSError("disque plein")):
+        self.echecs = echecs
+        self.erreur = erreur
+        self.lots = []
+
+    def charger(self):
+        return {"vehicules": [], "clients": [], "contrats": []}
+
+    def enregistrer_lot(self, operations, vehicules, clients, contrats):
+        if self.echecs:
+            self.echecs -= 1
+            raise self.erreur
+        self.lots.append([donnees['id'] for _, donnees in operations])
+
+
+def test_echec_puis_nouvel_essai_dans_l_ordre(capsys):
+    stockage = StockageInstable(echecs=1)
+    differee = SauvegardeDifferee(stockage, delai=0.01, lot=1000)
+    for i in range(3):
+        differee.enregistrer('ajout_client', Client("N", "P", f"04{i}", identifiant=i).to_dict(), [], [], [])
+    limite = time.monotonic() + 5
+    while not stockage.lots and time.monotonic() < limite:
+        time.sleep(0.01)  # nouvel essai du thread après `delai`
+    differee.fermer()
+    assert stockage.lots == [[0, 1, 2]] and differee.get_erreur() is None
+    assert "Échec de la sauvegarde" in capsys.readouterr().err
+
+
+def test_conflit_non_retente(capsys):
+    differee = SauvegardeDifferee(StockageInstable(echecs=99, erreur=ConflitEcriture("autre processus")),
+                                  delai=0.01, lot=1)
+    differee.enregistrer('ajout_client', Client("N", "P", "041", identifiant=1).to_dict(), [], [], [])
+    with pytest.raises(ErreurSauvegarde):
+        differee.vider()
+    with pytest.raises(ErreurSauvegarde):
+        differee.enregistrer('ajout_client', Client("N", "P", "042", identifiant=2).to_dict(), [], [], [])
+    with pytest.raises(ErreurSauvegarde):
+        differee.fermer()
+
+
+class StockageObserve(StockageInstable):
+    """Pendant chaque écriture, un autre thread tente d'ajouter un client au système."""
+
+    def __init__(self):
+        super().__init__(echecs=0)
+        self.systeme = None
+        self.vus = []
+        self.fils = []
+
+    def enregistrer_lot(self, operations, vehicules, clients, contrats):
+        avant = len(clients)
+        fil = threading.Thread(target=self.systeme.integrer_client, args=(Client("N", "P", f"05{avant}"),))
+        fil.start()
+        self.fils.append(fil)
+        fil.join(0.05)
+        self.vus.append((avant, len(clients), fil.is_alive()))
+
+    def enregistrer(self, operation, donnees, vehicules, clients, contrats):
+        self.enregistrer_lot([(operation, donnees)], vehicules, clients, contrats)
+
+
+@pytest.mark.parametrize("differe", [False, True], ids=["direct", "differe"])
+def test_listes_figees_pendant_l_ecriture(differe):
+    stockage = StockageObserve()
+    systeme = SystemeLocation(SauvegardeDifferee(stockage, 0, 1) if differe else stockage)
+    stockage.systeme = systeme
+    systeme.enregistrer_mutation('ajout_client', systeme.integrer_client(Client("A", "B", "0500")).to_dict())
+    systeme.fermer()
+    for fil in stockage.fils:
+        fil.join()
+    # l'ajout concurrent attend la fin de l'écriture au lieu de modifier la liste parcourue
+    assert stockage.vus == [(1, 1, True)]
+    assert len(systeme.get_client()) == 2
@@ -0,0 +1,152 @@
+import csv
+import json
+
+import pytest
+
+from classes import GestionnaireDonnees
+from import_export import ImportateurMasse, exporter, main
+from main import SystemeLocation
+from stockage_sqlite import StockageSQLite
+
+
+def ecrire_jsonl(chemin, enregistrements):
+    chemin.write_text("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in enregistrements),
+                      encoding='utf-8')
+    return str(chemin)
+
+
+def ecrire_csv(chemin, colonnes, lignes):
+    with open(chemin, "w", encoding='utf-8', newline='') as f:
+        ecrivain = csv.DictWriter(f, fieldnames=colonnes)
+        ecrivain.writeheader()
+        ecrivain.writerows(lignes)
+    return str(chemin)
+
+
+@pytest.fixture
+def systeme(tmp_path):
+    systeme = SystemeLocation(GestionnaireDonnees(str(tmp_path / "d.json")))
+    importateur = ImportateurMasse(systeme)
+    importateur.importer('vehicules', ecrire_jsonl(tmp_path / "v.jsonl", [
+        {"type": "Voiture", "marque": "Toyota", "modele": "Corolla", "prix_journalier": 100,
+         "immatriculation": "IMP-1", "nombre_portes": 5},
+        {"type": "Moto", "marque": "Honda", "modele": "CB", "prix_journalier": 50, "immatriculation": "IMP-2"},
+    ]))
+    importateur.importer('clients', ecrire_jsonl(tmp_path / "c.jsonl", [
+        {"nom": "Kouassi", "prenom": "Awa", "telephone": "0711111111"},
+    ]))
+    yield systeme
+    systeme.fermer()
+
+
+def test_vehicules_et_clients_invalides(tmp_path, systeme):
+    rapport = ImportateurMasse(systeme, taille_lot=2).importer('vehicules', ecrire_csv(
+        tmp_path / "v.csv", ['type', 'marque', 'modele', 'prix_journalier', 'immatriculation', 'disponible'], [
+            {"type": "Camion", "marque": "M", "modele": "X", "prix_journalier": 1, "immatriculation": "E-1"},
+            {"type": "Moto", "marque": "M", "modele": "X", "prix_journalier": -1, "immatriculation": "E-2"},
+            {"type": "Moto", "marque": "M", "modele": "X", "prix_journalier": "cher", "immatriculation": "E-3"},
+            {"type": "Moto", "marque": "M", "modele": "X", "prix_journalier": 1, "immatriculation": ""},
+            {"type": "Moto", "marque": "M", "modele": "X", "prix_journalier": 1, "immatriculation": "E-5",
+             "disponible": "peut-être"},
+            {"type": "Moto", "marque": "M", "modele": "X", "prix_journalier": 1, "immatriculation": "IMP-1"},
+            {"type": "Moto", "marque": "M", "modele": "X", "prix_journalier": 1, "immatriculation": "OK-1"},
+            {"type": "Moto", "marque": "M", "modele": "X", "prix_journalier": 1, "immatriculation": "OK-1"},
+        ]))
+    assert [ligne for ligne, _ in rapport.erreurs] == [2, 3, 4, 5, 6]
+    assert "type de véhicule invalide" in rapport.erreurs[0][1]
+    assert "'prix_journalier' doit être >= 0" in rapport.erreurs[1][1]
+    assert "'immatriculation' manquant" in rapport.erreurs[3][1]
+    assert (rapport.ajoutes, rapport.doublons) == (1, 2)
+    assert systeme.trouver_vehicule("OK-1") is not None and systeme.trouver_vehicule("E-1") is None
+
+    rapport = ImportateurMasse(systeme).importer('clients', ecrire_jsonl(tmp_path / "c2.jsonl", [
+        {"nom": "", "telephone": "0722222222"}, {"nom": "Traoré"}, {"nom": "Koné", "telephone": "0711111111"},
+    ]))
+    assert len(rapport.erreurs) == 2 and rapport.doublons == 1 and rapport.ajoutes == 0
+
+
+def test_contrats_invalides(tmp_path, systeme):
+    base = {"telephone": "0711111111", "immatriculation": "IMP-1", "nb_jours": 2, "date_debut": "2030-01-01"}
+    rapport = ImportateurMasse(systeme).importer('contrats', ecrire_jsonl(tmp_path / "k.jsonl", [
+        dict(base, telephone="0799999999"),
+        dict(base, immatriculation="INCONNU"),
+        dict(base, nb_jours=0),
+        dict(base, nb_jours="deux"),
+        dict(base, mode_paiement="{pas du json"),
+        dict(base, mode_paiement=["carte"]),
+        dict(base, mode_paiement={"type_mode": "carte", "details": "4242"}),
+        base,
+        dict(base, date_debut="2030-01-02"),  # chevauche la ligne précédente
+    ]))
+    messages = [message for _, message in rapport.erreurs]
+    assert [ligne for ligne, _ in rapport.erreurs] == [1, 2, 3, 4, 5, 6, 7, 9]
+    assert "client inconnu" in messages[0] and "véhicule inconnu" in messages[1]
+    assert all("'mode_paiement' invalide" in m for m in messages[4:7])
+    assert "indisponible" in messages[7]
+    assert rapport.ajoutes == 1 and len(systeme.get_contrat()) == 1
+    # les lignes refusées n'ont rien réservé
+    contrat = systeme.get_contrat()[0]
+    assert list(systeme.trouver_vehicule("IMP-1").get_calendrier()) == [(contrat.get_date_debut(),
+                                                                         contrat.get_date_fin())]
+
+
+def test_mode_paiement_refuse_ne_reserve_pas(tmp_path, systeme):
+    ligne = {"telephone": "0711111111", "immatriculation": "IMP-2", "nb_jours": 3, "date_debut": "2030-03-01"}
+    importateur = ImportateurMasse(systeme)
+    rapport = importateur.importer('contrats', ecrire_csv(tmp_path / "k.csv", list(ligne) + ['mode_paiement'], [
+        dict(ligne, mode_paiement="carte"),
+        dict(ligne, mode_paiement=json.dumps({"type_mode": "carte", "details": {"fin": "4242"}})),
+    ]))
+    assert [ligne for ligne, _ in rapport.erreurs] == [2]  # ligne 1 = entête
+    assert rapport.ajoutes == 1
+    contrat = systeme.get_contrat()[0]
+    assert contrat.get_mode_paiement().to_dict()['details'] == {"fin": "4242"}
+    importateur.terminer()
+
+
+def test_collection_inconnue(tmp_path, systeme):
+    with pytest.raises(ValueError, match="Collection inconnue"):
+        ImportateurMasse(systeme).importer('factures', ecrire_jsonl(tmp_path / "f.jsonl", []))
+
+
+def test_ligne_illisible_en_json_lines(tmp_path, systeme):
+    chemin = tmp_path / "c.jsonl"
+    chemin.write_text('{"nom": "A", "telephone": "0733333333"}\n{pas du json\n[1, 2]\n', encoding='utf-8')
+    rapport = ImportateurMasse(systeme).importer('clients', str(chemin))
+    assert rapport.ajoutes == 1 and [ligne for ligne, _ in rapport.erreurs] == [2, 3]
+
+
+def test_cli_import_puis_export_sqlite(tmp_path, capsys):
+    db = str(tmp_path / "d.db")
+    clients = ecrire_jsonl(tmp_path / "c.jsonl", [{"nom": "A", "telephone": "0744444444"},
+                                                   {"nom": "B", "telephone": "0744444444"},
+                                                   {"nom": "", "telephone": "0755555555"}])
+    main(["importer", "clients", clients, "--sqlite", db])
+    sortie = capsys.readouterr().out
+    assert "1 ajouté(s), 1 doublon(s) ignoré(s), 1 erreur(s)" in sortie
+
+    stockage = StockageSQLite(db)
+    assert stockage.trouver_client("0744444444") is not None
+    stockage.fermer()
+
+    export = str(tmp_path / "export.csv")
+    main(["exporter", "clients", export, "--sqlite", db])
+    with open(export, encoding='utf-8') as f:
+        assert [ligne['telephone'] for ligne in csv.DictReader(f)] == ["0744444444"]
+
+
+def test_export_puis_reimport(tmp_path, systeme):
+    ImportateurMasse(systeme).importer('contrats', ecrire_jsonl(tmp_path / "k.jsonl", [
+        {"telephone": "0711111111", "immatriculation": "IMP-2", "nb_jours": 2, "date_debut": "2030-05-01",
+         "mode_paiement": {"type_mode": "virement", "details": {"iban": "CI00"}}}]))
+    chemin = str(tmp_path / "k.csv")
+    assert exporter('contrats', systeme.get_contrat(), chemin) == 1
+
+    autre = SystemeLocation(GestionnaireDonnees(str(tmp_path / "autre.json")))
+    for collection, entites in (('vehicules', systeme.get_vehicule()), ('clients', systeme.get_client())):
+        exporter(collection, entites, str(tmp_path / f"{collection}.jsonl"))
+        ImportateurMasse(autre).importer(collection, str(tmp_path / f"{collection}.jsonl"))
+    rapport = ImportateurMasse(autre).importer('contrats', chemin)
+    assert rapport.erreurs == [] and rapport.ajoutes == 1
+    assert autre.get_contrat()[0].to_dict()['mode_paiement'] == systeme.get_contrat()[0].to_dict()['mode_paiement']
+    autre.fermer()
@@ -0,0 +1,55 @@
+import sys
+import threading
+
+import pytest
+
+from instrumentation import Histogramme, Metriques
+
+
+@pytest.fixture
+def commutations_frequentes():
+    # changements de thread très fréquents : une mise à jour non protégée perdrait des incréments
+    intervalle = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(intervalle)
+
+
+def test_histogramme():
+    h = Histogramme()
+    for duree in (0.001, 0.002, 0.003, 20.0):
+        h.observer(duree)
+    d = h.to_dict()
+    assert d['nombre'] == 4 and d['min_s'] == 0.001 and d['max_s'] == 20.0
+    assert d['p50_s'] == 0.002 and d['classes'][">10"] == 1
+
+
+def test_inactives_par_defaut():
+    metriques = Metriques()
+    metriques.compter("x")
+    metriques.compter_octets("lus", "journal", 10)
+    assert metriques.instantane()['compteurs'] == {} and metriques.instantane()['octets']['lus'] == {}
+    assert "désactivée" in metriques.lignes()[0]
+
+
+def test_mises_a_jour_concurrentes(commutations_frequentes):
+    metriques = Metriques()
+    metriques.actif = True
+    nb_fils, nb = 8, 5000
+
+    def travailler():
+        for _ in range(nb):
+            metriques.compter("operations")
+            metriques.compter_octets("ecrits", "journal", 2)
+            metriques.observer("enregistrer", 0.001)
+
+    fils = [threading.Thread(target=travailler) for _ in range(nb_fils)]
+    for f in fils:
+        f.start()
+    for f in fils:
+        f.join()
+    mesures = metriques.instantane()
+    assert mesures['compteurs'] == {"operations": nb_fils * nb}
+    assert mesures['octets']['ecrits'] == {"journal": 2 * nb_fils * nb}
+    assert mesures['latences']['enregistrer']['nombre'] == nb_fils * nb
+    assert any(ligne.startswith("operations") for ligne in metriques.lignes())
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from classes import GestionnaireDonnees
+from conftest import etat, verifier_aller_retour, verifier_sauvegarde_complete
+from journal import Journal
+from main import SystemeLocation
+from verrous import ConflitEcriture
+
+
+def test_relecture_depuis_une_sequence(tmp_path):
+    journal = Journal(str(tmp_path / "d.journal"), fsync=False)
+    assert list(journal.relire()) == []  # fichier absent
+    journal.ajouter('ajout_client', {'id': 1})
+    assert journal.ajouter_lot([('ajout_client', {'id': 2}), ('ajout_client', {'id': 3})]) == 3
+
+    relu = Journal(str(tmp_path / "d.journal"))
+    assert [e['seq'] for e in relu.relire()] == [1, 2, 3]
+    assert [e['donnees']['id'] for e in relu.relire(depuis_seq=2)] == [3]
+    assert relu.get_dernier_seq() == 3 and len(relu) == 3
+
+
+def test_derniere_ligne_tronquee_ignoree_puis_coupee(tmp_path, capsys):
+    chemin = tmp_path / "d.journal"
+    journal = Journal(str(chemin), fsync=False)
+    journal.ajouter('ajout_client', {'id': 1})
+    journal.ajouter('ajout_client', {'id': 2})
+    taille_valide = chemin.stat().st_size
+    with open(chemin, "ab") as f:
+        f.write(b'{"seq": 3, "op": "ajout_cl')  # arrêt brutal au milieu d'une écriture
+
+    relu = Journal(str(chemin), fsync=False)
+    assert [e['seq'] for e in relu.relire()] == [1, 2]
+    assert "incomplet" in capsys.readouterr().out
+    assert chemin.stat().st_size == taille_valide
+
+    # l'ajout suivant reprend la séquence sur une ligne propre
+    assert relu.ajouter('ajout_client', {'id': 3}) == 3
+    assert [e['donnees']['id'] for e in Journal(str(chemin)).relire()] == [1, 2, 3]
+
+
+def test_ligne_corrompue_au_milieu(tmp_path):
+    chemin = tmp_path / "d.journal"
+    lignes = [json.dumps({'seq': 1, 'op': 'ajout_client', 'donnees': {}}), "pas du json",
+              json.dumps({'seq': 3, 'op': 'ajout_client', 'donnees': {}})]
+    chemin.write_text("\n".join(lignes) + "\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="corrompu"):
+        list(Journal(str(chemin)).relire())
+
+
+def test_ecriture_concurrente_detectee(tmp_path):
+    chemin = tmp_path / "d.journal"
+    journal = Journal(str(chemin), fsync=False)
+    journal.ajouter('ajout_client', {'id': 1})
+    autre = Journal(str(chemin), fsync=False)  # un second processus, à jour du fichier
+    list(autre.relire())
+    autre.ajouter('ajout_client', {'id': 9})
+    with pytest.raises(ConflitEcriture):
+        journal.ajouter('ajout_client', {'id': 2})
+
+
+def test_rejeu_apres_redemarrage(tmp_path, peupler):
+    chemin = str(tmp_path / "d.json")
+    systeme = SystemeLocation(GestionnaireDonnees(chemin, journalise=True))
+    peupler(systeme)
+    attendu = etat(systeme)
+    systeme.fermer()
+    assert (tmp_path / "d.journal").stat().st_size > 0
+
+    relu = SystemeLocation(GestionnaireDonnees(chemin, journalise=True))
+    assert etat(relu) == attendu
+    relu.fermer()
+
+
+def test_compaction_vide_le_journal(tmp_path, peupler):
+    chemin = str(tmp_path / "d.json")
+    systeme = SystemeLocation(GestionnaireDonnees(chemin, journalise=True, seuil_compaction=4))
+    peupler(systeme)
+    attendu = etat(systeme)
+    systeme.fermer()
+    assert sum(1 for _ in Journal(str(tmp_path / "d.journal")).relire()) < 4
+
+    relu = SystemeLocation(GestionnaireDonnees(chemin, journalise=True, seuil_compaction=4))
+    assert etat(relu) == attendu
+    relu.fermer()
+
+
+@pytest.mark.parametrize("journalise", [False, True], ids=["reecriture", "journal"])
+def test_aller_retour_json(tmp_path, peupler, journalise):
+    fabrique = lambda: GestionnaireDonnees(str(tmp_path / "d.json"), journalise=journalise)
+    verifier_aller_retour(fabrique, peupler)
+    verifier_sauvegarde_complete(lambda: GestionnaireDonnees(str(tmp_path / "s.json"), journalise=journalise),
+                                 peupler)
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from classes import GestionnaireDonnees
+from main import SystemeLocation
+
+# ancien format : chaque contrat embarque son client et son véhicule complets
+ANCIEN = {
+    "vehicules": [{"id": 1, "type": "Voiture", "marque": "Toyota", "modele": "Corolla", "annee": 2020,
+                   "prix_journalier": 100, "disponible": False, "immatriculation": "MIG-1", "nombre_portes": 4}],
+    "clients": [{"id": 1, "nom": "Kouassi", "prenom": "Awa", "telephone": "0700000001"}],
+    "contrats": [
+        # client et véhicule déjà présents dans les listes
+        {"client": {"id": 1, "nom": "Kouassi", "prenom": "Awa", "telephone": "0700000001"},
+         "vehicule": {"id": 1, "type": "Voiture", "marque": "Toyota", "modele": "Corolla", "annee": 2020,
+                      "prix_journalier": 100, "disponible": False, "immatriculation": "MIG-1",
+                      "nombre_portes": 4},
+         "nb_jours": 3, "montant_total": 300},
+        # client et véhicule connus seulement par le contrat
+        {"client": {"id": 2, "nom": "Traoré", "prenom": "Moussa", "telephone": "0700000002"},
+         "vehicule": {"id": 2, "type": "Moto", "marque": "Honda", "modele": "CB", "annee": 2019,
+                      "prix_journalier": 50, "disponible": False, "immatriculation": "MIG-2", "cylindree": 500},
+         "nb_jours": 2, "montant_total": 100},
+    ],
+}
+
+MODES = [{}, {"paresseux": True}, {"compact": True}, {"paresseux": True, "compact": True}]
+
+
+@pytest.mark.parametrize("options", MODES, ids=["immediat", "paresseux", "compact", "paresseux-compact"])
+def test_migration_ancien_format(tmp_path, options):
+    chemin = tmp_path / "d.json"
+    chemin.write_text(json.dumps(ANCIEN), encoding='utf-8')
+
+    systeme = SystemeLocation(GestionnaireDonnees(str(chemin), **options))
+    assert len(systeme.get_contrat()) == 2
+    assert len(systeme.get_client()) == 2 and len(systeme.get_vehicule()) == 2
+    # les entités migrées sont indexées comme les autres
+    client = systeme.trouver_client("0700000002")
+    vehicule = systeme.trouver_vehicule("MIG-2")
+    assert client is not None and vehicule is not None
+    assert [c.get_vehicule() for c in systeme.contrats_du_client(client)] == [vehicule]
+    # le client déjà présent n'est pas dupliqué
+    awa = systeme.trouver_client("0700000001")
+    assert [c.get_client() for c in systeme.contrats_du_client(awa)] == [awa]
+
+    systeme.sauvegarder_donnees()
+    systeme.fermer()
+    relu = SystemeLocation(GestionnaireDonnees(str(chemin), **options))
+    assert len(relu.get_contrat()) == 2 and len(relu.get_client()) == 2
+    assert relu.trouver_vehicule("MIG-2") is not None
+    relu.fermer()
+
+
+def test_sauvegarde_au_nouveau_format(tmp_path):
+    chemin = tmp_path / "d.json"
+    chemin.write_text(json.dumps(ANCIEN), encoding='utf-8')
+    systeme = SystemeLocation(GestionnaireDonnees(str(chemin)))
+    systeme.sauvegarder_donnees()
+    systeme.fermer()
+    contrats = json.loads(chemin.read_text(encoding='utf-8'))['contrats']
+    assert all('client_id' in c and 'client' not in c for c in contrats)
@@ -0,0 +1,113 @@
+from datetime import date
+
+from classes import Client, Moto, Voiture
+from main import SystemeLocation
+from recherche import IndexRecherche, normaliser
+
+
+def noms(resultats):
+    return [c.get_nom() for c in resultats]
+
+
+def systeme_avec_clients():
+    systeme = SystemeLocation()
+    for nom, prenom, telephone in (("Kouassi", "Awa", "07 01 02 03"), ("Kouamé", "Éric", "0504030201"),
+                                   ("Traoré", "Awa", "0102030405"), ("Diallo", "Koffi", "0708090001")):
+        systeme.integrer_client(Client(nom, prenom, telephone))
+    return systeme
+
+
+def test_normalisation():
+    assert normaliser("  Kouamé-Éric ") == "  kouame eric "
+    assert normaliser(None) == ""
+
+
+def test_prefixes_accents_et_plusieurs_termes():
+    systeme = systeme_avec_clients()
+    assert sorted(noms(systeme.rechercher_clients("kou"))) == ["Kouamé", "Kouassi"]
+    assert noms(systeme.rechercher_clients("KOUAME")) == ["Kouamé"]
+    assert noms(systeme.rechercher_clients("kou aw")) == ["Kouassi"]
+    assert noms(systeme.rechercher_clients("awa tra")) == ["Traoré"]
+    assert systeme.rechercher_clients("") == [] and systeme.rechercher_clients("zzz") == []
+
+
+def test_telephone_avec_ou_sans_espaces():
+    systeme = systeme_avec_clients()
+    assert noms(systeme.rechercher_clients("070102")) == ["Kouassi"]
+    assert noms(systeme.rechercher_clients("07 01")) == ["Kouassi"]
+    assert noms(systeme.rechercher_clients("0504")) == ["Kouamé"]
+
+
+def test_faute_de_frappe():
+    systeme = systeme_avec_clients()
+    assert noms(systeme.rechercher_clients("kouasi")) == ["Kouassi"]
+    assert noms(systeme.rechercher_clients("diall")) == ["Diallo"]  # préfixe exact d'abord
+    assert noms(systeme.rechercher_clients("dialo")) == ["Diallo"]
+
+
+def test_limite():
+    systeme = SystemeLocation()
+    for i in range(50):
+        systeme.integrer_client(Client("Koné", f"P{i}", f"05{i:08d}"))
+    assert len(systeme.rechercher_clients("kone", limite=7)) == 7
+    assert len(systeme.rechercher_clients("kone", limite=None)) == 50
+
+
+def test_index_tenu_a_jour():
+    systeme = systeme_avec_clients()
+    assert noms(systeme.rechercher_clients("diallo")) == ["Diallo"]  # index construit
+    nouveau = systeme.integrer_client(Client("Bamba", "Issa", "0111111111"))
+    assert systeme.rechercher_clients("bamba") == [nouveau]
+    nouveau.set_nom("Sanogo")
+    assert systeme.rechercher_clients("bamba") == [] and systeme.rechercher_clients("sano") == [nouveau]
+
+    index = IndexRecherche(lambda c: (c.get_nom(),))
+    index.construire([nouveau])
+    index.retirer(nouveau)
+    assert len(index) == 0 and index.rechercher("sanogo") == []
+
+
+def test_vehicules_libres_sur_la_periode():
+    systeme = SystemeLocation()
+    corolla = systeme.integrer_vehicule(Voiture("Toyota", "Corolla", 2020, 100, 5, immatriculation="AB 123 CI"))
+    yaris = systeme.integrer_vehicule(Voiture("Toyota", "Yaris", 2021, 80, 5, immatriculation="AB 456 CI"))
+    systeme.integrer_vehicule(Moto("Yamaha", "MT", 2021, 50, 700, immatriculation="MO 1"))
+    client = systeme.integrer_client(Client("Koné", "Ali", "0100000000"))
+    assert systeme.rechercher_vehicules("toy cor") == [corolla]
+    assert systeme.rechercher_vehicules("ab456") == [yaris]
+    assert len(systeme.rechercher_vehicules("moto")) == 1
+
+    systeme.louer(client, corolla, 3, date(2030, 1, 1))
+    libres = systeme.rechercher_vehicules("toyota", filtre=lambda v: v.est_libre(date(2030, 1, 2), date(2030, 1, 4)))
+    assert libres == [yaris]
+
+
+def saisir(monkeypatch, *reponses):
+    reponses = iter(reponses)
+    monkeypatch.setattr("builtins.input", lambda invite="": next(reponses))
+
+
+def test_creation_de_contrat_au_menu(monkeypatch, capsys):
+    systeme = SystemeLocation()
+    systeme.creer_contrat()  # ni client ni véhicule : retour immédiat, sans saisie
+    assert "d'abord ajouter" in capsys.readouterr().out
+
+    systeme = systeme_avec_clients()
+    systeme.integrer_vehicule(Voiture("Toyota", "Corolla", 2020, 100, 5, immatriculation="AB 456 CI"))
+    saisir(monkeypatch, "0")  # annulation dès la recherche du client
+    systeme.creer_contrat()
+    saisir(monkeypatch, "diallo", "", "0")  # nouvelle recherche, puis annulation
+    systeme.creer_contrat()
+    saisir(monkeypatch, "diallo", "1", "2030-01-01", "zéro")
+    systeme.creer_contrat()
+    assert systeme.get_contrat() == []
+
+    saisir(monkeypatch, "diallo", "1", "2030-01-01", "3", "ab456", "1")
+    systeme.creer_contrat()
+    [contrat] = systeme.get_contrat()
+    assert contrat.get_client().get_nom() == "Diallo" and contrat.get_date_fin() == date(2030, 1, 4)
+
+    # plus aucun véhicule libre sur la période : pas de recherche sans fin
+    saisir(monkeypatch, "kouassi", "1", "2030-01-02", "1")
+    systeme.creer_contrat()
+    assert "Aucun véhicule disponible" in capsys.readouterr().out and len(systeme.get_contrat()) == 1
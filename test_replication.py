@@ -0,0 +1,99 @@
+from datetime import date
+
+import pytest
+
+from classes import Client, GestionnaireDonnees, Voiture
+from main import SystemeLocation
+from replication import ReplicationAgences
+
+DEBUT = date(2030, 1, 1)
+
+
+def ouvrir(tmp_path, agence):
+    systeme = SystemeLocation(GestionnaireDonnees(str(tmp_path / f"{agence}.json")))
+    systeme.set_replication(ReplicationAgences(systeme, str(tmp_path / "flux"), agence))
+    return systeme
+
+
+def contrats(systeme):
+    return sorted((c.get_client().get_telephone(), c.get_vehicule().get_immatriculation(), str(c.get_date_debut()))
+                  for c in systeme.get_contrat())
+
+
+def louer(systeme, telephone, immatriculation, nb_jours, debut):
+    contrat = systeme.louer(systeme.trouver_client(telephone), systeme.trouver_vehicule(immatriculation),
+                            nb_jours, debut)
+    systeme.enregistrer_mutation('creation_contrat', contrat.to_dict())
+    return contrat
+
+
+@pytest.fixture
+def agences(tmp_path):
+    abidjan, bouake = ouvrir(tmp_path, "abidjan"), ouvrir(tmp_path, "bouake")
+    vehicule = abidjan.integrer_vehicule(Voiture("Toyota", "Corolla", 2020, 100, 5, immatriculation="REP-1"))
+    client = abidjan.integrer_client(Client("Kouassi", "Awa", "0700000001"))
+    abidjan.enregistrer_mutation('ajout_vehicule', vehicule.to_dict())
+    abidjan.enregistrer_mutation('ajout_client', client.to_dict())
+    bouake.integrer_client(Client("Traoré", "Moussa", "0700000002"))
+    bouake.enregistrer_mutation('ajout_client', bouake.trouver_client("0700000002").to_dict())
+    for systeme in (abidjan, bouake):
+        systeme.synchroniser_agences()
+    return abidjan, bouake
+
+
+def test_nom_d_agence_invalide(tmp_path):
+    with pytest.raises(ValueError, match="Nom d'agence invalide"):
+        ReplicationAgences(SystemeLocation(), str(tmp_path / "flux"), "../a")
+
+
+def test_propagation_et_rejeu_sans_effet(tmp_path, agences):
+    abidjan, bouake = agences
+    assert bouake.trouver_vehicule("REP-1") is not None and abidjan.trouver_client("0700000002") is not None
+    louer(abidjan, "0700000001", "REP-1", 3, DEBUT)
+    assert bouake.synchroniser_agences() == 1
+    assert contrats(bouake) == contrats(abidjan)
+    assert not bouake.trouver_vehicule("REP-1").est_libre(DEBUT, date(2030, 1, 2))
+    assert bouake.synchroniser_agences() == 0
+
+    # redémarrage : positions relues, rien n'est appliqué deux fois
+    bouake.fermer()
+    relu = ouvrir(tmp_path, "bouake")
+    assert relu.synchroniser_agences() == 0
+    assert contrats(relu) == contrats(abidjan) and len(relu.get_client()) == 2
+
+
+def test_cloture_repliquee(agences):
+    abidjan, bouake = agences
+    contrat = louer(abidjan, "0700000001", "REP-1", 3, DEBUT)
+    bouake.synchroniser_agences()
+    abidjan.retourner(contrat, date(2030, 1, 2))
+    abidjan.enregistrer_cloture(contrat)
+    bouake.synchroniser_agences()
+    assert bouake.get_contrat() == []
+    assert [c.get_date_retour() for c in bouake.contrats_archives()] == [date(2030, 1, 2)]
+    assert bouake.trouver_vehicule("REP-1").est_libre(DEBUT, date(2030, 1, 4))
+
+
+def test_conflit_resolu_pareil_partout_puis_retabli(agences):
+    abidjan, bouake = agences
+    # même véhicule, périodes qui se chevauchent, avant toute synchronisation
+    premier = louer(abidjan, "0700000001", "REP-1", 5, DEBUT)
+    louer(bouake, "0700000002", "REP-1", 3, date(2030, 1, 3))
+    for systeme in (abidjan, bouake, abidjan):
+        systeme.synchroniser_agences()
+
+    attendu = [("0700000001", "REP-1", "2030-01-01")]
+    assert contrats(abidjan) == contrats(bouake) == attendu
+    assert any("annulé au profit de la réservation antérieure de abidjan" in m
+               for m in bouake.get_replication().get_conflits())
+    assert any("ignoré" in m for m in abidjan.get_replication().get_conflits())
+    assert bouake.get_rapports().verifier() == []
+
+    # la réservation gagnante est close : celle qui était écartée est rétablie partout
+    abidjan.retourner(premier, date(2030, 1, 2))
+    abidjan.enregistrer_cloture(premier)
+    for systeme in (bouake, abidjan):
+        systeme.synchroniser_agences()
+    attendu = [("0700000002", "REP-1", "2030-01-03")]
+    assert contrats(abidjan) == contrats(bouake) == attendu
+    assert any("rétabli" in m for m in bouake.get_replication().get_conflits())
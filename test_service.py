@@ -0,0 +1,167 @@
+import asyncio
+import json
+import pytest
+
+from classes import GestionnaireDonnees, Moto, Voiture
+from main import SystemeLocation
+from service import TAILLE_CORPS_MAX, ErreurHTTP, ServiceLocation
+
+
+class StockageInstable(GestionnaireDonnees):
+    """Journal JSON dont les écritures échouent tant que `en_panne` est vrai."""
+    en_panne = False
+
+    def enregistrer(self, *args):
+        if self.en_panne:
+            raise OSError("disque plein")
+        super().enregistrer(*args)
+
+    def enregistrer_lot(self, *args):
+        if self.en_panne:
+            raise OSError("disque plein")
+        super().enregistrer_lot(*args)
+
+
+@pytest.fixture(params=[False, True], ids=["objets", "compact"])
+def stockage(tmp_path, request):
+    return StockageInstable(str(tmp_path / "d.json"), journalise=True, compact=request.param)
+
+
+@pytest.fixture
+def service(stockage):
+    systeme = SystemeLocation(stockage)
+    for vehicule in (Voiture("Toyota", "Corolla", 2020, 100, 5, immatriculation="SV-1"),
+                     Voiture("Kia", "Rio", 2020, 80, 5, immatriculation="SV-2"),
+                     Moto("Yamaha", "MT", 2020, 50, 700, immatriculation="SV-3")):
+        systeme.integrer_vehicule(vehicule)
+        systeme.enregistrer_mutation('ajout_vehicule', vehicule.to_dict())
+    service = ServiceLocation(systeme)
+    yield service
+    service.fermer()
+
+
+def executer(service, *requetes):
+    """Exécute les requêtes (méthode, cible, corps) dans une même boucle ; renvoie (statut, réponse) de chacune."""
+    async def scenario():
+        resultats = []
+        for methode, cible, corps in requetes:
+            try:
+                resultats.append(await service.traiter_requete(
+                    methode, cible, corps if isinstance(corps, bytes) else json.dumps(corps).encode()))
+            except ErreurHTTP as e:
+                resultats.append((e.statut, e.message))
+        return resultats
+    return asyncio.run(scenario())
+
+
+CLIENT = ("POST", "/clients", {"nom": "Kouassi", "prenom": "Awa", "telephone": "0701"})
+CONTRAT = ("POST", "/contrats", {"telephone": "0701", "immatriculation": "SV-1", "nb_jours": 3,
+                                 "date_debut": "2030-01-01"})
+
+
+def test_clients(service):
+    statuts = [s for s, _ in executer(service, CLIENT, CLIENT, ("POST", "/clients", {"nom": "X"}),
+                                      ("POST", "/clients", b"pas du json"), ("GET", "/clients/0701", None),
+                                      ("GET", "/clients/0999", None), ("DELETE", "/clients/0701", None))]
+    assert statuts == [201, 409, 400, 400, 200, 404, 405]
+
+
+def test_contrats_et_retour(service, stockage):
+    resultats = executer(
+        service, CLIENT, CONTRAT,
+        ("POST", "/contrats", dict(CONTRAT[2], date_debut="2030-01-02")),       # chevauchement
+        ("POST", "/contrats", dict(CONTRAT[2], immatriculation="XX")),
+        ("POST", "/contrats", dict(CONTRAT[2], nb_jours="trois")),
+        ("GET", "/vehicules/disponibles?debut=2030-01-01&fin=2030-01-03&type=Voiture", None),
+        ("GET", "/clients/0701/contrats", None),
+        ("POST", "/contrats/retour", {"telephone": "0701", "immatriculation": "SV-1", "date_retour": "2030-01-02"}),
+        ("POST", "/contrats/retour", {"telephone": "0701", "immatriculation": "SV-1"}),
+        ("GET", "/clients/0701/archives", None),
+    )
+    assert [s for s, _ in resultats] == [201, 201, 409, 404, 400, 200, 200, 200, 404, 200]
+    assert [v['immatriculation'] for v in resultats[5][1]] == ["SV-2"]
+    assert resultats[7][1]['date_retour'] == "2030-01-02"
+    assert [c['immatriculation'] for c in resultats[9][1]] == ["SV-1"]
+
+    relu = SystemeLocation(GestionnaireDonnees(stockage.get_chemin(), journalise=True))
+    assert relu.get_contrat() == [] and len(list(relu.contrats_archives())) == 1
+
+
+def test_lot_recherche_et_rapports(service):
+    lot = {"telephone": "0701", "demandes": [{"type": "Voiture", "nombre": 3, "nb_jours": 2,
+                                                "date_debut": "2030-03-01"}]}
+    resultats = executer(service, CLIENT, ("POST", "/contrats/lot", lot), ("POST", "/contrats/lot", lot),
+                         ("POST", "/contrats/lot", {"telephone": "0701", "demandes": []}),
+                         ("GET", "/recherche/vehicules?q=toy", None), ("GET", "/recherche/clients?q=kou", None),
+                         ("GET", "/rapports?mois=2030-03", None), ("GET", "/rapports?mois=2030-13", None))
+    assert [s for s, _ in resultats] == [201, 201, 409, 400, 200, 200, 200, 400]
+    assert resultats[1][1][0]['manquants'] == 1 and len(resultats[1][1][0]['contrats']) == 2
+    assert [v['immatriculation'] for v in resultats[4][1]] == ["SV-1"]
+    assert resultats[6][1]['total']['nb'] == 2 and resultats[6][1]['par_type_mois']['Voiture']['nb'] == 2
+
+
+def test_echec_de_persistance_defait_le_contrat(service, stockage):
+    executer(service, CLIENT)
+    stockage.en_panne = True
+    with pytest.raises(OSError):
+        executer(service, CONTRAT)  # traiter_connexion le transforme en 500
+    stockage.en_panne = False
+    # rien n'est resté réservé : la même demande passe ensuite
+    assert [s for s, _ in executer(service, CONTRAT)] == [201]
+
+
+def test_protocole_http_keep_alive(service):
+    async def scenario():
+        serveur = await asyncio.start_server(service.traiter_connexion, "127.0.0.1", 0)
+        port = serveur.sockets[0].getsockname()[1]
+        lecteur, ecrivain = await asyncio.open_connection("127.0.0.1", port)
+        reponses = []
+        for corps, fermer in ((json.dumps(CLIENT[2]).encode(), False), (b"{}", True)):
+            ecrivain.write(b"POST /clients HTTP/1.1\r\nContent-Type: application/json\r\n"
+                           + f"Content-Length: {len(corps)}\r\n".encode()
+                           + (b"Connection: close\r\n" if fermer else b"") + b"\r\n" + corps)
+            await ecrivain.drain()
+            statut = (await lecteur.readline()).split()[1]
+            entetes = {}
+            while (ligne := await lecteur.readline()) != b"\r\n":
+                nom, _, valeur = ligne.decode().partition(":")
+                entetes[nom.lower()] = valeur.strip()
+            reponses.append((int(statut), json.loads(await lecteur.readexactly(int(entetes["content-length"])))))
+        assert await lecteur.read() == b""  # connexion fermée par le serveur
+        ecrivain.close()
+        serveur.close()
+        await serveur.wait_closed()
+        return reponses
+
+    reponses = asyncio.run(scenario())
+    assert [s for s, _ in reponses] == [201, 400]
+    assert reponses[0][1]['telephone'] == "0701" and "obligatoires" in reponses[1][1]['erreur']
+
+
+def test_echec_de_persistance_defait_le_client(service, stockage):
+    stockage.en_panne = True
+    with pytest.raises(OSError):
+        executer(service, CLIENT)
+    stockage.en_panne = False
+    resultats = executer(service, ("GET", "/clients/0701", None), ("GET", "/recherche/clients?q=kouassi", None),
+                         CLIENT, ("GET", "/clients/0701", None))
+    assert [s for s, _ in resultats] == [404, 200, 201, 200]
+    assert resultats[1][1] == []
+
+
+@pytest.mark.parametrize("longueur, statut", [("abc", 400), ("-5", 400), (str(TAILLE_CORPS_MAX + 1), 413)])
+def test_content_length_refuse(service, longueur, statut):
+    async def scenario():
+        serveur = await asyncio.start_server(service.traiter_connexion, "127.0.0.1", 0)
+        lecteur, ecrivain = await asyncio.open_connection("127.0.0.1", serveur.sockets[0].getsockname()[1])
+        ecrivain.write(f"POST /clients HTTP/1.1\r\nContent-Length: {longueur}\r\n\r\n{{}}".encode())
+        await ecrivain.drain()
+        reponse = await lecteur.read()  # réponse d'erreur, puis connexion fermée
+        ecrivain.close()
+        serveur.close()
+        await serveur.wait_closed()
+        return reponse
+
+    reponse = asyncio.run(scenario())
+    assert reponse.startswith(f"HTTP/1.1 {statut} ".encode()) and b"Connection: close" in reponse
+    assert "erreur" in json.loads(reponse.split(b"\r\n\r\n", 1)[1])
@@ -0,0 +1,48 @@
+import pytest
+
+from classes import GestionnaireDonnees
+from conftest import etat, verifier_aller_retour, verifier_sauvegarde_complete
+from main import SystemeLocation
+from snapshot_binaire import MAGIQUE, SnapshotBinaire, convertir, est_snapshot_binaire
+
+
+@pytest.mark.parametrize("journalise", [False, True], ids=["reecriture", "journal"])
+def test_aller_retour(tmp_path, peupler, journalise):
+    verifier_aller_retour(
+        lambda: GestionnaireDonnees(str(tmp_path / "d.bin"), journalise=journalise, format_="binaire"), peupler)
+
+
+def test_sauvegarde_complete(tmp_path, peupler):
+    verifier_sauvegarde_complete(lambda: GestionnaireDonnees(str(tmp_path / "d.bin"), format_="binaire"), peupler)
+
+
+def test_entete_et_conversion(tmp_path, peupler):
+    binaire, json_, retour = (str(tmp_path / n) for n in ("d.bin", "d.json", "r.bin"))
+    systeme = SystemeLocation(GestionnaireDonnees(binaire, format_="binaire"))
+    peupler(systeme)
+    systeme.sauvegarder_donnees()
+    attendu = etat(systeme)
+    systeme.fermer()
+
+    with open(binaire, "rb") as f:
+        assert f.read(len(MAGIQUE)) == MAGIQUE
+    assert est_snapshot_binaire(binaire)
+    with SnapshotBinaire(binaire) as snapshot:
+        assert (snapshot.nb_vehicules(), snapshot.nb_clients(), snapshot.nb_contrats()) == (3, 2, 2)
+
+    assert convertir(binaire, json_) == 'json' and not est_snapshot_binaire(json_)
+    with pytest.raises(FileExistsError):
+        convertir(binaire, json_)
+    assert convertir(json_, retour) == 'binaire'
+    relu = SystemeLocation(GestionnaireDonnees(retour, format_="binaire"))
+    assert {k: v for k, v in etat(relu).items() if k != 'archives'} == \
+        {k: v for k, v in attendu.items() if k != 'archives'}
+    relu.fermer()
+
+
+def test_fichier_non_binaire(tmp_path):
+    chemin = tmp_path / "d.bin"
+    chemin.write_bytes(b"{}" + bytes(200))
+    assert not est_snapshot_binaire(str(chemin))
+    with pytest.raises(ValueError, match="n'est pas un snapshot binaire"):
+        SnapshotBinaire(str(chemin))
@@ -0,0 +1,67 @@
+from datetime import date
+
+from classes import Client, GestionnaireDonnees, Voiture
+from conftest import etat, verifier_aller_retour, verifier_sauvegarde_complete
+from main import SystemeLocation
+from stockage_compact import ClientStore, VehiculeStore, VueMoto, VueVoiture
+
+
+def test_aller_retour(tmp_path, peupler):
+    verifier_aller_retour(
+        lambda: GestionnaireDonnees(str(tmp_path / "d.json"), journalise=True, paresseux=True, compact=True), peupler)
+
+
+def test_sauvegarde_complete(tmp_path, peupler):
+    verifier_sauvegarde_complete(lambda: GestionnaireDonnees(str(tmp_path / "d.json"), compact=True), peupler)
+
+
+def test_vues_sur_les_colonnes():
+    store = VehiculeStore()
+    store.ajouter_dict({'id': 10, 'type': 'Voiture', 'marque': 'Toyota', 'modele': 'Yaris', 'annee': 2020,
+                        'prix_journalier': 90.5, 'immatriculation': 'CP-1', 'nombre_portes': 3})
+    store.ajouter_dict({'id': 12, 'type': 'Moto', 'marque': 'Toyota', 'modele': 'X', 'annee': 2021,
+                        'prix_journalier': 40.0, 'immatriculation': 'CP-2', 'cylindree': 650,
+                        'reservations': [['2030-01-01', '2030-01-05']]})
+    voiture, moto = store
+    assert isinstance(voiture, VueVoiture) and isinstance(moto, VueMoto)
+    assert store[0] == voiture and store[0] is not voiture and store[-1] == moto
+    assert store.par_identifiant()[12] == moto and 11 not in store.par_identifiant()
+    assert moto.get_cylindree() == 650 and not moto.est_libre(date(2030, 1, 4), date(2030, 1, 6))
+    assert voiture.reserver(date(2030, 1, 1), date(2030, 1, 3))
+    voiture.set_marque("Kia")
+    assert store[0].to_dict() == {'id': 10, 'type': 'Voiture', 'marque': 'Kia', 'modele': 'Yaris', 'annee': 2020,
+                                  'prix_journalier': 90.5, 'disponible': True, 'immatriculation': 'CP-1',
+                                  'nombre_portes': 3, 'reservations': [['2030-01-01', '2030-01-03']]}
+    # même tarif que l'objet équivalent
+    objet = Voiture("Kia", "Yaris", 2020, 90.5, 3)
+    assert voiture.calculer_tarif_location(4) == objet.calculer_tarif_location(4)
+
+
+def test_prix_rendus_tels_quels(tmp_path):
+    store = VehiculeStore()
+    for identifiant, prix in ((1, 15000), (2, None), (3, 40.5)):
+        store.ajouter_dict({'id': identifiant, 'type': 'Voiture', 'marque': 'Kia', 'modele': 'Rio', 'annee': 2020,
+                            'prix_journalier': prix, 'immatriculation': f'PX-{identifiant}'})
+    assert [repr(v.get_prix_journalier()) for v in store] == ["15000", "None", "40.5"]
+    store[1].set_prix_journalier(12000)
+    assert repr(store[1].get_prix_journalier()) == "12000" and store.colonnes_tarif()[0][1] == 12000.0
+
+    # rechargement compact identique au rechargement en objets (JSON réécrit sans 15000.0 ni 0.0)
+    chemin = str(tmp_path / "d.json")
+    systeme = SystemeLocation(GestionnaireDonnees(chemin))
+    systeme.integrer_vehicule(Voiture("Kia", "Rio", 2020, 15000, 5, immatriculation="PX-1"))
+    systeme.integrer_vehicule(Voiture("Kia", "Rio", 2020, None, 5, immatriculation="PX-2"))
+    systeme.sauvegarder_donnees()
+    compact = SystemeLocation(GestionnaireDonnees(chemin, compact=True))
+    assert etat(compact) == etat(SystemeLocation(GestionnaireDonnees(chemin)))
+    compact.sauvegarder_donnees()
+    assert etat(SystemeLocation(GestionnaireDonnees(chemin)))['vehicules'] == etat(systeme)['vehicules']
+
+
+def test_identifiants_hors_ordre():
+    store = ClientStore()
+    for identifiant in (5, 3, 9):
+        store.append(Client("Koné", "Ali", f"05{identifiant}", identifiant=identifiant))
+    assert [c.get_identifiant() for c in store] == [5, 3, 9]
+    assert store.par_identifiant()[3].get_telephone() == "053"
+    assert store[1].get_nom() == store[2].get_nom() == "Koné"
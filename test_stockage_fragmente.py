@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+
+from classes import Client
+from conftest import verifier_aller_retour, verifier_sauvegarde_complete
+import stockage_fragmente
+from stockage_fragmente import StockageFragmente
+from verrous import ConflitEcriture
+
+
+@pytest.mark.parametrize("paresseux", [False, True], ids=["immediat", "paresseux"])
+def test_aller_retour(tmp_path, peupler, paresseux):
+    verifier_aller_retour(lambda: StockageFragmente(str(tmp_path / "frag"), 2, paresseux=paresseux), peupler)
+
+
+def test_sauvegarde_complete(tmp_path, peupler):
+    verifier_sauvegarde_complete(lambda: StockageFragmente(str(tmp_path / "frag"), 2), peupler)
+
+
+def test_seuls_les_fragments_modifies_sont_ecrits(tmp_path):
+    dossier = str(tmp_path / "frag")
+    clients = [Client(f"N{i}", "P", f"06{i:08d}", identifiant=i) for i in range(10)]
+    stockage = StockageFragmente(dossier, 4)
+    stockage.sauvegarder([], clients, [])
+    assert stockage.get_nb_fichiers_ecrits() == 4  # 3 fragments de clients + meta.json
+
+    clients.append(Client("N10", "P", "0600000010", identifiant=10))
+    stockage.enregistrer('ajout_client', clients[-1].to_dict(), [], clients, [])
+    assert stockage.get_nb_fichiers_ecrits() == 6  # clients-00002 et meta.json
+    stockage.sauvegarder([], clients, [])
+    assert stockage.get_nb_fichiers_ecrits() == 7  # contenu inchangé : meta.json seul
+
+    with open(os.path.join(dossier, "meta.json"), encoding='utf-8') as f:
+        meta = json.load(f)
+    assert meta['fragments']['clients'] == [0, 1, 2]
+    assert [c['id'] for c in StockageFragmente(dossier, 4).lire_fragment("clients", 2)] == [8, 9, 10]
+    # un seul fichier par fragment : les versions remplacées ont été supprimées
+    generations = meta['generations']['clients']
+    assert sorted(n for n in os.listdir(dossier) if n.startswith("clients-")) == [
+        f"clients-{numero:05d}.{generations[str(numero)]:06d}.jsonl" for numero in range(3)]
+
+
+def test_ecriture_concurrente_detectee(tmp_path):
+    dossier = str(tmp_path / "frag")
+    premier, second = StockageFragmente(dossier, 4), StockageFragmente(dossier, 4)
+    premier.charger()
+    second.charger()
+    second.sauvegarder([], [Client("A", "B", "0600000001", identifiant=1)], [])
+    with pytest.raises(ConflitEcriture):
+        premier.sauvegarder([], [Client("C", "D", "0600000002", identifiant=2)], [])
+
+
+def test_echec_avant_la_bascule_puis_nouvel_essai(tmp_path, monkeypatch):
+    dossier = str(tmp_path / "frag")
+    clients = [Client("A", "B", "0600000000", identifiant=0)]
+    stockage = StockageFragmente(dossier, 1)
+    stockage.sauvegarder([], clients, [])
+
+    remplacer = os.replace
+
+    def panne_sur_meta(source, cible):
+        if cible.endswith("meta.json"):
+            raise OSError("disque plein")
+        remplacer(source, cible)
+    monkeypatch.setattr(stockage_fragmente.os, "replace", panne_sur_meta)
+    clients.append(Client("C", "D", "0600000001", identifiant=1))
+    with pytest.raises(OSError):
+        stockage.enregistrer('ajout_client', clients[-1].to_dict(), [], clients, [])
+    monkeypatch.setattr(stockage_fragmente.os, "replace", remplacer)
+
+    # le fragment du nouveau client n'a pas été oublié : le nouvel essai l'écrit et le désigne
+    stockage.enregistrer('ajout_client', clients[-1].to_dict(), [], clients, [])
+    relu = StockageFragmente(dossier, 1).charger()
+    assert [c.get_identifiant() for c in relu['clients']] == [0, 1]
@@ -0,0 +1,30 @@
+from datetime import date
+
+from conftest import DEBUT, verifier_aller_retour, verifier_sauvegarde_complete
+from main import SystemeLocation
+from stockage_sqlite import StockageSQLite
+
+
+def test_aller_retour(tmp_path, peupler):
+    verifier_aller_retour(lambda: StockageSQLite(str(tmp_path / "d.db")), peupler)
+
+
+def test_sauvegarde_complete(tmp_path, peupler):
+    verifier_sauvegarde_complete(lambda: StockageSQLite(str(tmp_path / "d.db")), peupler)
+
+
+def test_requetes_indexees(tmp_path, peupler):
+    chemin = str(tmp_path / "d.db")
+    systeme = SystemeLocation(StockageSQLite(chemin))
+    vehicules, clients, _ = peupler(systeme)
+    systeme.fermer()
+
+    stockage = StockageSQLite(chemin)
+    assert stockage.compter() == {'vehicules': 3, 'clients': 2, 'contrats': 2}
+    assert stockage.trouver_vehicule("MM-001").get_identifiant() == vehicules[2].get_identifiant()
+    assert stockage.trouver_client("0505050505").get_nom() == "Traoré"
+    assert stockage.trouver_client("0000000000") is None
+    assert len(stockage.contrats_par_client(clients[1].get_identifiant())) == 1
+    libres = {v.get_immatriculation() for v in stockage.vehicules_disponibles(debut=DEBUT, fin=date(2030, 1, 3))}
+    assert libres == {"AA-002"}
+    stockage.fermer()
@@ -0,0 +1,58 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:  # POSIX
+    import fcntl
+    msvcrt = None
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# ===============================================================
+# VERROUS
+# ---------------------------------------------------------------
+# Rôle : Protéger les réservations et les écritures concurrentes.
+# - VerrousRayes : un petit nombre fixe de verrous partagés par hachage
+#   de la clé (un verrou par véhicule sans un objet Lock par véhicule).
+# - verrou_fichier : verrou exclusif entre processus sur un fichier .lock.
+# - ConflitEcriture : levée quand un autre processus a modifié les
+#   données depuis notre dernière lecture (écriture versionnée).
+# ===============================================================
+class ConflitEcriture(Exception):
+    """Les données sur disque ont changé depuis le dernier chargement : recharger avant d'écrire."""
+
+
+class VerrousRayes:
+    def __init__(self, nombre: int = 256):
+        self.__verrous = [threading.Lock() for _ in range(nombre)]
+
+    def pour(self, cle) -> threading.Lock:
+        return self.__verrous[hash(cle) % len(self.__verrous)]
+
+
+@contextmanager
+def verrou_fichier(chemin: str):
+    """Verrou exclusif inter-processus (bloquant) sur `chemin`, créé si besoin."""
+    with open(chemin, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def taille_fichier(chemin: str) -> int:
+    try:
+        return os.path.getsize(chemin)
+    except FileNotFoundError:
+        return 0